@@ -0,0 +1,42 @@
+"""Signed audit-chain verification checkpoints
+
+Revision ID: 20260801_audit_chain_checkpoint
+Revises: 20260723_category_pack_price
+Create Date: 2026-08-01
+
+Verifying the audit_log hash chain from genesis on every call stops scaling
+once the table holds millions of rows. Each successful verification now stores
+an HMAC-signed checkpoint (last verified id + hash) so the next run only checks
+rows appended since; a periodic Celery task still re-verifies the full range.
+"""
+from __future__ import annotations
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = "20260801_audit_chain_checkpoint"
+down_revision = "20260723_category_pack_price"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "audit_chain_checkpoint",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("last_id", sa.Integer(), nullable=False),
+        sa.Column("last_hash", sa.String(length=64), nullable=False),
+        sa.Column("rows_verified", sa.Integer(), nullable=False),
+        sa.Column("signature", sa.String(length=64), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+            nullable=False,
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("audit_chain_checkpoint")
@@ -0,0 +1,58 @@
+"""Per-issuer daily invoice rollup for analytics
+
+Revision ID: 20260802_invoice_daily_rollup
+Revises: 20260801_audit_chain_checkpoint
+Create Date: 2026-08-02
+
+Analytics dashboards scanned every invoice row of an issuer with CASE sums on
+each load. invoice_daily_rollup keeps count/amount per (issuer, created day,
+invoice_type, status, channel); the app updates it on every invoice flush and a
+nightly task reconciles the last two days. Backfilled here from existing rows.
+
+NOTE: revision id kept <=32 chars — alembic_version.version_num is varchar(32).
+"""
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "20260802_invoice_daily_rollup"
+down_revision = "20260801_audit_chain_checkpoint"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "invoice_daily_rollup",
+        sa.Column("issuer_id", sa.Integer(), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("invoice_type", sa.String(length=20), nullable=False),
+        sa.Column("status", sa.String(length=30), nullable=False),
+        sa.Column("channel", sa.String(length=20), nullable=False, server_default=""),
+        sa.Column("invoice_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("amount_total", sa.Numeric(scale=2), nullable=False, server_default="0"),
+        sa.PrimaryKeyConstraint("issuer_id", "day", "invoice_type", "status", "channel"),
+    )
+    op.execute(
+        """
+        INSERT INTO invoice_daily_rollup
+            (issuer_id, day, invoice_type, status, channel, invoice_count, amount_total)
+        SELECT issuer_id,
+               date(created_at),
+               COALESCE(invoice_type, 'revenue'),
+               COALESCE(status, 'pending'),
+               COALESCE(channel, ''),
+               count(*),
+               COALESCE(sum(amount), 0)
+        FROM invoice
+        WHERE issuer_id IS NOT NULL
+        GROUP BY issuer_id, date(created_at), COALESCE(invoice_type, 'revenue'),
+                 COALESCE(status, 'pending'), COALESCE(channel, '')
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("invoice_daily_rollup")
@@ -0,0 +1,69 @@
+"""Composite and partial indexes for invoice hot paths
+
+Revision ID: 20260803_invoice_hot_path_idx
+Revises: 20260802_invoice_daily_rollup
+Create Date: 2026-08-03
+
+- (issuer_id, invoice_type, created_at): analytics date-range sums. Supersedes
+  ix_invoice_issuer_type (a strict prefix), which is dropped.
+- (issuer_id, id): newest-first invoice list pages without a sort.
+- (issuer_id, invoice_type, due_date) WHERE open: aging / overdue / inflow.
+- (due_date) WHERE open: cross-issuer overdue + payment reminder sweeps.
+- (issuer_id, paid_at) WHERE paid: cash collected today / this week.
+
+"Open" = status IN ('pending', 'awaiting_confirmation'). Built CONCURRENTLY so
+invoice writes aren't blocked while the indexes build.
+"""
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "20260803_invoice_hot_path_idx"
+down_revision = "20260802_invoice_daily_rollup"
+branch_labels = None
+depends_on = None
+
+_OPEN = "status IN ('pending', 'awaiting_confirmation')"
+
+_INDEXES = [
+    ("ix_invoice_issuer_type_created", ["issuer_id", "invoice_type", "created_at"], None),
+    ("ix_invoice_issuer_recent", ["issuer_id", "id"], None),
+    ("ix_invoice_issuer_open_due", ["issuer_id", "invoice_type", "due_date"], _OPEN),
+    ("ix_invoice_open_due", ["due_date"], _OPEN),
+    ("ix_invoice_issuer_paid_at", ["issuer_id", "paid_at"], "status = 'paid'"),
+]
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction block.
+    with op.get_context().autocommit_block():
+        for name, columns, where in _INDEXES:
+            op.create_index(
+                name,
+                "invoice",
+                columns,
+                postgresql_where=sa.text(where) if where else None,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+        op.drop_index(
+            "ix_invoice_issuer_type",
+            table_name="invoice",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_invoice_issuer_type",
+            "invoice",
+            ["issuer_id", "invoice_type"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        for name, _, _ in reversed(_INDEXES):
+            op.drop_index(name, table_name="invoice", postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,134 @@
+"""Marketplace search documents for storefronts
+
+Revision ID: 20260804_storefront_search_doc
+Revises: 20260803_invoice_hot_path_idx
+Create Date: 2026-08-04
+
+/public/stores?q= ran ILIKE '%term%' over five user columns plus a subquery over
+every active product and category name. storefront_search_document holds one
+row of searchable text per storefront owner, maintained by the app on profile,
+product and category writes (nightly maintenance.rebuild_search_documents
+reconciles). On Postgres it also gets:
+
+- search_vector: generated tsvector (profile text weight A, products weight B)
+  with a GIN index, for ranked word matches;
+- a pg_trgm GIN index on the lower-cased document, so substring (LIKE) matches
+  are index-served too.
+
+Prerequisite for the trigram index: the pg_trgm extension must be installed,
+or the migrating role must be allowed to create it (it is a trusted extension
+on Postgres 13+, so CREATE on the database suffices; managed providers may
+need it enabled first). If it can't be had, the index is skipped with a
+warning and substring search falls back to a scan; create the extension and
+the index by hand later to get it back.
+
+Backfilled here from existing rows.
+"""
+from __future__ import annotations
+
+import logging
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "20260804_storefront_search_doc"
+down_revision = "20260803_invoice_hot_path_idx"
+branch_labels = None
+depends_on = None
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+
+def _ensure_pg_trgm(bind) -> bool:
+    """True once pg_trgm is installed; False if it can't be created here."""
+    installed = sa.text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+    if bind.execute(installed).scalar():
+        return True
+    try:
+        # Savepoint: a refused CREATE EXTENSION must not abort the migration.
+        with bind.begin_nested():
+            bind.execute(sa.text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    except sa.exc.DBAPIError as exc:
+        logger.warning("pg_trgm unavailable (%s); skipping the trigram search index", exc.orig)
+        return False
+    return True
+
+
+def upgrade() -> None:
+    op.create_table(
+        "storefront_search_document",
+        sa.Column(
+            "user_id",
+            sa.Integer(),
+            sa.ForeignKey("user.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("store_text", sa.Text(), nullable=False, server_default=""),
+        sa.Column("product_text", sa.Text(), nullable=False, server_default=""),
+        sa.Column("document", sa.Text(), nullable=False, server_default=""),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.func.now(),
+        ),
+    )
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    op.execute(
+        """
+        ALTER TABLE storefront_search_document ADD COLUMN search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('simple', store_text), 'A')
+            || setweight(to_tsvector('simple', product_text), 'B')
+        ) STORED
+        """
+    )
+    op.create_index(
+        "ix_storefront_search_vector",
+        "storefront_search_document",
+        ["search_vector"],
+        postgresql_using="gin",
+    )
+    if _ensure_pg_trgm(op.get_bind()):
+        op.create_index(
+            "ix_storefront_search_document_trgm",
+            "storefront_search_document",
+            ["document"],
+            postgresql_using="gin",
+            postgresql_ops={"document": "gin_trgm_ops"},
+        )
+    op.execute(
+        """
+        WITH store AS (
+            SELECT u.id AS user_id,
+                   concat_ws(E'\\n',
+                       NULLIF(trim(u.business_name), ''),
+                       NULLIF(trim(u.name), ''),
+                       NULLIF(trim(u.storefront_description), ''),
+                       NULLIF(trim(u.storefront_city), ''),
+                       NULLIF(trim(u.storefront_state), '')) AS store_text,
+                   COALESCE((
+                       SELECT string_agg(
+                                  CASE WHEN c.name IS NULL THEN p.name
+                                       ELSE p.name || E'\\t' || c.name END,
+                                  E'\\n' ORDER BY p.id)
+                       FROM product p
+                       LEFT JOIN product_category c ON c.id = p.category_id
+                       WHERE p.user_id = u.id AND p.is_active
+                   ), '') AS product_text
+            FROM "user" u
+            WHERE u.storefront_slug IS NOT NULL
+        )
+        INSERT INTO storefront_search_document (user_id, store_text, product_text, document)
+        SELECT user_id, store_text, product_text,
+               lower(store_text || E'\\n' || product_text)
+        FROM store
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("storefront_search_document")
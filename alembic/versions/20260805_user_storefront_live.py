@@ -0,0 +1,71 @@
+"""Materialised storefront "live in search" flag
+
+Revision ID: 20260805_user_storefront_live
+Revises: 20260804_storefront_search_doc
+Create Date: 2026-08-05
+
+/public/stores and the admin "Live in search" metric re-derived the live gate
+(opted in, active, logo, active subaccount, description, state and a DISTINCT
+subquery over every listable product) on each call. user.storefront_live
+stores it; the app recomputes it on profile, payout and product writes and
+maintenance.reconcile_storefront_live repairs drift. Backfilled here; the
+partial index on live slugs serves the directory page order. Built
+CONCURRENTLY so user writes aren't blocked while it builds.
+"""
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "20260805_user_storefront_live"
+down_revision = "20260804_storefront_search_doc"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "user",
+        sa.Column("storefront_live", sa.Boolean(), nullable=False, server_default="false"),
+    )
+    op.execute(
+        """
+        UPDATE "user" u SET storefront_live = true
+        WHERE u.storefront_enabled IS true
+          AND u.store_status = 'active'
+          AND u.storefront_slug IS NOT NULL
+          AND u.logo_url IS NOT NULL
+          AND u.paystack_subaccount_active IS true
+          AND u.storefront_description IS NOT NULL AND u.storefront_description != ''
+          AND u.storefront_state IS NOT NULL AND u.storefront_state != ''
+          AND EXISTS (
+              SELECT 1 FROM product p
+              WHERE p.user_id = u.id
+                AND p.is_active IS true
+                AND p.description IS NOT NULL AND p.description != ''
+                AND p.image_url IS NOT NULL AND p.image_url != ''
+          )
+        """
+    )
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction block.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_user_storefront_live_slug",
+            "user",
+            ["storefront_slug"],
+            postgresql_where=sa.text("storefront_live IS true"),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_user_storefront_live_slug",
+            table_name="user",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    op.drop_column("user", "storefront_live")
@@ -0,0 +1,55 @@
+"""invoice.updated_at for rollup reconciliation
+
+Revision ID: 20260806_invoice_updated_at
+Revises: 20260805_user_storefront_live
+Create Date: 2026-08-06
+
+The nightly invoice_daily_rollup reconcile only rebuilt days with invoices
+*created* recently, so status/amount changes to older invoices made outside
+the ORM flush hook were never repaired. updated_at (set by the app on every
+UPDATE) lets it rebuild every (issuer, day) holding a recently changed
+invoice. Existing rows start at the migration time; the index is built
+CONCURRENTLY so invoice writes aren't blocked.
+"""
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "20260806_invoice_updated_at"
+down_revision = "20260805_user_storefront_live"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "invoice",
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            nullable=True,
+            server_default=sa.func.now(),
+        ),
+    )
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction block.
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_invoice_updated_at",
+            "invoice",
+            ["updated_at"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_invoice_updated_at",
+            table_name="invoice",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    op.drop_column("invoice", "updated_at")
@@ -2,17 +2,36 @@
 from typing import Annotated, TypeAlias
 
 from fastapi import Depends, HTTPException, status
-from sqlalchemy import select
 from sqlalchemy.orm import Session
 
 from app.api.routes_auth import get_current_user_id
 from app.db.session import get_db
+from app.services.principal import Principal, resolve_principal
 
 CurrentUserDep: TypeAlias = Annotated[int, Depends(get_current_user_id)]
 DbDep: TypeAlias = Annotated[Session, Depends(get_db)]
 
 
-def require_admin_role(current_user_id: CurrentUserDep, db: DbDep) -> int:
+def get_principal(current_user_id: CurrentUserDep, db: DbDep) -> Principal:
+    """
+    Resolve the caller's plan, team role and data owner.
+
+    FastAPI caches dependencies per request, so every dependency below shares
+    one resolution; across requests it is served from a short-TTL cache
+    (see ``app.services.principal``).
+
+    Raises HTTPException 404 if the user no longer exists.
+    """
+    principal = resolve_principal(db, current_user_id)
+    if principal is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    return principal
+
+
+PrincipalDep: TypeAlias = Annotated[Principal, Depends(get_principal)]
+
+
+def require_admin_role(principal: PrincipalDep) -> int:
     """
     Verify user has admin privileges (can modify settings).
     
@@ -24,16 +43,7 @@ def require_admin_role(current_user_id: CurrentUserDep, db: DbDep) -> int:
     Raises HTTPException 403 if user is a team member (not admin).
     Returns the user_id if access is granted.
     """
-    from app.models.team_models import Team, TeamMember
-    
-    # Check if user is admin of a team (they have full access)
-    team = db.scalar(select(Team).where(Team.admin_user_id == current_user_id))
-    if team:
-        return current_user_id
-    
-    # Check if user is a member of a team (they have read-only access)
-    membership = db.scalar(select(TeamMember).where(TeamMember.user_id == current_user_id))
-    if membership:
+    if principal.is_member:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail={
@@ -43,15 +53,13 @@ def require_admin_role(current_user_id: CurrentUserDep, db: DbDep) -> int:
                 "current_role": "member",
             }
         )
-    
-    # Solo user (no team) has full access
-    return current_user_id
+    return principal.user_id
 
 
 AdminUserDep: TypeAlias = Annotated[int, Depends(require_admin_role)]
 
 
-def get_data_owner_id(current_user_id: CurrentUserDep, db: DbDep) -> int:
+def get_data_owner_id(principal: PrincipalDep) -> int:
     """
     Get the user_id to use for data access (invoices, expenses, inventory, etc.).
     
@@ -64,27 +72,7 @@ def get_data_owner_id(current_user_id: CurrentUserDep, db: DbDep) -> int:
         The user_id to use when querying data. For team members,
         this is the team admin's user_id, not their own.
     """
-    from app.models.team_models import Team, TeamMember
-    
-    # Check if user is admin of a team (use their own ID)
-    team = db.scalar(select(Team).where(Team.admin_user_id == current_user_id))
-    if team:
-        return current_user_id
-    
-    # Check if user is a member of a team (use admin's ID)
-    membership = db.scalar(
-        select(TeamMember)
-        .options()
-        .where(TeamMember.user_id == current_user_id)
-    )
-    if membership:
-        # Get the team to find the admin's user_id
-        team = db.get(Team, membership.team_id)
-        if team:
-            return team.admin_user_id
-    
-    # Solo user (no team) - use their own ID
-    return current_user_id
+    return principal.data_owner_id
 
 
 DataOwnerDep: TypeAlias = Annotated[int, Depends(get_data_owner_id)]
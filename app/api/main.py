@@ -187,11 +187,32 @@ def create_app() -> FastAPI:
         try:
             yield
         finally:
+            try:
+                from app.core.audit import flush_audit_log
+                flush_audit_log()
+            except Exception:
+                pass
             try:
                 from app.db.redis_client import close_redis_pool
                 close_redis_pool()
             except Exception:
                 pass
+            try:
+                from app.bot.whatsapp_transport import aclose_transport, close_transport
+                close_transport()
+                await aclose_transport()
+            except Exception:
+                pass
+            try:
+                from app.services.openai_client import aclose_client
+                await aclose_client()
+            except Exception:
+                pass
+            try:
+                from app.utils.media_executor import shutdown_media_pool
+                shutdown_media_pool()
+            except Exception:
+                pass
 
     # Disable debug mode and interactive docs in production for security
     is_production = settings.ENV.lower() == "prod"
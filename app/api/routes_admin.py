@@ -2,7 +2,7 @@ import datetime as dt
 import logging
 from typing import Any
 
-from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request, Response
 from pydantic import BaseModel, ConfigDict, Field
 from sqlalchemy import and_, case, desc, func, or_
 from sqlalchemy.orm import Session
@@ -16,6 +16,7 @@ from app.models import models
 from app.models.models import SubscriptionPlan
 from app.models.payment_models import PaymentStatus, PaymentTransaction
 from app.utils.feature_gate import INVOICE_PACK_SIZE
+from app.utils.pagination import InvalidCursorError, KeysetColumn, capped_count, keyset_page
 
 logger = logging.getLogger(__name__)
 
@@ -224,15 +225,24 @@ def get_user_stats(
     )
 
 
+# Newest first; id breaks ties between users created in the same instant.
+_USER_LIST_ORDER = (
+    KeysetColumn(models.User.created_at, descending=True),
+    KeysetColumn(models.User.id, descending=True),
+)
+
+
 @router.get("/users", response_model=list[UserListItem])
 def list_users(
+    response: Response,
     db: Session = Depends(get_db),
     admin_user=Depends(get_current_admin),
     skip: int = Query(0, ge=0),
     limit: int = Query(50, ge=1, le=100),
     plan: str | None = Query(None, description="Filter by plan (free, pro)"),
     verified_only: bool = Query(False, description="Show only verified users"),
-    search: str | None = Query(None, description="Search by name, email, or phone")
+    search: str | None = Query(None, description="Search by name, email, or phone"),
+    cursor: str | None = Query(None, description="Keyset cursor from X-Next-Cursor (skip ignored)"),
 ) -> Any:
     """
     List all users with filtering and pagination.
@@ -242,6 +252,8 @@ def list_users(
     - **plan**: Filter by subscription plan
     - **verified_only**: Only show phone-verified users
     - **search**: Search in name, email, or phone
+    - **cursor**: Continue after the previous page; the next cursor is returned
+      in the ``X-Next-Cursor`` header (absent on the last page)
     """
     log_audit_event("admin.users.list", user_id=admin_user.id, skip=skip, limit=limit)
     
@@ -266,11 +278,22 @@ def list_users(
             (models.User.phone.ilike(search_pattern))
         )
     
-    # Order by most recent first
-    query = query.order_by(desc(models.User.created_at))
-    
-    # Pagination
-    users = query.offset(skip).limit(limit).all()
+    # Keyset pages stay fast at any depth; offset kept for existing clients.
+    try:
+        page = keyset_page(
+            query,
+            _USER_LIST_ORDER,
+            limit=limit,
+            key=lambda u: (u.created_at, u.id),
+            cursor=cursor,
+            offset=0 if cursor else skip,
+            count=False,
+        )
+    except InvalidCursorError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    users = page.items
+    if page.next_cursor:
+        response.headers["X-Next-Cursor"] = page.next_cursor
     
     return [
         UserListItem(
@@ -3053,8 +3076,11 @@ class AuditChainResult(BaseModel):
     total: int  # rows checked
     verified: int  # rows that passed before the first break (== total when ok)
     first_broken_id: int | None  # id of the first row that fails the chain
-    reason: str | None  # what broke: 'content_edited' | 'chain_broken' | None
+    reason: str | None  # 'content_edited' | 'chain_broken' | 'checkpoint_invalid' | None
     message: str
+    mode: str = "incremental"  # 'incremental' (since last checkpoint) | 'full'
+    last_verified_id: int | None = None  # chain is proven intact up to this id
+    complete: bool = True  # False when ``limit`` stopped the walk early
 
 
 @router.get("/audit/verify", response_model=AuditChainResult)
@@ -3062,6 +3088,7 @@ def verify_audit_chain(
     db: Session = Depends(get_db),
     admin_user=Depends(get_current_admin),
     limit: int = Query(50000, ge=1, le=200000),
+    mode: str = Query("incremental", pattern="^(incremental|full)$"),
 ) -> Any:
     """Walk the audit_log hash chain and confirm nothing was edited or deleted.
 
@@ -3069,45 +3096,43 @@ def verify_audit_chain(
     check it equals the stored ``entry_hash`` (detects CONTENT edits) and that the
     row's ``prev_hash`` matches the previous row's ``entry_hash`` (detects DELETED
     or reordered rows). The first mismatch is reported.
+
+    ``incremental`` (default) resumes from the last signed checkpoint and only
+    checks rows appended since; ``full`` starts from the first row. Rows are
+    streamed in keyset-paginated chunks, at most ``limit`` per call — when more
+    remain, ``complete`` is False and the next call continues from the new
+    checkpoint. For very large tables use ``POST /audit/verify/full``.
     """
-    from app.core.audit import hash_entry
-    from app.models.models import AuditLog
+    from app.services import audit_verifier
 
-    log_audit_event("admin.audit.verify", user_id=admin_user.id)
+    log_audit_event("admin.audit.verify", user_id=admin_user.id, mode=mode)
 
-    rows = (
-        db.query(AuditLog)
-        .order_by(AuditLog.id.asc())
-        .limit(limit)
-        .all()
-    )
-    prev = ""
-    verified = 0
-    for r in rows:
-        expected = hash_entry(prev, r.action, r.user_id, r.status, r.details)
-        if (r.prev_hash or "") != prev:
-            return AuditChainResult(
-                ok=False, total=len(rows), verified=verified,
-                first_broken_id=r.id, reason="chain_broken",
-                message=f"Row {r.id}: prev_hash does not link to the previous row "
-                        "(a row was deleted, inserted or reordered).",
-            )
-        if r.entry_hash != expected:
-            return AuditChainResult(
-                ok=False, total=len(rows), verified=verified,
-                first_broken_id=r.id, reason="content_edited",
-                message=f"Row {r.id}: entry_hash does not match its contents "
-                        "(the row was edited after it was written).",
-            )
-        prev = r.entry_hash or ""
-        verified += 1
+    verify = audit_verifier.verify_full if mode == "full" else audit_verifier.verify_incremental
+    result = verify(db, max_rows=limit)
     return AuditChainResult(
-        ok=True, total=len(rows), verified=verified,
-        first_broken_id=None, reason=None,
-        message=f"Audit chain intact: {verified} row(s) verified.",
+        ok=result.ok, total=result.total, verified=result.verified,
+        first_broken_id=result.first_broken_id, reason=result.reason,
+        message=result.message, mode=mode,
+        last_verified_id=result.last_id or None, complete=result.complete,
     )
 
 
+@router.post("/audit/verify/full")
+def queue_full_audit_verify(
+    admin_user=Depends(get_current_admin),
+) -> dict[str, Any]:
+    """Queue a background re-verify of the whole audit chain in parallel segments.
+
+    The outcome is written to the application log and the audit log
+    (``audit.chain.verify_full``); on success it also refreshes the checkpoint.
+    """
+    from app.workers.tasks.maintenance_tasks import verify_audit_chain_full
+
+    log_audit_event("admin.audit.verify_full", user_id=admin_user.id)
+    task = verify_audit_chain_full.delay()
+    return {"queued": True, "task_id": task.id}
+
+
 # =============================================================================
 # USER SEGMENTS FOR CAMPAIGNS (Brevo Email/WhatsApp Export)
 # =============================================================================
@@ -5326,7 +5351,8 @@ def list_disputes(
     else:
         q = q.filter(models.StorefrontOrderEscrow.status == status_filter)
 
-    total = q.count()
+    # The queue only shows `limit` rows; don't count past the list cap either.
+    total, _ = capped_count(q, ADMIN_LIST_CAP)
     rows = (
         q.order_by(desc(models.StorefrontOrderEscrow.disputed_at), desc(models.StorefrontOrderEscrow.id))
         .limit(limit)
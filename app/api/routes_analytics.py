@@ -13,6 +13,7 @@ from sqlalchemy.orm import Session
 
 from app.api.dependencies import get_data_owner_id
 from app.api.routes_auth import get_current_user_id
+from app.core.cache import get_or_compute, tagged_key
 from app.db.session import get_db
 from app.models import models
 from app.utils.feature_gate import require_plan_feature
@@ -43,6 +44,24 @@ CurrentUserDep = Annotated[int, Depends(get_current_user_id)]
 DataOwnerDep = Annotated[int, Depends(get_data_owner_id)]
 DbDep = Annotated[Session, Depends(get_db)]
 
+# Dashboards are fetched by every open tab on the same schedule, so results are
+# served from the two-tier cache. Keys carry the issuer's cache-tag version, so
+# any invoice change for the owner retires them at once; the TTL only bounds
+# drift from the clock (e.g. invoices becoming overdue).
+ANALYTICS_CACHE_TTL = 300
+ANALYTICS_CACHE_STALE_TTL = 300
+
+
+def _cached_analytics(owner_id: int, name: str, *params: object, producer):
+    key = ":".join(["analytics", str(owner_id), name, *(str(p) for p in params)])
+    return get_or_compute(
+        tagged_key(key, f"issuer:{owner_id}"),
+        ANALYTICS_CACHE_TTL,
+        producer,
+        namespace="analytics",
+        stale_ttl=ANALYTICS_CACHE_STALE_TTL,
+    )
+
 
 # ── Analytics response schemas ─────────────────────────────────────────
 
@@ -120,41 +139,46 @@ def get_analytics_dashboard(
     """
     require_plan_feature(db, current_user_id, "cash_dashboard", "Analytics Dashboard")
 
-    # Calculate date range and conversion rate
-    start_date, end_date = get_date_range(period)
-    conversion_rate = get_conversion_rate(currency)
-    
-    # Calculate all metrics using data_owner_id for team context
-    revenue_metrics = calculate_revenue_metrics(
-        db, data_owner_id, start_date, end_date, conversion_rate
-    )
-    
-    invoice_metrics = calculate_invoice_metrics(
-        db, data_owner_id, start_date, end_date
-    )
-    
-    customer_metrics = calculate_customer_metrics(
-        db, data_owner_id, start_date, end_date
-    )
-    
-    aging_report = calculate_aging_report(
-        db, data_owner_id, end_date, conversion_rate
-    )
-    
-    monthly_trends = calculate_monthly_trends(
-        db, data_owner_id, end_date, conversion_rate
-    )
-    
-    return AnalyticsDashboard(
-        period=period,
-        currency=currency,
-        start_date=start_date,
-        end_date=end_date,
-        revenue=revenue_metrics,
-        invoices=invoice_metrics,
-        customers=customer_metrics,
-        aging=aging_report,
-        monthly_trends=monthly_trends,
+    def _produce() -> dict:
+        # Calculate date range and conversion rate
+        start_date, end_date = get_date_range(period)
+        conversion_rate = get_conversion_rate(currency)
+
+        # Calculate all metrics using data_owner_id for team context
+        revenue_metrics = calculate_revenue_metrics(
+            db, data_owner_id, start_date, end_date, conversion_rate
+        )
+
+        invoice_metrics = calculate_invoice_metrics(
+            db, data_owner_id, start_date, end_date
+        )
+
+        customer_metrics = calculate_customer_metrics(
+            db, data_owner_id, start_date, end_date
+        )
+
+        aging_report = calculate_aging_report(
+            db, data_owner_id, end_date, conversion_rate
+        )
+
+        monthly_trends = calculate_monthly_trends(
+            db, data_owner_id, end_date, conversion_rate
+        )
+
+        return AnalyticsDashboard(
+            period=period,
+            currency=currency,
+            start_date=start_date,
+            end_date=end_date,
+            revenue=revenue_metrics,
+            invoices=invoice_metrics,
+            customers=customer_metrics,
+            aging=aging_report,
+            monthly_trends=monthly_trends,
+        ).model_dump(mode="json")
+
+    return AnalyticsDashboard.model_validate(
+        _cached_analytics(data_owner_id, "dashboard", period, currency, producer=_produce)
     )
 
 
@@ -170,42 +194,45 @@ def get_revenue_by_customer(
     """Get top customers by revenue (team data for team members)."""
     require_plan_feature(db, current_user_id, "cash_dashboard", "Revenue by Customer")
 
-    start_date, _ = get_date_range(period)
-    conversion_rate = get_conversion_rate(currency)
-    
-    # Query top customers using data_owner_id
-    top_customers = (
-        db.query(
-            models.Customer.name,
-            func.sum(models.Invoice.amount).label("total_revenue"),
-            func.count(models.Invoice.id).label("invoice_count"),
+    def _produce() -> dict:
+        start_date, _ = get_date_range(period)
+        conversion_rate = get_conversion_rate(currency)
+
+        # Query top customers using data_owner_id
+        top_customers = (
+            db.query(
+                models.Customer.name,
+                func.sum(models.Invoice.amount).label("total_revenue"),
+                func.count(models.Invoice.id).label("invoice_count"),
+            )
+            .join(models.Invoice, models.Invoice.customer_id == models.Customer.id)
+            .filter(
+                models.Invoice.issuer_id == data_owner_id,
+                models.Invoice.invoice_type == "revenue",
+                models.Invoice.status == "paid",
+                models.Invoice.created_at >= datetime.combine(start_date, datetime.min.time()),
+            )
+            .group_by(models.Customer.id, models.Customer.name)
+            .order_by(func.sum(models.Invoice.amount).desc())
+            .limit(limit)
+            .all()
         )
-        .join(models.Invoice, models.Invoice.customer_id == models.Customer.id)
-        .filter(
-            models.Invoice.issuer_id == data_owner_id,
-            models.Invoice.invoice_type == "revenue",
-            models.Invoice.status == "paid",
-            models.Invoice.created_at >= datetime.combine(start_date, datetime.min.time()),
-        )
-        .group_by(models.Customer.id, models.Customer.name)
-        .order_by(func.sum(models.Invoice.amount).desc())
-        .limit(limit)
-        .all()
-    )
-    
-    return {
-        "period": period,
-        "customers": [
-            {
-                "name": customer.name,
-                "total_revenue": float(
-                    Decimal(str(customer.total_revenue)) / conversion_rate
-                ),
-                "invoice_count": customer.invoice_count,
-            }
-            for customer in top_customers
-        ],
-    }
+
+        return {
+            "period": period,
+            "customers": [
+                {
+                    "name": customer.name,
+                    "total_revenue": float(
+                        Decimal(str(customer.total_revenue)) / conversion_rate
+                    ),
+                    "invoice_count": customer.invoice_count,
+                }
+                for customer in top_customers
+            ],
+        }
+
+    return _cached_analytics(data_owner_id, "revenue_by_customer", period, limit, currency, producer=_produce)
 
 
 @router.get("/conversion-funnel", response_model=ConversionFunnelOut)
@@ -218,48 +245,51 @@ def get_conversion_funnel(
     """Get invoice conversion funnel (created → paid). Returns team data for team members."""
     require_plan_feature(db, current_user_id, "cash_dashboard", "Conversion Funnel")
 
-    start_date, _ = get_date_range(period)
-    
-    # Count invoices by status using data_owner_id
-    stats = (
-        db.query(
-            func.count(models.Invoice.id).label("total"),
-            func.sum(case((models.Invoice.status == "paid", 1), else_=0)).label("paid"),
-            func.sum(case((models.Invoice.status == "awaiting_confirmation", 1), else_=0)).label("awaiting"),
-            func.sum(case((models.Invoice.status == "pending", 1), else_=0)).label("pending"),
-            func.sum(case((models.Invoice.status == "cancelled", 1), else_=0)).label("cancelled"),
+    def _produce() -> dict:
+        start_date, _ = get_date_range(period)
+
+        # Count invoices by status using data_owner_id
+        stats = (
+            db.query(
+                func.count(models.Invoice.id).label("total"),
+                func.sum(case((models.Invoice.status == "paid", 1), else_=0)).label("paid"),
+                func.sum(case((models.Invoice.status == "awaiting_confirmation", 1), else_=0)).label("awaiting"),
+                func.sum(case((models.Invoice.status == "pending", 1), else_=0)).label("pending"),
+                func.sum(case((models.Invoice.status == "cancelled", 1), else_=0)).label("cancelled"),
+            )
+            .filter(
+                models.Invoice.issuer_id == data_owner_id,
+                models.Invoice.invoice_type == "revenue",
+                models.Invoice.created_at >= datetime.combine(start_date, datetime.min.time()),
+                # Exclude abandoned/unpaid storefront orders from the funnel.
+                exclude_abandoned_storefront(),
+            )
+            .first()
         )
-        .filter(
-            models.Invoice.issuer_id == data_owner_id,
-            models.Invoice.invoice_type == "revenue",
-            models.Invoice.created_at >= datetime.combine(start_date, datetime.min.time()),
-            # Exclude abandoned/unpaid storefront orders from the funnel.
-            exclude_abandoned_storefront(),
-        )
-        .first()
-    )
-    
-    total = stats.total or 0
-    paid = stats.paid or 0
-    awaiting = stats.awaiting or 0
-    cancelled = stats.cancelled or 0
-    
-    return {
-        "period": period,
-        "funnel": {
-            "created": total,
-            "sent": total,  # All created invoices are "sent"
-            "viewed": awaiting + paid,  # Assuming viewed if status changed
-            "awaiting_confirmation": awaiting,
-            "paid": paid,
-            "cancelled": cancelled,
-        },
-        "conversion_rates": {
-            "sent_to_viewed": ((awaiting + paid) / total * 100) if total > 0 else 0,
-            "viewed_to_paid": (paid / (awaiting + paid) * 100) if (awaiting + paid) > 0 else 0,
-            "overall": (paid / total * 100) if total > 0 else 0,
-        },
-    }
+
+        total = stats.total or 0
+        paid = stats.paid or 0
+        awaiting = stats.awaiting or 0
+        cancelled = stats.cancelled or 0
+
+        return {
+            "period": period,
+            "funnel": {
+                "created": total,
+                "sent": total,  # All created invoices are "sent"
+                "viewed": awaiting + paid,  # Assuming viewed if status changed
+                "awaiting_confirmation": awaiting,
+                "paid": paid,
+                "cancelled": cancelled,
+            },
+            "conversion_rates": {
+                "sent_to_viewed": ((awaiting + paid) / total * 100) if total > 0 else 0,
+                "viewed_to_paid": (paid / (awaiting + paid) * 100) if (awaiting + paid) > 0 else 0,
+                "overall": (paid / total * 100) if total > 0 else 0,
+            },
+        }
+
+    return _cached_analytics(data_owner_id, "conversion_funnel", period, producer=_produce)
 
 
 # ── Cash-First Dashboard ─────────────────────────────────────────────
@@ -290,7 +320,9 @@ def get_cash_position(
     Nigerian small business owner.
     """
     require_plan_feature(db, current_user_id, "cash_dashboard", "Cash Dashboard")
-    return calculate_cash_position(db, data_owner_id)
+    return _cached_analytics(
+        data_owner_id, "cash_position", producer=lambda: calculate_cash_position(db, data_owner_id)
+    )
 
 
 # ── Customer Insights ────────────────────────────────────────────────
@@ -328,7 +360,12 @@ def get_customer_insights(
     business knows who to nurture and who to re-engage.
     """
     require_plan_feature(db, current_user_id, "customer_insights", "Customer Insights")
-    return calculate_customer_insights(db, data_owner_id, limit)
+    return _cached_analytics(
+        data_owner_id,
+        "customer_insights",
+        limit,
+        producer=lambda: calculate_customer_insights(db, data_owner_id, limit),
+    )
 
 
 # ── Professionalism Score ────────────────────────────────────────────
@@ -397,7 +434,12 @@ def get_margin_insights(
     """
     require_plan_feature(db, current_user_id, "margin_insights", "Margin & Discount Insights")
     start_date, end_date = get_date_range(period)
-    return calculate_margin_insights(db, data_owner_id, start_date, end_date)
+    return _cached_analytics(
+        data_owner_id,
+        "margin_insights",
+        period,
+        producer=lambda: calculate_margin_insights(db, data_owner_id, start_date, end_date),
+    )
 
 
 # ── Storefront Insights ──────────────────────────────────────────────
@@ -448,10 +490,14 @@ def get_storefront_insights(
     storefront so the UI can prompt setup.
     """
     require_plan_feature(db, current_user_id, "cash_dashboard", "Storefront Insights")
-    start_date, end_date = get_date_range(period)
-    conversion_rate = get_conversion_rate(currency)
-    result = calculate_storefront_insights(
-        db, data_owner_id, start_date, end_date, conversion_rate
-    )
-    result["period"] = period
-    return result
+
+    def _produce() -> dict:
+        start_date, end_date = get_date_range(period)
+        conversion_rate = get_conversion_rate(currency)
+        result = calculate_storefront_insights(
+            db, data_owner_id, start_date, end_date, conversion_rate
+        )
+        result["period"] = period
+        return result
+
+    return _cached_analytics(data_owner_id, "storefront_insights", period, currency, producer=_produce)
@@ -16,6 +16,7 @@ from app.api.rate_limit import limiter
 from app.api.routes_auth import get_current_user_id
 from app.db.session import get_db
 from app.models.models import Invoice
+from app.services.cache_service import invalidate_invoice_tags
 from app.models.expense_schemas import (
     ExpenseCreate,
     ExpenseOut,
@@ -239,6 +240,7 @@ def update_expense(
 
     db.commit()
     db.refresh(invoice)
+    invalidate_invoice_tags(data_owner_id, invoice.customer_id, invoice.invoice_id)
 
     return expense_invoice_to_out(invoice)
 
@@ -260,8 +262,10 @@ def delete_expense(
     if not invoice:
         raise HTTPException(status_code=404, detail="Expense not found")
 
+    tags = (invoice.customer_id, invoice.invoice_id)
     db.delete(invoice)
     db.commit()
+    invalidate_invoice_tags(data_owner_id, *tags)
 
     return None
 
@@ -2,21 +2,19 @@
 from typing import Annotated, TypeAlias
 
 from fastapi import Depends, HTTPException, status
-from sqlalchemy import select
 from sqlalchemy.orm import Session
 
-from app.api.dependencies import get_data_owner_id
+from app.api.dependencies import PrincipalDep, get_data_owner_id
 from app.api.routes_auth import get_current_user_id
 from app.db.session import get_db
 from app.services.inventory import InventoryService, build_inventory_service
-from app.utils.feature_gate import FeatureGate
 
 CurrentUserDep: TypeAlias = Annotated[int, Depends(get_current_user_id)]
 DataOwnerDep: TypeAlias = Annotated[int, Depends(get_data_owner_id)]
 DbDep: TypeAlias = Annotated[Session, Depends(get_db)]
 
 
-def require_inventory_access(current_user_id: CurrentUserDep, data_owner_id: DataOwnerDep, db: DbDep) -> int:
+def require_inventory_access(principal: PrincipalDep) -> int:
     """
     Verify user has access to inventory features (Pro or Business plan).
     
@@ -28,25 +26,24 @@ def require_inventory_access(current_user_id: CurrentUserDep, data_owner_id: Dat
     """
     # Check the DATA OWNER's plan (team admin for members, self for solo)
     # Uses effective_plan to respect admin-granted PRO override
-    gate = FeatureGate(db, data_owner_id)
-    if not gate.user.effective_plan.features.get("inventory", False):
+    if not principal.owner_plan.features.get("inventory", False):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail={
                 "error": "feature_gated",
                 "message": "Inventory Management requires Pro plan or higher",
                 "required_plan": "PRO",
-                "current_plan": gate.user.effective_plan.value,
+                "current_plan": principal.owner_plan.value,
                 "upgrade_url": "/settings/subscription"
             }
         )
-    return current_user_id
+    return principal.user_id
 
 
 InventoryAccessDep: TypeAlias = Annotated[int, Depends(require_inventory_access)]
 
 
-def require_inventory_admin(current_user_id: InventoryAccessDep, db: DbDep) -> int:
+def require_inventory_admin(current_user_id: InventoryAccessDep, principal: PrincipalDep) -> int:
     """
     Verify user is admin/owner for inventory write operations.
     
@@ -57,16 +54,7 @@ def require_inventory_admin(current_user_id: InventoryAccessDep, db: DbDep) -> i
     Raises HTTPException 403 if user is a team member (not admin).
     Returns the user_id if access is granted.
     """
-    from app.models.team_models import Team, TeamMember
-    
-    # Check if user is admin of a team (they have full access)
-    team = db.scalar(select(Team).where(Team.admin_user_id == current_user_id))
-    if team:
-        return current_user_id
-    
-    # Check if user is a member of a team (they have read-only access)
-    membership = db.scalar(select(TeamMember).where(TeamMember.user_id == current_user_id))
-    if membership:
+    if principal.is_member:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail={
@@ -76,8 +64,6 @@ def require_inventory_admin(current_user_id: InventoryAccessDep, db: DbDep) -> i
                 "current_role": "member",
             }
         )
-    
-    # Solo user (no team) has full access
     return current_user_id
 
 
@@ -7,6 +7,7 @@ from app.api.rate_limit import limiter
 from app.models import inventory_schemas as schemas
 from app.storage.s3_client import s3_client
 from app.utils.file_validation import get_safe_extension, validate_file_magic_bytes
+from app.utils.pagination import InvalidCursorError, encode_cursor
 
 from .dependencies import InventoryServiceAdminDep, InventoryServiceDep
 from .helpers import product_to_out
@@ -38,8 +39,36 @@ def list_products(
     include_inactive: bool = Query(False, description="Include inactive products"),
     low_stock_only: bool = Query(False, description="Show only low stock products"),
     out_of_stock_only: bool = Query(False, description="Show only out of stock products"),
+    cursor: str | None = Query(None, description="Keyset cursor from a previous page (page ignored)"),
 ):
     """List products with filtering and pagination."""
+    if cursor:
+        try:
+            result = service.page_products(
+                cursor=cursor,
+                page_size=page_size,
+                category_id=category_id,
+                search=search,
+                include_inactive=include_inactive,
+                low_stock_only=low_stock_only,
+                out_of_stock_only=out_of_stock_only,
+            )
+        except InvalidCursorError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return schemas.ProductListOut(
+            products=[product_to_out(p) for p in result.items],
+            total=result.total,
+            page=page,
+            page_size=page_size,
+            # A capped total isn't the real count, so neither is a page count from it.
+            total_pages=(
+                None if result.total_capped
+                else (result.total + page_size - 1) // page_size if result.total else 1
+            ),
+            next_cursor=result.next_cursor,
+            total_capped=result.total_capped,
+        )
+
     products, total = service.list_products(
         page=page,
         page_size=page_size,
@@ -51,6 +80,7 @@ def list_products(
     )
     
     total_pages = (total + page_size - 1) // page_size if total > 0 else 1
+    has_more = bool(page < total_pages and products)
     
     return schemas.ProductListOut(
         products=[product_to_out(p) for p in products],
@@ -58,6 +88,7 @@ def list_products(
         page=page,
         page_size=page_size,
         total_pages=total_pages,
+        next_cursor=encode_cursor(products[-1].name, products[-1].id) if has_more else None,
     )
 
 
@@ -140,9 +171,9 @@ async def upload_product_image(
 
     # Shrink to a storefront-sized WebP so the catalog stays snappy on mobile
     # (original can be up to 5MB; storefront cards render at ~256px).
-    from app.utils.image_optimizer import optimize_for_storefront
+    from app.utils.image_optimizer import aoptimize_for_storefront
 
-    content, optimized_type = optimize_for_storefront(content, file.content_type)
+    content, optimized_type = await aoptimize_for_storefront(content, file.content_type)
     ext = get_safe_extension(file.filename, optimized_type)
     key = f"products/product_{product_id}.{ext}"
     image_url = await s3_client.upload_file(content, key, content_type=optimized_type)
@@ -15,6 +15,7 @@ from app.models import models, schemas
 from app.services.invoice_service import InvoiceService, build_invoice_service
 from app.storage.s3_client import S3Client
 from app.utils.feature_gate import FeatureGate, check_invoice_limit
+from app.utils.pagination import InvalidCursorError, encode_cursor
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -246,6 +247,7 @@ def list_invoices(
     end_date: str | None = None,  # Optional date filter (YYYY-MM-DD)
     skip: int = 0,
     limit: int = 50,
+    cursor: str | None = None,  # Keyset mode: next_cursor from the previous page (skip ignored)
 ):
     from datetime import date
     from datetime import datetime as dt
@@ -269,6 +271,28 @@ def list_invoices(
             pass
     
     svc = get_invoice_service_for_user(data_owner_id, db)
+    if cursor:
+        try:
+            page = svc.page_invoices(
+                data_owner_id,
+                invoice_type=invoice_type,
+                cursor=cursor,
+                limit=limit,
+                start_date=parsed_start,
+                end_date=parsed_end,
+            )
+        except InvalidCursorError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+        return schemas.PaginatedResponse[schemas.InvoiceOut](
+            items=page.items,
+            total=page.total,
+            skip=0,
+            limit=limit,
+            has_more=page.next_cursor is not None,
+            next_cursor=page.next_cursor,
+            total_capped=page.total_capped,
+        )
+
     invoices, total = svc.list_invoices(
         data_owner_id,
         invoice_type=invoice_type,
@@ -278,12 +302,15 @@ def list_invoices(
         end_date=parsed_end,
     )
     
+    has_more = (skip + limit) < total
     return schemas.PaginatedResponse[schemas.InvoiceOut](
         items=invoices,
         total=total,
         skip=skip,
         limit=limit,
-        has_more=(skip + limit) < total,
+        has_more=has_more,
+        # Lets offset clients switch to keyset paging from here on.
+        next_cursor=encode_cursor(invoices[-1].id) if has_more and invoices else None,
     )
 
 
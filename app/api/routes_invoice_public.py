@@ -21,26 +21,20 @@ def _public_invoice_payload(invoice, issuer) -> dict[str, object]:
     ]
 
     # Stored presigned URLs expire, so re-presign from the stable object key.
-    from app.storage.s3_client import s3_client
-
-    def _fresh_url(stored: str | None) -> str | None:
-        if not stored:
-            return None
-        key = s3_client.extract_key_from_url(stored)
-        if key:
-            return s3_client.get_presigned_url(key, expires_in=3600) or stored
-        return stored
-
-    logo_url = _fresh_url(getattr(issuer, "logo_url", None))
-
     # Paid invoices expose their receipt (and invoice PDF, when one exists) so
     # the customer can download it right on the pay page. Nothing is exposed
     # before payment — online-only invoices have no invoice PDF at all.
+    from app.services.presign_service import presign_many
+
     is_paid = invoice.status == "paid"
-    receipt_pdf_url = (
-        _fresh_url(getattr(invoice, "receipt_pdf_url", None)) if is_paid else None
+    logo_url, receipt_pdf_url, pdf_url = presign_many(
+        [
+            getattr(issuer, "logo_url", None),
+            getattr(invoice, "receipt_pdf_url", None) if is_paid else None,
+            getattr(invoice, "pdf_url", None) if is_paid else None,
+        ],
+        expires_in=3600,
     )
-    pdf_url = _fresh_url(getattr(invoice, "pdf_url", None)) if is_paid else None
 
     only_online = is_online_only(
         issuer,
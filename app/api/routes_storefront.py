@@ -14,7 +14,17 @@ from decimal import Decimal
 from typing import Annotated
 from urllib.parse import quote_plus
 
-from fastapi import APIRouter, BackgroundTasks, Depends, File, Form, HTTPException, Request, UploadFile
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    File,
+    Form,
+    HTTPException,
+    Request,
+    Response,
+    UploadFile,
+)
 from pydantic import BaseModel, Field
 from sqlalchemy import func
 from sqlalchemy.orm import Session
@@ -26,6 +36,8 @@ from app.core.config import settings
 from app.db.session import get_db
 from app.models import models
 from app.models.inventory_models import Product, ProductCategory
+from app.services import marketplace_search, presign_service, storefront_cache
+from app.services.storefront_live import listable_product_conditions
 
 logger = logging.getLogger(__name__)
 
@@ -58,65 +70,16 @@ def _unique_slug(db: Session, base: str, user_id: int) -> str:
         candidate = f"{base}-{n}"[:60]
 
 
-def _listable_product_conditions() -> list:
-    """A product is publicly listable only when it's active AND has a description
-    AND a photo — the exact rule the store page uses to display items. The
-    directory + 'live in search' gate reuse this, so a store counted as live
-    always has at least one item a shopper can actually see and buy.
-    """
-    return [
-        Product.is_active.is_(True),
-        Product.description.isnot(None),
-        Product.description != "",
-        Product.image_url.isnot(None),
-        Product.image_url != "",
-    ]
-
-
 def _presign(url: str | None, *, expires_in: int = 3600) -> str | None:
     """Presign an S3 URL, optionally with a longer TTL for public/cacheable assets.
 
-    We cache the presigned URL in-process for half the TTL so repeat requests
-    (page loads, refreshes) return the SAME URL — browsers and CDNs can then
-    cache the image across visits instead of re-fetching it every render.
+    URLs come from the shared presign cache, so every worker returns the SAME
+    URL for an object within a window — browsers and CDNs can then cache the
+    image across visits instead of re-fetching it every render.
     """
-    if not url:
-        return None
-    try:
-        from app.storage.s3_client import s3_client
-
-        key = s3_client.extract_key_from_url(url)
-        if not key:
-            return url
-        # Serve from the tiny in-process cache when a fresh-enough URL exists.
-        import time
-
-        cache_key = (key, expires_in)
-        cached = _PRESIGN_CACHE.get(cache_key)
-        now = time.time()
-        # Keep it stable for HALF the TTL so a browser cache actually hits.
-        if cached and cached[1] > now:
-            # Refresh recency for LRU eviction.
-            _PRESIGN_CACHE.move_to_end(cache_key)
-            return cached[0]
-        fresh = s3_client.get_presigned_url(key, expires_in=expires_in) or url
-        _PRESIGN_CACHE[cache_key] = (fresh, now + max(60, expires_in // 2))
-        _PRESIGN_CACHE.move_to_end(cache_key)
-        # Bound memory: evict oldest when we exceed the cap. 4k entries ≈ a few MB.
-        while len(_PRESIGN_CACHE) > _PRESIGN_CACHE_MAX:
-            _PRESIGN_CACHE.popitem(last=False)
-        return fresh
-    except Exception:  # noqa: BLE001
-        pass
-    return url
+    return presign_service.presign_url(url, expires_in=expires_in)
 
 
-# In-process presign cache (ordered for LRU eviction). Not persisted — a new
-# process picks its own URL and browsers just re-fetch once, then cache again.
-from collections import OrderedDict
-
-_PRESIGN_CACHE: "OrderedDict[tuple[str, int], tuple[str, float]]" = OrderedDict()
-_PRESIGN_CACHE_MAX = 4096
 # AWS presigned URLs max out at 7 days; used for the public storefront so image
 # URLs stay stable long enough for browsers to reuse them across visits.
 _PUBLIC_ASSET_TTL = 7 * 24 * 3600
@@ -231,7 +194,7 @@ def _listable_product_count(db: Session, user_id: int) -> int:
     """Products a shopper can actually see & buy (active + description + photo)."""
     return (
         db.query(func.count(Product.id))
-        .filter(Product.user_id == user_id, *_listable_product_conditions())
+        .filter(Product.user_id == user_id, *listable_product_conditions())
         .scalar()
     ) or 0
 
@@ -902,19 +865,17 @@ async def mark_order_sent(
     return {"escrow": _escrow_summary(escrow, buyer)}
 
 
-@public_router.get("/store/{slug}")
-@limiter.limit("30/minute")
-def get_public_storefront(request: Request, slug: str, db: Annotated[Session, Depends(get_db)]) -> dict:
-    """Public: a business's shareable inventory catalog."""
+def _build_storefront_entry(db: Session, slug: str) -> dict | None:
+    """Render the public store payload (cached by ``storefront_cache``)."""
     from sqlalchemy.orm import joinedload
 
     owner = (
         db.query(models.User)
-        .filter(models.User.storefront_slug == slug.lower())
+        .filter(models.User.storefront_slug == slug)
         .first()
     )
     if not owner:
-        raise HTTPException(status_code=404, detail="Storefront not found")
+        return None
 
     # Slug exists but the store isn't live — the owner hasn't enabled it yet, or
     # it's under moderation. Return a graceful "offline" payload (HTTP 200) so a
@@ -922,19 +883,15 @@ def get_public_storefront(request: Request, slug: str, db: Annotated[Session, De
     if not owner.storefront_enabled or owner.store_status != "active":
         reason = owner.store_status if owner.store_status in ("suspended", "delisted") else "disabled"
         return {
-            "slug": slug.lower(),
-            "business_name": owner.business_name or owner.name,
-            "offline": True,
-            "offline_reason": reason,
+            "owner_id": owner.id,
+            "payload": {
+                "slug": slug,
+                "business_name": owner.business_name or owner.name,
+                "offline": True,
+                "offline_reason": reason,
+            },
         }
 
-    # Discovery analytics: count this view (best-effort, never blocks the page).
-    try:
-        owner.storefront_views = (owner.storefront_views or 0) + 1
-        db.commit()
-    except Exception:  # noqa: BLE001
-        db.rollback()
-
     products = (
         db.query(Product)
         .options(joinedload(Product.category))
@@ -943,34 +900,36 @@ def get_public_storefront(request: Request, slug: str, db: Annotated[Session, De
             # Buyer protection: only list items that show a description AND a
             # photo, so buyers (and dispute reviews) can see exactly what was
             # ordered. Same rule as the live-search gate
-            # (_listable_product_conditions) so a listed store is never empty.
-            *_listable_product_conditions(),
+            # (listable_product_conditions) so a listed store is never empty.
+            *listable_product_conditions(),
         )
         .order_by(Product.name.asc())
         .all()
     )
 
-    is_open, open_from, open_to = _open_now(owner.storefront_hours)
-
-    reviews = (
-        db.query(models.StorefrontReview)
+    review_count, review_avg = (
+        db.query(func.count(models.StorefrontReview.id), func.avg(models.StorefrontReview.rating))
         .filter(
             models.StorefrontReview.user_id == owner.id,
             models.StorefrontReview.approved.is_(True),
         )
-        .all()
+        .one()
+    )
+    review_avg = round(float(review_avg), 1) if review_count else None
+
+    # One batch for the logo and every product photo on the page.
+    logo_url, *image_urls = presign_service.presign_many(
+        [owner.logo_url, *(p.image_url for p in products)], expires_in=_PUBLIC_ASSET_TTL
     )
-    review_count = len(reviews)
-    review_avg = round(sum(r.rating for r in reviews) / review_count, 1) if review_count else None
 
     address_parts = [owner.storefront_address, owner.storefront_city, owner.storefront_state]
     full_address = ", ".join(p for p in address_parts if p) or None
 
-    return {
-        "slug": slug.lower(),
+    payload = {
+        "slug": slug,
         "business_name": owner.business_name or owner.name,
         "description": owner.storefront_description,
-        "logo_url": _presign(owner.logo_url, expires_in=_PUBLIC_ASSET_TTL),
+        "logo_url": logo_url,
         "online_payments_enabled": bool(
             owner.paystack_subaccount_active and owner.paystack_subaccount_code
         ),
@@ -988,9 +947,10 @@ def get_public_storefront(request: Request, slug: str, db: Annotated[Session, De
             ),
         },
         "hours": owner.storefront_hours,
-        "open_now": is_open,
-        "open_from": open_from,
-        "open_to": open_to,
+        # Time-dependent; filled in per request from "hours".
+        "open_now": False,
+        "open_from": None,
+        "open_to": None,
         "reviews": {"count": review_count, "average": review_avg},
         "products": [
             {
@@ -1001,7 +961,7 @@ def get_public_storefront(request: Request, slug: str, db: Annotated[Session, De
                 "unit": p.unit,
                 "category": p.category.name if p.category else None,
                 "category_id": p.category_id,
-                "image_url": _presign(p.image_url, expires_in=_PUBLIC_ASSET_TTL),
+                "image_url": image_url,
                 "in_stock": (not p.track_stock) or (p.quantity_in_stock > 0),
                 "fulfilment_type": getattr(p, "fulfilment_type", "physical"),
                 # Category pack fee (₦) — one flat pack is added to an order that
@@ -1012,9 +972,51 @@ def get_public_storefront(request: Request, slug: str, db: Annotated[Session, De
                     else None
                 ),
             }
-            for p in products
+            for p, image_url in zip(products, image_urls)
         ],
     }
+    return {"owner_id": owner.id, "payload": payload}
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    return header.strip() == "*" or etag in (t.strip() for t in header.split(","))
+
+
+@public_router.get("/store/{slug}")
+@limiter.limit("30/minute")
+def get_public_storefront(
+    request: Request, response: Response, slug: str, db: Annotated[Session, Depends(get_db)]
+):
+    """Public: a business's shareable inventory catalog.
+
+    Served from a cached, pre-rendered payload with an ETag; a matching
+    ``If-None-Match`` gets an empty 304.
+    """
+    slug = slug.lower()
+    entry = storefront_cache.get_storefront(slug, lambda: _build_storefront_entry(db, slug))
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Storefront not found")
+
+    payload = dict(entry["payload"])
+    etag = entry["etag"]
+    if not payload.get("offline"):
+        # Discovery analytics: count this view (buffered, never blocks the page).
+        storefront_cache.record_view(db, entry["owner_id"])
+        is_open, open_from, open_to = _open_now(payload.get("hours"))
+        payload.update(open_now=is_open, open_from=open_from, open_to=open_to)
+        etag = f"{etag}-{int(is_open)}-{open_from or ''}-{open_to or ''}"
+
+    headers = {
+        "ETag": f'W/"{etag}"',
+        "Cache-Control": f"public, max-age={settings.STOREFRONT_HTTP_MAX_AGE}, must-revalidate",
+    }
+    if _etag_matches(request, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return payload
 
 
 def live_storefronts_query(db: Session):
@@ -1027,24 +1029,12 @@ def live_storefronts_query(db: Session):
       • at least one shopper-visible product (active + photo + description)
       • a store description
       • a location (state, captured via GPS)
+    That gate is materialised in ``user.storefront_live`` and kept current on
+    write (``app.services.storefront_live``), so this is an index lookup.
     ``list_public_stores`` REUSES this exact query, so the admin "Live in search"
     metric and what customers actually see on the landing page can never differ.
     """
-    product_owner_ids = (
-        db.query(Product.user_id).filter(*_listable_product_conditions()).distinct().subquery()
-    )
-    return db.query(models.User).filter(
-        models.User.storefront_enabled.is_(True),
-        models.User.store_status == "active",
-        models.User.storefront_slug.isnot(None),
-        models.User.logo_url.isnot(None),
-        models.User.paystack_subaccount_active.is_(True),
-        models.User.storefront_description.isnot(None),
-        models.User.storefront_description != "",
-        models.User.storefront_state.isnot(None),
-        models.User.storefront_state != "",
-        models.User.id.in_(db.query(product_owner_ids)),
-    )
+    return db.query(models.User).filter(models.User.storefront_live.is_(True))
 
 
 def count_live_storefronts(db: Session) -> int:
@@ -1068,12 +1058,10 @@ def list_public_stores(
     AND a location are listed — the SAME gate as the admin "Live in search"
     metric (``live_storefronts_query``). When ``q`` is given it searches business
     name, description, city/state and product names + categories across every
-    store, so a shopper can find an item and pick which store to buy it from.
+    store through the marketplace search index (``marketplace_search``), ranked
+    with profile matches first, so a shopper can find an item and pick which
+    store to buy it from.
     """
-    from sqlalchemy import or_
-
-    from app.models.inventory_models import ProductCategory
-
     page = max(1, page)
     page_size = min(max(1, page_size), 48)
     term = (q or "").strip()
@@ -1083,54 +1071,19 @@ def list_public_stores(
     base = live_storefronts_query(db)
 
     if term:
-        like = f"%{term}%"
-        product_match_ids = (
-            db.query(Product.user_id)
-            .outerjoin(ProductCategory, Product.category_id == ProductCategory.id)
-            .filter(
-                Product.is_active.is_(True),
-                or_(Product.name.ilike(like), ProductCategory.name.ilike(like)),
-            )
-            .distinct()
-            .subquery()
+        total, results = marketplace_search.search_stores(
+            base, term, page=page, page_size=page_size
         )
-        base = base.filter(
-            or_(
-                models.User.business_name.ilike(like),
-                models.User.name.ilike(like),
-                models.User.storefront_description.ilike(like),
-                models.User.storefront_city.ilike(like),
-                models.User.storefront_state.ilike(like),
-                models.User.id.in_(db.query(product_match_ids)),
-            )
-        )
-
-    total = base.with_entities(func.count(models.User.id)).scalar() or 0
-    owners = (
-        base.order_by(models.User.storefront_slug.asc())
-        .offset((page - 1) * page_size)
-        .limit(page_size)
-        .all()
-    )
-
-    # For search results, surface up to 3 matching product names per store.
-    matched: dict[int, list[str]] = {}
-    if term and owners:
-        like = f"%{term}%"
-        rows = (
-            db.query(Product.user_id, Product.name)
-            .outerjoin(ProductCategory, Product.category_id == ProductCategory.id)
-            .filter(
-                Product.user_id.in_([o.id for o in owners]),
-                Product.is_active.is_(True),
-                or_(Product.name.ilike(like), ProductCategory.name.ilike(like)),
-            )
+    else:
+        total = base.with_entities(func.count(models.User.id)).scalar() or 0
+        owners = (
+            base.order_by(models.User.storefront_slug.asc())
+            .offset((page - 1) * page_size)
+            .limit(page_size)
             .all()
         )
-        for uid, pname in rows:
-            lst = matched.setdefault(uid, [])
-            if len(lst) < 3 and pname not in lst:
-                lst.append(pname)
+        results = [(o, []) for o in owners]
+    logos = presign_service.presign_many([o.logo_url for o, _ in results])
 
     return {
         "page": page,
@@ -1141,15 +1094,15 @@ def list_public_stores(
             {
                 "slug": o.storefront_slug,
                 "business_name": o.business_name or o.name,
-                "logo_url": _presign(o.logo_url),
+                "logo_url": logo,
                 "description": o.storefront_description,
                 "location": ", ".join(
                     p for p in [o.storefront_city, o.storefront_state] if p
                 )
                 or None,
-                "matched_products": matched.get(o.id, []),
+                "matched_products": matched,
             }
-            for o in owners
+            for (o, matched), logo in zip(results, logos)
         ],
     }
 
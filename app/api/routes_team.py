@@ -6,6 +6,7 @@ from sqlalchemy.orm import Session
 
 from pydantic import BaseModel as PydanticBaseModel
 
+from app.api.dependencies import PrincipalDep
 from app.api.rate_limit import limiter
 from app.api.routes_auth import get_current_user_id
 
@@ -31,7 +32,6 @@ from app.models.team_schemas import (
     UserTeamRole,
 )
 from app.services.team_service import TeamService
-from app.utils.feature_gate import FeatureGate
 
 router = APIRouter(prefix="/team", tags=["team"])
 
@@ -39,28 +39,27 @@ CurrentUserDep: TypeAlias = Annotated[int, Depends(get_current_user_id)]
 DbDep: TypeAlias = Annotated[Session, Depends(get_db)]
 
 
-def require_team_feature(current_user_id: CurrentUserDep, db: DbDep) -> int:
+def require_team_feature(principal: PrincipalDep) -> int:
     """
     Verify user has access to team features (Pro or Business plan).
     
     Raises HTTPException 403 if user doesn't have required plan.
     Returns the user_id if access is granted.
     """
-    gate = FeatureGate(db, current_user_id)
     # Team management uses same gate as inventory (Pro+)
     # Uses effective_plan to respect admin-granted PRO override
-    if not gate.user.effective_plan.features.get("inventory", False):
+    if not principal.plan.features.get("inventory", False):
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail={
                 "error": "feature_gated",
                 "message": "Team Management requires Pro plan or higher",
                 "required_plan": "PRO",
-                "current_plan": gate.user.effective_plan.value,
+                "current_plan": principal.plan.value,
                 "upgrade_url": "/settings/subscription"
             }
         )
-    return current_user_id
+    return principal.user_id
 
 
 TeamAccessDep: TypeAlias = Annotated[int, Depends(require_team_feature)]
@@ -74,14 +74,9 @@ def get_profile(
     invoice_balance = getattr(user, "invoice_balance", 0) or 0
     
     # Generate a fresh presigned URL for the logo (the stored URL expires)
-    fresh_logo_url = None
-    if user.logo_url:
-        from app.storage.s3_client import s3_client
-        logo_key = s3_client.extract_key_from_url(user.logo_url)
-        if logo_key:
-            fresh_logo_url = s3_client.get_presigned_url(logo_key, expires_in=3600)
-        if not fresh_logo_url:
-            fresh_logo_url = user.logo_url  # fallback to stored URL
+    from app.services.presign_service import presign_url
+
+    fresh_logo_url = presign_url(user.logo_url, expires_in=3600)  # stored URL if unsignable
 
     # Has the user ever created a revenue invoice? Drives the dashboard's
     # first-invoice activation prompt (invoices_this_month is deprecated/0, so
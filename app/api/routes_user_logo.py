@@ -54,9 +54,9 @@ async def upload_logo(
         ext = get_safe_extension(file.filename, file.content_type)
         # Shrink logos to a WebP the browser can render instantly (SVGs are left
         # alone by the optimizer since they can't be resized as bitmaps).
-        from app.utils.image_optimizer import optimize_for_storefront
+        from app.utils.image_optimizer import aoptimize_for_storefront
 
-        optimized, optimized_type = optimize_for_storefront(content, file.content_type)
+        optimized, optimized_type = await aoptimize_for_storefront(content, file.content_type)
         if optimized_type != file.content_type:
             ext = get_safe_extension(file.filename, optimized_type)
         key = f"logos/user_{current_user_id}.{ext}"
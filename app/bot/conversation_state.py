@@ -0,0 +1,171 @@
+"""Per-message snapshot of a sender's conversation state in Redis.
+
+Handling one inbound message used to cost a sequential Redis round-trip per
+helper: the onboarding session, the pending-feedback flag, the owed-list
+mapping and the 24-hour window marker. ``snapshot(sender)`` loads all of
+them with one MGET when a message arrives and exposes them as a typed
+:class:`ConversationState`; while it is active the helpers in
+``onboarding_flow``, ``owed_list_session``, ``conversation_window`` and
+``feedback_tasks`` read from it, and their writes/deletes are buffered and
+flushed in one pipeline when the message is done.
+
+Helpers go through :func:`read`, :func:`write` and :func:`remove`, which fall
+back to plain Redis calls for keys outside the active snapshot (or when no
+snapshot is active, e.g. in Celery tasks). Like the helpers themselves, all
+of this fails open: a Redis error never breaks message processing.
+"""
+from __future__ import annotations
+
+import json
+import logging
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+# Key prefixes owned by the helper modules above (kept in sync with them).
+ONBOARDING_PREFIX = "bot:onboarding:"
+FEEDBACK_PENDING_PREFIX = "feedback:pending:"
+OWED_LIST_PREFIX = "bot:owed_list:"
+WINDOW_PREFIX = "wa:window:"
+
+_PREFIXES = (ONBOARDING_PREFIX, FEEDBACK_PENDING_PREFIX, OWED_LIST_PREFIX, WINDOW_PREFIX)
+_DELETED = object()
+
+_current: ContextVar[ConversationState | None] = ContextVar("conversation_state", default=None)
+
+
+class ConversationState:
+    """Values of one sender's per-conversation keys, plus pending writes."""
+
+    def __init__(self, phone: str, values: dict[str, str | None]):
+        self.phone = phone
+        self._values: dict[str, Any] = dict(values)
+        self._writes: dict[str, tuple[int, str] | object] = {}
+
+    def covers(self, key: str) -> bool:
+        return key in self._values
+
+    def get(self, key: str) -> str | None:
+        value = self._values.get(key)
+        return None if value is _DELETED else value
+
+    def setex(self, key: str, ttl: int, value: str) -> None:
+        self._values[key] = value
+        self._writes[key] = (ttl, value)
+
+    def delete(self, key: str) -> None:
+        self._values[key] = _DELETED
+        self._writes[key] = _DELETED
+
+    # ── Typed views ──────────────────────────────────────────────
+    @property
+    def onboarding(self) -> dict[str, Any] | None:
+        return _json(self.get(ONBOARDING_PREFIX + self.phone))
+
+    @property
+    def feedback_pending(self) -> bool:
+        return bool(self.get(FEEDBACK_PENDING_PREFIX + self.phone))
+
+    @property
+    def owed_list(self) -> list[str] | None:
+        data = _json(self.get(OWED_LIST_PREFIX + self.phone))
+        return [str(x) for x in data] if isinstance(data, list) else None
+
+    @property
+    def window_open(self) -> bool:
+        return bool(self.get(WINDOW_PREFIX + self.phone))
+
+    def flush(self, r) -> None:
+        """Apply buffered writes in one (non-transactional) pipeline."""
+        if not self._writes:
+            return
+        writes, self._writes = self._writes, {}
+        try:
+            pipe = r.pipeline(transaction=False)
+            for key, op in writes.items():
+                if op is _DELETED:
+                    pipe.delete(key)
+                else:
+                    ttl, value = op  # type: ignore[misc]
+                    pipe.setex(key, ttl, value)
+            pipe.execute()
+        except Exception:  # noqa: BLE001
+            logger.warning("Failed to flush conversation state for %s", self.phone, exc_info=True)
+
+
+def _json(raw: str | None) -> Any:
+    if not raw:
+        return None
+    try:
+        return json.loads(raw)
+    except ValueError:
+        return None
+
+
+def _redis():
+    try:
+        from app.db.redis_client import get_redis_client
+
+        return get_redis_client()
+    except Exception:
+        return None
+
+
+def load(phone: str, r=None) -> ConversationState | None:
+    """Fetch every per-sender key in one MGET (None if Redis is unavailable)."""
+    r = r if r is not None else _redis()
+    if r is None:
+        return None
+    keys = [prefix + phone for prefix in _PREFIXES]
+    try:
+        values = r.mget(keys)
+    except Exception:  # noqa: BLE001
+        logger.debug("Conversation state MGET failed for %s", phone, exc_info=True)
+        return None
+    return ConversationState(phone, dict(zip(keys, values)))
+
+
+@contextmanager
+def snapshot(phone: str) -> Iterator[ConversationState | None]:
+    """Make ``phone``'s state current for the block; flush writes on exit."""
+    r = _redis()
+    state = load(phone, r)
+    if state is None:
+        yield None
+        return
+    token = _current.set(state)
+    try:
+        yield state
+    finally:
+        _current.reset(token)
+        state.flush(r)
+
+
+def current() -> ConversationState | None:
+    return _current.get()
+
+
+def read(r, key: str) -> str | None:
+    state = _current.get()
+    if state is not None and state.covers(key):
+        return state.get(key)
+    return r.get(key)
+
+
+def write(r, key: str, ttl: int, value: str) -> None:
+    state = _current.get()
+    if state is not None and state.covers(key):
+        state.setex(key, ttl, value)
+        return
+    r.setex(key, ttl, value)
+
+
+def remove(r, key: str) -> None:
+    state = _current.get()
+    if state is not None and state.covers(key):
+        state.delete(key)
+        return
+    r.delete(key)
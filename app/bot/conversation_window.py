@@ -9,6 +9,8 @@ from __future__ import annotations
 
 import logging
 
+from app.bot import conversation_state
+
 logger = logging.getLogger(__name__)
 
 _WA_WINDOW_PREFIX = "wa:window:"
@@ -21,7 +23,7 @@ def mark_conversation_active(phone: str) -> None:
         from app.db.redis_client import get_redis_client
 
         r = get_redis_client()
-        r.setex(f"{_WA_WINDOW_PREFIX}{phone}", _WA_WINDOW_TTL, "1")
+        conversation_state.write(r, f"{_WA_WINDOW_PREFIX}{phone}", _WA_WINDOW_TTL, "1")
     except Exception:
         # Redis failure should never break message processing
         logger.debug("Failed to mark conversation window for %s", phone)
@@ -32,8 +34,12 @@ def is_window_open(phone: str) -> bool:
     try:
         from app.db.redis_client import get_redis_client
 
+        key = f"{_WA_WINDOW_PREFIX}{phone}"
+        state = conversation_state.current()
+        if state is not None and state.covers(key):
+            return bool(state.get(key))
         r = get_redis_client()
-        return r.exists(f"{_WA_WINDOW_PREFIX}{phone}") > 0
+        return r.exists(key) > 0
     except Exception:
         logger.debug("Failed to check conversation window for %s", phone)
         return False
@@ -49,15 +49,9 @@ class ExpenseIntentProcessor:
             return False
         
         # Get user from phone number (handle all Nigerian phone format variants)
-        from app.models.models import User
-        from app.utils.phone import get_phone_variants
+        from app.services.phone_resolution import resolve_user
 
-        phone_candidates = get_phone_variants(sender)
-        user = (
-            self.db.query(User)
-            .filter(User.phone.in_(list(phone_candidates)))
-            .first()
-        )
+        user = resolve_user(self.db, sender)
         
         if not user:
             self.client.send_text(
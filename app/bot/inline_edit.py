@@ -15,6 +15,7 @@ from datetime import datetime, timedelta, timezone
 from typing import Any
 
 from app.models import models
+from app.services.cache_service import invalidate_invoice_tags
 from app.utils.currency_fmt import fmt_money
 
 logger = logging.getLogger(__name__)
@@ -103,6 +104,7 @@ def try_handle_inline_edit(
         db.add(invoice)
         db.commit()
         db.refresh(invoice)
+        invalidate_invoice_tags(issuer_id, invoice.customer_id, invoice.invoice_id)
     except Exception:  # noqa: BLE001
         logger.exception("inline edit failed for invoice %s", invoice.invoice_id)
         try:
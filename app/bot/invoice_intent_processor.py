@@ -8,6 +8,7 @@ from typing import Any
 
 from sqlalchemy.orm import Session
 
+from app.bot.session_store import SessionStore
 from app.bot.whatsapp_client import WhatsAppClient
 from app.core.config import settings
 from app.core.exceptions import InvoiceBalanceExhaustedError, MissingBankDetailsError
@@ -20,7 +21,7 @@ logger = logging.getLogger(__name__)
 # ── Pending-price session store ─────────────────────────────────
 # When a user sends quantity-only items ("5 wig, 10 shoe") and has
 # no product catalog, the bot asks for prices and stores state here.
-# Same ephemeral pattern as product_invoice_flow._carts.
+# Kept in the shared session store, like product_invoice_flow carts.
 
 _PRICE_TTL = 900  # 15 minutes
 
@@ -33,27 +34,41 @@ class PendingPriceSession:
     lines: list[dict[str, Any]]  # [{description, quantity}, ...]
     data: dict[str, Any]         # original parsed data (name, phone, etc.)
     created_at: float = field(default_factory=time.time)
+    # Store version this session was loaded at (optimistic concurrency).
+    version: int = field(default=0, compare=False)
 
     @property
     def is_expired(self) -> bool:
         return (time.time() - self.created_at) > _PRICE_TTL
 
 
-_pending_prices: dict[str, PendingPriceSession] = {}
+_pending_prices: SessionStore[PendingPriceSession] = SessionStore(
+    "bot:pending_price:",
+    _PRICE_TTL,
+    dump=lambda s: {"u": s.user_id, "l": s.lines, "d": s.data, "t": s.created_at},
+    load=lambda d: PendingPriceSession(
+        user_id=int(d["u"]), lines=d["l"], data=d["d"], created_at=float(d["t"])
+    ),
+)
 
 
 def get_pending_price_session(phone: str) -> PendingPriceSession | None:
     """Get active pending-price session, or None if expired/missing."""
     session = _pending_prices.get(phone)
     if session and session.is_expired:
-        del _pending_prices[phone]
+        _pending_prices.delete(phone)
         return None
     return session
 
 
+def save_pending_price_session(phone: str, session: PendingPriceSession) -> None:
+    """Start (or replace) the pending-price session for phone."""
+    _pending_prices.save(phone, session, force=True)
+
+
 def clear_pending_price_session(phone: str) -> None:
     """Remove pending-price session for phone."""
-    _pending_prices.pop(phone, None)
+    _pending_prices.delete(phone)
 
 
 class InvoiceIntentProcessor:
@@ -1227,17 +1242,15 @@ class InvoiceIntentProcessor:
         """
         from decimal import Decimal
 
-        from app.bot.product_invoice_flow import _fuzzy_match_product
-        from app.services.inventory.product_service import ProductService
+        from app.services.inventory.product_match import get_match_index
 
         try:
-            product_svc = ProductService(self.db, issuer_id)
-            products, _ = product_svc.list_products(page=1, page_size=50)
+            index = get_match_index(self.db, issuer_id)
         except Exception:
             logger.warning("Could not load products for user %s", issuer_id)
-            products = []
+            index = None
 
-        if not products:
+        if not index:
             # No inventory — ask user for prices conversationally
             if data is not None:
                 self._start_pending_price_session(sender, issuer_id, lines, data)
@@ -1253,18 +1266,15 @@ class InvoiceIntentProcessor:
                 )
             return None
 
-        product_cache: list[tuple[str, Any]] = [
-            (p.name.lower(), p) for p in products
-        ]
+        # One pass over the whole catalog for every line.
+        matches = index.resolve(self.db, [line.get("description") or "" for line in lines])
 
         resolved: list[dict[str, Any]] = []
         unmatched: list[str] = []
 
-        for line in lines:
-            desc = (line.get("description") or "").lower().strip()
+        for line, match in zip(lines, matches):
             qty = line.get("quantity", 1)
 
-            match = _fuzzy_match_product(desc, product_cache)
             if match and match.selling_price:
                 resolved.append({
                     "description": match.name,
@@ -1330,7 +1340,7 @@ class InvoiceIntentProcessor:
             ],
             data={k: v for k, v in data.items() if k not in ("lines", "amount")},
         )
-        _pending_prices[sender] = session
+        save_pending_price_session(sender, session)
 
         items_list = "\n".join(
             f"  {i + 1}. {l['description'].title()} (×{l['quantity']})"
@@ -1457,57 +1467,26 @@ class InvoiceIntentProcessor:
         return None
 
     def _resolve_issuer_id(self, sender_phone: str | None) -> int | None:
-        from app.models import models
-        from app.utils.phone import get_phone_variants
+        from app.services import phone_resolution
 
         if not sender_phone:
             return None
 
-        candidates = get_phone_variants(sender_phone)
-        if not candidates:
+        identity = phone_resolution.resolve_phone(self.db, sender_phone)
+        if identity is None:
+            logger.warning("No user found for WhatsApp number: %s", sender_phone)
             return None
-        
-        logger.info("[RESOLVE_ISSUER] Looking for user with phone candidates: %s", candidates)
-
-        # First try verified phones
-        user = (
-            self.db.query(models.User)
-            .filter(
-                models.User.phone.in_(list(candidates)),
-                models.User.phone_verified.is_(True),
-            )
-            .first()
-        )
 
-        if user:
-            user_identifier = getattr(user, "email", None) or user.phone
-            logger.info(
-                "Resolved WhatsApp %s → User ID %s (%s)",
-                sender_phone,
-                user.id,
-                user_identifier,
-            )
-            return user.id
-
-        # Auto-verify: user saved this phone in settings and is now messaging
-        # from it — WhatsApp guarantees the sender's number, so this proves ownership
-        unverified_user = (
-            self.db.query(models.User)
-            .filter(
-                models.User.phone.in_(list(candidates)),
-                models.User.phone_verified.is_(False),
-            )
-            .first()
-        )
-        if unverified_user:
-            unverified_user.phone_verified = True
-            self.db.commit()
+        if not identity.verified:
+            # Auto-verify: user saved this phone in settings and is now messaging
+            # from it — WhatsApp guarantees the sender's number, so this proves ownership
+            phone_resolution.mark_verified(self.db, sender_phone, identity)
             logger.info(
                 "Auto-verified phone for user %s (sender: %s)",
-                unverified_user.id,
+                identity.user_id,
                 sender_phone,
             )
-            return unverified_user.id
+            return identity.user_id
 
-        logger.warning("No user found for WhatsApp number: %s", sender_phone)
-        return None
+        logger.debug("Resolved WhatsApp %s → User ID %s", sender_phone, identity.user_id)
+        return identity.user_id
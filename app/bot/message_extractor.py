@@ -1,13 +1,153 @@
+"""Normalise WhatsApp Cloud API webhook payloads.
+
+Under load Meta batches several messages and delivery statuses into a single
+webhook POST — across multiple ``entry`` items, ``changes`` and list
+positions. ``iter_messages``/``iter_statuses`` walk all of them;
+``split_payload`` re-wraps each inbound message as its own single-message
+payload so it can be queued and handled independently, and
+``handle_statuses`` processes a batch of receipts in one pass.
+"""
 from __future__ import annotations
 
 import logging
+from collections import Counter
+from collections.abc import Iterable, Iterator
 from typing import Any
 
 logger = logging.getLogger(__name__)
 
 
+def _values(payload: dict[str, Any]) -> Iterator[tuple[dict[str, Any], dict[str, Any], dict[str, Any]]]:
+    """Yield (entry, change, value) for every change in a webhook payload."""
+    for entry in payload.get("entry") or []:
+        if not isinstance(entry, dict):
+            continue
+        for change in entry.get("changes") or []:
+            if not isinstance(change, dict):
+                continue
+            value = change.get("value") or {}
+            if isinstance(value, dict):
+                yield entry, change, value
+
+
+def _contact_for(value: dict[str, Any], sender: str | None) -> dict[str, Any] | None:
+    contacts = value.get("contacts") or []
+    for contact in contacts:
+        if isinstance(contact, dict) and contact.get("wa_id") == sender:
+            return contact
+    return contacts[0] if len(contacts) == 1 else None
+
+
+def split_payload(payload: dict[str, Any]) -> list[dict[str, Any]]:
+    """One single-message webhook payload per inbound message, in order.
+
+    Each keeps its entry/change envelope and only the sender's contact, so
+    ``extract_message`` sees exactly what Meta sends for an unbatched message.
+    Statuses are left out — see ``iter_statuses``.
+    """
+    if not isinstance(payload, dict):
+        return []
+    if "entry" not in payload:
+        return [payload]
+    singles: list[dict[str, Any]] = []
+    for entry, change, value in _values(payload):
+        rest = {k: v for k, v in value.items() if k not in ("messages", "statuses", "contacts")}
+        for message in value.get("messages") or []:
+            if not isinstance(message, dict):
+                continue
+            single_value = {**rest, "messages": [message]}
+            contact = _contact_for(value, message.get("from"))
+            if contact:
+                single_value["contacts"] = [contact]
+            singles.append({
+                **{k: v for k, v in payload.items() if k != "entry"},
+                "entry": [{
+                    **{k: v for k, v in entry.items() if k != "changes"},
+                    "changes": [{**change, "value": single_value}],
+                }],
+            })
+    return singles
+
+
+def iter_statuses(payload: dict[str, Any]) -> Iterator[dict[str, Any]]:
+    """Every delivery status (sent/delivered/read/failed) in a payload."""
+    if not isinstance(payload, dict):
+        return
+    for _entry, _change, value in _values(payload):
+        for status in value.get("statuses") or []:
+            if isinstance(status, dict):
+                yield status
+
+
+def handle_statuses(statuses: Iterable[dict[str, Any]]) -> dict[str, int]:
+    """Process a batch of delivery receipts; returns counts per status.
+
+    Successful receipts only need a tally. Failed ones are logged and, if the
+    wamid belongs to a pending OTP, flagged so the frontend can surface it to
+    the user instead of leaving them on a spinning OTP screen.
+    """
+    counts: Counter[str] = Counter()
+    failures: list[tuple[str, Any, Any, str]] = []
+    for status in statuses:
+        counts[str(status.get("status") or "unknown")] += 1
+        errors = status.get("errors") or []
+        if not errors:
+            continue
+        err = errors[0]
+        wamid = status.get("id")
+        err_code = err.get("code")
+        err_title = err.get("title")
+        err_detail = (err.get("error_data") or {}).get("details", "")
+        logger.warning(
+            "[STATUS] Delivery FAILED to %s: wamid=%s code=%s title=%s -- %s",
+            status.get("recipient_id"),
+            wamid,
+            err_code,
+            err_title,
+            err_detail,
+        )
+        if wamid:
+            failures.append((wamid, err_code, err_title, err_detail))
+    if counts:
+        logger.debug("[STATUS] receipts %s", dict(counts))
+    if failures:
+        try:
+            from app.services.otp_service import OTPService
+
+            otp = OTPService()
+        except Exception:  # noqa: BLE001
+            logger.exception("Failed to record %d delivery failures", len(failures))
+            return dict(counts)
+        for wamid, err_code, err_title, err_detail in failures:
+            try:
+                otp.record_delivery_failure(
+                    wamid=wamid,
+                    error_code=err_code,
+                    error_title=err_title,
+                    error_detail=err_detail,
+                )
+            except Exception:  # noqa: BLE001
+                logger.exception("Failed to record OTP delivery failure for wamid=%s", wamid)
+    return dict(counts)
+
+
+def iter_messages(payload: dict[str, Any]) -> Iterator[dict[str, Any]]:
+    """Every inbound message in a payload, normalised (see ``extract_message``).
+
+    ``raw`` on each item is that message's single-message payload.
+    """
+    for single in split_payload(payload):
+        message = _normalize(single)
+        if message is not None:
+            yield message
+
+
 def extract_message(payload: dict[str, Any]) -> dict[str, Any] | None:
-    """Extract the first message object from a WhatsApp webhook payload."""
+    """Extract the first message object from a WhatsApp webhook payload.
+
+    A payload with no messages is a status webhook; its receipts are handled
+    here and ``None`` is returned.
+    """
     if not isinstance(payload, dict):
         return None
 
@@ -18,55 +158,22 @@ def extract_message(payload: dict[str, Any]) -> dict[str, Any] | None:
         return message
 
     try:
-        entry = payload.get("entry", [])[0]
-        change = entry.get("changes", [])[0]
-        value = change.get("value", {})
-        messages = value.get("messages", [])
-        if not messages:
-            # Status webhooks (sent/delivered/read/failed) don't contain
-            # messages -- they are delivery receipts, not inbound messages.
-            statuses = value.get("statuses", [])
-            if statuses:
-                status = statuses[0]
-                logger.debug(
-                    "[STATUS] recipient=%s status=%s timestamp=%s",
-                    status.get("recipient_id"),
-                    status.get("status"),
-                    status.get("timestamp"),
-                )
-                errors = status.get("errors", [])
-                if errors:
-                    err = errors[0]
-                    wamid = status.get("id")
-                    err_code = err.get("code")
-                    err_title = err.get("title")
-                    err_detail = err.get("error_data", {}).get("details", "")
-                    logger.warning(
-                        "[STATUS] Delivery FAILED to %s: wamid=%s code=%s title=%s -- %s",
-                        status.get("recipient_id"),
-                        wamid,
-                        err_code,
-                        err_title,
-                        err_detail,
-                    )
-                    # If this wamid corresponds to a pending OTP, flag the
-                    # delivery failure so the frontend can surface it to the
-                    # user instead of leaving them on a spinning OTP screen.
-                    if wamid:
-                        try:
-                            from app.services.otp_service import OTPService
-
-                            OTPService().record_delivery_failure(
-                                wamid=wamid,
-                                error_code=err_code,
-                                error_title=err_title,
-                                error_detail=err_detail,
-                            )
-                        except Exception:  # noqa: BLE001
-                            logger.exception("Failed to record OTP delivery failure for wamid=%s", wamid)
-            return None
+        for message in iter_messages(payload):
+            return message
+        # Status webhooks (sent/delivered/read/failed) don't contain
+        # messages -- they are delivery receipts, not inbound messages.
+        handle_statuses(iter_statuses(payload))
+        return None
+    except Exception as exc:  # noqa: BLE001
+        logger.exception("Failed to parse WhatsApp webhook payload: %s", exc)
+        return None
+
 
-        message = messages[0]
+def _normalize(payload: dict[str, Any]) -> dict[str, Any] | None:
+    """Normalise the single message in a ``split_payload`` item."""
+    try:
+        value = payload["entry"][0]["changes"][0]["value"]
+        message = value["messages"][0]
         sender = message.get("from")
         if not sender:
             return None
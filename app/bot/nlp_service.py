@@ -37,7 +37,51 @@ class NLPService:
     # Email pattern
     # Matches: user@example.com, name.surname@company.co.uk
     EMAIL_PATTERN = re.compile(r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b")
-    
+
+    # Phones written with spaces: "0902018 0595", "090 2018 0595"
+    SPACED_PHONE_PATTERN = re.compile(r"(0[789][\d\s]{8,12})")
+
+    # ---------- line-item tokenizer ----------
+    # Everything _extract_line_items strips or rewrites before it pairs
+    # amounts with descriptions, as one alternation so the message is
+    # scanned once. At each position the first alternative wins:
+    #   email      → dropped
+    #   phone      → dropped (any format, so every variant of the sender's
+    #                customer phone goes too)
+    #   thousands  → "11,000" / "20,00" / "5,0" joined (groups may carry
+    #                'k' or a currency marker: "5k,50", "₦500,₦500")
+    #   kilo       → "5k" → "5000"
+    #   currency   → "₦", "$", "n" before 3+ digits, "usd", "ngn", "dollar(s)"
+    #   date_word  → "for", "due", "tomorrow", "today", "next week"
+    #                (substrings, as before: "uniform" → "uni m")
+    #   comma      → space
+    _INVOICE_PREFIX = re.compile(r"^invoice\s+")
+    _INVOICE_NAME_PREFIX = re.compile(r"^invoice(?:\s+[a-zA-Z]+)+\s*")
+    _DATE_WORD_PATTERN = re.compile(r"for|due|tomorrow|today|next week")
+    _ITEM_TOKEN_PATTERN = re.compile(
+        r"(?P<email>\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b)"
+        r"|(?P<phone>\+?(?:\+?234[7-9]\d{9}|0[7-9]\d{9}|[7-9]\d{9}|\+[1-9]\d{6,14}))"
+        r"|(?P<thousands>\d+(?:k\b)?(?:,(?:[₦$]|n(?=\d{3}))*(?:\d+k\b|\d{1,3}(?!\d)))+)"
+        r"|(?P<kilo>\b\d+k\b)"
+        r"|(?P<currency>[₦$]|\bn(?=\d{3,})|\b(?:usd|ngn|dollars?)\b)"
+        r"|(?P<date_word>for|due|tomorrow|today|next week)"
+        r"|(?P<comma>,)"
+    )
+    # Thousands separators, tried in this order over a comma-joined number
+    _THOUSANDS_PATTERNS = (
+        re.compile(r"(\d),(\d{3})\b"),  # 11,000 → 11000
+        re.compile(r"(\d),(\d{2})\b"),  # 20,00 → 2000 (typo)
+        re.compile(r"(\d),(\d{1})\b"),  # 5,0 → 50 (edge case)
+    )
+    _WORD_CHAR = re.compile(r"\w")
+    # Amounts after tokenizing: USD accepts 1+ digit ($5, $50); NGN needs 3+
+    _ITEM_AMOUNT_PATTERN = re.compile(r"\b(\d{3,})\b")
+    _ITEM_USD_AMOUNT_PATTERN = re.compile(r"\b(\d{1,})\b")
+    _ITEM_QUANTITY_PATTERN = re.compile(r"\b(\d{1,2})\s+([a-zA-Z][a-zA-Z\s]*?)(?=\s+\d|\s*$)")
+    _FOR_DESCRIPTION_PATTERN = re.compile(
+        r"\bfor\s+([a-zA-Z][a-zA-Z\s]+?)(?:\s+due|\s*$)", re.IGNORECASE
+    )
+
     # Filler words to remove from speech transcripts
     FILLER_WORDS = ["uhh", "umm", "like", "you know", "so", "basically", "actually"]
     
@@ -60,6 +104,13 @@ class NLPService:
         r"\bfive thousand\b": "5000",
         r"\bten thousand\b": "10000",
     }
+    _FILLER_PATTERN = re.compile(r"\b(?:" + "|".join(FILLER_WORDS) + r")\b", re.IGNORECASE)
+    # One group per NUMBER_WORDS entry (n0, n1, ...), in the same order
+    _NUMBER_WORDS_PATTERN = re.compile(
+        "|".join(f"(?P<n{i}>{pattern})" for i, pattern in enumerate(NUMBER_WORDS)),
+        re.IGNORECASE,
+    )
+    _NUMBER_WORD_VALUES = tuple(NUMBER_WORDS.values())
 
     DIGIT_WORDS = {
         "zero": "0",
@@ -133,7 +184,7 @@ class NLPService:
             "why", "where", "when",
         )
         stripped = text.strip().rstrip("?")
-        if any(stripped.startswith(q) for q in question_starters):
+        if stripped.startswith(question_starters):
             return True
         # Ends with "?" and doesn't start with "invoice" (an actual command)
         if text.strip().endswith("?") and not stripped.startswith("invoice"):
@@ -148,15 +199,15 @@ class NLPService:
         DRY: Single place for all speech cleaning logic.
         """
         # Remove filler words
-        for filler in self.FILLER_WORDS:
-            text = re.sub(rf"\b{filler}\b", "", text, flags=re.IGNORECASE)
+        text = self._FILLER_PATTERN.sub("", text)
         
         # Convert spoken numbers to digits
-        for pattern, number in self.NUMBER_WORDS.items():
-            text = re.sub(pattern, number, text, flags=re.IGNORECASE)
+        text = self._NUMBER_WORDS_PATTERN.sub(
+            lambda m: self._NUMBER_WORD_VALUES[int(m.lastgroup[1:])], text
+        )
         
         # Normalize whitespace
-        text = re.sub(r"\s+", " ", text).strip()
+        text = " ".join(text.split())
 
         # Convert sequences of digit words (e.g. "zero eight") into numeric strings
         tokens = []
@@ -208,8 +259,7 @@ class NLPService:
             # Try to find phone with spaces: look for digit sequences that form a phone
             # Pattern: starts with 0 or +, followed by digits (possibly with spaces)
             # E.g., "0902018 0595" or "090 2018 0595"
-            space_phone_pattern = re.compile(r"(0[789][\d\s]{8,12})")
-            space_match = space_phone_pattern.search(text)
+            space_match = self.SPACED_PHONE_PATTERN.search(text)
             if space_match:
                 # Remove all spaces to get clean phone number
                 phone = space_match.group(1).replace(" ", "")
@@ -243,7 +293,7 @@ class NLPService:
             Extracted name or 'Customer' as fallback.
         """
         # Remove 'invoice' prefix and split
-        clean = re.sub(r"^invoice\s+", "", text.lower())
+        clean = self._INVOICE_PREFIX.sub("", text.lower())
         tokens = clean.replace(",", " ").split()
         
         # First pass: look for known common names
@@ -516,6 +566,49 @@ class NLPService:
             "lines": lines,
         }
     
+    def _item_token(self, match: re.Match[str]) -> str:
+        """Replacement for one ``_ITEM_TOKEN_PATTERN`` match."""
+        kind = match.lastgroup
+        if kind == "thousands":
+            return self._join_thousands(match)
+        if kind == "kilo":
+            return str(int(match.group()[:-1]) * 1000)
+        if kind == "currency":
+            return ""
+        return " "  # email, phone, date word, leftover comma
+
+    def _join_thousands(self, match: re.Match[str]) -> str:
+        """Join a comma-formatted number ("11,000" → "11000", "5k,50" → "500050").
+
+        Each group is cleaned the way the rest of the message is ('k'
+        expanded, currency marker dropped), then the separator passes run in
+        order over the number alone. A group is only joined when a word
+        boundary follows it; a date word right after the number counts as
+        one (it is blanked out).
+        """
+        text, start, end = match.string, match.start(), match.end()
+        groups = match.group().split(",")
+        for i, group in enumerate(groups):
+            bare = group.lstrip("₦$")
+            n_prefixed = bare.startswith("n")
+            if n_prefixed:
+                bare = bare[1:]
+            # "5k" only expands at a word start ("n500k" and "a5k" don't)
+            at_word_start = i > 0 or start == 0 or not self._WORD_CHAR.match(text, start - 1)
+            if bare.endswith("k") and at_word_start and not n_prefixed:
+                bare = str(int(bare[:-1]) * 1000)
+            groups[i] = bare
+        bounded = (
+            match.group().endswith("k")
+            or end == len(text)
+            or not self._WORD_CHAR.match(text, end)
+            or bool(self._DATE_WORD_PATTERN.match(text, end))
+        )
+        joined = ",".join(groups) + (" " if bounded else "x")
+        for pattern in self._THOUSANDS_PATTERNS:
+            joined = pattern.sub(r"\1\2", joined)
+        return joined[:-1].replace(",", " ")
+
     def _extract_line_items(
         self,
         text: str,
@@ -541,51 +634,12 @@ class NLPService:
         """
         lines = []
         
-        # Remove common prefixes to focus on item data
-        clean_text = text.lower()
-        
         # Remove "invoice" and customer name (consecutive alpha tokens after invoice)
-        clean_text = re.sub(r"^invoice(?:\s+[a-zA-Z]+)+\s*", "", clean_text)
-        
-        # Expand 'k' shorthand BEFORE stripping symbols (5k→5000, 10k→10000)
-        clean_text = re.sub(r"\b(\d+)k\b", lambda m: str(int(m.group(1)) * 1000), clean_text)
-        
-        # Strip currency symbols/prefixes so amounts are clean digits
-        # Support 'N' as informal Naira shorthand (N5000 → 5000)
-        clean_text = clean_text.replace("₦", "").replace("$", "")
-        clean_text = re.sub(r"\bn(\d{3,})", r"\1", clean_text)  # N5000 → 5000
-        clean_text = re.sub(r"\busd\b", "", clean_text)
-        clean_text = re.sub(r"\bngn\b", "", clean_text)
-        clean_text = re.sub(r"\bdollars?\b", "", clean_text)
-        
-        for word in ["for", "due", "tomorrow", "today", "next week"]:
-            clean_text = clean_text.replace(word, " ")
-        
-        # Remove phone number from text (include +prefix)
-        # IMPORTANT: Sort by length descending to avoid partial replacements
-        for variant in sorted(phone_variants, key=len, reverse=True):
-            clean_text = clean_text.replace("+" + variant.lower(), " ")
-            clean_text = clean_text.replace(variant.lower(), " ")
+        clean_text = self._INVOICE_NAME_PREFIX.sub("", text.lower())
         
-        # Also remove phone patterns directly (including + prefix)
-        clean_text = re.sub(r"\+?" + self.PHONE_PATTERN.pattern, " ", clean_text)
-        
-        # Remove email from text
-        clean_text = self.EMAIL_PATTERN.sub(" ", clean_text)
-        
-        # Normalize comma-formatted numbers FIRST
-        # Convert "11,000" to "11000" but handle edge cases
-        # Pattern: digit,digit (e.g., "11,000" but not "wig, shoe")
-        # Also handle typos like "20,00" (2 digits after comma) → "2000"
-        clean_text = re.sub(r"(\d),(\d{3})\b", r"\1\2", clean_text)  # 11,000 → 11000
-        clean_text = re.sub(r"(\d),(\d{2})\b", r"\1\2", clean_text)  # 20,00 → 2000 (typo)
-        clean_text = re.sub(r"(\d),(\d{1})\b", r"\1\2", clean_text)  # 5,0 → 50 (edge case)
-        
-        # Remove any remaining commas (now safe since amounts are normalized)
-        clean_text = clean_text.replace(",", " ")
-        
-        # Normalize whitespace
-        clean_text = re.sub(r"\s+", " ", clean_text).strip()
+        # Strip phones, emails, currency markers and date words, expand 'k'
+        # shorthand and join comma-formatted amounts in a single pass
+        clean_text = " ".join(self._ITEM_TOKEN_PATTERN.sub(self._item_token, clean_text).split())
         
         # Strategy: Use regex to find all <amount> <description> pairs
         # or <quantity> <description> at <amount> patterns
@@ -597,8 +651,7 @@ class NLPService:
         
         # Find all amounts and their positions
         # USD amounts can be 1+ digit ($5, $50); NGN needs 3+ digits
-        min_digits = 1 if is_usd else 3
-        amount_pattern = re.compile(rf"\b(\d{{{min_digits},}})\b")
+        amount_pattern = self._ITEM_USD_AMOUNT_PATTERN if is_usd else self._ITEM_AMOUNT_PATTERN
         matches = list(amount_pattern.finditer(clean_text))
         
         if matches:
@@ -617,7 +670,6 @@ class NLPService:
                         prev_end = match.end()
                         continue
                     description = clean_text[prev_end:match.start()].strip()
-                    description = re.sub(r"^[\s,]+|[\s,]+$", "", description)
 
                     if description and not description.isdigit():
                         lines.append({
@@ -646,8 +698,6 @@ class NLPService:
                     # Extract description between this amount and the next
                     description = clean_text[amount_start:desc_end].strip()
 
-                    # Clean up description - remove leading/trailing punctuation
-                    description = re.sub(r"^[\s,]+|[\s,]+$", "", description)
 
                     if description and not description.isdigit():
                         lines.append({
@@ -682,10 +732,7 @@ class NLPService:
         # e.g., "5 wig 10 shoe 20 pack" → quantities without unit prices
         # These need inventory price lookup downstream.
         if not lines:
-            qty_pattern = re.compile(
-                r"\b(\d{1,2})\s+([a-zA-Z][a-zA-Z\s]*?)(?=\s+\d|\s*$)"
-            )
-            qty_matches = qty_pattern.findall(clean_text)
+            qty_matches = self._ITEM_QUANTITY_PATTERN.findall(clean_text)
             for qty_str, desc in qty_matches:
                 qty = int(qty_str)
                 desc = desc.strip()
@@ -701,7 +748,7 @@ class NLPService:
     def _extract_description(self, text: str) -> str:
         """Extract item description from text (for single-item invoices)."""
         # Look for "for <description>" pattern
-        for_match = re.search(r"\bfor\s+([a-zA-Z][a-zA-Z\s]+?)(?:\s+due|\s*$)", text, re.IGNORECASE)
+        for_match = self._FOR_DESCRIPTION_PATTERN.search(text)
         if for_match:
             return for_match.group(1).strip().capitalize()
         
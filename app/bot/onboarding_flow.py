@@ -19,6 +19,8 @@ import time
 from dataclasses import asdict, dataclass, field
 from typing import Any
 
+from app.bot import conversation_state
+
 logger = logging.getLogger(__name__)
 
 _ONBOARDING_TTL = 1800  # 30 minutes
@@ -79,7 +81,7 @@ def _save_session(phone: str, session: OnboardingSession) -> None:
     if r is None:
         return
     try:
-        r.setex(_redis_key(phone), _ONBOARDING_TTL, json.dumps(asdict(session)))
+        conversation_state.write(r, _redis_key(phone), _ONBOARDING_TTL, json.dumps(asdict(session)))
     except Exception:
         logger.exception("Failed to persist onboarding session for %s", phone)
 
@@ -93,13 +95,13 @@ def get_onboarding_session(phone: str) -> OnboardingSession | None:
     r = _redis()
     if r is not None:
         try:
-            raw = r.get(_redis_key(phone))
+            raw = conversation_state.read(r, _redis_key(phone))
             if raw:
                 data = json.loads(raw)
                 session = OnboardingSession(**data)
                 if session.is_expired:
                     try:
-                        r.delete(_redis_key(phone))
+                        conversation_state.remove(r, _redis_key(phone))
                     except Exception:
                         pass
                     _sessions.pop(phone, None)
@@ -334,7 +336,7 @@ def clear_onboarding(phone: str) -> None:
     r = _redis()
     if r is not None:
         try:
-            r.delete(_redis_key(phone))
+            conversation_state.remove(r, _redis_key(phone))
         except Exception:
             logger.exception("Failed to clear onboarding session for %s", phone)
 
@@ -12,6 +12,8 @@ from __future__ import annotations
 import json
 import logging
 
+from app.bot import conversation_state
+
 logger = logging.getLogger(__name__)
 
 _TTL = 600  # 10 minutes
@@ -37,7 +39,7 @@ def save_owed_list(phone: str, invoice_ids: list[str]) -> None:
     if r is None:
         return
     try:
-        r.setex(_key(phone), _TTL, json.dumps(invoice_ids))
+        conversation_state.write(r, _key(phone), _TTL, json.dumps(invoice_ids))
     except Exception:
         logger.exception("Failed to save owed-list session for %s", phone)
 
@@ -48,7 +50,7 @@ def get_owed_list(phone: str) -> list[str] | None:
     if r is None:
         return None
     try:
-        raw = r.get(_key(phone))
+        raw = conversation_state.read(r, _key(phone))
         if not raw:
             return None
         data = json.loads(raw)
@@ -64,6 +66,6 @@ def clear_owed_list(phone: str) -> None:
     if r is None:
         return
     try:
-        r.delete(_key(phone))
+        conversation_state.remove(r, _key(phone))
     except Exception:
         logger.exception("Failed to clear owed-list session for %s", phone)
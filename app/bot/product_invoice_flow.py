@@ -10,21 +10,23 @@ Flow:
        shows matched cart and asks for customer
     3. Business replies "Joy 08012345678" → invoice created with product_ids
 
-All state is ephemeral (in-memory with TTL). No DB writes until invoice creation.
+Carts are ephemeral (shared session store with TTL, see ``app.bot.session_store``).
+No DB writes until invoice creation.
 """
 from __future__ import annotations
 
 import logging
 import re
 import time
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, replace
 from decimal import Decimal
 from typing import Any
 
 from sqlalchemy.orm import Session
 
+from app.bot.session_store import SessionStore
 from app.bot.whatsapp_client import WhatsAppClient
-from app.models.inventory_models import Product
+from app.services.inventory.product_match import get_match_index
 from app.services.inventory.product_service import ProductService
 from app.utils.currency_fmt import fmt_money, get_user_currency
 
@@ -54,9 +56,9 @@ class CartSession:
     items: list[CartItem] = field(default_factory=list)
     # Conversation step: "awaiting_items" | "awaiting_customer"
     step: str = "awaiting_items"
-    # Cached product catalog for fuzzy matching (name_lower, Product)
-    _products_cache: list[tuple[str, Product]] = field(default_factory=list)
     created_at: float = field(default_factory=time.time)
+    # Store version this cart was loaded at (optimistic concurrency).
+    version: int = field(default=0, compare=False)
 
     @property
     def is_expired(self) -> bool:
@@ -81,70 +83,47 @@ class CartSession:
         return self.cart_summary_fmt("NGN")
 
 
-# In-memory cart store (phone → CartSession)
-# In production with multiple workers, use Redis. For single-worker Render, this is fine.
-_carts: dict[str, CartSession] = {}
+def _dump_cart(session: CartSession) -> dict[str, Any]:
+    return {
+        "u": session.user_id,
+        "s": session.step,
+        "t": session.created_at,
+        "i": [[i.product_id, i.product_name, i.quantity, i.unit_price] for i in session.items],
+    }
+
+
+def _load_cart(data: dict[str, Any]) -> CartSession:
+    return CartSession(
+        user_id=int(data["u"]),
+        step=data["s"],
+        created_at=float(data["t"]),
+        items=[CartItem(int(pid), name, int(qty), Decimal(price)) for pid, name, qty, price in data["i"]],
+    )
+
+
+# Shared cart store (phone → CartSession), so any worker can handle the next message.
+_carts: SessionStore[CartSession] = SessionStore(
+    "bot:cart:", CART_TTL_SECONDS, dump=_dump_cart, load=_load_cart
+)
 
 
 def get_cart(phone: str) -> CartSession | None:
     """Get active cart for phone, or None if expired/missing."""
     session = _carts.get(phone)
     if session and session.is_expired:
-        del _carts[phone]
+        _carts.delete(phone)
         return None
     return session
 
 
-def clear_cart(phone: str) -> None:
-    """Remove cart for phone."""
-    _carts.pop(phone, None)
-
-
-def _fuzzy_match_product(
-    query: str,
-    products: list[tuple[str, Product]],
-) -> Product | None:
-    """
-    Fuzzy-match a query string against the user's product catalog.
-
-    Matching strategy (in order of priority):
-        1. Exact name match (case-insensitive)
-        2. Query is a substring of product name ("wig" matches "Brazilian Wig")
-        3. Product name starts with query ("sh" matches "Shoe")
-        4. Any word in product name starts with query ("br" matches "Brazilian Wig")
-
-    Returns the best-matching Product, or None.
-    """
-    query_lower = query.lower().strip()
-    if not query_lower:
-        return None
-
-    # 1. Exact match
-    for name_lower, product in products:
-        if name_lower == query_lower:
-            return product
-
-    # 2. Substring match (prefer shorter names = more specific)
-    substring_matches = [
-        (name_lower, product)
-        for name_lower, product in products
-        if query_lower in name_lower
-    ]
-    if substring_matches:
-        return min(substring_matches, key=lambda x: len(x[0]))[1]
+def save_cart(phone: str, session: CartSession, *, force: bool = False) -> bool:
+    """Store the cart; False if another message changed it since it was loaded."""
+    return _carts.save(phone, session, force=force)
 
-    # 3. Starts-with
-    for name_lower, product in products:
-        if name_lower.startswith(query_lower):
-            return product
 
-    # 4. Any word starts with query
-    for name_lower, product in products:
-        words = name_lower.split()
-        if any(w.startswith(query_lower) for w in words):
-            return product
-
-    return None
+def clear_cart(phone: str) -> None:
+    """Remove cart for phone."""
+    _carts.delete(phone)
 
 
 def _parse_item_entries(text: str) -> list[tuple[int, str]]:
@@ -272,18 +251,14 @@ class ProductInvoiceFlow:
                 )
             return
 
-        # Build product catalog cache for fuzzy matching
-        product_cache = [(p.name.lower(), p) for p in products]
-
         # Preserve existing cart items if session exists (for "Add More")
         existing_session = get_cart(phone)
         if existing_session and existing_session.user_id == user_id:
-            existing_session._products_cache = product_cache
             existing_session.step = "awaiting_items"
             session = existing_session
         else:
-            session = CartSession(user_id=user_id, _products_cache=product_cache)
-            _carts[phone] = session
+            session = CartSession(user_id=user_id)
+        save_cart(phone, session, force=True)
 
         # Resolve user's preferred display currency
         currency = get_user_currency(self.db, user_id)
@@ -328,22 +303,19 @@ class ProductInvoiceFlow:
         if not session or session.step != "awaiting_items":
             return False
 
-        # Reload product cache if empty
-        if not session._products_cache:
-            product_svc = ProductService(self.db, session.user_id)
-            products, _ = product_svc.list_products(page=1, page_size=50)
-            session._products_cache = [(p.name.lower(), p) for p in products]
-
         entries = _parse_item_entries(text)
         if not entries:
             return False
 
+        # Match every line against the whole catalog in one pass.
+        index = get_match_index(self.db, session.user_id)
+        products = index.resolve(self.db, [desc for _, desc in entries])
+
         matched: list[CartItem] = []
         unmatched: list[str] = []
         stock_warnings: list[str] = []
 
-        for qty, desc in entries:
-            product = _fuzzy_match_product(desc, session._products_cache)
+        for (qty, desc), product in zip(entries, products):
             if product:
                 # Check stock
                 if product.track_stock and qty > product.quantity_in_stock:
@@ -377,15 +349,26 @@ class ProductInvoiceFlow:
             )
             return True
 
-        # Merge matched items into cart (handle duplicates)
-        for new_item in matched:
-            existing = next(
-                (i for i in session.items if i.product_id == new_item.product_id), None
-            )
-            if existing:
-                existing.quantity += new_item.quantity
-            else:
-                session.items.append(new_item)
+        # Merge matched items into cart (handle duplicates). Re-applied to a
+        # fresh copy if another message changed the cart in the meantime.
+        def _merge(cart: CartSession) -> CartSession | None:
+            if cart.is_expired or cart.step != "awaiting_items":
+                return None
+            for new_item in matched:
+                existing = next(
+                    (i for i in cart.items if i.product_id == new_item.product_id), None
+                )
+                if existing:
+                    existing.quantity += new_item.quantity
+                else:
+                    cart.items.append(replace(new_item))
+            cart.step = "awaiting_customer"
+            return cart
+
+        session = _carts.update(phone, _merge)
+        if session is None:
+            self.client.send_text(phone, "⏰ Session expired. Type *products* to start again.")
+            return True
 
         # Resolve user's preferred display currency
         currency = get_user_currency(self.db, session.user_id)
@@ -402,8 +385,6 @@ class ProductInvoiceFlow:
         if stock_warnings:
             warn_text += "\n" + "\n".join(stock_warnings)
 
-        session.step = "awaiting_customer"
-
         self.client.send_text(
             phone,
             f"{added_text}{warn_text}\n\n"
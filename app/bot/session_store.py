@@ -0,0 +1,273 @@
+"""Shared, versioned store for short-lived bot conversation sessions.
+
+Carts and pending-price sessions used to live in module-level dicts: lost on
+restart, invisible to other workers (so every message from a phone had to
+reach the same process), never evicted unless the expired entry happened to
+be read, and holding live ORM objects. A :class:`SessionStore` keeps each
+session in Redis instead, under ``{prefix}{phone}`` with a TTL (refreshed on
+every save):
+
+- Values are compact JSON produced by the session's own ``dump``/``load``
+  (ids, names, prices, quantities — never ORM objects). Decimals and
+  datetimes round-trip through :func:`encode`/:func:`decode`.
+- Writes are optimistic: every session carries a ``version``; :meth:`save`
+  only succeeds if the stored version still matches (a Lua compare-and-set,
+  or WATCH/MULTI on servers without scripting), and :meth:`update` reloads
+  and re-applies a change when another worker got there first.
+
+Without Redis (or when a Redis call fails) the store falls back to a bounded
+in-process dict with the same TTL and version semantics, so a single worker
+keeps working (fail open).
+"""
+from __future__ import annotations
+
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Generic, Protocol, TypeVar
+
+logger = logging.getLogger(__name__)
+
+_LOCAL_MAX_ENTRIES = 10_000
+_UPDATE_ATTEMPTS = 3
+
+# KEYS[1]=session key ARGV: expected version ('' = any), body, ttl.
+# Returns the new version, or 0 if the stored version didn't match.
+_SAVE_LUA = """
+local cur = redis.call('GET', KEYS[1])
+local v = 0
+if cur then v = tonumber(string.match(cur, '^(%d+):')) or 0 end
+if ARGV[1] ~= '' and v ~= tonumber(ARGV[1]) then return 0 end
+redis.call('SET', KEYS[1], tostring(v + 1) .. ':' .. ARGV[2], 'EX', tonumber(ARGV[3]))
+return v + 1
+"""
+
+
+class Versioned(Protocol):
+    version: int
+
+
+S = TypeVar("S", bound=Versioned)
+
+
+# ── JSON codec for session payloads ─────────────────────────────────
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return {"$d": str(value)}
+    if isinstance(value, datetime):
+        return {"$t": value.isoformat()}
+    if isinstance(value, date):
+        return {"$day": value.isoformat()}
+    raise TypeError(f"Cannot store {type(value).__name__} in a bot session")
+
+
+def _hook(obj: dict[str, Any]) -> Any:
+    if len(obj) == 1:
+        if "$d" in obj:
+            return Decimal(obj["$d"])
+        if "$t" in obj:
+            return datetime.fromisoformat(obj["$t"])
+        if "$day" in obj:
+            return date.fromisoformat(obj["$day"])
+    return obj
+
+
+def encode(data: Any) -> str:
+    return json.dumps(data, default=_default, separators=(",", ":"))
+
+
+def decode(raw: str) -> Any:
+    return json.loads(raw, object_hook=_hook)
+
+
+def _split(raw: str | bytes | None) -> tuple[int, str | None]:
+    """``(version, body)`` of a stored ``"<version>:<json>"`` value."""
+    if raw is None:
+        return 0, None
+    if isinstance(raw, bytes):
+        raw = raw.decode()
+    version, _, body = raw.partition(":")
+    return (int(version), body) if version.isdigit() else (0, None)
+
+
+def _redis():
+    try:
+        from app.db.redis_client import get_redis_client
+
+        return get_redis_client()
+    except Exception:
+        return None
+
+
+class SessionStore(Generic[S]):
+    """Per-phone sessions of one kind (``prefix``), expiring ``ttl`` seconds after the last save."""
+
+    def __init__(
+        self,
+        prefix: str,
+        ttl: int,
+        *,
+        dump: Callable[[S], dict[str, Any]],
+        load: Callable[[dict[str, Any]], S],
+    ):
+        self.prefix = prefix
+        self.ttl = ttl
+        self._dump = dump
+        self._load = load
+        self._local: OrderedDict[str, tuple[int, str, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _key(self, phone: str) -> str:
+        return f"{self.prefix}{phone}"
+
+    def _materialise(self, version: int, body: str | None) -> S | None:
+        if body is None:
+            return None
+        try:
+            session = self._load(decode(body))
+        except Exception:  # noqa: BLE001 — unreadable (e.g. older format): treat as absent
+            logger.warning("Dropping unreadable %s session", self.prefix, exc_info=True)
+            return None
+        session.version = version
+        return session
+
+    # ── Reads ───────────────────────────────────────────────────────
+
+    def get(self, phone: str) -> S | None:
+        """The phone's session (with its stored ``version``), or None."""
+        r = _redis()
+        if r is None:
+            return self._materialise(*self._local_get(phone))
+        try:
+            return self._materialise(*_split(r.get(self._key(phone))))
+        except Exception:  # noqa: BLE001
+            logger.warning("Reading %s session failed; using local copy", self.prefix, exc_info=True)
+            return self._materialise(*self._local_get(phone))
+
+    # ── Writes ──────────────────────────────────────────────────────
+
+    def save(self, phone: str, session: S, *, force: bool = False) -> bool:
+        """Store ``session`` if nobody saved since it was read (always, with ``force``).
+
+        On success ``session.version`` is bumped to the stored version; on a
+        conflict nothing is written and False is returned.
+        """
+        body = encode(self._dump(session))
+        expected = None if force else session.version
+        r = _redis()
+        if r is None:
+            version = self._local_save(phone, expected, body)
+        else:
+            try:
+                version = self._redis_save(r, phone, expected, body)
+            except Exception:  # noqa: BLE001
+                logger.warning("Saving %s session failed; keeping it locally", self.prefix, exc_info=True)
+                version = self._local_save(phone, expected, body)
+        if not version:
+            logger.info("Concurrent update to %s session for %s", self.prefix, phone)
+            return False
+        session.version = version
+        return True
+
+    def update(self, phone: str, change: Callable[[S], S | None]) -> S | None:
+        """Load, apply ``change`` and save, retrying when another worker wins the race.
+
+        ``change`` mutates (or replaces) the session and returns it, or returns
+        None to leave it untouched. Returns the saved session, or None when there
+        is no session, ``change`` declined, or every attempt conflicted.
+        """
+        for _ in range(_UPDATE_ATTEMPTS):
+            session = self.get(phone)
+            if session is None:
+                return None
+            changed = change(session)
+            if changed is None:
+                return None
+            if self.save(phone, changed):
+                return changed
+        return None
+
+    def delete(self, phone: str) -> None:
+        with self._lock:
+            self._local.pop(phone, None)
+        r = _redis()
+        if r is None:
+            return
+        try:
+            r.delete(self._key(phone))
+        except Exception:  # noqa: BLE001
+            logger.warning("Deleting %s session failed", self.prefix, exc_info=True)
+
+    def clear(self) -> None:
+        """Drop every session of this kind (tests and maintenance)."""
+        with self._lock:
+            self._local.clear()
+        r = _redis()
+        if r is None:
+            return
+        try:
+            keys = list(r.scan_iter(match=f"{self.prefix}*"))
+            if keys:
+                r.delete(*keys)
+        except Exception:  # noqa: BLE001
+            logger.warning("Clearing %s sessions failed", self.prefix, exc_info=True)
+
+    def _redis_save(self, r, phone: str, expected: int | None, body: str) -> int:
+        from redis.exceptions import ResponseError, WatchError
+
+        key = self._key(phone)
+        arg = "" if expected is None else str(expected)
+        try:
+            return int(r.eval(_SAVE_LUA, 1, key, arg, body, self.ttl))
+        except ResponseError:
+            pass
+        # No scripting (e.g. some proxies): same compare-and-set via WATCH/MULTI.
+        with r.pipeline() as pipe:
+            try:
+                pipe.watch(key)
+                current, _ = _split(pipe.get(key))
+                if expected is not None and current != expected:
+                    pipe.unwatch()
+                    return 0
+                pipe.multi()
+                pipe.set(key, f"{current + 1}:{body}", ex=self.ttl)
+                pipe.execute()
+                return current + 1
+            except WatchError:
+                return 0
+
+    # ── In-process fallback ─────────────────────────────────────────
+
+    def _local_get(self, phone: str) -> tuple[int, str | None]:
+        with self._lock:
+            entry = self._local.get(phone)
+            if entry is None:
+                return 0, None
+            if entry[2] <= time.time():
+                del self._local[phone]
+                return 0, None
+            return entry[0], entry[1]
+
+    def _local_save(self, phone: str, expected: int | None, body: str) -> int:
+        now = time.time()
+        with self._lock:
+            entry = self._local.get(phone)
+            current = entry[0] if entry is not None and entry[2] > now else 0
+            if expected is not None and current != expected:
+                return 0
+            self._local[phone] = (current + 1, body, now + self.ttl)
+            self._local.move_to_end(phone)
+            # Evict expired entries from the old end, then enforce the bound.
+            while self._local:
+                oldest = next(iter(self._local.values()))
+                if oldest[2] > now and len(self._local) <= _LOCAL_MAX_ENTRIES:
+                    break
+                self._local.popitem(last=False)
+            return current + 1
@@ -7,7 +7,6 @@ and escalates to support.suoops.com when the bot can't resolve the issue.
 from __future__ import annotations
 
 import logging
-import re
 from typing import Any
 
 from sqlalchemy.orm import Session
@@ -435,22 +434,6 @@ class SupportHandler:
 
     def _resolve_user(self, phone: str) -> models.User | None:
         """Look up a registered user by phone number."""
-        clean = phone.strip().replace(" ", "").replace("-", "")
-        candidates: set[str] = {clean}
-        digits = re.sub(r"[^\d]", "", clean)
-        if digits:
-            candidates.add(digits)
-            if digits.startswith("234"):
-                candidates.add(f"+{digits}")
-                candidates.add("0" + digits[3:])
-            elif digits.startswith("0"):
-                candidates.add("234" + digits[1:])
-                candidates.add("+234" + digits[1:])
-            else:
-                candidates.add(f"+{digits}")
-
-        return (
-            self.db.query(models.User)
-            .filter(models.User.phone.in_(list(candidates)))
-            .first()
-        )
+        from app.services.phone_resolution import resolve_user
+
+        return resolve_user(self.db, phone)
@@ -44,20 +44,9 @@ class VoiceMessageProcessor:
         if settings.ENV.lower() not in {"prod", "production"}:
             return True, None
         
-        normalized = sender.strip()
-        if not normalized.startswith("+"):
-            if normalized.startswith("234"):
-                normalized = f"+{normalized}"
-            elif normalized.startswith("0"):
-                normalized = f"+234{normalized[1:]}"
-            else:
-                normalized = f"+{normalized}"
-        
-        user = (
-            self.invoice_processor.db.query(models.User)
-            .filter(models.User.phone == normalized)
-            .first()
-        )
+        from app.services.phone_resolution import resolve_user
+
+        user = resolve_user(self.invoice_processor.db, sender)
         if not user:
             return False, None
         
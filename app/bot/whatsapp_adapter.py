@@ -5,6 +5,7 @@ from typing import Any
 
 from sqlalchemy.orm import Session
 
+from app.bot import conversation_state
 from app.bot.expense_intent_processor import ExpenseIntentProcessor
 from app.bot.invoice_intent_processor import (
     InvoiceIntentProcessor,
@@ -95,45 +96,10 @@ class WhatsAppHandler:
                 logger.warning("Missing sender in message: %s", message)
                 return
 
-            # Track 24-hour conversation window for outbound messaging
-            mark_conversation_active(sender)
-
-            msg_type = message.get("type", "text")
-
-            # Show "typing…" + read-receipt for slower message types so
-            # the user knows we're working on it. Best-effort.
-            wa_msg_id = message.get("message_id")
-            if wa_msg_id:
-                try:
-                    show_typing = msg_type in ("audio", "image")
-                    self.client.mark_read(wa_msg_id, typing=show_typing)
-                except Exception:
-                    logger.debug("mark_read failed", exc_info=True)
-
-            if msg_type == "text":
-                await self._handle_text_message(sender, message)
-                return
-            
-            if msg_type == "interactive":
-                # Handle button clicks
-                await self._handle_interactive_message(sender, message)
-                return
-
-            if msg_type == "audio":
-                media_id = message.get("audio_id")
-                if media_id:
-                    await self.voice_processor.process(sender, media_id, message)
-                return
-            
-            if msg_type == "image":
-                # Handle image messages (receipts)
-                await self._handle_image_message(sender, message)
-                return
-
-            self.client.send_text(
-                sender,
-                "Sorry, I only support text messages, voice notes, and images.",
-            )
+            # Load every per-sender Redis key in one round-trip; helper
+            # writes are buffered and flushed together when we're done.
+            with conversation_state.snapshot(sender):
+                await self._dispatch_message(sender, message)
         except Exception as exc:
             logger.exception("Error handling WhatsApp message: %s", exc)
             # Try to notify user of error - but don't fail if this also errors
@@ -157,6 +123,48 @@ class WhatsAppHandler:
             except Exception:
                 logger.exception("Failed to send error message to user")
 
+    async def _dispatch_message(self, sender: str, message: dict[str, Any]) -> None:
+        """Route one extracted message by type."""
+        # Track 24-hour conversation window for outbound messaging
+        mark_conversation_active(sender)
+
+        msg_type = message.get("type", "text")
+
+        # Show "typing…" + read-receipt for slower message types so
+        # the user knows we're working on it. Best-effort.
+        wa_msg_id = message.get("message_id")
+        if wa_msg_id:
+            try:
+                show_typing = msg_type in ("audio", "image")
+                self.client.mark_read(wa_msg_id, typing=show_typing)
+            except Exception:
+                logger.debug("mark_read failed", exc_info=True)
+
+        if msg_type == "text":
+            await self._handle_text_message(sender, message)
+            return
+        
+        if msg_type == "interactive":
+            # Handle button clicks
+            await self._handle_interactive_message(sender, message)
+            return
+
+        if msg_type == "audio":
+            media_id = message.get("audio_id")
+            if media_id:
+                await self.voice_processor.process(sender, media_id, message)
+            return
+        
+        if msg_type == "image":
+            # Handle image messages (receipts)
+            await self._handle_image_message(sender, message)
+            return
+
+        self.client.send_text(
+            sender,
+            "Sorry, I only support text messages, voice notes, and images.",
+        )
+
     def _auto_create_support_ticket(
         self, sender: str | None, exc: BaseException,
     ) -> str | None:
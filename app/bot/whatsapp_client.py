@@ -5,8 +5,8 @@ import os
 from typing import Any
 
 import httpx
-import requests
 
+from app.bot import whatsapp_transport
 from app.core.config import settings
 from app.utils.phone import normalize_phone
 
@@ -56,6 +56,20 @@ class WhatsAppClient:
         self.base_url = f"https://graph.facebook.com/v21.0/{self.phone_number_id}/messages"
         self.media_url = "https://graph.facebook.com/v21.0"
 
+    def _post_message(self, payload: dict[str, Any], *, timeout: float = 10) -> httpx.Response:
+        """POST ``payload`` to the messages endpoint over the shared pool."""
+        return whatsapp_transport.request(
+            "POST",
+            self.base_url,
+            endpoint="messages",
+            headers={
+                "Authorization": f"Bearer {self.api_key}",
+                "Content-Type": "application/json",
+            },
+            json=payload,
+            timeout=timeout,
+        )
+
     def mark_read(self, message_id: str, *, typing: bool = False) -> bool:
         """Mark an inbound WhatsApp message as read, optionally with the
         "typing…" indicator. The typing bubble auto-clears within ~25 s
@@ -77,15 +91,7 @@ class WhatsAppClient:
             }
             if typing:
                 payload["typing_indicator"] = {"type": "text"}
-            response = requests.post(
-                self.base_url,
-                headers={
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json",
-                },
-                json=payload,
-                timeout=5,
-            )
+            response = self._post_message(payload, timeout=5)
             response.raise_for_status()
             return True
         except Exception as exc:  # noqa: BLE001
@@ -111,20 +117,12 @@ class WhatsAppClient:
                 "type": "text",
                 "text": {"body": body},
             }
-            response = requests.post(
-                self.base_url,
-                headers={
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json",
-                },
-                json=payload,
-                timeout=10,
-            )
+            response = self._post_message(payload)
             response.raise_for_status()
             logger.info("[WHATSAPP] ✓ Sent to %s: %s", to, body[:50])
             return True
-        except requests.HTTPError as exc:  # pragma: no cover - external service
-            detail = exc.response.text if exc.response is not None else "(no body)"
+        except httpx.HTTPStatusError as exc:  # pragma: no cover - external service
+            detail = exc.response.text
             logger.error(
                 "[WHATSAPP] Failed to send to %s: %s | Response: %s",
                 to,
@@ -170,15 +168,7 @@ class WhatsAppClient:
                 "document": document,
             }
 
-            response = requests.post(
-                self.base_url,
-                headers={
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json",
-                },
-                json=payload,
-                timeout=10,
-            )
+            response = self._post_message(payload)
             response.raise_for_status()
             logger.info("[WHATSAPP DOC] ✓ Sent to %s: %s", to, filename)
             return True
@@ -215,15 +205,7 @@ class WhatsAppClient:
                 "image": image,
             }
 
-            response = requests.post(
-                self.base_url,
-                headers={
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json",
-                },
-                json=payload,
-                timeout=10,
-            )
+            response = self._post_message(payload)
             response.raise_for_status()
             logger.info("[WHATSAPP IMG] ✓ Sent to %s", to)
             return True
@@ -245,8 +227,10 @@ class WhatsAppClient:
 
         upload_url = f"{self.media_url}/{self.phone_number_id}/media"
         try:
-            response = requests.post(
+            response = whatsapp_transport.request(
+                "POST",
                 upload_url,
+                endpoint="media_upload",
                 headers={"Authorization": f"Bearer {self.api_key}"},
                 files={"file": (filename, data, mime_type)},
                 data={"messaging_product": "whatsapp", "type": mime_type},
@@ -328,15 +312,7 @@ class WhatsAppClient:
 
         try:
             logger.info("[WHATSAPP TEMPLATE] Sending to %s, template=%s, payload=%s", to, template_name, payload)
-            response = requests.post(
-                self.base_url,
-                headers={
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json",
-                },
-                json=payload,
-                timeout=10,
-            )
+            response = self._post_message(payload)
             logger.info(
                 "[WHATSAPP TEMPLATE] Response status=%s, body=%s",
                 response.status_code,
@@ -354,8 +330,8 @@ class WhatsAppClient:
             except Exception:  # noqa: BLE001
                 logger.debug("[WHATSAPP TEMPLATE] Could not parse wamid from response", exc_info=True)
             return ""
-        except requests.HTTPError as exc:
-            detail = exc.response.text if exc.response is not None else "(no body)"
+        except httpx.HTTPStatusError as exc:
+            detail = exc.response.text
             logger.error("[WHATSAPP TEMPLATE] HTTP Error to %s: %s | Response: %s", to, exc, detail)
             return None
         except Exception as exc:  # noqa: BLE001
@@ -407,11 +383,12 @@ class WhatsAppClient:
         url = f"{self.media_url}/{media_id}"
         headers = {"Authorization": f"Bearer {self.api_key}"}
 
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.get(url, headers=headers)
-            response.raise_for_status()
-            data = response.json()
-            return data["url"]
+        response = await whatsapp_transport.arequest(
+            "GET", url, endpoint="media_lookup", headers=headers, timeout=30.0
+        )
+        response.raise_for_status()
+        data = response.json()
+        return data["url"]
 
     async def download_media(self, media_url: str) -> bytes:
         """Download media bytes from the WhatsApp CDN."""
@@ -420,11 +397,12 @@ class WhatsAppClient:
 
         headers = {"Authorization": f"Bearer {self.api_key}"}
 
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            response = await client.get(media_url, headers=headers)
-            response.raise_for_status()
-            logger.info("[WHATSAPP] Downloaded %d bytes", len(response.content))
-            return response.content
+        response = await whatsapp_transport.arequest(
+            "GET", media_url, endpoint="media_download", headers=headers, timeout=60.0
+        )
+        response.raise_for_status()
+        logger.info("[WHATSAPP] Downloaded %d bytes", len(response.content))
+        return response.content
 
     def send_interactive_list(
         self,
@@ -497,20 +475,12 @@ class WhatsAppClient:
         }
 
         try:
-            response = requests.post(
-                self.base_url,
-                headers={
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json",
-                },
-                json=payload,
-                timeout=10,
-            )
+            response = self._post_message(payload)
             response.raise_for_status()
             logger.info("[WHATSAPP LIST] ✓ Sent list to %s with %d items", to, total_rows)
             return True
-        except requests.HTTPError as exc:
-            detail = exc.response.text if exc.response is not None else "(no body)"
+        except httpx.HTTPStatusError as exc:
+            detail = exc.response.text
             logger.error("[WHATSAPP LIST] HTTP Error to %s: %s | Response: %s", to, exc, detail)
             return False
         except Exception as exc:  # noqa: BLE001
@@ -570,20 +540,12 @@ class WhatsAppClient:
         }
 
         try:
-            response = requests.post(
-                self.base_url,
-                headers={
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Content-Type": "application/json",
-                },
-                json=payload,
-                timeout=10,
-            )
+            response = self._post_message(payload)
             response.raise_for_status()
             logger.info("[WHATSAPP BUTTONS] ✓ Sent to %s with %d buttons", to, len(buttons))
             return True
-        except requests.HTTPError as exc:
-            detail = exc.response.text if exc.response is not None else "(no body)"
+        except httpx.HTTPStatusError as exc:
+            detail = exc.response.text
             logger.error("[WHATSAPP BUTTONS] HTTP Error to %s: %s | Response: %s", to, exc, detail)
             return False
         except Exception as exc:  # noqa: BLE001
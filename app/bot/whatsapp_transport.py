@@ -0,0 +1,234 @@
+"""Shared, pooled HTTP transport for the WhatsApp Cloud API.
+
+Every ``WhatsAppClient`` in the process — however many are instantiated —
+sends through the same keep-alive connection pool to graph.facebook.com, so a
+fan-out task pays one TLS handshake per pooled connection instead of one per
+message. HTTP/2 is negotiated when the optional ``h2`` package is installed.
+
+Two facades share the configuration:
+
+* ``request`` — a process-wide ``httpx.Client`` (thread-safe) for Celery
+  tasks and the sync ``send_*`` methods. Recreated after fork, since pooled
+  sockets must not be shared between Celery prefork children.
+* ``arequest`` — an ``httpx.AsyncClient`` per running event loop for the
+  async media download path.
+
+Both retry with full-jitter exponential backoff, honouring ``Retry-After``,
+and record per-endpoint latency in ``whatsapp_api_latency_seconds``. A POST
+(sending a message, uploading media) is not idempotent, so it is retried only
+when Meta certainly did not act on it: a 429, or a failure to connect or to
+get a pooled connection. A read timeout or 5xx may follow a delivered
+message, so those are returned to the caller instead of risking a duplicate.
+GETs also retry 5xx responses and any transport error.
+
+The sync ``request`` does not retry when it finds itself on a running event
+loop's thread (a ``send_*`` call from an async handler): ``time.sleep`` there
+would stall every other request on the loop, so the 429 or transport error
+goes straight back to the caller. Async code should use ``arequest``.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+import weakref
+from typing import Any
+
+import httpx
+
+from app import metrics
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = frozenset({429})
+IDEMPOTENT_RETRY_STATUSES = RETRY_STATUSES | {500, 502, 503, 504}
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+# Failures that happen before the request leaves the process.
+UNSENT_ERRORS: tuple[type[httpx.TransportError], ...] = (
+    httpx.ConnectError,
+    httpx.ConnectTimeout,
+    httpx.PoolTimeout,
+)
+
+_lock = threading.Lock()
+_sync_client: httpx.Client | None = None
+_sync_pid: int | None = None
+_async_clients: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient] = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _http2_enabled() -> bool:
+    if not settings.WHATSAPP_HTTP2:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _client_kwargs() -> dict[str, Any]:
+    return {
+        "http2": _http2_enabled(),
+        "limits": httpx.Limits(
+            max_connections=settings.WHATSAPP_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.WHATSAPP_HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=settings.WHATSAPP_HTTP_KEEPALIVE_EXPIRY,
+        ),
+        "timeout": httpx.Timeout(10.0, connect=5.0),
+    }
+
+
+def get_sync_client() -> httpx.Client:
+    """The process-wide pooled client (rebuilt in a forked child)."""
+    global _sync_client, _sync_pid
+    if _sync_client is not None and _sync_pid == os.getpid():
+        return _sync_client
+    with _lock:
+        if _sync_client is None or _sync_pid != os.getpid():
+            # A pool inherited across fork shares sockets with the parent; drop it.
+            _sync_client = httpx.Client(**_client_kwargs())
+            _sync_pid = os.getpid()
+    return _sync_client
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """The pooled async client bound to the running event loop."""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(**_client_kwargs())
+        _async_clients[loop] = client
+    return client
+
+
+def _backoff(attempt: int, response: httpx.Response | None) -> float:
+    """Seconds to wait before retry ``attempt`` (1-based)."""
+    if response is not None:
+        retry_after = response.headers.get("Retry-After")
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), settings.WHATSAPP_HTTP_BACKOFF_MAX)
+    cap = min(settings.WHATSAPP_HTTP_BACKOFF_MAX, settings.WHATSAPP_HTTP_BACKOFF_BASE * 2 ** (attempt - 1))
+    return random.uniform(0, cap)
+
+
+def _outcome(response: httpx.Response | None) -> str:
+    if response is None:
+        return "error"
+    if response.status_code == 429:
+        return "429"
+    return f"{response.status_code // 100}xx"
+
+
+def _should_retry(
+    attempt: int,
+    method: str,
+    response: httpx.Response | None,
+    error: httpx.TransportError | None,
+) -> bool:
+    if attempt > settings.WHATSAPP_HTTP_MAX_RETRIES:
+        return False
+    idempotent = method.upper() in IDEMPOTENT_METHODS
+    if error is not None:
+        return idempotent or isinstance(error, UNSENT_ERRORS)
+    statuses = IDEMPOTENT_RETRY_STATUSES if idempotent else RETRY_STATUSES
+    return response is not None and response.status_code in statuses
+
+
+def _on_event_loop() -> bool:
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+
+def request(method: str, url: str, *, endpoint: str, **kwargs: Any) -> httpx.Response:
+    """Send through the shared sync pool, retrying only what is safe to resend.
+
+    ``endpoint`` is a short label (``"messages"``, ``"media_upload"``, ...)
+    for the latency histogram. Returns the final response — callers still
+    ``raise_for_status()`` — or re-raises the last transport error. Makes a
+    single attempt when called on an event loop's thread.
+    """
+    client = get_sync_client()
+    retries_allowed = not _on_event_loop()
+    attempt = 0
+    while True:
+        attempt += 1
+        response: httpx.Response | None = None
+        error: httpx.TransportError | None = None
+        started = time.perf_counter()
+        try:
+            response = client.request(method, url, **kwargs)
+        except httpx.TransportError as exc:
+            error = exc
+        metrics.whatsapp_api_latency_observe(
+            endpoint, _outcome(response), time.perf_counter() - started
+        )
+        if not (retries_allowed and _should_retry(attempt, method, response, error)):
+            if error is not None:
+                raise error
+            return response  # type: ignore[return-value]
+        delay = _backoff(attempt, response)
+        logger.info(
+            "[WHATSAPP HTTP] %s %s → %s; retry %d in %.2fs",
+            method, endpoint, response.status_code if response is not None else error,
+            attempt, delay,
+        )
+        time.sleep(delay)
+
+
+async def arequest(method: str, url: str, *, endpoint: str, **kwargs: Any) -> httpx.Response:
+    """Async twin of :func:`request` on the running loop's pooled client."""
+    client = get_async_client()
+    attempt = 0
+    while True:
+        attempt += 1
+        response: httpx.Response | None = None
+        error: httpx.TransportError | None = None
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.TransportError as exc:
+            error = exc
+        metrics.whatsapp_api_latency_observe(
+            endpoint, _outcome(response), time.perf_counter() - started
+        )
+        if not _should_retry(attempt, method, response, error):
+            if error is not None:
+                raise error
+            return response  # type: ignore[return-value]
+        delay = _backoff(attempt, response)
+        logger.info(
+            "[WHATSAPP HTTP] %s %s → %s; retry %d in %.2fs",
+            method, endpoint, response.status_code if response is not None else error,
+            attempt, delay,
+        )
+        await asyncio.sleep(delay)
+
+
+def close_transport() -> None:
+    """Close the sync pool. Called on app shutdown."""
+    global _sync_client, _sync_pid
+    with _lock:
+        if _sync_client is not None and _sync_pid == os.getpid():
+            _sync_client.close()
+        _sync_client = None
+        _sync_pid = None
+
+
+async def aclose_transport() -> None:
+    """Close the running loop's async pool."""
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    client = _async_clients.pop(loop, None)
+    if client is not None:
+        await client.aclose()
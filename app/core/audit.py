@@ -2,20 +2,35 @@
 
 Writes structured JSON lines to a dedicated audit log file and standard logger.
 Each event should describe a security- or compliance-relevant action.
+
+File and database writes happen off the request path: ``log_audit_event`` puts
+the event on a bounded in-memory queue and a single background writer drains it
+in batches — one buffered file write and one multi-row ``audit_log`` insert per
+batch. The hash chain is computed sequentially by that writer under a Postgres
+advisory lock, so concurrent processes can't fork it. When the queue is full
+events are dropped and counted (``audit_events_dropped_total``) rather than
+blocking the caller. Call ``flush_audit_log`` on shutdown.
 """
 from __future__ import annotations
 
+import datetime as dt
 import json
 import logging
 import os
+import queue
+import threading
 import time
 from typing import Any
 
+from app import metrics
 from app.core.config import settings
 
 _AUDIT_LOG_PATH = settings.AUDIT_LOG_FILE
 _logger = logging.getLogger("audit")
 
+# Arbitrary constant identifying the audit-chain advisory lock in Postgres.
+_AUDIT_CHAIN_LOCK_ID = 0x5A0D17
+
 
 def log_audit_event(action: str, user_id: int | None = None, status: str = "success", **metadata: Any) -> None:
     """Record an audit event.
@@ -33,65 +48,236 @@ def log_audit_event(action: str, user_id: int | None = None, status: str = "succ
         "status": status,
         **metadata,
     }
-    line = json.dumps(event, separators=(",", ":"))
-    # Append to file (best effort)
-    try:
-        os.makedirs(os.path.dirname(_AUDIT_LOG_PATH), exist_ok=True)
-        with open(_AUDIT_LOG_PATH, "a", encoding="utf-8") as f:
-            f.write(line + "\n")
-    except Exception:  # noqa: BLE001
-        _logger.debug("Failed to write audit event to file: %s", event)
-    # Durable, queryable copy in Postgres (survives redeploys). Best-effort and
-    # never allowed to break the caller. Skipped in tests to keep the suite's
-    # shared in-memory DB session clean — covered directly via _persist_audit_db.
-    if settings.AUDIT_LOG_TO_DB and getattr(settings, "ENV", None) != "test":
-        _persist_audit_db(event)
+    _get_writer().submit(event)
     # Emit via logger — downgrade expected noise to DEBUG
     if status == "failure" and metadata.get("error") == "missing_refresh_token":
-        _logger.debug(line)
+        _logger.debug(_to_line(event))
     else:
-        _logger.info(line)
+        _logger.info(_to_line(event))
+
+
+def _to_line(event: dict[str, Any]) -> str:
+    return json.dumps(event, separators=(",", ":"), default=str)
+
+
+class AuditWriter:
+    """Single background consumer batching audit events to file and DB.
+
+    ``synchronous=True`` processes each event inline (used in tests so the
+    shared in-memory DB and the file see events immediately).
+    """
+
+    def __init__(
+        self,
+        path: str,
+        *,
+        to_db: bool,
+        max_queue: int,
+        batch_size: int,
+        flush_interval: float,
+        synchronous: bool = False,
+    ):
+        self.path = path
+        self.to_db = to_db
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.synchronous = synchronous
+        self._max_queue = max_queue
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        # Also called after fork: threads and file handles don't survive it.
+        self._pid = os.getpid()
+        self._queue: queue.Queue[dict[str, Any]] = queue.Queue(maxsize=self._max_queue)
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+        self._fh = None
+        self._fh_ino: int | None = None
+
+    def submit(self, event: dict[str, Any]) -> bool:
+        """Queue ``event``; returns False (and counts a drop) if the queue is full."""
+        if self.synchronous:
+            self._write_batch([event])
+            return True
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(event)
+            return True
+        except queue.Full:
+            metrics.audit_event_dropped("queue_full")
+            return False
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._reset()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stop.is_set() or not self._queue.empty():
+            try:
+                first = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            batch = [first]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write_batch(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Block until every queued event is written (or ``timeout`` passes)."""
+        if self._thread is None or self._pid != os.getpid():
+            return True
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def close(self, timeout: float = 5.0) -> bool:
+        """Flush, stop the writer thread and close the file handle."""
+        flushed = self.flush(timeout)
+        self._stop.set()
+        if self._thread is not None and self._pid == os.getpid():
+            self._thread.join(timeout)
+        if self._fh is not None:
+            try:
+                self._fh.close()
+            except Exception:  # noqa: BLE001
+                pass
+            self._fh = None
+        return flushed
+
+    def _write_batch(self, events: list[dict[str, Any]]) -> None:
+        self._write_file(events)
+        if self.to_db:
+            _persist_audit_batch(events)
+        metrics.audit_batch_written(len(events))
+
+    def _write_file(self, events: list[dict[str, Any]]) -> None:
+        try:
+            self._open_file()
+            self._fh.write("".join(_to_line(e) + "\n" for e in events))  # type: ignore[union-attr]
+            self._fh.flush()  # type: ignore[union-attr]
+        except Exception:  # noqa: BLE001
+            _logger.debug("Failed to write %d audit events to file", len(events))
+            self._fh = None
+
+    def _open_file(self) -> None:
+        # Reopen if the log was rotated/moved away underneath us.
+        try:
+            ino = os.stat(self.path).st_ino
+        except FileNotFoundError:
+            ino = None
+        if self._fh is not None and ino == self._fh_ino:
+            return
+        if self._fh is not None:
+            try:
+                self._fh.close()
+            except Exception:  # noqa: BLE001
+                pass
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._fh = open(self.path, "a", encoding="utf-8", buffering=64 * 1024)
+        self._fh_ino = os.fstat(self._fh.fileno()).st_ino
+
+
+_writer: AuditWriter | None = None
+_writer_lock = threading.Lock()
+
+
+def _get_writer() -> AuditWriter:
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                is_test = getattr(settings, "ENV", None) == "test"
+                _writer = AuditWriter(
+                    _AUDIT_LOG_PATH,
+                    # Skipped in tests to keep the suite's shared in-memory DB
+                    # session clean — covered directly via _persist_audit_db.
+                    to_db=settings.AUDIT_LOG_TO_DB and not is_test,
+                    max_queue=settings.AUDIT_QUEUE_MAX,
+                    batch_size=settings.AUDIT_BATCH_SIZE,
+                    flush_interval=settings.AUDIT_FLUSH_INTERVAL_SECONDS,
+                    synchronous=is_test,
+                )
+    return _writer
+
+
+def flush_audit_log(timeout: float = 5.0) -> bool:
+    """Drain queued audit events to file/DB. Call on process shutdown."""
+    if _writer is None:
+        return True
+    return _writer.close(timeout)
 
 
 def _persist_audit_db(event: dict[str, Any]) -> None:
-    """Insert one audit event into the durable ``audit_log`` table with a hash
-    chain (``entry_hash = sha256(prev_hash + event)``). Best-effort: any failure
-    is swallowed so audit logging never breaks a request. Uses its own session so
-    the row commits independently of the caller's transaction."""
+    """Insert one audit event into the durable ``audit_log`` table."""
+    _persist_audit_batch([event])
+
+
+def _persist_audit_batch(events: list[dict[str, Any]]) -> None:
+    """Insert audit events into the durable ``audit_log`` table with a hash
+    chain (``entry_hash = sha256(prev_hash + event)``) in one multi-row INSERT.
+    Best-effort: any failure is swallowed (and counted) so audit logging never
+    breaks a request. Uses its own session so rows commit independently of any
+    caller's transaction."""
     try:
-        import hashlib
+        from sqlalchemy import insert, text
 
         from app.db.session import SessionLocal
         from app.models.models import AuditLog
 
-        details = {
-            k: v for k, v in event.items()
-            if k not in ("action", "user_id", "status", "ts")
-        } or None
-        action = str(event.get("action"))[:120]
-        user_id = event.get("user_id")
-        status = str(event.get("status") or "success")[:20]
         with SessionLocal() as db:
+            if db.get_bind().dialect.name == "postgresql":
+                # Serialise chain extension across processes; released on commit.
+                db.execute(text("SELECT pg_advisory_xact_lock(:k)"), {"k": _AUDIT_CHAIN_LOCK_ID})
             prev = (
                 db.query(AuditLog.entry_hash)
                 .order_by(AuditLog.id.desc())
                 .limit(1)
                 .scalar()
             ) or ""
-            entry_hash = hash_entry(prev, action, user_id, status, details)
-            db.add(
-                AuditLog(
-                    action=action,
-                    user_id=user_id,
-                    status=status,
-                    details=details,
-                    prev_hash=prev or None,
-                    entry_hash=entry_hash,
-                )
-            )
+            rows = []
+            for event in events:
+                details = {
+                    k: v for k, v in event.items()
+                    if k not in ("action", "user_id", "status", "ts")
+                } or None
+                action = str(event.get("action"))[:120]
+                user_id = event.get("user_id")
+                status = str(event.get("status") or "success")[:20]
+                entry_hash = hash_entry(prev, action, user_id, status, details)
+                row = {
+                    "action": action,
+                    "user_id": user_id,
+                    "status": status,
+                    "details": details,
+                    "prev_hash": prev or None,
+                    "entry_hash": entry_hash,
+                }
+                if event.get("ts"):
+                    row["ts"] = dt.datetime.fromtimestamp(event["ts"], dt.timezone.utc)
+                rows.append(row)
+                prev = entry_hash
+            db.execute(insert(AuditLog), rows)
             db.commit()
     except Exception:  # noqa: BLE001 — audit persistence must never break a request
-        _logger.debug("Failed to persist audit event to DB: %s", event.get("action"))
+        metrics.audit_event_dropped("db_error", len(events))
+        _logger.debug("Failed to persist %d audit events to DB", len(events))
 
 
 def hash_entry(
@@ -1,74 +1,524 @@
+"""Two-tier application cache: bounded in-process LRU in front of Redis.
+
+Reads check the local LRU first, then Redis. On a miss only one caller per key
+runs the producer (single-flight): callers in the same process wait on an
+in-flight marker, and a short Redis lease makes other workers poll for the
+value instead of stampeding Postgres right after a deploy.
+
+Entries carry a "fresh until" timestamp. Past it, and for up to ``stale_ttl``
+more seconds, the stale value is served to everyone except the single caller
+that recomputes it (stale-while-revalidate).
+
+Invalidation is tag based: a tag (``issuer:7``, ``invoice:INV-1``) owns a
+version counter, and keys built with :func:`tagged_key` embed the versions of
+their tags. Bumping a tag with :func:`invalidate_tags` is one INCR, after which
+every dependent key is simply never read again and ages out on its own TTL.
+ORM hooks queue invalidations with :func:`invalidate_on_commit`, so caches are
+only dropped for changes that actually committed.
+
+Values must be JSON-serialisable. Fail-open: without Redis the local tier
+still works, and a Redis error never surfaces to callers.
+"""
+from __future__ import annotations
+
+import asyncio
 import json
 import logging
-from typing import Any, Awaitable, Callable
-
-try:  # pragma: no cover
-    from prometheus_client import Counter
-    _PROM_CACHE_HITS = Counter("suoops_cache_hits_native", "Cache hits (native instrumented)")
-    _PROM_CACHE_MISSES = Counter("suoops_cache_misses_native", "Cache misses (native instrumented)")
-except Exception:  # noqa: BLE001
-    _PROM_CACHE_HITS = None
-    _PROM_CACHE_MISSES = None
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, NamedTuple
 
 import redis
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app import metrics
+from app.core.config import settings
 
 logger = logging.getLogger(__name__)
-_cache_metrics = {"hits": 0, "misses": 0}
+_cache_metrics = {"hits": 0, "local_hits": 0, "stale": 0, "misses": 0}
 
 _redis: redis.Redis | None = None
+_redis_retry_at = 0.0
+_REDIS_RETRY_SECONDS = 30.0
+
+_LEASE_PREFIX = "cache:lease:"
+_LEASE_SECONDS = 10
+_LEASE_WAIT_SECONDS = 2.0
+_LEASE_POLL_SECONDS = 0.05
+# Envelope marker so plain JSON values written by older code still decode.
+_ENVELOPE = "__c"
+TAG_KEY_PREFIX = "cachetag:"
+# Tag counters expire after a quiet week. Must outlive the longest entry TTL,
+# otherwise a reset counter could resurrect an entry stamped with an old version.
+TAG_TTL_SECONDS = 7 * 86400
+
+
+class _Entry(NamedTuple):
+    value: Any
+    fresh_until: float
+    expires_at: float
+
+
+class LocalLRU:
+    """Thread-safe, size-bounded LRU with per-entry expiry."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._data: OrderedDict[str, _Entry] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, now: float) -> _Entry | None:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            if entry.expires_at <= now:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return entry
+
+    def set(self, key: str, entry: _Entry) -> None:
+        with self._lock:
+            self._data[key] = entry
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+_local = LocalLRU(settings.CACHE_LOCAL_MAX_ENTRIES)
+
+# Single-flight bookkeeping: one in-flight marker per key per process.
+_inflight: dict[str, threading.Event] = {}
+_inflight_lock = threading.Lock()
+_async_inflight: dict[str, asyncio.Future] = {}
+# Tag versions used when Redis is unavailable (single-process fallback).
+_local_tag_versions: dict[str, int] = {}
+# session.info key: {invalidate callback: items} queued until commit.
+_ON_COMMIT_INFO_KEY = "cache_invalidate_on_commit"
 
 
 def _get_client() -> redis.Redis | None:
-    global _redis
+    global _redis, _redis_retry_at
     if _redis is not None:
         return _redis
+    if time.monotonic() < _redis_retry_at:
+        return None
     try:
         from app.db.redis_client import get_redis_client
         _redis = get_redis_client()
         return _redis
     except Exception:  # noqa: BLE001
+        _redis_retry_at = time.monotonic() + _REDIS_RETRY_SECONDS
         logger.warning("Cache disabled (Redis unavailable)")
         return None
 
 
-def cache_get(key: str) -> Any | None:
+def _namespace_of(key: str) -> str:
+    return key.split(":", 1)[0] or "default"
+
+
+def _decode(raw: str, now: float) -> _Entry | None:
+    try:
+        data = json.loads(raw)
+    except Exception:  # noqa: BLE001
+        return None
+    if isinstance(data, dict) and _ENVELOPE in data:
+        return _Entry(data[_ENVELOPE], float(data.get("f", 0)), now)
+    return _Entry(data, float("inf"), now)
+
+
+def _read(key: str) -> tuple[_Entry | None, str]:
+    """Return ``(entry, tier)`` where tier is ``local``, ``redis`` or ``miss``."""
+    now = time.time()
+    entry = _local.get(key, now)
+    if entry is not None:
+        return entry, "local"
     client = _get_client()
     if not client:
-        return None
-    raw = client.get(key)
+        return None, "miss"
+    try:
+        raw = client.get(key)
+    except Exception:  # noqa: BLE001
+        logger.debug("Failed to read cache key=%s", key)
+        return None, "miss"
     if raw is None:
-        _cache_metrics["misses"] += 1
-        if _PROM_CACHE_MISSES:
-            _PROM_CACHE_MISSES.inc()
-        return None
+        return None, "miss"
+    entry = _decode(raw, now)
+    if entry is None:
+        return None, "miss"
+    # Keep the local copy short-lived so other workers' writes show up quickly.
+    local_expiry = min(now + settings.CACHE_LOCAL_TTL_SECONDS, entry.fresh_until)
+    if local_expiry > now:
+        _local.set(key, entry._replace(expires_at=local_expiry))
+    return entry, "redis"
+
+
+def _write(key: str, value: Any, ttl: int, stale_ttl: int = 0) -> None:
+    now = time.time()
+    fresh_until = now + ttl
+    _local.set(key, _Entry(value, fresh_until, min(now + settings.CACHE_LOCAL_TTL_SECONDS, fresh_until + stale_ttl)))
+    client = _get_client()
+    if not client:
+        return
     try:
+        client.setex(key, ttl + stale_ttl, json.dumps({_ENVELOPE: value, "f": fresh_until}))
+    except Exception:  # noqa: BLE001
+        logger.debug("Failed to set cache key=%s", key)
+
+
+def _record(namespace: str, result: str, started: float | None = None) -> None:
+    if result == "miss":
+        _cache_metrics["misses"] += 1
+    else:
         _cache_metrics["hits"] += 1
-        if _PROM_CACHE_HITS:
-            _PROM_CACHE_HITS.inc()
-        return json.loads(raw)
+        if result == "local":
+            _cache_metrics["local_hits"] += 1
+        elif result == "stale":
+            _cache_metrics["stale"] += 1
+    metrics.cache_lookup(namespace, result)
+    if started is not None:
+        metrics.cache_lookup_latency_observe(namespace, time.perf_counter() - started)
+
+
+def _try_lease(key: str) -> bool:
+    """Claim the cross-process right to recompute ``key``. True without Redis."""
+    client = _get_client()
+    if not client:
+        return True
+    try:
+        return bool(client.set(_LEASE_PREFIX + key, "1", nx=True, ex=_LEASE_SECONDS))
     except Exception:  # noqa: BLE001
+        return True
+
+
+def _release_lease(key: str) -> None:
+    client = _get_client()
+    if not client:
+        return
+    try:
+        client.delete(_LEASE_PREFIX + key)
+    except Exception:  # noqa: BLE001
+        pass
+
+
+def _fresh(entry: _Entry | None) -> bool:
+    return entry is not None and entry.fresh_until > time.time()
+
+
+def cache_get(key: str) -> Any | None:
+    """Return the cached value for ``key`` (fresh or stale), or None."""
+    started = time.perf_counter()
+    entry, tier = _read(key)
+    if entry is None:
+        _record(_namespace_of(key), "miss")
         return None
+    _record(_namespace_of(key), tier if _fresh(entry) else "stale", started)
+    return entry.value
+
 
+def cache_set(key: str, value: Any, ttl: int = 60, stale_ttl: int = 0) -> None:
+    _write(key, value, ttl, stale_ttl)
 
-def cache_set(key: str, value: Any, ttl: int = 60) -> None:
+
+def cache_delete(*keys: str) -> None:
+    """Drop keys from both tiers (local tier of this process only)."""
+    for key in keys:
+        _local.delete(key)
+    client = _get_client()
+    if not client or not keys:
+        return
+    try:
+        client.delete(*keys)
+    except Exception:  # noqa: BLE001
+        logger.debug("Failed to delete cache keys=%s", keys)
+
+
+def cache_get_many(keys: list[str]) -> list[Any | None]:
+    """Like :func:`cache_get` for several keys, with one MGET for local misses."""
+    now = time.time()
+    entries: list[_Entry | None] = [_local.get(k, now) for k in keys]
+    tiers = ["local" if e is not None else "miss" for e in entries]
+    missing = [i for i, e in enumerate(entries) if e is None]
+    client = _get_client() if missing else None
+    if client:
+        try:
+            raws = client.mget([keys[i] for i in missing])
+        except Exception:  # noqa: BLE001
+            logger.debug("Failed to read cache keys=%s", [keys[i] for i in missing])
+            raws = [None] * len(missing)
+        for i, raw in zip(missing, raws):
+            entry = _decode(raw, now) if raw is not None else None
+            if entry is None:
+                continue
+            entries[i], tiers[i] = entry, "redis"
+            local_expiry = min(now + settings.CACHE_LOCAL_TTL_SECONDS, entry.fresh_until)
+            if local_expiry > now:
+                _local.set(keys[i], entry._replace(expires_at=local_expiry))
+    for key, tier in zip(keys, tiers):
+        _record(_namespace_of(key), tier)
+    return [e.value if e is not None else None for e in entries]
+
+
+def cache_add_many(items: dict[str, Any], ttl: int) -> dict[str, Any]:
+    """Store each value only if its key is absent (SET NX); first writer wins.
+
+    Returns the value now held for every key — ours, or the one another
+    process stored first — so concurrent writers converge on a single value.
+    """
+    if not items:
+        return {}
+    now = time.time()
+    winners = dict(items)
+    client = _get_client()
+    if client:
+        keys = list(items)
+        try:
+            pipe = client.pipeline(transaction=False)
+            for key in keys:
+                pipe.set(key, json.dumps({_ENVELOPE: items[key], "f": now + ttl}), nx=True, ex=ttl)
+            lost = [k for k, stored in zip(keys, pipe.execute()) if not stored]
+            if lost:
+                for key, raw in zip(lost, client.mget(lost)):
+                    entry = _decode(raw, now) if raw is not None else None
+                    if entry is not None:
+                        winners[key] = entry.value
+        except Exception:  # noqa: BLE001
+            logger.debug("Failed to add cache keys=%s", keys)
+    expiry = now + min(ttl, settings.CACHE_LOCAL_TTL_SECONDS)
+    for key, value in winners.items():
+        _local.set(key, _Entry(value, now + ttl, expiry))
+    return winners
+
+
+def cache_clear_local() -> None:
+    """Empty this process's LRU tier (tests, or after a bulk invalidation)."""
+    _local.clear()
+    _local_tag_versions.clear()
+
+
+def tag_key(tag: str) -> str:
+    """Redis key holding the version counter for ``tag``."""
+    return f"{TAG_KEY_PREFIX}{tag}"
+
+
+def cache_tag_versions(*tags: str) -> list[int]:
+    """Return the current version of each tag (one MGET)."""
+    if not tags:
+        return []
+    client = _get_client()
+    if client:
+        try:
+            return [int(v or 0) for v in client.mget([tag_key(t) for t in tags])]
+        except Exception:  # noqa: BLE001
+            logger.debug("Failed to read cache tag versions tags=%s", tags)
+    return [_local_tag_versions.get(t, 0) for t in tags]
+
+
+def tagged_key(key: str, *tags: str) -> str:
+    """Suffix ``key`` with its tags' versions so a tag bump retires it."""
+    versions = cache_tag_versions(*tags)
+    return f"{key}@{'.'.join(str(v) for v in versions)}"
+
+
+def invalidate_tags(*tags: str) -> None:
+    """Bump each tag's version, orphaning every entry built from the old ones."""
+    tags = tuple(t for t in tags if t)
+    if not tags:
+        return
+    for tag in tags:
+        _local_tag_versions[tag] = _local_tag_versions.get(tag, 0) + 1
     client = _get_client()
     if not client:
         return
     try:
-        client.setex(key, ttl, json.dumps(value))
+        pipe = client.pipeline(transaction=False)
+        for tag in tags:
+            pipe.incr(tag_key(tag))
+            pipe.expire(tag_key(tag), TAG_TTL_SECONDS)
+        pipe.execute()
     except Exception:  # noqa: BLE001
-        logger.debug("Failed to set cache key=%s", key)
+        logger.warning("Failed to invalidate cache tags=%s", tags)
 
 
-async def cached(key: str, ttl: int, producer: Callable[[], Awaitable[Any]]):
-    data = cache_get(key)
-    if data is not None:
-        return data
-    value = await producer()
-    cache_set(key, value, ttl)
+def _produce_sync(key: str, ttl: int, stale_ttl: int, producer: Callable[[], Any], namespace: str) -> Any:
+    started = time.perf_counter()
+    value = producer()
+    metrics.cache_load_latency_observe(namespace, time.perf_counter() - started)
+    _write(key, value, ttl, stale_ttl)
     return value
 
 
+def get_or_compute(
+    key: str,
+    ttl: int,
+    producer: Callable[[], Any],
+    *,
+    namespace: str | None = None,
+    stale_ttl: int = 0,
+) -> Any:
+    """Return the cached value for ``key``, computing it at most once on a miss.
+
+    Synchronous counterpart of :func:`cached` for ``def`` routes and workers.
+    """
+    namespace = namespace or _namespace_of(key)
+    started = time.perf_counter()
+    entry, tier = _read(key)
+    if _fresh(entry):
+        _record(namespace, tier, started)
+        return entry.value  # type: ignore[union-attr]
+
+    with _inflight_lock:
+        event = _inflight.get(key)
+        leader = event is None
+        if leader:
+            event = _inflight[key] = threading.Event()
+
+    if not leader:
+        if entry is not None:
+            _record(namespace, "stale", started)
+            return entry.value
+        event.wait(_LEASE_WAIT_SECONDS)  # type: ignore[union-attr]
+        entry, tier = _read(key)
+        if entry is not None:
+            _record(namespace, tier, started)
+            return entry.value
+        _record(namespace, "miss")
+        return _produce_sync(key, ttl, stale_ttl, producer, namespace)
+
+    try:
+        if not _try_lease(key):
+            if entry is not None:
+                _record(namespace, "stale", started)
+                return entry.value
+            deadline = time.monotonic() + _LEASE_WAIT_SECONDS
+            while time.monotonic() < deadline:
+                time.sleep(_LEASE_POLL_SECONDS)
+                entry, tier = _read(key)
+                if entry is not None:
+                    _record(namespace, tier, started)
+                    return entry.value
+        _record(namespace, "miss")
+        try:
+            return _produce_sync(key, ttl, stale_ttl, producer, namespace)
+        finally:
+            _release_lease(key)
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+        event.set()  # type: ignore[union-attr]
+
+
+async def cached(
+    key: str,
+    ttl: int,
+    producer: Callable[[], Awaitable[Any]],
+    *,
+    namespace: str | None = None,
+    stale_ttl: int = 0,
+) -> Any:
+    """Async single-flight read-through over both cache tiers."""
+    namespace = namespace or _namespace_of(key)
+    started = time.perf_counter()
+    entry, tier = _read(key)
+    if _fresh(entry):
+        _record(namespace, tier, started)
+        return entry.value  # type: ignore[union-attr]
+
+    pending = _async_inflight.get(key)
+    if pending is not None:
+        if entry is not None:
+            _record(namespace, "stale", started)
+            return entry.value
+        try:
+            value = await asyncio.shield(pending)
+            _record(namespace, "coalesced", started)
+            return value
+        except Exception:  # noqa: BLE001 - leader failed; try ourselves below
+            pass
+
+    future: asyncio.Future = asyncio.get_running_loop().create_future()
+    _async_inflight[key] = future
+    try:
+        if not _try_lease(key):
+            if entry is not None:
+                _record(namespace, "stale", started)
+                future.set_result(entry.value)
+                return entry.value
+            deadline = time.monotonic() + _LEASE_WAIT_SECONDS
+            while time.monotonic() < deadline:
+                await asyncio.sleep(_LEASE_POLL_SECONDS)
+                entry, tier = _read(key)
+                if entry is not None:
+                    _record(namespace, tier, started)
+                    future.set_result(entry.value)
+                    return entry.value
+        _record(namespace, "miss")
+        try:
+            load_started = time.perf_counter()
+            value = await producer()
+            metrics.cache_load_latency_observe(namespace, time.perf_counter() - load_started)
+            _write(key, value, ttl, stale_ttl)
+            future.set_result(value)
+            return value
+        finally:
+            _release_lease(key)
+    except BaseException as exc:
+        if not future.done():
+            future.set_exception(exc)
+            future.exception()  # mark retrieved so unawaited failures don't warn
+        raise
+    finally:
+        if _async_inflight.get(key) is future:
+            del _async_inflight[key]
+
+
 def cache_stats() -> dict[str, int]:
     """Return basic cache hit/miss counters for instrumentation."""
-    return dict(_cache_metrics)
\ No newline at end of file
+    return {**_cache_metrics, "local_entries": len(_local)}
+
+
+def invalidate_on_commit(target: Any, invalidate: Callable[..., None], *items: Any) -> None:
+    """Call ``invalidate(*items)`` once the session owning ``target`` commits.
+
+    ``target`` is an ORM instance (from a mapper event) or the ``Session``
+    itself. Items queued for the same ``invalidate`` during one transaction are
+    merged into a single call. ``None`` and empty items are ignored.
+    """
+    session = target if isinstance(target, Session) else inspect(target).session
+    items = tuple(i for i in items if i is not None and i != "")
+    if session is None or not items:
+        return
+    pending = session.info.setdefault(_ON_COMMIT_INFO_KEY, {})
+    pending.setdefault(invalidate, set()).update(items)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session: Session) -> None:
+    pending = session.info.pop(_ON_COMMIT_INFO_KEY, None)
+    for invalidate, items in (pending or {}).items():
+        try:
+            invalidate(*items)
+        except Exception:  # noqa: BLE001 — the commit already happened
+            logger.warning("Cache invalidation %s failed", getattr(invalidate, "__name__", invalidate), exc_info=True)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_rolled_back(session: Session, previous_transaction) -> None:
+    # Only the outermost rollback discards the changes; after a SAVEPOINT
+    # rollback the enclosing transaction may still commit what it queued.
+    if previous_transaction.parent is None:
+        session.info.pop(_ON_COMMIT_INFO_KEY, None)
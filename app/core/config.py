@@ -54,6 +54,20 @@ class BaseAppSettings(BaseSettings):
     WHATSAPP_PHONE_NUMBER_ID: str | None = None
     WHATSAPP_VERIFY_TOKEN: str = ""  # REQUIRED: set a unique random value in env vars
     WHATSAPP_APP_SECRET: str | None = None  # Meta app secret for webhook signature verification
+    # Shared Graph API connection pool (app/bot/whatsapp_transport.py)
+    WHATSAPP_HTTP2: bool = True  # negotiated only when the optional h2 package is installed
+    WHATSAPP_HTTP_MAX_CONNECTIONS: int = 20
+    WHATSAPP_HTTP_MAX_KEEPALIVE: int = 10
+    WHATSAPP_HTTP_KEEPALIVE_EXPIRY: float = 30.0  # seconds an idle connection is kept
+    WHATSAPP_HTTP_MAX_RETRIES: int = 2  # extra attempts when safe to resend (see whatsapp_transport)
+    WHATSAPP_HTTP_BACKOFF_BASE: float = 0.5  # seconds; full-jitter exponential backoff
+    WHATSAPP_HTTP_BACKOFF_MAX: float = 8.0
+    # Inbound processing (app/workers/inbound_runtime.py). Run the worker with
+    # --pool threads --concurrency N to handle N senders at once per process.
+    WHATSAPP_INBOUND_PERSISTENT_LOOP: bool = True  # False = asyncio.run per message
+    WHATSAPP_INBOUND_GC_EVERY: int = 50  # full gc.collect() every N messages (0 = never)
+    WHATSAPP_SENDER_LOCK_TTL: int = 180  # seconds; outlives the inbound task's time limit
+    WHATSAPP_SENDER_LOCK_WAIT: float = 60.0  # seconds to wait for another worker's message
     # WhatsApp Message Templates (set via env vars — names must match Meta Business Manager)
     WHATSAPP_TEMPLATE_INVOICE: str | None = None  # Basic invoice notification
     # invoice_with_payment: the main template. Give it a DOCUMENT header (the
@@ -63,6 +77,7 @@ class BaseAppSettings(BaseSettings):
     WHATSAPP_TEMPLATE_PAYMENT_REMINDER: str | None = None  # Overdue reminder
     WHATSAPP_TEMPLATE_RECEIPT: str | None = None  # Payment receipt
     WHATSAPP_TEMPLATE_DAILY_SUMMARY: str | None = None  # Daily business summary
+    DAILY_SUMMARY_SEND_CONCURRENCY: int = 8  # parallel email/WhatsApp sends in send_daily_summaries
     # Lifecycle / engagement templates
     WHATSAPP_TEMPLATE_ACTIVATION_WELCOME: str | None = None  # New signup welcome
     WHATSAPP_TEMPLATE_FIRST_INVOICE: str | None = None  # After first invoice
@@ -230,6 +245,42 @@ class BaseAppSettings(BaseSettings):
     REDIS_URL: str = "redis://localhost:6379/0"
     REDIS_SSL_CERT_REQS: str | None = "required"
     REDIS_SSL_CA_CERTS: str | None = None
+    # In-process LRU tier in front of the Redis app cache (app/core/cache.py).
+    # Local copies live at most CACHE_LOCAL_TTL_SECONDS so writes from other
+    # workers become visible quickly.
+    CACHE_LOCAL_MAX_ENTRIES: int = 2048
+    CACHE_LOCAL_TTL_SECONDS: int = 10
+    # WhatsApp sender → user resolution cache (app/services/phone_resolution.py)
+    PHONE_RESOLVE_TTL: int = 600
+    PHONE_RESOLVE_NEGATIVE_TTL: int = 30  # unknown numbers, e.g. customers replying
+    # Per-user plan / team role / data owner cache (app/services/principal.py)
+    PRINCIPAL_CACHE_TTL: int = 60
+    # Per-issuer bot product match index (app/services/inventory/product_match.py);
+    # rebuilt early whenever a product is added, renamed or (de)activated.
+    PRODUCT_MATCH_INDEX_TTL: int = 3600
+    PRODUCT_MATCH_LOCAL_MAX: int = 256  # built indexes kept per process
+    # Cursor-paginated lists stop counting matches past this (app/utils/pagination.py)
+    PAGINATION_COUNT_CAP: int = 10000
+    # Public storefront payload cache (app/services/storefront_cache.py); must stay
+    # well under the 7-day presigned asset TTL baked into the payload.
+    STOREFRONT_CACHE_TTL: int = 600
+    STOREFRONT_HTTP_MAX_AGE: int = 60  # browsers/CDNs revalidate with If-None-Match after this
+    # Content-addressed OpenAI media results (app/services/openai_client.py):
+    # a re-sent receipt photo or voice note is answered from cache.
+    OCR_RESULT_CACHE_TTL: int = 7 * 24 * 3600
+    TRANSCRIPT_CACHE_TTL: int = 7 * 24 * 3600
+    OPENAI_HTTP_MAX_CONNECTIONS: int = 20
+    OPENAI_HTTP_MAX_KEEPALIVE: int = 10
+    # Process pool for Pillow work off the event loop (app/utils/media_executor.py);
+    # 0 workers runs jobs on a thread instead.
+    MEDIA_POOL_WORKERS: int = 2
+    MEDIA_MAX_TASKS_PER_CHILD: int = 200  # recycle workers so Pillow leaks stay bounded
+    MEDIA_TASK_TIMEOUT: float = 15.0  # seconds; stuck workers are killed
+    MEDIA_MAX_INPUT_BYTES: int = 20 * 1024 * 1024
+    # Read analytics sums from invoice_daily_rollup (falls back to raw invoice
+    # scans when off or when the rollup query fails).
+    ANALYTICS_ROLLUP_ENABLED: bool = True
+
     HTML_PDF_ENABLED: bool = False
     PDF_WATERMARK_ENABLED: bool = False
     PDF_WATERMARK_TEXT: str = "SUOOPS COMPLIANT"
@@ -317,6 +368,15 @@ class BaseAppSettings(BaseSettings):
     # Also persist audit events to a durable Postgres table (survives redeploys;
     # the file above lives on ephemeral disk). Costs ₦0 — reuses the existing DB.
     AUDIT_LOG_TO_DB: bool = True
+    # Background audit writer (app/core/audit.py): events beyond AUDIT_QUEUE_MAX
+    # are dropped and counted instead of blocking requests.
+    AUDIT_QUEUE_MAX: int = 10_000
+    AUDIT_BATCH_SIZE: int = 200
+    AUDIT_FLUSH_INTERVAL_SECONDS: float = 0.5
+    # HMAC key for audit-chain verification checkpoints (falls back to JWT_SECRET).
+    AUDIT_CHECKPOINT_SECRET: str | None = None
+    AUDIT_VERIFY_CHUNK_SIZE: int = 5000  # rows fetched per keyset page while verifying
+    AUDIT_VERIFY_SEGMENTS: int = 8  # parallel segments for the background full re-verify
 
     # Feature flags / premium gating
     # When False, voice note invoice feature is available to all users regardless of plan.
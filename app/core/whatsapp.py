@@ -16,7 +16,8 @@ def get_whatsapp_client() -> WhatsAppClient:
 
     Lazily creates the client on first call.  The instance is module-level
     so it's shared across the process (safe — ``WhatsAppClient`` is stateless
-    and only holds config; each call opens its own HTTP request).
+    and only holds config; HTTP connections live in the process-wide pool in
+    ``app.bot.whatsapp_transport``).
     """
     global _client
     if _client is None:
@@ -0,0 +1,46 @@
+"""Shared plumbing for ``after_flush`` hooks that keep derived rows in step.
+
+``invoice_rollup``, ``marketplace_search`` and ``storefront_live`` each write
+derived rows from an ``after_flush`` hook, in the same transaction as the
+change that caused them. In that hook ``session.new`` / ``dirty`` / ``deleted``
+and attribute history still describe the flush that just ran.
+"""
+from __future__ import annotations
+
+import logging
+from collections.abc import Callable
+from typing import Any
+
+from sqlalchemy import inspect
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import SQLAlchemyError
+
+logger = logging.getLogger(__name__)
+
+
+def changed(obj: Any, fields: tuple[str, ...]) -> bool:
+    """True if the flush changed any of ``fields`` on ``obj``."""
+    state = inspect(obj)
+    return any(state.attrs[f].history.has_changes() for f in fields)
+
+
+def old_and_new(obj: Any, attr: str) -> set:
+    """``obj.attr`` now and before the flush (both rows' owners on a move); no None."""
+    state = inspect(obj)
+    values = {state.dict.get(attr), *(state.attrs[attr].history.deleted or ())}
+    values.discard(None)
+    return values
+
+
+def in_savepoint(connection: Connection, fn: Callable[[], Any], *, target: str, repair: str) -> None:
+    """Run ``fn`` inside a SAVEPOINT on ``connection``.
+
+    A failure rolls back only the derived write and is logged (``target`` was
+    not updated; ``repair`` says what will fix it), so it never takes the
+    user's write down with it.
+    """
+    try:
+        with connection.begin_nested():
+            fn()
+    except SQLAlchemyError:
+        logger.warning("%s update failed; %s will reconcile", target, repair, exc_info=True)
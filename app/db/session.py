@@ -68,3 +68,7 @@ def session_scope() -> Generator[Session, None, None]:
         raise
     finally:
         db.close()
+
+
+# Registers the ORM hooks that keep derived rows and caches in step with writes.
+import app.services.hooks  # noqa: E402,F401
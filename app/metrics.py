@@ -95,6 +95,40 @@ try:  # pragma: no cover - import guard
         "Invoice amounts in Naira",
         buckets=(100, 500, 1000, 2500, 5000, 10000, 25000, 50000, 100000, 250000, 500000, 1000000),
     )
+    # App cache (app/core/cache.py)
+    _CACHE_REQUESTS = Counter(
+        "cache_requests_total",
+        "App cache lookups by namespace and result (local|redis|stale|coalesced|miss)",
+        ["namespace", "result"],
+    )
+    _CACHE_LOOKUP_LATENCY = Histogram(
+        "cache_lookup_latency_seconds",
+        "Time to serve a value from the app cache",
+        ["namespace"],
+        buckets=(0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5),
+    )
+    _CACHE_LOAD_LATENCY = Histogram(
+        "cache_load_latency_seconds",
+        "Producer run time on an app cache miss",
+        ["namespace"],
+        buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+    )
+    # Audit pipeline (app/core/audit.py)
+    _AUDIT_DROPPED = Counter(
+        "audit_events_dropped_total", "Audit events dropped (queue_full|db_error)", ["reason"]
+    )
+    _AUDIT_BATCH_SIZE = Histogram(
+        "audit_batch_size",
+        "Events written per audit writer batch",
+        buckets=(1, 2, 5, 10, 25, 50, 100, 200, 500),
+    )
+    # WhatsApp Graph API transport (app/bot/whatsapp_transport.py)
+    _WHATSAPP_API_LATENCY = Histogram(
+        "whatsapp_api_latency_seconds",
+        "WhatsApp Cloud API request latency by endpoint and outcome (2xx|4xx|429|5xx|error)",
+        ["endpoint", "outcome"],
+        buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10, 30),
+    )
     _ENABLED = True
 except Exception:  # noqa: BLE001
     _ENABLED = False
@@ -127,7 +161,13 @@ except Exception:  # noqa: BLE001
         _SUBSCRIPTION_UPGRADES,
         _INVOICE_CREATED_BY_PLAN,
         _AVERAGE_INVOICE_VALUE,
-    ) = (None,) * 28  # type: ignore
+        _CACHE_REQUESTS,
+        _CACHE_LOOKUP_LATENCY,
+        _CACHE_LOAD_LATENCY,
+        _AUDIT_DROPPED,
+        _AUDIT_BATCH_SIZE,
+        _WHATSAPP_API_LATENCY,
+    ) = (None,) * 34  # type: ignore
     logger.warning("Prometheus client not available; metrics will be log-only")
 
 
@@ -332,6 +372,53 @@ def record_invoice_amount(amount_naira: float):
         logger.debug(f"observe invoice_amount_naira={amount_naira}")
 
 
+# ---------------- App cache metrics helpers -----------------
+def cache_lookup(namespace: str, result: str):
+    """Record one app cache lookup outcome."""
+    if _ENABLED:
+        _CACHE_REQUESTS.labels(namespace=namespace, result=result).inc()  # type: ignore[union-attr]
+    else:
+        logger.debug(f"metric cache_requests_total[namespace={namespace}, result={result}] += 1")
+
+
+def cache_lookup_latency_observe(namespace: str, seconds: float):
+    if _ENABLED:
+        _CACHE_LOOKUP_LATENCY.labels(namespace=namespace).observe(seconds)  # type: ignore[union-attr]
+    else:
+        logger.debug(f"observe cache_lookup_latency_seconds[namespace={namespace}]={seconds}")
+
+
+def cache_load_latency_observe(namespace: str, seconds: float):
+    if _ENABLED:
+        _CACHE_LOAD_LATENCY.labels(namespace=namespace).observe(seconds)  # type: ignore[union-attr]
+    else:
+        logger.debug(f"observe cache_load_latency_seconds[namespace={namespace}]={seconds}")
+
+
+# ---------------- Audit pipeline metrics helpers -----------------
+def audit_event_dropped(reason: str, count: int = 1):
+    """Record audit events lost to backpressure or a failed DB write."""
+    if _ENABLED:
+        _AUDIT_DROPPED.labels(reason=reason).inc(count)  # type: ignore[union-attr]
+    else:
+        logger.debug(f"metric audit_events_dropped_total[reason={reason}] += {count}")
+
+
+def audit_batch_written(size: int):
+    if _ENABLED:
+        _AUDIT_BATCH_SIZE.observe(size)  # type: ignore[union-attr]
+    else:
+        logger.debug(f"observe audit_batch_size={size}")
+
+
+# ---------------- WhatsApp transport metrics helpers -----------------
+def whatsapp_api_latency_observe(endpoint: str, outcome: str, seconds: float):
+    if _ENABLED:
+        _WHATSAPP_API_LATENCY.labels(endpoint=endpoint, outcome=outcome).observe(seconds)  # type: ignore[union-attr]
+    else:
+        logger.debug(f"observe whatsapp_api_latency_seconds[endpoint={endpoint}, outcome={outcome}]={seconds}")
+
+
 class PaymentLatencyTimer:
     def __init__(self):
         self.start = time.perf_counter()
@@ -372,4 +459,13 @@ __all__ = [
     "subscription_upgrade",
     "invoice_created_by_plan",
     "record_invoice_amount",
+    # App cache
+    "cache_lookup",
+    "cache_lookup_latency_observe",
+    "cache_load_latency_observe",
+    # Audit
+    "audit_event_dropped",
+    "audit_batch_written",
+    # WhatsApp transport
+    "whatsapp_api_latency_observe",
 ]
@@ -147,7 +147,9 @@ class ProductListOut(BaseModel):
     total: int
     page: int
     page_size: int
-    total_pages: int
+    total_pages: int | None  # None when total_capped (the real count is unknown)
+    next_cursor: str | None = None  # pass as ?cursor= for the next (keyset) page
+    total_capped: bool = False  # total stopped counting at the cap (cursor mode)
 
 
 # ============================================================================
@@ -18,6 +18,7 @@ from sqlalchemy import (
     String,
     Text,
     UniqueConstraint,
+    text,
 )
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.sql import func
@@ -168,27 +169,56 @@ class Customer(Base):
     invoices: Mapped[list[Invoice]] = relationship("Invoice", back_populates="customer")  # type: ignore
 
 
+_OPEN_INVOICE = text("status IN ('pending', 'awaiting_confirmation')")
+_PAID_INVOICE = text("status = 'paid'")
+
+
 class Invoice(Base):
     __table_args__ = (
         Index("ix_invoice_issuer_wa_pending", "issuer_id", "whatsapp_delivery_pending"),
         Index("ix_invoice_customer_status", "customer_id", "status"),
+        # Hot-path indexes (20260803_invoice_hot_path_idx); query plans are
+        # pinned by tests/test_query_plans.py.
+        # Analytics date-range sums: issuer + revenue/expense + created_at.
+        Index("ix_invoice_issuer_type_created", "issuer_id", "invoice_type", "created_at"),
+        # Invoice list: newest-first page of one issuer's invoices.
+        Index("ix_invoice_issuer_recent", "issuer_id", "id"),
+        # Receivables (aging, overdue, expected inflow) only ever read open rows.
+        Index(
+            "ix_invoice_issuer_open_due", "issuer_id", "invoice_type", "due_date",
+            postgresql_where=_OPEN_INVOICE, sqlite_where=_OPEN_INVOICE,
+        ),
+        # Cross-issuer reminder sweeps: open invoices by due date.
+        Index(
+            "ix_invoice_open_due", "due_date",
+            postgresql_where=_OPEN_INVOICE, sqlite_where=_OPEN_INVOICE,
+        ),
+        # Cash collected today/this week.
+        Index(
+            "ix_invoice_issuer_paid_at", "issuer_id", "paid_at",
+            postgresql_where=_PAID_INVOICE, sqlite_where=_PAID_INVOICE,
+        ),
     )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     invoice_id: Mapped[str] = mapped_column(String(40), unique=True, index=True)
-    issuer_id: Mapped[int] = mapped_column(ForeignKey("user.id"))  # type: ignore
+    # active_history on the invoice_daily_rollup dimensions (issuer_id, amount,
+    # status, created_at, invoice_type, channel): the rollup flush hook needs the
+    # old value even when the attribute was expired before being reassigned.
+    issuer_id: Mapped[int] = mapped_column(ForeignKey("user.id"), active_history=True)  # type: ignore
     customer_id: Mapped[int] = mapped_column(ForeignKey("customer.id"), index=True)  # type: ignore
-    amount: Mapped[Decimal] = mapped_column(Numeric(scale=2))
+    amount: Mapped[Decimal] = mapped_column(Numeric(scale=2), active_history=True)
     currency: Mapped[str] = mapped_column(String(3), default="NGN", server_default="NGN")  # NGN or USD
     # WhatsApp delivery pending: True if waiting for customer to opt-in before sending
     whatsapp_delivery_pending: Mapped[bool] = mapped_column(default=False, index=True)
     discount_amount: Mapped[Decimal | None] = mapped_column(Numeric(scale=2), nullable=True)
-    status: Mapped[str] = mapped_column(String(30), default="pending", index=True)
+    status: Mapped[str] = mapped_column(String(30), default="pending", index=True, active_history=True)
     due_date: Mapped[dt.datetime | None] = mapped_column(DateTime(timezone=True), nullable=True, index=True)
     created_at: Mapped[dt.datetime] = mapped_column(
         DateTime(timezone=True),
         default=utcnow,
         server_default=func.now(),
+        active_history=True,
     )
     pdf_url: Mapped[str | None]
     # When customer payment is confirmed and invoice marked paid
@@ -208,6 +238,7 @@ class Invoice(Base):
         String(20),
         default="revenue",
         index=True,
+        active_history=True,
     )  # "revenue" or "expense"
     # For expenses: rent, utilities, etc.
     category: Mapped[str | None] = mapped_column(String(50), nullable=True, index=True)
@@ -216,7 +247,9 @@ class Invoice(Base):
     receipt_url: Mapped[str | None] = mapped_column(String(500), nullable=True)  # Receipt image/PDF URL
     receipt_text: Mapped[str | None] = mapped_column(Text, nullable=True)  # OCR extracted text
     input_method: Mapped[str | None] = mapped_column(String(20), nullable=True)  # voice, text, photo, manual
-    channel: Mapped[str | None] = mapped_column(String(20), nullable=True)  # whatsapp, email, dashboard
+    channel: Mapped[str | None] = mapped_column(  # whatsapp, email, dashboard
+        String(20), nullable=True, active_history=True
+    )
     # Fee ledger: the SuoOps commission (kobo) actually locked in for THIS invoice
     # at creation — manual invoices at the manual rate (charged from the wallet),
     # storefront/online at the storefront rate (collected by Paystack on payment).
@@ -233,6 +266,16 @@ class Invoice(Base):
     # Track which user last updated the invoice status (paid/cancelled)
     status_updated_by_user_id: Mapped[int | None] = mapped_column(ForeignKey("user.id"), nullable=True, index=True)
     status_updated_at: Mapped[dt.datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    # Bumped on every UPDATE issued through SQLAlchemy (ORM or Core), so the
+    # nightly rollup reconcile finds changed invoices whatever their created day.
+    updated_at: Mapped[dt.datetime | None] = mapped_column(
+        DateTime(timezone=True),
+        default=utcnow,
+        onupdate=utcnow,
+        server_default=func.now(),
+        nullable=True,
+        index=True,
+    )
     
     customer: Mapped[Customer] = relationship("Customer", back_populates="invoices")  # type: ignore
     issuer: Mapped[User] = relationship("User", back_populates="issued_invoices", foreign_keys=[issuer_id])  # type: ignore
@@ -250,6 +293,27 @@ class Invoice(Base):
     )  # type: ignore
 
 
+class InvoiceDailyRollup(Base):
+    """Per-issuer daily invoice totals for analytics.
+
+    One row per (issuer, created day, invoice_type, status, channel) holding the
+    invoice count and amount sum. Kept current by the ORM flush hook in
+    ``app.services.invoice_rollup`` and reconciled by the
+    ``maintenance.rebuild_invoice_rollup`` task. ``channel`` is '' for invoices
+    without one so the key stays NOT NULL (upsert-able).
+    """
+
+    __tablename__ = "invoice_daily_rollup"
+
+    issuer_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    day: Mapped[dt.date] = mapped_column(Date, primary_key=True)
+    invoice_type: Mapped[str] = mapped_column(String(20), primary_key=True)
+    status: Mapped[str] = mapped_column(String(30), primary_key=True)
+    channel: Mapped[str] = mapped_column(String(20), primary_key=True, default="")
+    invoice_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    amount_total: Mapped[Decimal] = mapped_column(Numeric(scale=2), default=0, nullable=False)
+
+
 class InvoiceLine(Base):
     id: Mapped[int] = mapped_column(primary_key=True)
     invoice_id: Mapped[int] = mapped_column(ForeignKey("invoice.id"), index=True)  # type: ignore
@@ -366,6 +430,10 @@ class User(Base):
     storefront_announcement: Mapped[str | None] = mapped_column(String(200), nullable=True)
     # Discovery analytics — incremented on each public store view.
     storefront_views: Mapped[int] = mapped_column(Integer, default=0, server_default="0", nullable=False)
+    # Materialised "live in search" gate (opted in + active + logo + payouts +
+    # description + state + a listable product). Maintained on write by
+    # app.services.storefront_live — never set it directly.
+    storefront_live: Mapped[bool] = mapped_column(default=False, server_default="false", nullable=False)
 
     # Precise business location (GPS-captured at storefront setup). Powers the
     # escrow same/different-state window and future delivery pickup point.
@@ -543,6 +611,15 @@ class User(Base):
     )  # type: ignore
 
 
+# Directory pages walk live stores by slug; the partial index holds only those.
+Index(
+    "ix_user_storefront_live_slug",
+    User.storefront_slug,
+    postgresql_where=User.storefront_live.is_(True),
+    sqlite_where=User.storefront_live.is_(True),
+)
+
+
 class WebhookEvent(Base):
     __table_args__ = (
         UniqueConstraint("provider", "external_id", name="uq_webhookevent_provider_external_id"),
@@ -703,6 +780,34 @@ class StorefrontReview(Base):
     )
 
 
+class StorefrontSearchDocument(Base):
+    """Denormalised marketplace search text for one storefront owner.
+
+    ``store_text`` holds the profile fields shoppers search (business name,
+    name, description, city, state), ``product_text`` one ``name<TAB>category``
+    line per active product, and ``document`` both, lower-cased. On Postgres the
+    migration adds a generated, GIN-indexed ``search_vector`` (store text
+    weighted above products) and a trigram index on ``document``. Kept current
+    by the flush hook in ``app.services.marketplace_search`` and reconciled by
+    ``maintenance.rebuild_search_documents``.
+    """
+
+    __tablename__ = "storefront_search_document"
+
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("user.id", ondelete="CASCADE"), primary_key=True
+    )
+    store_text: Mapped[str] = mapped_column(Text, default="", nullable=False)
+    product_text: Mapped[str] = mapped_column(Text, default="", nullable=False)
+    document: Mapped[str] = mapped_column(Text, default="", nullable=False)
+    updated_at: Mapped[dt.datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=utcnow,
+        server_default=func.now(),
+        onupdate=utcnow,
+    )
+
+
 class StorefrontOrderEscrow(Base):
     """Buyer-protection hold for a storefront order (channel='storefront').
 
@@ -980,3 +1085,24 @@ class AuditLog(Base):
     details: Mapped[dict | None] = mapped_column(JSON, nullable=True)
     prev_hash: Mapped[str | None] = mapped_column(String(64), nullable=True)
     entry_hash: Mapped[str | None] = mapped_column(String(64), nullable=True, index=True)
+
+
+class AuditChainCheckpoint(Base):
+    """Signed record of how far the ``audit_log`` hash chain has been verified.
+
+    ``signature`` is an HMAC over ``(last_id, last_hash, rows_verified)`` keyed by
+    a server secret, so someone who can rewrite ``audit_log`` rows still can't
+    forge a checkpoint that vouches for them. Verification resumes from the
+    latest valid checkpoint instead of re-hashing the whole table.
+    """
+
+    __tablename__ = "audit_chain_checkpoint"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    last_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    last_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    rows_verified: Mapped[int] = mapped_column(Integer, nullable=False)
+    signature: Mapped[str] = mapped_column(String(64), nullable=False)
+    created_at: Mapped[dt.datetime] = mapped_column(
+        DateTime(timezone=True), default=utcnow, server_default=func.now()
+    )
@@ -256,4 +256,10 @@ class PaginatedResponse(BaseModel, Generic[T]):
     total: int = Field(description="Total number of matching records")
     skip: int = Field(description="Number of records skipped")
     limit: int = Field(description="Maximum records returned per page")
-    has_more: bool = Field(description="Whether more records exist beyond this page")
\ No newline at end of file
+    has_more: bool = Field(description="Whether more records exist beyond this page")
+    next_cursor: str | None = Field(
+        default=None, description="Pass as ?cursor= to fetch the next page (keyset paging)"
+    )
+    total_capped: bool = Field(
+        default=False, description="Whether total stopped counting at the cap (cursor mode)"
+    )
\ No newline at end of file
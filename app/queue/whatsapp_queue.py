@@ -2,6 +2,15 @@
 
 For MVP this attempts to use Celery for async processing; if Celery is unavailable,
 processes messages synchronously for immediate response.
+
+A webhook delivery may batch several messages and statuses. Each message is
+queued as its own ``process_whatsapp_inbound`` task; a sender's messages are
+chained in timestamp order so they're handled in the order they were sent,
+while different senders run in parallel inside one Celery group. Each link
+carries an errback (``resume_whatsapp_inbound``) holding the sender's later
+messages, so a message that fails for good (retries exhausted) doesn't take
+the rest of the chain down with it. All status receipts in the delivery go to
+a single ``process_whatsapp_statuses`` task.
 """
 from __future__ import annotations
 
@@ -68,20 +77,83 @@ def _flush_fallback_queue() -> None:
             break
 
 
+def _sender_batches(payload: dict[str, Any]) -> list[list[dict[str, Any]]]:
+    """Single-message payloads grouped by sender, each group in send order."""
+    from app.bot.message_extractor import split_payload
+
+    by_sender: dict[str, list[dict[str, Any]]] = {}
+    for single in split_payload(payload):
+        try:
+            message = single["entry"][0]["changes"][0]["value"]["messages"][0]
+        except (KeyError, IndexError, TypeError):
+            message = single
+        by_sender.setdefault(str(message.get("from") or ""), []).append(single)
+
+    def _ts(single: dict[str, Any]) -> int:
+        try:
+            return int(single["entry"][0]["changes"][0]["value"]["messages"][0].get("timestamp") or 0)
+        except (KeyError, IndexError, TypeError, ValueError):
+            return 0
+
+    # sorted() is stable, so equal/missing timestamps keep delivery order.
+    return [sorted(batch, key=_ts) for batch in by_sender.values()]
+
+
+def sender_chain(batch: list[dict[str, Any]]) -> Any:
+    """One sender's messages as a chain, each link resuming the rest if it fails."""
+    from celery import chain
+
+    from app.workers.tasks import process_whatsapp_inbound, resume_whatsapp_inbound
+
+    sigs = []
+    for idx, single in enumerate(batch):
+        sig = process_whatsapp_inbound.si(single)
+        rest = batch[idx + 1:]
+        if rest:
+            # Fires only on terminal failure; retries don't trigger errbacks.
+            sig.on_error(resume_whatsapp_inbound.si(rest))
+        sigs.append(sig)
+    return sigs[0] if len(sigs) == 1 else chain(*sigs)
+
+
+def _dispatch(batches: list[list[dict[str, Any]]], statuses: list[dict[str, Any]]) -> None:
+    from celery import group
+
+    from app.workers.tasks import process_whatsapp_statuses
+
+    signatures = [sender_chain(batch) for batch in batches]
+    if statuses:
+        signatures.append(process_whatsapp_statuses.si(statuses))
+    if len(signatures) == 1:
+        signatures[0].apply_async()
+    elif signatures:
+        group(signatures).apply_async()
+
+
 def enqueue_message(payload: dict[str, Any]) -> None:
-    # Import task here to avoid circular imports
-    from app.workers.tasks import process_whatsapp_inbound
-    
-    # Prefer asynchronous Celery worker
+    from app.bot.message_extractor import iter_statuses
+
+    batches = _sender_batches(payload)
+    statuses = list(iter_statuses(payload))
+    if not batches and not statuses:
+        return
+
+    # Prefer asynchronous Celery workers
     try:
-        process_whatsapp_inbound.delay(payload)
+        _dispatch(batches, statuses)
         _flush_fallback_queue()
         return
     except Exception:  # noqa: BLE001
         logger.warning("Celery dispatch failed; processing synchronously instead")
 
     # Celery unavailable - process synchronously for immediate response
-    _process_synchronously(payload)
+    if statuses:
+        from app.bot.message_extractor import handle_statuses
+
+        handle_statuses(statuses)
+    for batch in batches:
+        for single in batch:
+            _process_synchronously(single)
 
     # Trim buffer if it has grown beyond cap (defensive)
     if len(_fallback_buffer) > _MAX_FALLBACK_BUFFER:
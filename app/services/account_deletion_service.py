@@ -15,7 +15,7 @@ from sqlalchemy.orm import Session
 
 from app.core.audit import log_audit_event
 from app.models.expense import Expense
-from app.models.models import Invoice, InvoiceLine, User
+from app.models.models import Invoice, InvoiceDailyRollup, InvoiceLine, User
 from app.models.referral_models import Referral, ReferralCode, ReferralReward
 from app.models.team_models import Team, TeamMember
 
@@ -103,6 +103,9 @@ class AccountDeletionService:
                 delete(Invoice).where(Invoice.issuer_id == user_id)
             ).rowcount
             deletion_summary["deleted_items"]["invoices"] = invoices_deleted
+            self.db.execute(
+                delete(InvoiceDailyRollup).where(InvoiceDailyRollup.issuer_id == user_id)
+            )
             
             # 3. Delete referral-related data
             # Delete referrals where user is referrer (regardless of whether they have a referral code)
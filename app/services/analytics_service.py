@@ -2,12 +2,16 @@
 
 from __future__ import annotations
 
+import logging
 from datetime import date, datetime, timedelta, timezone
 from decimal import Decimal
+from typing import Any, Callable, TypeVar
 
 from sqlalchemy import and_, case, extract, func, or_
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 
+from app.core.config import settings
 from app.models import models
 from app.models.schemas import (
     AgingReport,
@@ -34,18 +38,105 @@ def exclude_abandoned_storefront():
     )
 
 
-def calculate_revenue_metrics(
+# ── Daily rollup ─────────────────────────────────────────────────────
+#
+# Sums that only depend on (created day, invoice_type, status, channel) are
+# read from ``invoice_daily_rollup`` (see app/services/invoice_rollup.py),
+# which is a handful of rows per issuer-day instead of every invoice. Anything
+# keyed on due_date/paid_at/customer still scans ``invoice``. If the rollup
+# read fails (e.g. the migration hasn't run) we fall back to the raw scan.
+
+logger = logging.getLogger(__name__)
+
+_T = TypeVar("_T")
+
+_Rollup = models.InvoiceDailyRollup
+
+
+def _utc_today() -> date:
+    """Today's date in UTC, the calendar ``invoice_daily_rollup`` buckets by."""
+    return datetime.now(timezone.utc).date()
+
+
+def rollup_live_filter():
+    """``exclude_abandoned_storefront`` for rollup rows."""
+    return or_(_Rollup.channel != "storefront", _Rollup.status != "pending")
+
+
+def _from_rollup(
     db: Session,
-    user_id: int,
-    start_date: date,
-    end_date: date,
-    conversion_rate: Decimal,
-) -> RevenueMetrics:
-    """Calculate total revenue, paid, pending, and overdue amounts.
+    rollup_fn: Callable[..., _T],
+    raw_fn: Callable[..., _T],
+    *args: Any,
+) -> _T:
+    if settings.ANALYTICS_ROLLUP_ENABLED:
+        try:
+            return rollup_fn(db, *args)
+        except SQLAlchemyError:
+            logger.warning("invoice_daily_rollup read failed; using raw scan", exc_info=True)
+            db.rollback()
+    return raw_fn(db, *args)
+
+
+def _sum_if(condition, column=None):
+    column = _Rollup.amount_total if column is None else column
+    return func.coalesce(func.sum(case((condition, column), else_=0)), 0)
+
+
+def _revenue_sums_rollup(
+    db: Session, user_id: int, start_date: date, end_date: date, prev_start: date
+) -> tuple:
+    in_period = _Rollup.day >= start_date
+    row = (
+        db.query(
+            _sum_if(in_period).label("total"),
+            _sum_if(and_(in_period, _Rollup.status == "paid")).label("paid"),
+            _sum_if(and_(in_period, _Rollup.status == "pending")).label("pending_all"),
+            _sum_if(and_(in_period, _Rollup.status == "awaiting_confirmation")).label("awaiting"),
+            _sum_if(in_period, _Rollup.invoice_count).label("cnt"),
+            _sum_if(and_(_Rollup.day < start_date, _Rollup.status == "paid")).label("prev"),
+        )
+        .filter(
+            _Rollup.issuer_id == user_id,
+            _Rollup.invoice_type == "revenue",
+            _Rollup.day >= prev_start,
+            _Rollup.day <= end_date,
+            rollup_live_filter(),
+        )
+        .one()
+    )
+    # Overdue depends on due_date, which the rollup doesn't carry; only open
+    # invoices can be overdue, so this stays a narrow scan.
+    overdue = (
+        db.query(func.coalesce(func.sum(models.Invoice.amount), 0))
+        .filter(
+            models.Invoice.issuer_id == user_id,
+            models.Invoice.invoice_type == "revenue",
+            models.Invoice.status == "pending",
+            models.Invoice.due_date != None,  # noqa: E711
+            models.Invoice.due_date < datetime.combine(end_date, datetime.max.time()),
+            models.Invoice.created_at >= datetime.combine(start_date, datetime.min.time()),
+            models.Invoice.created_at <= datetime.combine(end_date, datetime.max.time()),
+            exclude_abandoned_storefront(),
+        )
+        .scalar()
+    )
+    overdue = Decimal(str(overdue))
+    pending = Decimal(str(row.pending_all)) - overdue + Decimal(str(row.awaiting))
+    return (
+        Decimal(str(row.total)),
+        Decimal(str(row.paid)),
+        pending,
+        overdue,
+        int(row.cnt or 0),
+        Decimal(str(row.prev)),
+    )
 
-    Uses a single SQL aggregation query instead of loading all invoices
-    into Python memory.
-    """
+
+def _revenue_sums_raw(
+    db: Session, user_id: int, start_date: date, end_date: date, prev_start: date
+) -> tuple:
+    """Same sums as ``_revenue_sums_rollup`` straight from ``invoice``."""
     end_dt = datetime.combine(end_date, datetime.max.time())
     start_dt = datetime.combine(start_date, datetime.min.time())
 
@@ -104,16 +195,6 @@ def calculate_revenue_metrics(
         .first()
     )
 
-    total_revenue = Decimal(str(row.total)) / conversion_rate
-    paid_revenue = Decimal(str(row.paid)) / conversion_rate
-    overdue_revenue = Decimal(str(row.overdue)) / conversion_rate
-    pending_revenue = Decimal(str(row.pending)) / conversion_rate
-    count = row.cnt or 0
-
-    # Calculate previous period for growth
-    period_days = (end_date - start_date).days
-    prev_start = start_date - timedelta(days=period_days)
-
     prev_revenue = (
         db.query(func.sum(models.Invoice.amount))
         .filter(
@@ -126,7 +207,40 @@ def calculate_revenue_metrics(
         .scalar()
     ) or Decimal("0")
 
-    prev_revenue = prev_revenue / conversion_rate
+    return (
+        Decimal(str(row.total)),
+        Decimal(str(row.paid)),
+        Decimal(str(row.pending)),
+        Decimal(str(row.overdue)),
+        row.cnt or 0,
+        Decimal(str(prev_revenue)),
+    )
+
+
+def calculate_revenue_metrics(
+    db: Session,
+    user_id: int,
+    start_date: date,
+    end_date: date,
+    conversion_rate: Decimal,
+) -> RevenueMetrics:
+    """Calculate total revenue, paid, pending, and overdue amounts.
+
+    Reads the daily rollup (one narrow scan of open invoices for the overdue
+    split), falling back to a single SQL aggregation over ``invoice``.
+    """
+    period_days = (end_date - start_date).days
+    prev_start = start_date - timedelta(days=period_days)
+
+    total, paid, pending, overdue, count, prev = _from_rollup(
+        db, _revenue_sums_rollup, _revenue_sums_raw, user_id, start_date, end_date, prev_start
+    )
+
+    total_revenue = total / conversion_rate
+    paid_revenue = paid / conversion_rate
+    overdue_revenue = overdue / conversion_rate
+    pending_revenue = pending / conversion_rate
+    prev_revenue = prev / conversion_rate
 
     # Calculate growth percentage
     if prev_revenue > 0:
@@ -144,15 +258,30 @@ def calculate_revenue_metrics(
     )
 
 
-def calculate_invoice_metrics(
-    db: Session,
-    user_id: int,
-    start_date: date,
-    end_date: date,
-) -> InvoiceMetrics:
-    """Calculate invoice counts by status."""
-    
-    invoices = (
+def _invoice_counts_rollup(db: Session, user_id: int, start_date: date, end_date: date):
+    count = _Rollup.invoice_count
+    return (
+        db.query(
+            func.coalesce(func.sum(count), 0).label("total"),
+            _sum_if(_Rollup.status == "paid", count).label("paid"),
+            _sum_if(_Rollup.status == "pending", count).label("pending"),
+            _sum_if(_Rollup.status == "failed", count).label("failed"),
+            _sum_if(_Rollup.status == "awaiting_confirmation", count).label("awaiting"),
+            _sum_if(_Rollup.status == "cancelled", count).label("cancelled"),
+        )
+        .filter(
+            _Rollup.issuer_id == user_id,
+            _Rollup.invoice_type == "revenue",
+            _Rollup.day >= start_date,
+            _Rollup.day <= end_date,
+            rollup_live_filter(),
+        )
+        .one()
+    )
+
+
+def _invoice_counts_raw(db: Session, user_id: int, start_date: date, end_date: date):
+    return (
         db.query(
             func.count(models.Invoice.id).label("total"),
             func.sum(case((models.Invoice.status == "paid", 1), else_=0)).label("paid"),
@@ -170,7 +299,19 @@ def calculate_invoice_metrics(
         )
         .first()
     )
-    
+
+
+def calculate_invoice_metrics(
+    db: Session,
+    user_id: int,
+    start_date: date,
+    end_date: date,
+) -> InvoiceMetrics:
+    """Calculate invoice counts by status."""
+    invoices = _from_rollup(
+        db, _invoice_counts_rollup, _invoice_counts_raw, user_id, start_date, end_date
+    )
+
     total = invoices.total or 0
     paid = invoices.paid or 0
     pending = invoices.pending or 0
@@ -350,32 +491,38 @@ def calculate_aging_report(
     )
 
 
-def calculate_monthly_trends(
-    db: Session,
-    user_id: int,
-    end_date: date,
-    conversion_rate: Decimal,
-) -> list[MonthlyTrend]:
-    """Calculate revenue and invoice trends for last 12 months.
+def _monthly_sums_rollup(db: Session, user_id: int, month_start: date, end_date: date):
+    yr_col = extract("year", _Rollup.day).label("yr")
+    mo_col = extract("month", _Rollup.day).label("mo")
+    return (
+        db.query(
+            yr_col,
+            mo_col,
+            _Rollup.invoice_type,
+            _sum_if(_Rollup.status == "paid").label("paid_amount"),
+            func.coalesce(func.sum(_Rollup.amount_total), 0).label("total_amount"),
+            func.coalesce(func.sum(_Rollup.invoice_count), 0).label("cnt"),
+        )
+        .filter(
+            _Rollup.issuer_id == user_id,
+            _Rollup.invoice_type.in_(["revenue", "expense"]),
+            _Rollup.day >= month_start,
+            _Rollup.day <= end_date,
+            rollup_live_filter(),
+        )
+        .group_by(yr_col, mo_col, _Rollup.invoice_type)
+        .all()
+    )
 
-    Uses a single GROUP BY query instead of 36 individual queries (3 per month).
-    """
-    # Determine the 12-month window (current month + 11 prior months)
-    end_month = end_date.replace(day=1)
-    # Go back 11 months from end_month to get exactly 12 months total
-    start_month_raw = end_month.month - 11
-    start_year = end_month.year
-    if start_month_raw <= 0:
-        start_month_raw += 12
-        start_year -= 1
-    month_start = date(start_year, start_month_raw, 1)
+
+def _monthly_sums_raw(db: Session, user_id: int, month_start: date, end_date: date):
     end_dt = datetime.combine(end_date, datetime.max.time())
     start_dt = datetime.combine(month_start, datetime.min.time())
 
     yr_col = extract("year", models.Invoice.created_at).label("yr")
     mo_col = extract("month", models.Invoice.created_at).label("mo")
 
-    rows = (
+    return (
         db.query(
             yr_col,
             mo_col,
@@ -400,6 +547,29 @@ def calculate_monthly_trends(
         .all()
     )
 
+
+def calculate_monthly_trends(
+    db: Session,
+    user_id: int,
+    end_date: date,
+    conversion_rate: Decimal,
+) -> list[MonthlyTrend]:
+    """Calculate revenue and invoice trends for last 12 months.
+
+    Uses a single GROUP BY query (over the daily rollup when available)
+    instead of 36 individual queries (3 per month).
+    """
+    # Determine the 12-month window (current month + 11 prior months)
+    end_month = end_date.replace(day=1)
+    # Go back 11 months from end_month to get exactly 12 months total
+    start_month_raw = end_month.month - 11
+    start_year = end_month.year
+    if start_month_raw <= 0:
+        start_month_raw += 12
+        start_year -= 1
+    month_start = date(start_year, start_month_raw, 1)
+    rows = _from_rollup(db, _monthly_sums_rollup, _monthly_sums_raw, user_id, month_start, end_date)
+
     # Build lookup: (year, month) → {revenue, expenses, count}
     data: dict[tuple[int, int], dict] = {}
     for row in rows:
@@ -443,7 +613,7 @@ def calculate_monthly_trends(
 
 def get_date_range(period: str) -> tuple[date, date]:
     """Calculate start and end dates based on period."""
-    today = date.today()
+    today = _utc_today()
     
     if period == "7d":
         start_date = today - timedelta(days=7)
@@ -629,104 +799,103 @@ def calculate_storefront_insights(
 # ── Cash-First Dashboard ─────────────────────────────────────────────
 
 
+def _today_activity_rollup(db: Session, user_id: int, today: date) -> tuple[int, Decimal]:
+    row = (
+        db.query(
+            _sum_if(
+                and_(_Rollup.invoice_type == "revenue", rollup_live_filter()),
+                _Rollup.invoice_count,
+            ).label("invoices"),
+            _sum_if(_Rollup.invoice_type == "expense").label("expenses"),
+        )
+        .filter(_Rollup.issuer_id == user_id, _Rollup.day == today)
+        .one()
+    )
+    return int(row.invoices or 0), row.expenses
+
+
+def _today_activity_raw(db: Session, user_id: int, today: date) -> tuple[int, Decimal]:
+    start_of_today = datetime.combine(today, datetime.min.time())
+    invoices_today = (
+        db.query(func.count(models.Invoice.id))
+        .filter(
+            models.Invoice.issuer_id == user_id,
+            models.Invoice.invoice_type == "revenue",
+            exclude_abandoned_storefront(),
+            models.Invoice.created_at >= start_of_today,
+        )
+        .scalar()
+    ) or 0
+    expenses_today = (
+        db.query(func.coalesce(func.sum(models.Invoice.amount), 0))
+        .filter(
+            models.Invoice.issuer_id == user_id,
+            models.Invoice.invoice_type == "expense",
+            models.Invoice.created_at >= start_of_today,
+        )
+        .scalar()
+    )
+    return invoices_today, expenses_today
+
+
 def calculate_cash_position(db: Session, user_id: int) -> dict:
     """Cash-first dashboard: collected, outstanding, overdue, expected inflow.
 
     Gives business owners an instant snapshot of *money movement* rather
     than abstract accounting metrics.
     """
-    today = date.today()
+    today = _utc_today()
     week_ago = today - timedelta(days=7)
     next_week = today + timedelta(days=7)
     start_of_today = datetime.combine(today, datetime.min.time())
     start_of_week = datetime.combine(week_ago, datetime.min.time())
     end_of_next_week = datetime.combine(next_week, datetime.max.time())
 
-    base = [
-        models.Invoice.issuer_id == user_id,
-        models.Invoice.invoice_type == "revenue",
-        exclude_abandoned_storefront(),
-    ]
-
-    # Cash collected this week
-    cash_this_week = (
-        db.query(func.coalesce(func.sum(models.Invoice.amount), 0))
-        .filter(
-            *base,
-            models.Invoice.status == "paid",
-            models.Invoice.paid_at >= start_of_week,
-        )
-        .scalar()
+    inv = models.Invoice
+    is_open = inv.status.in_(["pending", "awaiting_confirmation"])
+    overdue = and_(
+        inv.status == "pending",
+        inv.due_date != None,  # noqa: E711
+        inv.due_date < start_of_today,
     )
 
-    # Cash collected today
-    cash_today = (
-        db.query(func.coalesce(func.sum(models.Invoice.amount), 0))
-        .filter(
-            *base,
-            models.Invoice.status == "paid",
-            models.Invoice.paid_at >= start_of_today,
-        )
-        .scalar()
-    )
+    def _amount_if(condition):
+        return func.coalesce(func.sum(case((condition, inv.amount), else_=0)), 0)
 
-    # Total outstanding (unpaid revenue invoices)
-    outstanding = (
-        db.query(func.coalesce(func.sum(models.Invoice.amount), 0))
-        .filter(
-            *base,
-            models.Invoice.status.in_(["pending", "awaiting_confirmation"]),
+    # One pass over open invoices + this week's payments (was 7 scalar queries).
+    row = (
+        db.query(
+            _amount_if(and_(inv.status == "paid", inv.paid_at >= start_of_week)).label("week"),
+            _amount_if(and_(inv.status == "paid", inv.paid_at >= start_of_today)).label("today"),
+            _amount_if(is_open).label("outstanding"),
+            _amount_if(overdue).label("overdue"),
+            func.coalesce(func.sum(case((overdue, 1), else_=0)), 0).label("overdue_count"),
+            _amount_if(
+                and_(
+                    is_open,
+                    inv.due_date != None,  # noqa: E711
+                    inv.due_date >= start_of_today,
+                    inv.due_date <= end_of_next_week,
+                )
+            ).label("inflow"),
         )
-        .scalar()
-    )
-
-    # Overdue amount + count
-    overdue_filters = [
-        *base,
-        models.Invoice.status == "pending",
-        models.Invoice.due_date != None,  # noqa: E711
-        models.Invoice.due_date < start_of_today,
-    ]
-    overdue_amount = (
-        db.query(func.coalesce(func.sum(models.Invoice.amount), 0))
-        .filter(*overdue_filters)
-        .scalar()
-    )
-    overdue_count = (
-        db.query(func.count(models.Invoice.id))
-        .filter(*overdue_filters)
-        .scalar()
-    ) or 0
-
-    # Expected inflow next 7 days
-    expected_inflow = (
-        db.query(func.coalesce(func.sum(models.Invoice.amount), 0))
         .filter(
-            *base,
-            models.Invoice.status.in_(["pending", "awaiting_confirmation"]),
-            models.Invoice.due_date != None,  # noqa: E711
-            models.Invoice.due_date >= start_of_today,
-            models.Invoice.due_date <= end_of_next_week,
+            inv.issuer_id == user_id,
+            inv.invoice_type == "revenue",
+            exclude_abandoned_storefront(),
+            or_(is_open, and_(inv.status == "paid", inv.paid_at >= start_of_week)),
         )
-        .scalar()
+        .one()
     )
-
-    # Invoices created today
-    invoices_today = (
-        db.query(func.count(models.Invoice.id))
-        .filter(*base, models.Invoice.created_at >= start_of_today)
-        .scalar()
-    ) or 0
-
-    # Expenses today
-    expenses_today = (
-        db.query(func.coalesce(func.sum(models.Invoice.amount), 0))
-        .filter(
-            models.Invoice.issuer_id == user_id,
-            models.Invoice.invoice_type == "expense",
-            models.Invoice.created_at >= start_of_today,
-        )
-        .scalar()
+    cash_this_week = row.week
+    cash_today = row.today
+    outstanding = row.outstanding
+    overdue_amount = row.overdue
+    overdue_count = int(row.overdue_count or 0)
+    expected_inflow = row.inflow
+
+    invoices_today, expenses_today = _from_rollup(
+        db, _today_activity_rollup, _today_activity_raw, user_id, today
     )
 
     return {
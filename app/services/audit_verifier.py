@@ -0,0 +1,241 @@
+"""Streaming, checkpointed verification of the ``audit_log`` hash chain.
+
+Rows are read as plain column tuples in keyset-paginated chunks
+(``WHERE id > :cursor ORDER BY id LIMIT :chunk``), so memory stays flat no
+matter how large the table grows. Every successful run stores an
+HMAC-signed :class:`AuditChainCheckpoint` (last verified id + entry_hash);
+incremental runs resume from the newest valid checkpoint and only hash rows
+appended since. A checkpoint whose signature fails, or whose row no longer
+carries the recorded hash, is itself reported as tampering.
+
+A full re-verify can be split into id segments (see
+``maintenance.verify_audit_chain_full``): each segment seeds its chain from
+the stored ``entry_hash`` of the row just before it, and the previous segment
+proves that hash is genuine, so the segments compose into one full check.
+"""
+from __future__ import annotations
+
+import hashlib
+import hmac
+from dataclasses import asdict, dataclass
+from typing import Any
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.core.audit import hash_entry
+from app.core.config import settings
+from app.models.models import AuditChainCheckpoint, AuditLog
+
+
+@dataclass
+class ChainVerification:
+    ok: bool
+    total: int  # rows checked
+    verified: int  # rows that passed before the first break (== total when ok)
+    first_broken_id: int | None
+    reason: str | None  # 'content_edited' | 'chain_broken' | 'checkpoint_invalid' | None
+    last_id: int  # id of the last verified row (the starting id when none were)
+    last_hash: str  # entry_hash of that row
+    complete: bool = True  # False when ``max_rows`` stopped the walk early
+
+    def as_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+    @property
+    def message(self) -> str:
+        if self.reason == "chain_broken":
+            return (
+                f"Row {self.first_broken_id}: prev_hash does not link to the previous row "
+                "(a row was deleted, inserted or reordered)."
+            )
+        if self.reason == "content_edited":
+            return (
+                f"Row {self.first_broken_id}: entry_hash does not match its contents "
+                "(the row was edited after it was written)."
+            )
+        if self.reason == "checkpoint_invalid":
+            return (
+                "The latest verification checkpoint does not match the audit log "
+                "(the checkpoint or the row it vouches for was altered)."
+            )
+        more = "" if self.complete else " More rows remain; run again to continue."
+        return f"Audit chain intact: {self.verified} row(s) verified.{more}"
+
+
+def _checkpoint_key() -> bytes:
+    return (settings.AUDIT_CHECKPOINT_SECRET or settings.JWT_SECRET).encode()
+
+
+def sign_checkpoint(last_id: int, last_hash: str, rows_verified: int) -> str:
+    payload = f"{last_id}:{last_hash}:{rows_verified}".encode()
+    return hmac.new(_checkpoint_key(), payload, hashlib.sha256).hexdigest()
+
+
+def _hash_before(db: Session, row_id: int) -> str:
+    """Stored entry_hash of the last row with id < ``row_id`` ('' at genesis)."""
+    return db.execute(
+        select(AuditLog.entry_hash)
+        .where(AuditLog.id < row_id)
+        .order_by(AuditLog.id.desc())
+        .limit(1)
+    ).scalar() or ""
+
+
+def verify_range(
+    db: Session,
+    *,
+    after_id: int = 0,
+    prev_hash: str = "",
+    upto_id: int | None = None,
+    chunk_size: int | None = None,
+    max_rows: int | None = None,
+) -> ChainVerification:
+    """Verify rows with ``after_id < id <= upto_id`` against ``prev_hash``.
+
+    For each row we recompute ``sha256(prev_entry_hash + canonical(columns))``
+    and check it equals the stored ``entry_hash`` (detects CONTENT edits) and
+    that the row's ``prev_hash`` matches the previous row's ``entry_hash``
+    (detects DELETED or reordered rows). Stops at the first mismatch.
+    """
+    chunk_size = chunk_size or settings.AUDIT_VERIFY_CHUNK_SIZE
+    cols = (
+        AuditLog.id, AuditLog.action, AuditLog.user_id, AuditLog.status,
+        AuditLog.details, AuditLog.prev_hash, AuditLog.entry_hash,
+    )
+    cursor, prev, verified = after_id, prev_hash or "", 0
+
+    def _after(stmt):
+        stmt = stmt.where(AuditLog.id > cursor)
+        return stmt if upto_id is None else stmt.where(AuditLog.id <= upto_id)
+
+    while True:
+        page = chunk_size if max_rows is None else min(chunk_size, max_rows - verified)
+        if page <= 0:
+            remaining = db.execute(_after(select(AuditLog.id)).limit(1)).first()
+            return ChainVerification(
+                ok=True, total=verified, verified=verified, first_broken_id=None,
+                reason=None, last_id=cursor, last_hash=prev, complete=remaining is None,
+            )
+        stmt = _after(select(*cols))
+        rows = db.execute(stmt.order_by(AuditLog.id.asc()).limit(page)).all()
+        for row_id, action, user_id, status, details, row_prev, entry_hash in rows:
+            reason = None
+            if (row_prev or "") != prev:
+                reason = "chain_broken"
+            elif entry_hash != hash_entry(prev, action, user_id, status, details):
+                reason = "content_edited"
+            if reason:
+                return ChainVerification(
+                    ok=False, total=verified + 1, verified=verified,
+                    first_broken_id=row_id, reason=reason, last_id=cursor, last_hash=prev,
+                )
+            cursor, prev = row_id, entry_hash or ""
+            verified += 1
+        if len(rows) < page:
+            return ChainVerification(
+                ok=True, total=verified, verified=verified, first_broken_id=None,
+                reason=None, last_id=cursor, last_hash=prev,
+            )
+
+
+def verify_segment(
+    db: Session, start_id: int, end_id: int, *, chunk_size: int | None = None
+) -> ChainVerification:
+    """Verify ``start_id <= id <= end_id``, seeded from the row just before it."""
+    return verify_range(
+        db,
+        after_id=start_id - 1,
+        prev_hash=_hash_before(db, start_id),
+        upto_id=end_id,
+        chunk_size=chunk_size,
+    )
+
+
+def latest_checkpoint(db: Session) -> AuditChainCheckpoint | None:
+    return db.execute(
+        select(AuditChainCheckpoint).order_by(AuditChainCheckpoint.id.desc()).limit(1)
+    ).scalar_one_or_none()
+
+
+def checkpoint_is_valid(db: Session, ckpt: AuditChainCheckpoint) -> bool:
+    expected = sign_checkpoint(ckpt.last_id, ckpt.last_hash, ckpt.rows_verified)
+    if not hmac.compare_digest(expected, ckpt.signature):
+        return False
+    stored = db.execute(
+        select(AuditLog.entry_hash).where(AuditLog.id == ckpt.last_id)
+    ).scalar()
+    return stored == ckpt.last_hash
+
+
+def save_checkpoint(db: Session, last_id: int, last_hash: str, rows_verified: int) -> AuditChainCheckpoint:
+    ckpt = AuditChainCheckpoint(
+        last_id=last_id,
+        last_hash=last_hash,
+        rows_verified=rows_verified,
+        signature=sign_checkpoint(last_id, last_hash, rows_verified),
+    )
+    db.add(ckpt)
+    db.commit()
+    return ckpt
+
+
+def verify_incremental(
+    db: Session, *, max_rows: int | None = None, chunk_size: int | None = None
+) -> ChainVerification:
+    """Verify rows appended since the newest checkpoint and advance it."""
+    ckpt = latest_checkpoint(db)
+    after_id, prev, base = 0, "", 0
+    if ckpt is not None:
+        if not checkpoint_is_valid(db, ckpt):
+            return ChainVerification(
+                ok=False, total=0, verified=0, first_broken_id=ckpt.last_id,
+                reason="checkpoint_invalid", last_id=ckpt.last_id, last_hash=ckpt.last_hash,
+            )
+        after_id, prev, base = ckpt.last_id, ckpt.last_hash, ckpt.rows_verified
+    result = verify_range(
+        db, after_id=after_id, prev_hash=prev, max_rows=max_rows, chunk_size=chunk_size
+    )
+    if result.ok and result.verified:
+        save_checkpoint(db, result.last_id, result.last_hash, base + result.verified)
+    return result
+
+
+def verify_full(
+    db: Session, *, max_rows: int | None = None, chunk_size: int | None = None
+) -> ChainVerification:
+    """Verify from genesis, ignoring (and on success refreshing) checkpoints."""
+    result = verify_range(db, max_rows=max_rows, chunk_size=chunk_size)
+    if result.ok and result.verified:
+        save_checkpoint(db, result.last_id, result.last_hash, result.verified)
+    return result
+
+
+def segment_bounds(db: Session, segments: int) -> list[tuple[int, int]]:
+    """Split the current ``audit_log`` id range into ``segments`` contiguous ranges."""
+    lo, hi = db.execute(select(func.min(AuditLog.id), func.max(AuditLog.id))).one()
+    if lo is None:
+        return []
+    segments = max(1, segments)
+    step = max(1, -(-(hi - lo + 1) // segments))
+    return [(start, min(start + step - 1, hi)) for start in range(lo, hi + 1, step)]
+
+
+def combine_segments(results: list[dict[str, Any]]) -> ChainVerification:
+    """Fold ordered per-segment results (``ChainVerification.as_dict``) into one."""
+    verified = 0
+    last_id, last_hash = 0, ""
+    for r in results:
+        if not r["ok"]:
+            return ChainVerification(
+                ok=False, total=verified + r["total"], verified=verified + r["verified"],
+                first_broken_id=r["first_broken_id"], reason=r["reason"],
+                last_id=r["last_id"], last_hash=r["last_hash"],
+            )
+        verified += r["verified"]
+        if r["verified"]:
+            last_id, last_hash = r["last_id"], r["last_hash"]
+    return ChainVerification(
+        ok=True, total=verified, verified=verified, first_broken_id=None,
+        reason=None, last_id=last_id, last_hash=last_hash,
+    )
@@ -3,6 +3,11 @@
 This module implements the Repository pattern for caching invoice data.
 Follows Dependency Inversion Principle by depending on the BaseKeyValueStore
 protocol rather than concrete Redis implementation.
+
+Every entry is tagged by issuer, customer and invoice (see ``invoice_cache_tags``)
+and records the tag versions it was built from. A status change or payment bumps
+those tags once (``invalidate_invoice_tags``), which retires every dependent
+invoice, list and analytics entry without enumerating keys.
 """
 
 from __future__ import annotations
@@ -11,11 +16,37 @@ import json
 import logging
 from typing import Any, Protocol
 
+from app.core.cache import cache_tag_versions, invalidate_tags
 from app.models import models
 
 logger = logging.getLogger(__name__)
 
 
+def invoice_cache_tags(
+    issuer_id: int | None,
+    customer_id: int | None = None,
+    invoice_id: str | None = None,
+) -> list[str]:
+    """Cache tags an invoice's dependents are filed under."""
+    tags = []
+    if issuer_id is not None:
+        tags.append(f"issuer:{issuer_id}")
+    if customer_id is not None:
+        tags.append(f"customer:{customer_id}")
+    if invoice_id is not None:
+        tags.append(f"invoice:{invoice_id}")
+    return tags
+
+
+def invalidate_invoice_tags(
+    issuer_id: int | None,
+    customer_id: int | None = None,
+    invoice_id: str | None = None,
+) -> None:
+    """Retire every cached entry depending on this invoice, its issuer or customer."""
+    invalidate_tags(*invoice_cache_tags(issuer_id, customer_id, invoice_id))
+
+
 class BaseKeyValueStore(Protocol):
     """Protocol defining key-value storage interface (Dependency Inversion Principle)."""
 
@@ -45,8 +76,9 @@ class InvoiceCacheRepository:
 
     INVOICE_KEY_PREFIX = "invoice:"
     INVOICE_LIST_KEY_PREFIX = "invoices:user:"
-    DEFAULT_TTL = 3600  # 1 hour (invoices don't change frequently)
-    LIST_TTL = 300  # 5 minutes (lists may grow)
+    # Tag invalidation retires entries on change, so TTLs only bound memory.
+    DEFAULT_TTL = 6 * 3600
+    LIST_TTL = 2 * 3600
 
     def __init__(self, store: BaseKeyValueStore):
         """Initialize repository with key-value store.
@@ -117,6 +149,24 @@ class InvoiceCacheRepository:
         """
         return json.loads(data)
 
+    def _get_tagged(self, key: str) -> Any | None:
+        """Return the payload at ``key`` if none of its tags moved since it was stored."""
+        cached = self.store.get(key)
+        if not cached:
+            return None
+        envelope = json.loads(cached)
+        if not isinstance(envelope, dict) or "tags" not in envelope:
+            return None  # pre-tagging entry; treat as a miss
+        tags = envelope["tags"]
+        if cache_tag_versions(*tags) != list(tags.values()):
+            return None
+        return envelope["data"]
+
+    def _set_tagged(self, key: str, data: Any, tags: list[str], ttl: int) -> None:
+        """Store ``data`` stamped with the current version of each tag."""
+        versions = cache_tag_versions(*tags)
+        self.store.set(key, json.dumps({"tags": dict(zip(tags, versions)), "data": data}), ex=ttl)
+
     def get_invoice(self, invoice_id: str) -> dict[str, Any] | None:
         """Retrieve invoice from cache.
         
@@ -128,11 +178,11 @@ class InvoiceCacheRepository:
         """
         try:
             key = self._invoice_key(invoice_id)
-            cached = self.store.get(key)
+            cached = self._get_tagged(key)
             
-            if cached:
+            if cached is not None:
                 logger.debug("Cache HIT for invoice %s", invoice_id)
-                return self._deserialize_invoice(cached)
+                return cached
             
             logger.debug("Cache MISS for invoice %s", invoice_id)
             return None
@@ -150,26 +200,26 @@ class InvoiceCacheRepository:
             ttl: Time-to-live in seconds (defaults to DEFAULT_TTL)
         """
         try:
-            key = self._invoice_key(invoice.id)
-            value = self._serialize_invoice(invoice)
+            key = self._invoice_key(invoice.invoice_id)
+            value = self._deserialize_invoice(self._serialize_invoice(invoice))
             expiry = ttl or self.DEFAULT_TTL
+            tags = invoice_cache_tags(invoice.issuer_id, invoice.customer_id, invoice.invoice_id)
             
-            self.store.set(key, value, ex=expiry)
-            logger.debug("Cached invoice %s (TTL: %ss)", invoice.id, expiry)
+            self._set_tagged(key, value, tags, expiry)
+            logger.debug("Cached invoice %s (TTL: %ss)", invoice.invoice_id, expiry)
             
         except Exception as e:
             # Redis is optional - log as warning not error to avoid Sentry noise
             logger.warning("Cache write error for invoice %s: %s", invoice.id, e)
 
     def invalidate_invoice(self, invoice_id: str) -> None:
-        """Remove invoice from cache.
+        """Retire the cached invoice by bumping its tag.
         
         Args:
             invoice_id: Unique invoice identifier
         """
         try:
-            key = self._invoice_key(invoice_id)
-            self.store.delete(key)
+            invalidate_tags(*invoice_cache_tags(None, invoice_id=invoice_id))
             logger.debug("Invalidated cache for invoice %s", invoice_id)
             
         except Exception as e:
@@ -177,14 +227,13 @@ class InvoiceCacheRepository:
             logger.warning("Cache invalidation error for invoice %s: %s", invoice_id, e)
 
     def invalidate_user_invoices(self, user_id: int) -> None:
-        """Remove user's invoice list from cache.
+        """Retire every list and analytics entry for the user (issuer tag bump).
         
         Args:
             user_id: User ID
         """
         try:
-            key = self._invoice_list_key(user_id)
-            self.store.delete(key)
+            invalidate_tags(*invoice_cache_tags(user_id))
             logger.debug("Invalidated invoice list cache for user %s", user_id)
             
         except Exception as e:
@@ -202,11 +251,11 @@ class InvoiceCacheRepository:
         """
         try:
             key = self._invoice_list_key(user_id)
-            cached = self.store.get(key)
+            cached = self._get_tagged(key)
             
-            if cached:
+            if cached is not None:
                 logger.debug("Cache HIT for user %s invoice list", user_id)
-                return json.loads(cached)
+                return cached
             
             logger.debug("Cache MISS for user %s invoice list", user_id)
             return None
@@ -227,10 +276,12 @@ class InvoiceCacheRepository:
         try:
             key = self._invoice_list_key(user_id)
             data = [self._deserialize_invoice(self._serialize_invoice(inv)) for inv in invoices]
-            value = json.dumps(data)
             expiry = ttl or self.LIST_TTL
+            # A list depends on its issuer and on every customer shown in it.
+            customer_ids = sorted({inv.customer_id for inv in invoices if inv.customer_id is not None})
+            tags = invoice_cache_tags(user_id) + [f"customer:{cid}" for cid in customer_ids]
             
-            self.store.set(key, value, ex=expiry)
+            self._set_tagged(key, data, tags, expiry)
             logger.debug("Cached %s invoices for user %s (TTL: %ss)", len(invoices), user_id, expiry)
             
         except Exception as e:
@@ -0,0 +1,29 @@
+"""ORM event hooks that keep derived rows and caches in step with writes.
+
+Each module below registers its SQLAlchemy listeners when imported;
+``app.db.session`` imports this module once so they are active wherever a
+session is used (API, Celery, scripts).
+
+- ``inventory.product_match``: retires the bot's cached product match index
+  when a catalog changes.
+- ``invoice_rollup``: keeps ``invoice_daily_rollup`` current.
+- ``marketplace_search``: keeps ``storefront_search_document`` in step with
+  store profiles and products.
+- ``phone_resolution``: drops cached phone → user resolutions when a phone or
+  team changes.
+- ``principal``: drops cached request principals when a plan, team or
+  membership changes.
+- ``storefront_cache``: retires cached public storefront payloads when a
+  store's data changes.
+- ``storefront_live``: recomputes ``user.storefront_live`` when a store's gate
+  inputs change.
+"""
+from app.services import (  # noqa: F401
+    invoice_rollup,
+    marketplace_search,
+    phone_resolution,
+    principal,
+    storefront_cache,
+    storefront_live,
+)
+from app.services.inventory import product_match  # noqa: F401
@@ -59,6 +59,7 @@ from app.models.inventory_schemas import (
 from app.models.inventory_schemas import (
     ProductCategoryUpdate as CategoryUpdate,
 )
+from app.utils.pagination import Page
 
 from .analytics_service import InventoryAnalyticsService
 from .category_service import CategoryService
@@ -153,6 +154,27 @@ class InventoryService:
             page_size=page_size,
         )
 
+    def page_products(
+        self,
+        cursor: str | None = None,
+        page_size: int = 50,
+        category_id: int | None = None,
+        include_inactive: bool = False,
+        search: str | None = None,
+        low_stock_only: bool = False,
+        out_of_stock_only: bool = False,
+    ) -> Page[Product]:
+        """List products with keyset (cursor) pagination."""
+        return self._products.page_products(
+            cursor=cursor,
+            page_size=page_size,
+            category_id=category_id,
+            include_inactive=include_inactive,
+            search=search,
+            low_stock_only=low_stock_only,
+            out_of_stock_only=out_of_stock_only,
+        )
+
     def update_product(self, product_id: int, data: ProductUpdate) -> Product | None:
         """Update a product."""
         return self._products.update_product(product_id, data)
@@ -0,0 +1,199 @@
+"""
+Per-issuer product match index for bot line-item resolution.
+
+"3 wig, 2 shoe" has to be matched against the issuer's catalog. The bot used
+to load the first 50 products on every message (so bigger catalogs could not
+be matched at all) and scan them once per line item. Here the whole active
+catalog is indexed once:
+
+- an exact map (lower-cased name → catalog position), and
+- trigram postings, so substring candidates come from a postings
+  intersection instead of a scan (one- and two-letter queries scan the names).
+
+Matching rule (unchanged from the bot's original linear matcher): an exact name
+wins, else the shortest name containing the query. Among equally short names
+a prefix match beats a word-prefix match, which beats a mid-word match; the
+rest tie on catalog order (name, id).
+
+The catalog (ids + names) is cached in the two-tier app cache under a key
+tagged ``catalog:{user_id}``, and the built index is kept in process. Committed
+product inserts, deletes and name / active / owner changes bump the tag (ORM
+hooks below), so the next lookup rebuilds. Stock and price are not indexed:
+matches are loaded fresh from the database in one query.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from collections.abc import Sequence
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+
+from app.core.cache import get_or_compute, invalidate_on_commit, invalidate_tags, tagged_key
+from app.core.config import settings
+from app.models.inventory_models import Product
+
+logger = logging.getLogger(__name__)
+
+# Product columns the index reads (stock, price etc. change without affecting it).
+_INDEXED_FIELDS = ("name", "is_active", "user_id")
+
+
+def catalog_tag(user_id: int) -> str:
+    return f"catalog:{user_id}"
+
+
+def _trigrams(text: str) -> set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class ProductMatchIndex:
+    """Exact map + trigram postings over one catalog, in catalog order."""
+
+    def __init__(self, ids: Sequence[int], names: Sequence[str]):
+        self.ids = list(ids)
+        self._names = [(n or "").lower().strip() for n in names]
+        self._exact: dict[str, int] = {}
+        postings: dict[str, list[int]] = defaultdict(list)
+        for pos, name in enumerate(self._names):
+            self._exact.setdefault(name, pos)
+            for gram in _trigrams(name):
+                postings[gram].append(pos)
+        self._postings = dict(postings)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _candidates(self, query: str) -> Sequence[int]:
+        if len(query) < 3:
+            return range(len(self._names))
+        lists = sorted((self._postings.get(g, ()) for g in _trigrams(query)), key=len)
+        if not lists[0]:
+            return ()
+        hits = set(lists[0])
+        for plist in lists[1:]:
+            hits.intersection_update(plist)
+            if not hits:
+                break
+        return sorted(hits)
+
+    def position(self, query: str) -> int | None:
+        """Catalog position of the best match for ``query``, or None."""
+        query = query.lower().strip()
+        if not query:
+            return None
+        if query in self._exact:
+            return self._exact[query]
+        best: tuple[int, int, int] | None = None
+        for pos in self._candidates(query):
+            name = self._names[pos]
+            if query not in name:
+                continue
+            if name.startswith(query):
+                kind = 0
+            elif f" {query}" in name:
+                kind = 1
+            else:
+                kind = 2
+            rank = (len(name), kind, pos)
+            if best is None or rank < best:
+                best = rank
+        return best[2] if best else None
+
+    def match_many(self, queries: Sequence[str]) -> list[int | None]:
+        """Product id for each query (None where nothing matches)."""
+        out: list[int | None] = []
+        for query in queries:
+            pos = self.position(query)
+            out.append(self.ids[pos] if pos is not None else None)
+        return out
+
+    def resolve(self, db: Session, queries: Sequence[str]) -> list[Product | None]:
+        """Matched ``Product`` rows for ``queries``, loaded in one query."""
+        ids = self.match_many(queries)
+        wanted = {i for i in ids if i is not None}
+        if not wanted:
+            return [None] * len(ids)
+        rows = {p.id: p for p in db.query(Product).filter(Product.id.in_(wanted)).all()}
+        return [rows.get(i) if i is not None else None for i in ids]
+
+
+# ── Per-issuer cache ────────────────────────────────────────────────
+
+# Built indexes by tagged key; a catalog change moves the key, so old entries
+# are never read again and fall off the end of the LRU.
+_indexes: OrderedDict[str, tuple[ProductMatchIndex, float]] = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def _load_catalog(db: Session, user_id: int) -> dict[str, list]:
+    rows = db.execute(
+        select(Product.id, Product.name)
+        .where(Product.user_id == user_id, Product.is_active.is_(True))
+        .order_by(Product.name.asc(), Product.id.asc())
+    ).all()
+    return {"ids": [r.id for r in rows], "names": [r.name for r in rows]}
+
+
+def get_match_index(db: Session, user_id: int) -> ProductMatchIndex:
+    """The issuer's current match index (built at most once per catalog version)."""
+    key = tagged_key(f"product_match:{user_id}", catalog_tag(user_id))
+    now = time.time()
+    with _indexes_lock:
+        hit = _indexes.get(key)
+        if hit is not None and hit[1] > now:
+            _indexes.move_to_end(key)
+            return hit[0]
+    catalog = get_or_compute(
+        key,
+        settings.PRODUCT_MATCH_INDEX_TTL,
+        lambda: _load_catalog(db, user_id),
+        namespace="product_match",
+    )
+    index = ProductMatchIndex(catalog.get("ids", []), catalog.get("names", []))
+    with _indexes_lock:
+        _indexes[key] = (index, now + settings.PRODUCT_MATCH_INDEX_TTL)
+        _indexes.move_to_end(key)
+        while len(_indexes) > settings.PRODUCT_MATCH_LOCAL_MAX:
+            _indexes.popitem(last=False)
+    return index
+
+
+def clear_local() -> None:
+    """Drop this process's built indexes (tests)."""
+    with _indexes_lock:
+        _indexes.clear()
+
+
+# ── Invalidation on committed Product changes ───────────────────────
+
+
+def invalidate_catalogs(*user_ids: int) -> None:
+    invalidate_tags(*(catalog_tag(uid) for uid in user_ids))
+
+
+def _mark_stale(target: Product, *, changed_only: bool) -> None:
+    state = inspect(target)
+    if changed_only and not any(state.attrs[f].history.has_changes() for f in _INDEXED_FIELDS):
+        return
+    invalidate_on_commit(
+        target, invalidate_catalogs, state.dict.get("user_id"), *(state.attrs.user_id.history.deleted or ())
+    )
+
+
+@event.listens_for(Product, "after_insert")
+def _product_inserted(_mapper, _conn, target: Product) -> None:
+    _mark_stale(target, changed_only=False)
+
+
+@event.listens_for(Product, "after_update")
+def _product_updated(_mapper, _conn, target: Product) -> None:
+    _mark_stale(target, changed_only=True)
+
+
+@event.listens_for(Product, "after_delete")
+def _product_deleted(_mapper, _conn, target: Product) -> None:
+    _mark_stale(target, changed_only=False)
@@ -14,9 +14,12 @@ from sqlalchemy.orm import joinedload
 from app.models.inventory_models import Product, ProductCategory, StockMovement, StockMovementType
 from app.models.inventory_schemas import ProductCreate, ProductUpdate
 from app.services.inventory.base import BaseInventoryService
+from app.utils.pagination import KeysetColumn, Page, keyset_page, order_by
 
 logger = logging.getLogger(__name__)
 
+PRODUCT_LIST_ORDER = (KeysetColumn(Product.name), KeysetColumn(Product.id))
+
 
 class ProductService(BaseInventoryService):
     """
@@ -138,21 +141,14 @@ class ProductService(BaseInventoryService):
             Product.barcode == barcode,
         ).first()
 
-    def list_products(
+    def _product_list_query(
         self,
-        page: int = 1,
-        page_size: int = 20,
-        category_id: int | None = None,
-        search: str | None = None,
-        include_inactive: bool = False,
-        low_stock_only: bool = False,
-        out_of_stock_only: bool = False,
-    ) -> tuple[Sequence[Product], int]:
-        """
-        List products with filtering and pagination.
-        
-        Returns a tuple of (products, total_count).
-        """
+        category_id: int | None,
+        search: str | None,
+        include_inactive: bool,
+        low_stock_only: bool,
+        out_of_stock_only: bool,
+    ):
         query = self._db.query(Product).options(
             joinedload(Product.category)
         ).filter(Product.user_id == self._user_id)
@@ -186,16 +182,63 @@ class ProductService(BaseInventoryService):
                 Product.track_stock.is_(True),
                 Product.quantity_in_stock <= 0,
             )
+        return query
+
+    def list_products(
+        self,
+        page: int = 1,
+        page_size: int = 20,
+        category_id: int | None = None,
+        search: str | None = None,
+        include_inactive: bool = False,
+        low_stock_only: bool = False,
+        out_of_stock_only: bool = False,
+    ) -> tuple[Sequence[Product], int]:
+        """
+        List products with filtering and pagination.
+        
+        Returns a tuple of (products, total_count).
+        """
+        query = self._product_list_query(
+            category_id, search, include_inactive, low_stock_only, out_of_stock_only
+        )
 
         # Get total count
         total = query.count()
 
-        # Apply pagination
+        # Apply pagination (id breaks ties so keyset pages line up with these)
         offset = (page - 1) * page_size
-        products = query.order_by(Product.name).offset(offset).limit(page_size).all()
+        products = (
+            query.order_by(*order_by(PRODUCT_LIST_ORDER)).offset(offset).limit(page_size).all()
+        )
 
         return products, total
 
+    def page_products(
+        self,
+        cursor: str | None = None,
+        page_size: int = 20,
+        category_id: int | None = None,
+        search: str | None = None,
+        include_inactive: bool = False,
+        low_stock_only: bool = False,
+        out_of_stock_only: bool = False,
+    ) -> Page[Product]:
+        """Keyset-paginated variant of :meth:`list_products` ((name, id) order).
+
+        Raises ``InvalidCursorError`` for a malformed cursor.
+        """
+        query = self._product_list_query(
+            category_id, search, include_inactive, low_stock_only, out_of_stock_only
+        )
+        return keyset_page(
+            query,
+            PRODUCT_LIST_ORDER,
+            limit=page_size,
+            key=lambda p: (p.name, p.id),
+            cursor=cursor,
+        )
+
     def update_product(self, product_id: int, data: ProductUpdate) -> Product | None:
         """Update a product."""
         product = self.get_product(product_id)
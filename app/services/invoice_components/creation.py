@@ -10,6 +10,7 @@ from sqlalchemy.orm import Session, joinedload
 from app import metrics
 from app.core.exceptions import MissingBankDetailsError
 from app.models import models
+from app.services.cache_service import invalidate_invoice_tags
 from app.services.fiscalization_service import VATCalculator
 from app.utils.id_generator import generate_id
 from app.utils.invoice_delivery import invoice_has_contact, is_online_only
@@ -247,9 +248,6 @@ class InvoiceCreationMixin:
         if invoice_type == "expense" and hasattr(self, 'process_inventory_for_invoice'):
             self.process_inventory_for_invoice(invoice, lines_data)
 
-        if self.cache:
-            self.cache.invalidate_user_invoices(issuer_id)
-
         user = self.db.query(models.User).filter(models.User.id == issuer_id).one()
         metrics.invoice_created_by_plan(user.plan.value)
         total_amount = sum(float(line.unit_price) * line.quantity for line in invoice.lines)
@@ -332,8 +330,7 @@ class InvoiceCreationMixin:
                         "Failed to enqueue professionalism-score nudge for %s", issuer_id
                     )
 
-        if self.cache:
-            self.cache.invalidate_user_invoices(issuer_id)
+        invalidate_invoice_tags(issuer_id, invoice.customer_id)
 
         return invoice
 
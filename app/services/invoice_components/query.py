@@ -8,23 +8,24 @@ from sqlalchemy.orm import Session, joinedload, selectinload
 
 from app.core.exceptions import InvoiceNotFoundError
 from app.models import models
+from app.utils.pagination import KeysetColumn, Page, keyset_page
 
 logger = logging.getLogger(__name__)
 
+# Newest first, matching the offset list.
+INVOICE_LIST_ORDER = (KeysetColumn(models.Invoice.id, descending=True),)
+
 
 class InvoiceQueryMixin:
     db: Session
 
-    def list_invoices(
+    def _invoice_list_query(
         self,
         issuer_id: int,
-        invoice_type: str | None = None,
-        skip: int = 0,
-        limit: int = 50,
-        start_date: dt.date | None = None,
-        end_date: dt.date | None = None,
-    ) -> tuple[list[models.Invoice], int]:
-        """Return a page of invoices and the total count matching the filters."""
+        invoice_type: str | None,
+        start_date: dt.date | None,
+        end_date: dt.date | None,
+    ):
         from sqlalchemy import or_ as _sa_or
 
         query = (
@@ -49,25 +50,45 @@ class InvoiceQueryMixin:
         if invoice_type:
             query = query.filter(models.Invoice.invoice_type == invoice_type)
 
-        # Date filters applied at SQL level so pagination counts are accurate
+        # Date filters applied at SQL level so pagination counts are accurate.
+        # Half-open datetime ranges instead of DATE(...) so no per-row cast is
+        # needed and the bounds stay comparable to the raw column.
         from sqlalchemy import func as sa_func
         date_col = sa_func.coalesce(models.Invoice.due_date, models.Invoice.created_at)
         if start_date:
-            query = query.filter(sa_func.date(date_col) >= start_date)
+            query = query.filter(date_col >= dt.datetime.combine(start_date, dt.time.min))
         if end_date:
-            query = query.filter(sa_func.date(date_col) <= end_date)
+            query = query.filter(
+                date_col < dt.datetime.combine(end_date + dt.timedelta(days=1), dt.time.min)
+            )
+        return query
+
+    @staticmethod
+    def _with_list_relations(query):
+        return query.options(
+            joinedload(models.Invoice.customer),
+            joinedload(models.Invoice.issuer),
+            joinedload(models.Invoice.created_by),
+            joinedload(models.Invoice.status_updated_by),
+        )
+
+    def list_invoices(
+        self,
+        issuer_id: int,
+        invoice_type: str | None = None,
+        skip: int = 0,
+        limit: int = 50,
+        start_date: dt.date | None = None,
+        end_date: dt.date | None = None,
+    ) -> tuple[list[models.Invoice], int]:
+        """Return a page of invoices and the total count matching the filters."""
+        query = self._invoice_list_query(issuer_id, invoice_type, start_date, end_date)
         
         # Get total count before applying pagination
         total = query.count()
         
         invoices = (
-            query
-            .options(
-                joinedload(models.Invoice.customer),
-                joinedload(models.Invoice.issuer),
-                joinedload(models.Invoice.created_by),
-                joinedload(models.Invoice.status_updated_by),
-            )
+            self._with_list_relations(query)
             .order_by(models.Invoice.id.desc())
             .offset(skip)
             .limit(limit)
@@ -78,6 +99,35 @@ class InvoiceQueryMixin:
             self.cache.set_invoice_list(issuer_id, invoices)
         return invoices, total
 
+    def page_invoices(
+        self,
+        issuer_id: int,
+        invoice_type: str | None = None,
+        cursor: str | None = None,
+        limit: int = 50,
+        start_date: dt.date | None = None,
+        end_date: dt.date | None = None,
+        count: bool = True,
+    ) -> Page[models.Invoice]:
+        """Keyset-paginated variant of :meth:`list_invoices` (newest first).
+
+        Served by ``ix_invoice_issuer_recent`` at any depth; the count is
+        capped (see ``app.utils.pagination``). Raises ``InvalidCursorError``.
+        """
+        query = self._invoice_list_query(issuer_id, invoice_type, start_date, end_date)
+        page = keyset_page(
+            self._with_list_relations(query),
+            INVOICE_LIST_ORDER,
+            limit=limit,
+            key=lambda inv: (inv.id,),
+            cursor=cursor,
+            count=count,
+        )
+        # The cached list is the newest invoices; a deeper page would replace it.
+        if self.cache and page.items and cursor is None:
+            self.cache.set_invoice_list(issuer_id, page.items)
+        return page
+
     def get_invoice(self, issuer_id: int, invoice_id: str) -> models.Invoice:
         invoice = (
             self.db.query(models.Invoice)
@@ -9,6 +9,7 @@ from sqlalchemy.orm import Session, joinedload, selectinload
 from app import metrics
 from app.core.exceptions import InvalidInvoiceStatusError, InvoiceNotFoundError
 from app.models import models
+from app.services.cache_service import invalidate_invoice_tags
 from app.utils.async_utils import run_async
 from app.utils.invoice_delivery import invoice_has_contact, is_online_only
 
@@ -144,9 +145,9 @@ class InvoiceStatusMixin:
                     invoice.issuer_id,
                 )
 
-        if self.cache:
-            self.cache.invalidate_invoice(invoice_id)
-            self.cache.invalidate_user_invoices(issuer_id)
+        # One tag bump retires the invoice, its issuer's lists and dashboards,
+        # and anything filed under the customer.
+        invalidate_invoice_tags(issuer_id, invoice.customer_id, invoice_id)
 
         return self.get_invoice(issuer_id, invoice_id)
 
@@ -166,6 +167,7 @@ class InvoiceStatusMixin:
         previous_status = invoice.status
         invoice.status = "awaiting_confirmation"
         self.db.commit()
+        invalidate_invoice_tags(invoice.issuer_id, invoice.customer_id, invoice.invoice_id)
         logger.info(
             "Invoice %s status transitioned %s → awaiting_confirmation after customer confirmation",
             invoice_id,
@@ -811,28 +813,29 @@ class InvoiceStatusMixin:
             if template_name and user.phone:
                 try:
                     from app.bot.whatsapp_client import WhatsAppClient
-                    from app.utils.whatsapp_budget import can_send_whatsapp, record_whatsapp_send
+                    from app.utils.whatsapp_budget import BudgetReservation
 
                     client = WhatsAppClient(_settings.WHATSAPP_API_KEY)
                     lang = _settings.WHATSAPP_TEMPLATE_LANGUAGE or "en"
                     for product in products:
-                        if not can_send_whatsapp(priority=False):
-                            break
-                        product_name = product.name or "Unknown product"
-                        qty = str(product.quantity_in_stock)
-                        reorder_level = str(product.reorder_level)
-                        components = [
-                            {
-                                "type": "body",
-                                "parameters": [
-                                    {"type": "text", "text": product_name},
-                                    {"type": "text", "text": qty},
-                                    {"type": "text", "text": reorder_level},
-                                ],
-                            }
-                        ]
-                        if client.send_template(user.phone, template_name, lang, components):
-                            record_whatsapp_send(priority=False)
+                        with BudgetReservation(1) as budget:
+                            if not budget.available:
+                                break
+                            product_name = product.name or "Unknown product"
+                            qty = str(product.quantity_in_stock)
+                            reorder_level = str(product.reorder_level)
+                            components = [
+                                {
+                                    "type": "body",
+                                    "parameters": [
+                                        {"type": "text", "text": product_name},
+                                        {"type": "text", "text": qty},
+                                        {"type": "text", "text": reorder_level},
+                                    ],
+                                }
+                            ]
+                            if client.send_template(user.phone, template_name, lang, components):
+                                budget.spend()
                 except Exception as exc:
                     logger.error("Failed to send low stock WhatsApp: %s", exc)
             
@@ -0,0 +1,246 @@
+"""Incremental maintenance of the ``invoice_daily_rollup`` analytics table.
+
+Analytics read per-issuer sums from ``invoice_daily_rollup`` instead of
+scanning every ``invoice`` row on each dashboard load. The table is kept in
+step by an ``after_flush`` hook on every ORM ``Session``: each flushed invoice
+insert, delete or change to a rollup dimension (issuer, created day, type,
+status, channel) or amount becomes a +/- delta, and the deltas are applied as
+one ``INSERT .. ON CONFLICT DO UPDATE`` inside the same transaction — so the
+rollup commits (or rolls back) together with the invoice.
+
+Core ``update()``/``delete()`` statements bypass the ORM and therefore the
+hook; ``rebuild_rollup`` recomputes rollup rows from raw rows and runs nightly
+to reconcile them — for every (issuer, day) holding an invoice created *or
+updated* (``invoice.updated_at``) in the last couple of days, so a change to
+an old invoice is repaired on its own created day.
+"""
+from __future__ import annotations
+
+import datetime as dt
+import logging
+from collections import defaultdict
+from decimal import Decimal
+
+from sqlalchemy import Date, delete, event, func, insert, inspect, literal, or_, select, tuple_
+from sqlalchemy.orm import Session
+
+from app.db.flush_maintenance import in_savepoint
+from app.models.models import Invoice, InvoiceDailyRollup
+
+logger = logging.getLogger(__name__)
+
+# Invoice attributes that decide which rollup row an invoice counts towards.
+_TRACKED = ("issuer_id", "created_at", "invoice_type", "status", "channel", "amount")
+_KEY_COLS = ("issuer_id", "day", "invoice_type", "status", "channel")
+
+RollupKey = tuple[int, dt.date, str, str, str]
+
+# (issuer, day) pairs rebuilt per DELETE + INSERT .. SELECT when reconciling.
+_REBUILD_CHUNK = 500
+
+
+def _day(value: dt.datetime | dt.date | None) -> dt.date:
+    if value is None:
+        return dt.datetime.now(dt.timezone.utc).date()
+    if isinstance(value, dt.datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(dt.timezone.utc)
+        return value.date()
+    return value
+
+
+def _key(values: dict) -> RollupKey | None:
+    if values["issuer_id"] is None:
+        return None
+    return (
+        values["issuer_id"],
+        _day(values["created_at"]),
+        values["invoice_type"] or "revenue",
+        values["status"] or "pending",
+        values["channel"] or "",
+    )
+
+
+def _current(obj: Invoice) -> dict:
+    return {attr: getattr(obj, attr) for attr in _TRACKED}
+
+
+def _previous(obj: Invoice) -> dict | None:
+    """Pre-flush values of the tracked attributes, or None if none changed."""
+    state = inspect(obj)
+    values, changed = {}, False
+    for attr in _TRACKED:
+        hist = state.attrs[attr].history
+        if hist.deleted:
+            values[attr] = hist.deleted[0]
+            changed = True
+        elif hist.unchanged:
+            values[attr] = hist.unchanged[0]
+        else:
+            values[attr] = getattr(obj, attr)
+    return values if changed else None
+
+
+def collect_deltas(session: Session) -> dict[RollupKey, list]:
+    """Compute per-key [count, amount] deltas for invoices in a pending flush."""
+    deltas: dict[RollupKey, list] = defaultdict(lambda: [0, Decimal("0")])
+
+    def add(values: dict | None, sign: int) -> None:
+        key = _key(values) if values else None
+        if key is None:
+            return
+        entry = deltas[key]
+        entry[0] += sign
+        entry[1] += sign * Decimal(str(values["amount"] or 0))
+
+    for obj in session.new:
+        if isinstance(obj, Invoice):
+            add(_current(obj), +1)
+    for obj in session.dirty:
+        if isinstance(obj, Invoice):
+            before = _previous(obj)
+            if before is not None:
+                add(before, -1)
+                add(_current(obj), +1)
+    for obj in session.deleted:
+        if isinstance(obj, Invoice):
+            before = _previous(obj) or _current(obj)
+            add(before, -1)
+    return {k: v for k, v in deltas.items() if v[0] or v[1]}
+
+
+def _upsert_statement(dialect: str):
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        return None
+    return dialect_insert(InvoiceDailyRollup)
+
+
+def apply_deltas(session: Session, deltas: dict[RollupKey, list]) -> None:
+    """Add ``deltas`` to the rollup in the session's current transaction."""
+    if not deltas:
+        return
+    conn = session.connection()
+    stmt = _upsert_statement(conn.dialect.name)
+    if stmt is None:
+        return  # no portable upsert; the nightly rebuild fills it in
+    # Sorted so concurrent flushes lock rollup rows in the same order.
+    rows = [
+        {**dict(zip(_KEY_COLS, key)), "invoice_count": count, "amount_total": amount}
+        for key, (count, amount) in sorted(deltas.items())
+    ]
+    table = InvoiceDailyRollup.__table__
+    stmt = stmt.values(rows).on_conflict_do_update(
+        index_elements=list(_KEY_COLS),
+        set_={
+            "invoice_count": table.c.invoice_count + stmt.excluded.invoice_count,
+            "amount_total": table.c.amount_total + stmt.excluded.amount_total,
+        },
+    )
+    in_savepoint(conn, lambda: conn.execute(stmt), target="invoice_daily_rollup", repair="the nightly rebuild")
+
+
+@event.listens_for(Session, "after_flush")
+def _track_invoice_rollup(session: Session, flush_context) -> None:
+    # new/dirty/deleted and attribute history still show pre-flush state here.
+    if not any(
+        isinstance(obj, Invoice)
+        for objs in (session.new, session.dirty, session.deleted)
+        for obj in objs
+    ):
+        return
+    apply_deltas(session, collect_deltas(session))
+
+
+def _source(day_expr):
+    return select(
+        Invoice.issuer_id,
+        day_expr,
+        func.coalesce(Invoice.invoice_type, literal("revenue")),
+        func.coalesce(Invoice.status, literal("pending")),
+        func.coalesce(Invoice.channel, literal("")),
+        func.count(Invoice.id),
+        func.coalesce(func.sum(Invoice.amount), 0),
+    ).where(Invoice.issuer_id.isnot(None))
+
+
+def _rebuild(session: Session, day_expr, cleanup, source) -> int:
+    source = source.group_by(
+        Invoice.issuer_id,
+        day_expr,
+        func.coalesce(Invoice.invoice_type, literal("revenue")),
+        func.coalesce(Invoice.status, literal("pending")),
+        func.coalesce(Invoice.channel, literal("")),
+    )
+    session.execute(cleanup)
+    result = session.execute(
+        insert(InvoiceDailyRollup).from_select(
+            [*_KEY_COLS, "invoice_count", "amount_total"], source
+        )
+    )
+    return result.rowcount or 0
+
+
+def touched_days(
+    session: Session, since: dt.date, issuer_id: int | None = None
+) -> set[tuple[int, dt.date]]:
+    """(issuer, day) pairs whose rollup may be wrong after changes since ``since``.
+
+    Days holding an invoice created or updated since then (an old invoice
+    marked paid today lands on its created day), plus rollup days from
+    ``since`` on (catches recent invoices deleted outside the ORM).
+    """
+    since_ts = dt.datetime.combine(since, dt.time.min)
+    day_expr = func.date(Invoice.created_at, type_=Date)
+    changed = select(Invoice.issuer_id, day_expr).where(
+        Invoice.issuer_id.isnot(None),
+        or_(Invoice.created_at >= since_ts, Invoice.updated_at >= since_ts),
+    )
+    recent = select(InvoiceDailyRollup.issuer_id, InvoiceDailyRollup.day).where(
+        InvoiceDailyRollup.day >= since
+    )
+    if issuer_id is not None:
+        changed = changed.where(Invoice.issuer_id == issuer_id)
+        recent = recent.where(InvoiceDailyRollup.issuer_id == issuer_id)
+    return {
+        (issuer, _day(day))
+        for query in (changed.distinct(), recent.distinct())
+        for issuer, day in session.execute(query)
+    }
+
+
+def rebuild_rollup(
+    session: Session,
+    *,
+    since: dt.date | None = None,
+    issuer_id: int | None = None,
+) -> int:
+    """Recompute rollup rows from raw invoices.
+
+    Without ``since`` every day is rebuilt; with it, only the
+    :func:`touched_days` since then. Runs as DELETE + INSERT .. SELECT in the
+    caller's transaction; returns the number of rollup rows written. The
+    caller commits.
+    """
+    day_expr = func.date(Invoice.created_at, type_=Date)
+    if since is None:
+        cleanup = delete(InvoiceDailyRollup)
+        source = _source(day_expr)
+        if issuer_id is not None:
+            cleanup = cleanup.where(InvoiceDailyRollup.issuer_id == issuer_id)
+            source = source.where(Invoice.issuer_id == issuer_id)
+        return _rebuild(session, day_expr, cleanup, source)
+
+    pairs = sorted(touched_days(session, since, issuer_id))
+    written = 0
+    for start in range(0, len(pairs), _REBUILD_CHUNK):
+        chunk = pairs[start:start + _REBUILD_CHUNK]
+        cleanup = delete(InvoiceDailyRollup).where(
+            tuple_(InvoiceDailyRollup.issuer_id, InvoiceDailyRollup.day).in_(chunk)
+        )
+        source = _source(day_expr).where(tuple_(Invoice.issuer_id, day_expr).in_(chunk))
+        written += _rebuild(session, day_expr, cleanup, source)
+    return written
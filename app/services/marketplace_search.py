@@ -0,0 +1,246 @@
+"""Marketplace search index over storefronts and their products.
+
+``/public/stores?q=`` used to ``ILIKE '%term%'`` five profile columns of every
+live store, plus a subquery over every active product and category name, plus
+a second product query for the matched names — none of which an index can
+serve, so each search cost grew with the whole catalogue. Instead every
+storefront owner has one ``storefront_search_document`` row holding their
+searchable profile text and one ``name<TAB>category`` line per active product.
+On Postgres that row carries a GIN-indexed ``tsvector`` (profile weighted
+above products) for ranking and a trigram index on the lower-cased document so
+substring matches stay index-served; elsewhere (SQLite tests) the search falls
+back to ``LIKE`` on the same column. Results, rank and the text for the
+matched-product snippets come back from one query.
+
+Documents are rebuilt by an ``after_flush`` hook in the same transaction as
+the profile/product/category write that changed them (as with
+``invoice_rollup``); Core bulk statements bypass it, so
+``maintenance.rebuild_search_documents`` reconciles nightly.
+"""
+from __future__ import annotations
+
+import logging
+from collections.abc import Iterable
+
+from sqlalchemy import and_, case, delete, event, func, literal_column, or_, select
+from sqlalchemy.orm import Query, Session
+
+from app.db.flush_maintenance import changed, in_savepoint, old_and_new
+from app.models.inventory_models import Product, ProductCategory
+from app.models.models import StorefrontSearchDocument, User
+
+logger = logging.getLogger(__name__)
+
+# Profile columns shoppers search, in document order.
+_STORE_FIELDS = (
+    "business_name", "name", "storefront_description", "storefront_city", "storefront_state",
+)
+# storefront_slug decides whether the owner has a document at all.
+_USER_FIELDS = (*_STORE_FIELDS, "storefront_slug")
+_PRODUCT_FIELDS = ("name", "is_active", "category_id", "user_id")
+_REBUILD_CHUNK = 500
+MAX_MATCHED_PRODUCTS = 3
+
+# Generated on Postgres only (see the migration), so it isn't mapped.
+_search_vector = literal_column("storefront_search_document.search_vector")
+
+
+def _join_text(parts: Iterable[str | None]) -> str:
+    return "\n".join(p.strip() for p in parts if p and p.strip())
+
+
+def build_documents(connection, owner_ids: Iterable[int]) -> list[dict]:
+    """Document rows for those of ``owner_ids`` that have a storefront slug."""
+    owner_ids = sorted(set(owner_ids))
+    if not owner_ids:
+        return []
+    owners = connection.execute(
+        select(User.id, *(getattr(User, f) for f in _STORE_FIELDS)).where(
+            User.id.in_(owner_ids), User.storefront_slug.isnot(None)
+        )
+    ).all()
+    if not owners:
+        return []
+    lines: dict[int, list[str]] = {}
+    for user_id, product, category in connection.execute(
+        select(Product.user_id, Product.name, ProductCategory.name)
+        .outerjoin(ProductCategory, Product.category_id == ProductCategory.id)
+        .where(Product.user_id.in_([o.id for o in owners]), Product.is_active.is_(True))
+        .order_by(Product.user_id, Product.id)
+    ):
+        lines.setdefault(user_id, []).append(f"{product}\t{category or ''}".rstrip("\t"))
+    docs = []
+    for owner in owners:
+        store_text = _join_text(owner[1:])
+        product_text = "\n".join(lines.get(owner.id, ()))
+        docs.append({
+            "user_id": owner.id,
+            "store_text": store_text,
+            "product_text": product_text,
+            "document": f"{store_text}\n{product_text}".lower(),
+        })
+    return docs
+
+
+def _upsert_statement(dialect: str):
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        return None
+    return dialect_insert(StorefrontSearchDocument)
+
+
+def write_documents(connection, owner_ids: Iterable[int]) -> int:
+    """Rebuild the documents of ``owner_ids``; owners without a store lose theirs."""
+    owner_ids = set(owner_ids)
+    docs = build_documents(connection, owner_ids)
+    stale = owner_ids - {d["user_id"] for d in docs}
+    if stale:
+        connection.execute(
+            delete(StorefrontSearchDocument).where(StorefrontSearchDocument.user_id.in_(stale))
+        )
+    if not docs:
+        return 0
+    stmt = _upsert_statement(connection.dialect.name)
+    if stmt is None:
+        connection.execute(
+            delete(StorefrontSearchDocument).where(
+                StorefrontSearchDocument.user_id.in_([d["user_id"] for d in docs])
+            )
+        )
+        connection.execute(StorefrontSearchDocument.__table__.insert(), docs)
+        return len(docs)
+    stmt = stmt.values(docs)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["user_id"],
+        set_={
+            "store_text": stmt.excluded.store_text,
+            "product_text": stmt.excluded.product_text,
+            "document": stmt.excluded.document,
+            "updated_at": func.now(),
+        },
+    )
+    connection.execute(stmt)
+    return len(docs)
+
+
+def rebuild_documents(session: Session) -> int:
+    """Recompute every document (and drop orphans) in the caller's transaction.
+
+    Returns the number of documents written; the caller commits.
+    """
+    conn = session.connection()
+    conn.execute(
+        delete(StorefrontSearchDocument).where(
+            StorefrontSearchDocument.user_id.notin_(
+                select(User.id).where(User.storefront_slug.isnot(None))
+            )
+        )
+    )
+    owner_ids = conn.execute(
+        select(User.id).where(User.storefront_slug.isnot(None)).order_by(User.id)
+    ).scalars().all()
+    written = 0
+    for start in range(0, len(owner_ids), _REBUILD_CHUNK):
+        written += write_documents(conn, owner_ids[start:start + _REBUILD_CHUNK])
+    return written
+
+
+# ── Maintenance on flush ────────────────────────────────────────────
+
+
+def collect_owner_ids(session: Session) -> set[int]:
+    """Owners whose search document a pending flush changes."""
+    owners: set[int] = set()
+    for obj in session.new:
+        if isinstance(obj, User):
+            if obj.storefront_slug:
+                owners.add(obj.id)
+        elif isinstance(obj, Product | ProductCategory):
+            owners |= old_and_new(obj, "user_id")
+    for obj in session.dirty:
+        if isinstance(obj, User):
+            if changed(obj, _USER_FIELDS):
+                owners.add(obj.id)
+        elif isinstance(obj, Product):
+            if changed(obj, _PRODUCT_FIELDS):
+                owners |= old_and_new(obj, "user_id")
+        elif isinstance(obj, ProductCategory):
+            if changed(obj, ("name", "user_id")):
+                owners |= old_and_new(obj, "user_id")
+    for obj in session.deleted:
+        if isinstance(obj, User):
+            owners.add(obj.id)
+        elif isinstance(obj, Product | ProductCategory):
+            owners |= old_and_new(obj, "user_id")
+    return {i for i in owners if i is not None}
+
+
+@event.listens_for(Session, "after_flush")
+def _track_search_documents(session: Session, flush_context) -> None:
+    # new/dirty/deleted and attribute history still show pre-flush state here.
+    owners = collect_owner_ids(session)
+    if not owners:
+        return
+    conn = session.connection()
+    in_savepoint(
+        conn,
+        lambda: write_documents(conn, owners),
+        target="storefront_search_document",
+        repair="the nightly rebuild",
+    )
+
+
+# ── Search ──────────────────────────────────────────────────────────
+
+
+def matched_products(product_text: str | None, term: str, limit: int = MAX_MATCHED_PRODUCTS) -> list[str]:
+    """Up to ``limit`` product names whose name or category contain every word of ``term``."""
+    words = term.lower().split()
+    found: list[str] = []
+    for line in (product_text or "").splitlines():
+        name = line.partition("\t")[0]
+        if name in found or not all(w in line.lower() for w in words):
+            continue
+        found.append(name)
+        if len(found) >= limit:
+            break
+    return found
+
+
+def search_stores(
+    base: Query,
+    term: str,
+    *,
+    page: int,
+    page_size: int,
+) -> tuple[int, list[tuple[User, list[str]]]]:
+    """``(total, [(owner, matched product names), ...])`` for ``term`` within ``base``.
+
+    ``base`` is a ``Query`` of ``User`` already restricted to listable stores;
+    results are ranked (profile matches first) and then ordered by slug.
+    """
+    needle = term.lower()
+    words = needle.split() or [needle]
+    doc = StorefrontSearchDocument
+    substring = and_(*(doc.document.contains(w, autoescape=True) for w in words))
+    if base.session.get_bind().dialect.name == "postgresql":
+        tsquery = func.websearch_to_tsquery("simple", term)
+        match = or_(_search_vector.op("@@")(tsquery), substring)
+        rank = func.ts_rank(_search_vector, tsquery).desc()
+    else:
+        match = substring
+        rank = case((func.lower(doc.store_text).contains(needle, autoescape=True), 0), else_=1)
+
+    query = base.join(doc, doc.user_id == User.id).filter(match)
+    total = query.with_entities(func.count(User.id)).scalar() or 0
+    rows = (
+        query.add_columns(doc.product_text)
+        .order_by(rank, User.storefront_slug.asc())
+        .offset((page - 1) * page_size)
+        .limit(page_size)
+        .all()
+    )
+    return total, [(owner, matched_products(text, term)) for owner, text in rows]
@@ -0,0 +1,70 @@
+"""Shared, pooled HTTP client and result keys for OpenAI media calls.
+
+Receipt OCR (``OCRService``) and voice-note transcription (``SpeechService``)
+both post to api.openai.com. They share one keep-alive ``httpx.AsyncClient``
+per running event loop instead of opening (and TLS-handshaking) a fresh
+client per call. Per-loop, because Celery tasks drive these services through
+``asyncio.run`` and a pooled client must not outlive the loop it was made on.
+
+Results are cached by content (see :func:`result_key`): the SHA-256 of the
+exact bytes sent plus everything else that shapes the answer (model, prompt,
+language). Re-forwarded media and retried tasks then cost no API call.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import weakref
+
+import httpx
+
+from app.core.config import settings
+
+_async_clients: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient] = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """The pooled OpenAI client bound to the running event loop.
+
+    Callers pass their own ``timeout=`` per request (vision and Whisper calls
+    have very different latencies).
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=settings.OPENAI_HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.OPENAI_HTTP_MAX_KEEPALIVE,
+            ),
+            timeout=httpx.Timeout(60.0, connect=5.0),
+        )
+        _async_clients[loop] = client
+    return client
+
+
+async def aclose_client() -> None:
+    """Close the running loop's pooled client."""
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    client = _async_clients.pop(loop, None)
+    if client is not None:
+        await client.aclose()
+
+
+def result_key(namespace: str, content: bytes, *variant: str) -> str:
+    """Cache key for a result derived from ``content`` under ``variant``.
+
+    ``variant`` lists whatever else changes the output for the same bytes
+    (model, full prompt text, language), so editing a prompt naturally
+    stops old results from being served.
+    """
+    digest = hashlib.sha256(content)
+    for part in variant:
+        digest.update(b"\x00")
+        digest.update(part.encode())
+    return f"{namespace}:{digest.hexdigest()}"
@@ -0,0 +1,182 @@
+"""Cached WhatsApp sender → user resolution.
+
+Every inbound bot message needs "which account is this phone?". Instead of
+expanding ``get_phone_variants`` into ``User.phone IN (...)`` queries in each
+processor, bot code calls :func:`resolve_phone`, which caches
+canonical E.164 → ``PhoneIdentity(user_id, verified, team_owner_id)`` in the
+two-tier app cache (in-process LRU + Redis, see ``app.core.cache``).
+
+Unknown numbers (customers replying to invoices) are cached too, for a short
+``PHONE_RESOLVE_NEGATIVE_TTL``. Any committed insert, delete or phone /
+verification change on a ``User`` drops the affected numbers from the cache
+(ORM hooks below), which covers signup, ``routes_user_phone`` and account
+deletion. So does joining or leaving a team, or a team changing admin, since
+the entry records the team owner.
+"""
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+
+from app.core.cache import cache_delete, cache_get, cache_set, invalidate_on_commit
+from app.core.config import settings
+from app.models.models import User
+from app.models.team_models import Team, TeamMember
+from app.utils.phone import get_phone_variants, normalize_phone
+
+logger = logging.getLogger(__name__)
+
+_KEY_PREFIX = "phone_issuer:"
+
+
+@dataclass(frozen=True)
+class PhoneIdentity:
+    user_id: int
+    verified: bool
+    team_owner_id: int | None  # admin of the team this user belongs to, if any
+
+
+def cache_key(phone: str) -> str:
+    return f"{_KEY_PREFIX}{normalize_phone(phone)}"
+
+
+def _lookup(db: Session, phone: str) -> PhoneIdentity | None:
+    candidates = get_phone_variants(phone)
+    if not candidates:
+        return None
+    # One query; a verified match wins over an unverified one.
+    row = db.execute(
+        select(User.id, User.phone_verified)
+        .where(User.phone.in_(list(candidates)))
+        .order_by(User.phone_verified.desc(), User.id.asc())
+        .limit(1)
+    ).first()
+    if row is None:
+        return None
+    owner_id = db.execute(
+        select(Team.admin_user_id)
+        .join(TeamMember, TeamMember.team_id == Team.id)
+        .where(TeamMember.user_id == row.id)
+        .limit(1)
+    ).scalar()
+    return PhoneIdentity(row.id, bool(row.phone_verified), owner_id)
+
+
+def _store(phone: str, identity: PhoneIdentity | None) -> None:
+    if identity is None:
+        cache_set(cache_key(phone), {"u": None}, ttl=settings.PHONE_RESOLVE_NEGATIVE_TTL)
+        return
+    cache_set(
+        cache_key(phone),
+        {"u": identity.user_id, "v": identity.verified, "t": identity.team_owner_id},
+        ttl=settings.PHONE_RESOLVE_TTL,
+    )
+
+
+def resolve_phone(db: Session, phone: str | None) -> PhoneIdentity | None:
+    """The account a WhatsApp sender's phone belongs to, or None."""
+    if not phone:
+        return None
+    cached = cache_get(cache_key(phone))
+    if isinstance(cached, dict) and "u" in cached:
+        if cached["u"] is None:
+            return None
+        return PhoneIdentity(int(cached["u"]), bool(cached.get("v")), cached.get("t"))
+    identity = _lookup(db, phone)
+    _store(phone, identity)
+    return identity
+
+
+def resolve_user(db: Session, phone: str | None) -> User | None:
+    """Like :func:`resolve_phone` but returns the ``User`` (a primary-key get)."""
+    identity = resolve_phone(db, phone)
+    return db.get(User, identity.user_id) if identity else None
+
+
+def mark_verified(db: Session, phone: str, identity: PhoneIdentity) -> PhoneIdentity:
+    """Flag the user's phone as verified (the sender proved ownership) and commit."""
+    user = db.get(User, identity.user_id)
+    if user is not None and not user.phone_verified:
+        user.phone_verified = True
+        db.commit()
+    verified = PhoneIdentity(identity.user_id, True, identity.team_owner_id)
+    _store(phone, verified)
+    return verified
+
+
+def invalidate_phone(*phones: str | None) -> None:
+    keys = {cache_key(p) for p in phones if p}
+    if keys:
+        cache_delete(*keys)
+
+
+# ── Invalidation on committed User changes ───────────────────────────
+
+
+def _mark_stale(target: User, *, changed_only: bool) -> None:
+    state = inspect(target)
+    phones: set[str] = set()
+    if changed_only:
+        phone_hist = state.attrs.phone.history
+        if not (phone_hist.has_changes() or state.attrs.phone_verified.history.has_changes()):
+            return
+        phones.update(p for p in (phone_hist.deleted or ()) if p)
+    # state.dict: never lazy-load (the row may already be gone).
+    phones.add(state.dict.get("phone"))
+    invalidate_on_commit(target, invalidate_phone, *phones)
+
+
+def _mark_users_stale(target, connection, user_ids: set[int]) -> None:
+    """Queue the phones of ``user_ids`` (their team owner changed)."""
+    user_ids = {uid for uid in user_ids if uid is not None}
+    if not user_ids:
+        return
+    phones = connection.execute(
+        select(User.phone).where(User.id.in_(user_ids), User.phone.is_not(None))
+    ).scalars()
+    invalidate_on_commit(target, invalidate_phone, *phones)
+
+
+@event.listens_for(User, "after_insert")
+def _user_inserted(_mapper, _conn, target: User) -> None:
+    _mark_stale(target, changed_only=False)
+
+
+@event.listens_for(User, "after_update")
+def _user_updated(_mapper, _conn, target: User) -> None:
+    _mark_stale(target, changed_only=True)
+
+
+@event.listens_for(User, "after_delete")
+def _user_deleted(_mapper, _conn, target: User) -> None:
+    _mark_stale(target, changed_only=False)
+
+
+def _member_ids(connection, team_id: int) -> set[int]:
+    return set(connection.execute(select(TeamMember.user_id).where(TeamMember.team_id == team_id)).scalars())
+
+
+@event.listens_for(TeamMember, "after_insert")
+@event.listens_for(TeamMember, "after_update")
+@event.listens_for(TeamMember, "after_delete")
+def _membership_changed(_mapper, connection, target: TeamMember) -> None:
+    state = inspect(target)
+    users = {state.dict.get("user_id")}
+    users.update(state.attrs.user_id.history.deleted or ())
+    _mark_users_stale(target, connection, users)
+
+
+@event.listens_for(Team, "before_delete")
+def _team_deleting(_mapper, connection, target: Team) -> None:
+    # Collected before the delete: member rows may be gone by after_delete.
+    _mark_users_stale(target, connection, _member_ids(connection, target.id))
+
+
+@event.listens_for(Team, "after_update")
+def _team_updated(_mapper, connection, target: Team) -> None:
+    if not inspect(target).attrs.admin_user_id.history.has_changes():
+        return
+    _mark_users_stale(target, connection, _member_ids(connection, target.id))
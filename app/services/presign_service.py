@@ -0,0 +1,118 @@
+"""Shared, stable presigned URLs for S3 assets.
+
+A SigV4 presigned URL embeds its signing time, so every process that signs
+the same object gets a different URL, and browsers and CDNs miss their cache
+after each reload and across workers. Instead, time is cut into windows of
+half the requested TTL. Each object key gets a fixed offset inside the window
+(a hash of the key, so renewals are spread out instead of all landing on one
+boundary). Every process computes the same window for a key. The first one to
+sign in that window publishes its URL to the two-tier app cache with SET NX
+(:func:`app.core.cache.cache_add_many`), and every other process adopts it.
+
+Each URL is signed for the full TTL and served for at most half of it, so a
+URL handed out always has at least half its TTL left. :func:`presign_many`
+resolves a whole catalog page with one MGET and one pipelined SET NX. Without
+Redis the URLs are still cached, but only per process.
+"""
+from __future__ import annotations
+
+import logging
+import time
+import zlib
+from collections.abc import Sequence
+
+from app.core.cache import cache_add_many, cache_get_many
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_KEY_PREFIX = "presign:"
+# AWS presigned URLs max out at 7 days.
+MAX_TTL = 7 * 24 * 3600
+_MIN_WINDOW = 60
+
+
+def _s3():
+    from app.storage.s3_client import s3_client
+
+    return s3_client
+
+
+def _window(key: str, ttl: int, now: float) -> tuple[int, int]:
+    """``(window index, seconds until it ends)`` for ``key`` at ``now``."""
+    width = max(_MIN_WINDOW, ttl // 2)
+    shifted = now + zlib.crc32(key.encode()) % width
+    return int(shifted // width), width - int(shifted % width)
+
+
+def _cache_key(bucket: str, key: str, ttl: int, window: int) -> str:
+    return f"{_KEY_PREFIX}{bucket}:{ttl}:{window}:{key}"
+
+
+def presign_keys(keys: Sequence[str], *, expires_in: int | None = None) -> list[str | None]:
+    """Presigned GET URLs for ``keys``, in order; None where signing failed."""
+    if not keys:
+        return []
+    s3 = _s3()
+    ttl = min(expires_in or settings.S3_PRESIGN_TTL, MAX_TTL)
+    now = time.time()
+    slots = [_window(k, ttl, now) for k in keys]
+    cache_keys = [_cache_key(s3.bucket, k, ttl, w) for k, (w, _) in zip(keys, slots)]
+    urls: list[str | None] = list(cache_get_many(cache_keys))
+
+    # Sign the misses, then publish grouped by remaining window so each entry
+    # expires exactly when its window closes.
+    by_expiry: dict[int, dict[str, str]] = {}
+    for i, url in enumerate(urls):
+        if url is not None:
+            continue
+        signed = s3.get_presigned_url(keys[i], expires_in=ttl)
+        if signed is None:
+            continue
+        urls[i] = signed
+        by_expiry.setdefault(slots[i][1], {})[cache_keys[i]] = signed
+    winners: dict[str, str] = {}
+    for remaining, items in by_expiry.items():
+        winners.update(cache_add_many(items, remaining))
+    return [winners.get(ck, url) for ck, url in zip(cache_keys, urls)]
+
+
+def presign_key(key: str, *, expires_in: int | None = None) -> str | None:
+    """Presigned GET URL for one object key (None without an S3 client)."""
+    return presign_keys([key], expires_in=expires_in)[0]
+
+
+def presign_many(urls: Sequence[str | None], *, expires_in: int | None = None) -> list[str | None]:
+    """Re-presign stored asset URLs, in order.
+
+    Empty entries stay None; a URL with no usable key, or one that can't be
+    signed right now, is returned unchanged.
+    """
+    s3 = _s3()
+    out: list[str | None] = [u or None for u in urls]
+    positions: list[int] = []
+    keys: list[str] = []
+    for i, url in enumerate(urls):
+        if not url:
+            continue
+        try:
+            key = s3.extract_key_from_url(url)
+        except Exception:  # noqa: BLE001
+            key = None
+        if key:
+            positions.append(i)
+            keys.append(key)
+    try:
+        signed = presign_keys(keys, expires_in=expires_in)
+    except Exception:  # noqa: BLE001
+        logger.warning("Presigning %d assets failed", len(keys), exc_info=True)
+        return out
+    for i, url in zip(positions, signed):
+        if url:
+            out[i] = url
+    return out
+
+
+def presign_url(url: str | None, *, expires_in: int | None = None) -> str | None:
+    """Re-presign one stored asset URL (see :func:`presign_many`)."""
+    return presign_many([url], expires_in=expires_in)[0]
@@ -0,0 +1,207 @@
+"""Who is making this request: plan, team role and data owner, resolved once.
+
+Authenticated routes used to re-derive the same facts per dependency:
+``get_data_owner_id`` and ``require_admin_role`` each queried ``Team`` /
+``TeamMember``, and ``require_plan_feature`` loaded the ``User`` again through
+``FeatureGate`` (which may even commit a plan downgrade inside a GET).
+:func:`resolve_principal` answers all of it with one query (two for team
+members, whose data owner's plan is also needed) and caches the result per
+user id in the two-tier app cache for ``PRINCIPAL_CACHE_TTL`` seconds.
+
+Role and data owner gate access, so a change must reach every process at
+once, not after the in-process tier's TTL. Each entry's key is tagged with
+the user's ``principal:<id>`` version (:func:`app.core.cache.tagged_key`),
+which is read from Redis on every lookup; invalidating bumps that version.
+
+Subscription expiry is evaluated at read time from the cached expiry, so an
+expired Pro user is treated as FREE immediately; persisting the downgrade is
+left to the daily ``maintenance.downgrade_expired_subscriptions`` task
+(:func:`app.workers.tasks.maintenance_tasks.downgrade_expired_subscriptions`).
+Committed changes to a user's plan fields, a team or a membership retire the
+affected entries (ORM hooks below), including every member of a team whose
+admin changed or that was deleted.
+"""
+from __future__ import annotations
+
+import datetime as dt
+import logging
+from dataclasses import dataclass
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+
+from app.core.cache import cache_delete, cache_get, cache_set, invalidate_on_commit, invalidate_tags, tagged_key
+from app.core.config import settings
+from app.models.models import SubscriptionPlan, User
+from app.models.team_models import Team, TeamMember
+
+logger = logging.getLogger(__name__)
+
+_KEY_PREFIX = "principal:"
+_PLAN_FIELDS = ("plan", "pro_override", "subscription_expires_at")
+
+ROLE_SOLO = "solo"
+ROLE_ADMIN = "admin"
+ROLE_MEMBER = "member"
+
+
+@dataclass(frozen=True)
+class Principal:
+    user_id: int
+    role: str  # ROLE_SOLO, ROLE_ADMIN or ROLE_MEMBER
+    data_owner_id: int  # team admin for members, the user otherwise
+    plan: SubscriptionPlan  # effective plan (pro_override and expiry applied)
+    owner_plan: SubscriptionPlan  # effective plan of the data owner
+
+    @property
+    def is_member(self) -> bool:
+        return self.role == ROLE_MEMBER
+
+
+def cache_key(user_id: int) -> str:
+    return f"{_KEY_PREFIX}{user_id}"
+
+
+def principal_tag(user_id: int) -> str:
+    return f"{_KEY_PREFIX}{user_id}"
+
+
+def effective_plan(plan: SubscriptionPlan, pro_override: bool, expires_at: dt.datetime | None) -> SubscriptionPlan:
+    """``User.effective_plan``, also treating a lapsed monthly subscription as FREE."""
+    if pro_override:
+        return SubscriptionPlan.PRO
+    if plan.has_monthly_subscription and expires_at is not None:
+        if expires_at.tzinfo is None:
+            expires_at = expires_at.replace(tzinfo=dt.timezone.utc)
+        if dt.datetime.now(dt.timezone.utc) > expires_at:
+            return SubscriptionPlan.FREE
+    return plan
+
+
+def _plan_entry(plan: SubscriptionPlan, pro_override: bool, expires_at: dt.datetime | None) -> list:
+    return [plan.value, bool(pro_override), expires_at.isoformat() if expires_at else None]
+
+
+def _plan_from_entry(entry: list) -> SubscriptionPlan:
+    plan, pro_override, expires_at = entry
+    return effective_plan(
+        SubscriptionPlan(plan),
+        pro_override,
+        dt.datetime.fromisoformat(expires_at) if expires_at else None,
+    )
+
+
+def _lookup(db: Session, user_id: int) -> dict | None:
+    admin_of = (
+        select(Team.id).where(Team.admin_user_id == User.id).limit(1).scalar_subquery()
+    )
+    member_of = (
+        select(Team.admin_user_id)
+        .join(TeamMember, TeamMember.team_id == Team.id)
+        .where(TeamMember.user_id == User.id)
+        .limit(1)
+        .scalar_subquery()
+    )
+    row = db.execute(
+        select(
+            User.plan,
+            User.pro_override,
+            User.subscription_expires_at,
+            admin_of.label("admin_of"),
+            member_of.label("owner_id"),
+        ).where(User.id == user_id)
+    ).first()
+    if row is None:
+        return None
+    own = _plan_entry(row.plan, row.pro_override, row.subscription_expires_at)
+    if row.admin_of is not None:
+        return {"r": ROLE_ADMIN, "o": user_id, "p": own, "op": own}
+    if row.owner_id is None:
+        return {"r": ROLE_SOLO, "o": user_id, "p": own, "op": own}
+    owner = db.execute(
+        select(User.plan, User.pro_override, User.subscription_expires_at).where(User.id == row.owner_id)
+    ).first()
+    owner_plan = (
+        _plan_entry(owner.plan, owner.pro_override, owner.subscription_expires_at) if owner else own
+    )
+    return {"r": ROLE_MEMBER, "o": row.owner_id, "p": own, "op": owner_plan}
+
+
+def resolve_principal(db: Session, user_id: int) -> Principal | None:
+    """The cached :class:`Principal` for ``user_id`` (None if the user is gone)."""
+    key = tagged_key(cache_key(user_id), principal_tag(user_id))
+    entry = cache_get(key)
+    if not isinstance(entry, dict) or "r" not in entry:
+        entry = _lookup(db, user_id)
+        if entry is None:
+            return None
+        cache_set(key, entry, ttl=settings.PRINCIPAL_CACHE_TTL)
+    try:
+        return Principal(
+            user_id=user_id,
+            role=entry["r"],
+            data_owner_id=int(entry["o"]),
+            plan=_plan_from_entry(entry["p"]),
+            owner_plan=_plan_from_entry(entry["op"]),
+        )
+    except (KeyError, TypeError, ValueError):
+        logger.warning("Discarding malformed principal cache entry for user %s", user_id)
+        cache_delete(key)
+        return resolve_principal(db, user_id)
+
+
+def invalidate_principal(*user_ids: int | None) -> None:
+    invalidate_tags(*{principal_tag(uid) for uid in user_ids if uid is not None})
+
+
+# ── Invalidation on committed plan / team changes ────────────────────
+
+
+def _mark_stale(target, connection, user_ids: set[int], team_ids: set[int] = frozenset()) -> None:
+    if inspect(target).session is None:
+        return
+    if team_ids:
+        # Members follow their admin's plan and identity.
+        user_ids = user_ids | set(
+            connection.execute(
+                select(TeamMember.user_id).where(TeamMember.team_id.in_(team_ids))
+            ).scalars()
+        )
+    invalidate_on_commit(target, invalidate_principal, *user_ids)
+
+
+@event.listens_for(User, "after_update")
+def _user_updated(_mapper, connection, target: User) -> None:
+    state = inspect(target)
+    if not any(state.attrs[name].history.has_changes() for name in _PLAN_FIELDS):
+        return
+    teams = set(
+        connection.execute(select(Team.id).where(Team.admin_user_id == target.id)).scalars()
+    )
+    _mark_stale(target, connection, {target.id}, teams)
+
+
+@event.listens_for(User, "after_delete")
+def _user_deleted(_mapper, connection, target: User) -> None:
+    _mark_stale(target, connection, {target.id})
+
+
+@event.listens_for(Team, "after_insert")
+@event.listens_for(Team, "after_update")
+@event.listens_for(Team, "before_delete")
+def _team_changed(_mapper, connection, target: Team) -> None:
+    # before_delete, not after: the member rows may be deleted along with it.
+    state = inspect(target)
+    admins = {state.dict.get("admin_user_id")}
+    admins.update(state.attrs.admin_user_id.history.deleted or ())
+    _mark_stale(target, connection, admins, {target.id} if target.id is not None else set())
+
+
+@event.listens_for(TeamMember, "after_insert")
+@event.listens_for(TeamMember, "after_update")
+@event.listens_for(TeamMember, "after_delete")
+def _membership_changed(_mapper, connection, target: TeamMember) -> None:
+    state = inspect(target)
+    users = {state.dict.get("user_id")}
+    users.update(state.attrs.user_id.history.deleted or ())
+    _mark_stale(target, connection, users)
@@ -0,0 +1,189 @@
+"""Bulk planning helpers for the reminder/nudge Celery tasks.
+
+The reminder sweeps used to ask the database one question per row: "was this
+tier already sent for this invoice?" and "who is this issuer?". These helpers
+answer those questions for the whole candidate set up front — one query for
+the already-sent ``InvoiceReminderLog`` keys, one for the issuers — so the
+send plan is computed in memory. New log rows are still committed right
+after the send they record (one multi-row INSERT per send), so a crash or
+retry mid-sweep can't resend reminders that already went out.
+"""
+from __future__ import annotations
+
+import logging
+from collections.abc import Iterable
+from datetime import date
+from typing import Any
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session, joinedload
+
+from app.models.models import Invoice, InvoiceReminderLog, User
+
+logger = logging.getLogger(__name__)
+
+OWNER_TIERS = ("owner_light", "owner_action", "owner_urgent", "owner_critical")
+
+SentKey = tuple[int, str, str]  # (invoice_id, reminder_type, channel)
+
+
+def owner_tier(days_overdue: int) -> str:
+    """Owner escalation tier for an invoice ``days_overdue`` past due."""
+    if days_overdue >= 14:
+        return "owner_critical"
+    if days_overdue >= 8:
+        return "owner_urgent"
+    if days_overdue >= 4:
+        return "owner_action"
+    return "owner_light"
+
+
+def load_sent_reminders(
+    db: Session,
+    invoice_scope: Any,
+    reminder_types: Iterable[str] | None = None,
+) -> set[SentKey]:
+    """Every logged (invoice_id, reminder_type, channel) for ``invoice_scope``.
+
+    ``invoice_scope`` is a ``select(Invoice.id)`` mirroring the task's candidate
+    filter, so the lookup is a single semi-join however many invoices match.
+    """
+    stmt = select(
+        InvoiceReminderLog.invoice_id,
+        InvoiceReminderLog.reminder_type,
+        InvoiceReminderLog.channel,
+    ).where(InvoiceReminderLog.invoice_id.in_(invoice_scope))
+    if reminder_types is not None:
+        stmt = stmt.where(InvoiceReminderLog.reminder_type.in_(list(reminder_types)))
+    return {(r.invoice_id, r.reminder_type, r.channel) for r in db.execute(stmt)}
+
+
+def load_users(db: Session, user_ids: Iterable[int]) -> dict[int, User]:
+    """Issuers by id in one query."""
+    ids = list(set(user_ids))
+    if not ids:
+        return {}
+    return {u.id: u for u in db.query(User).filter(User.id.in_(ids)).all()}
+
+
+def plan_owner_overdue(
+    invoices: Iterable[Invoice],
+    sent: set[SentKey],
+    today: date,
+) -> tuple[dict[int, dict[str, list[Invoice]]], int]:
+    """Group overdue invoices per issuer into not-yet-sent owner tiers.
+
+    A tier counts as sent for an invoice on ANY channel (prevents a duplicate
+    email when WhatsApp already delivered it). Returns (plan, skipped).
+    """
+    sent_pairs = {(invoice_id, tier) for invoice_id, tier, _ in sent}
+    plan: dict[int, dict[str, list[Invoice]]] = {}
+    skipped = 0
+    for inv in invoices:
+        if not inv.due_date:
+            continue
+        tier = owner_tier((today - inv.due_date.date()).days)
+        if (inv.id, tier) in sent_pairs:
+            skipped += 1
+            continue
+        tiers = plan.setdefault(inv.issuer_id, {t: [] for t in OWNER_TIERS})
+        tiers[tier].append(inv)
+    return plan, skipped
+
+
+def oldest_pending_invoices(
+    db: Session,
+    issuer_ids: Iterable[int],
+    created_before: Any,
+    per_issuer: int = 3,
+) -> dict[int, list[Invoice]]:
+    """The ``per_issuer`` oldest stale pending revenue invoices of each issuer.
+
+    One ``row_number() OVER (PARTITION BY issuer_id ...)`` query instead of a
+    LIMIT query per issuer.
+    """
+    ids = list(set(issuer_ids))
+    if not ids:
+        return {}
+    ranked = (
+        select(
+            Invoice.id,
+            func.row_number()
+            .over(partition_by=Invoice.issuer_id, order_by=(Invoice.created_at.asc(), Invoice.id.asc()))
+            .label("rn"),
+        )
+        .where(
+            Invoice.issuer_id.in_(ids),
+            Invoice.status == "pending",
+            Invoice.invoice_type == "revenue",
+            Invoice.created_at < created_before,
+        )
+        .subquery()
+    )
+    rows = (
+        db.query(Invoice)
+        .options(joinedload(Invoice.customer))
+        .join(ranked, ranked.c.id == Invoice.id)
+        .filter(ranked.c.rn <= per_issuer)
+        .order_by(Invoice.issuer_id, Invoice.created_at.asc(), Invoice.id.asc())
+        .all()
+    )
+    grouped: dict[int, list[Invoice]] = {}
+    for inv in rows:
+        grouped.setdefault(inv.issuer_id, []).append(inv)
+    return grouped
+
+
+class ReminderLogWriter:
+    """Record sent reminders in ``InvoiceReminderLog``, committed per send.
+
+    Call :meth:`record` right after each successful external send: it inserts
+    one row per invoice the message covered, ignoring rows a concurrent run
+    already wrote (ON CONFLICT DO NOTHING where the dialect supports it), and
+    commits before the next send. The keys also join ``sent`` so later checks
+    in the same run see them without a round-trip.
+    """
+
+    def __init__(self, db: Session, sent: set[SentKey] | None = None):
+        self.db = db
+        self.sent = sent if sent is not None else set()
+        self.written = 0
+
+    def record(
+        self,
+        reminders: Iterable[tuple[int, str]],
+        channel: str,
+        recipient: str | None,
+    ) -> None:
+        """Durably log one send covering ``(invoice_id, reminder_type)`` pairs."""
+        rows = []
+        for invoice_id, reminder_type in reminders:
+            key = (invoice_id, reminder_type, channel)
+            if key in self.sent:
+                continue
+            self.sent.add(key)
+            rows.append(
+                {
+                    "invoice_id": invoice_id,
+                    "reminder_type": reminder_type,
+                    "channel": channel,
+                    "recipient": (recipient or "")[:255],
+                }
+            )
+        if not rows:
+            return
+        self.db.execute(self._insert_statement(), rows)
+        self.db.commit()
+        self.written += len(rows)
+
+    def _insert_statement(self):
+        dialect = self.db.get_bind().dialect.name
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        elif dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            return insert(InvoiceReminderLog)
+        return dialect_insert(InvoiceReminderLog).on_conflict_do_nothing(
+            index_elements=["invoice_id", "reminder_type", "channel"]
+        )
@@ -2,6 +2,8 @@
 Speech-to-text service for transcribing WhatsApp voice notes.
 
 Single Responsibility: Handle audio transcription via OpenAI Whisper API.
+Transcripts are cached by audio content + language, so a re-forwarded voice
+note (or a retried task) is not transcribed twice.
 """
 from __future__ import annotations
 
@@ -10,7 +12,9 @@ from typing import TYPE_CHECKING
 
 import httpx
 
+from app.core import cache
 from app.core.config import settings
+from app.services.openai_client import get_async_client, result_key
 
 if TYPE_CHECKING:
     pass
@@ -25,6 +29,7 @@ class SpeechService:
         self.api_key = getattr(settings, "OPENAI_API_KEY", None)
         self.base_url = "https://api.openai.com/v1/audio/transcriptions"
         self.model = "whisper-1"
+        self.cache_ttl = settings.TRANSCRIPT_CACHE_TTL
 
     async def transcribe_audio(self, audio_bytes: bytes, language: str = "en") -> str:
         """
@@ -45,28 +50,10 @@ class SpeechService:
             raise ValueError("OPENAI_API_KEY not configured")
 
         try:
-            files = {
-                "file": ("audio.ogg", audio_bytes, "audio/ogg"),
-            }
-            data = {
-                "model": self.model,
-                "language": language,
-            }
-            headers = {"Authorization": f"Bearer {self.api_key}"}
-
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                response = await client.post(
-                    self.base_url,
-                    headers=headers,
-                    files=files,
-                    data=data,
-                )
-                response.raise_for_status()
-                result = response.json()
-                transcript = result.get("text", "").strip()
-                logger.info("[SPEECH] Transcribed %d bytes -> %d chars", len(audio_bytes), len(transcript))
-                return transcript
-
+            key = result_key("transcript", audio_bytes, self.model, language)
+            return await cache.cached(
+                key, self.cache_ttl, lambda: self._transcribe(audio_bytes, language)
+            )
         except httpx.HTTPError as e:
             logger.error("[SPEECH] Transcription failed: %s", e)
             raise
@@ -74,6 +61,30 @@ class SpeechService:
             logger.error("[SPEECH] Unexpected error: %s", e)
             raise
 
+    async def _transcribe(self, audio_bytes: bytes, language: str) -> str:
+        """Call Whisper for one voice note."""
+        files = {
+            "file": ("audio.ogg", audio_bytes, "audio/ogg"),
+        }
+        data = {
+            "model": self.model,
+            "language": language,
+        }
+        headers = {"Authorization": f"Bearer {self.api_key}"}
+
+        response = await get_async_client().post(
+            self.base_url,
+            headers=headers,
+            files=files,
+            data=data,
+            timeout=60.0,
+        )
+        response.raise_for_status()
+        result = response.json()
+        transcript = result.get("text", "").strip()
+        logger.info("[SPEECH] Transcribed %d bytes -> %d chars", len(audio_bytes), len(transcript))
+        return transcript
+
 
 def get_speech_service() -> SpeechService:
     """Dependency injection helper."""
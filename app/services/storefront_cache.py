@@ -0,0 +1,212 @@
+"""Cached public storefront payload and buffered view counting.
+
+``GET /public/store/{slug}`` is the most shared URL we have. Building it reads
+the owner, every listable product with its category and the review aggregate,
+and presigns every image; it also used to commit a ``storefront_views``
+increment on every hit. Here:
+
+- The rendered payload (minus the time-dependent ``open_now`` fields) is
+  cached in the two-tier app cache under a key tagged ``storefront:{slug}``,
+  with a content hash used as the HTTP ETag. Committed changes to the owner's
+  store profile, their products, categories or reviews bump the tag (ORM hooks
+  below), so the next view rebuilds it.
+- Views are ``HINCRBY``-ed into one Redis hash and folded into
+  ``user.storefront_views`` in bulk by ``maintenance.flush_storefront_views``.
+  The batch is dropped from Redis before the DB commit, so a crash can lose
+  one batch of views but never count it twice. Without Redis the view is
+  written straight to the row, as before.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+from collections.abc import Callable
+from typing import Any
+
+from sqlalchemy import bindparam, event, inspect, select, update
+from sqlalchemy.orm import Session
+
+from app.core.cache import get_or_compute, invalidate_on_commit, invalidate_tags, tagged_key
+from app.core.config import settings
+from app.models.inventory_models import Product, ProductCategory
+from app.models.models import StorefrontReview, User
+
+logger = logging.getLogger(__name__)
+
+VIEWS_KEY = "storefront:views"
+# A failed flush leaves its batch here; the next run retries it first.
+VIEWS_FLUSHING_KEY = "storefront:views:flushing"
+# session.info key: owner ids of changed store rows, resolved to slugs per flush.
+_OWNERS_INFO_KEY = "storefront_cache_owners"
+
+# User columns that feed the public payload (others, e.g. storefront_views or
+# last_login, change without affecting it).
+_PAYLOAD_USER_FIELDS = (
+    "storefront_slug", "storefront_enabled", "store_status", "name", "business_name",
+    "storefront_description", "logo_url", "paystack_subaccount_active",
+    "paystack_subaccount_code", "phone", "phone_verified", "storefront_announcement",
+    "storefront_address", "storefront_city", "storefront_state", "storefront_hours",
+)
+
+
+def storefront_tag(slug: str) -> str:
+    return f"storefront:{slug.lower()}"
+
+
+def etag_for(payload: dict[str, Any]) -> str:
+    raw = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha1(raw.encode()).hexdigest()[:20]
+
+
+def get_storefront(slug: str, build: Callable[[], dict[str, Any] | None]) -> dict[str, Any] | None:
+    """Cached ``{"owner_id", "etag", "payload"}`` for ``slug`` (None: no such store).
+
+    ``build`` returns ``{"owner_id", "payload"}`` or None; unknown slugs are
+    cached as well, so link scanners don't reach Postgres either.
+    """
+    slug = slug.lower()
+
+    def _produce() -> dict[str, Any]:
+        built = build()
+        if built is None:
+            return {"missing": True}
+        return {**built, "etag": etag_for(built["payload"])}
+
+    entry = get_or_compute(
+        tagged_key(f"storefront:payload:{slug}", storefront_tag(slug)),
+        settings.STOREFRONT_CACHE_TTL,
+        _produce,
+        namespace="storefront",
+    )
+    if not isinstance(entry, dict) or entry.get("missing"):
+        return None
+    return entry
+
+
+def _redis():
+    try:
+        from app.db.redis_client import get_redis_client
+
+        return get_redis_client()
+    except Exception:  # noqa: BLE001
+        return None
+
+
+def record_view(db: Session, owner_id: int) -> None:
+    """Count one storefront view (buffered in Redis; best-effort, never raises)."""
+    r = _redis()
+    if r is not None:
+        try:
+            r.hincrby(VIEWS_KEY, str(owner_id), 1)
+            return
+        except Exception:  # noqa: BLE001
+            logger.debug("Buffering storefront view failed; writing through", exc_info=True)
+    try:
+        db.execute(
+            update(User)
+            .where(User.id == owner_id)
+            .values(storefront_views=User.storefront_views + 1)
+        )
+        db.commit()
+    except Exception:  # noqa: BLE001
+        db.rollback()
+
+
+def flush_views(db: Session) -> int:
+    """Fold buffered view counts into ``user.storefront_views``; returns rows updated."""
+    r = _redis()
+    if r is None:
+        return 0
+    if not r.exists(VIEWS_FLUSHING_KEY):
+        try:
+            r.rename(VIEWS_KEY, VIEWS_FLUSHING_KEY)
+        except Exception:  # noqa: BLE001 — nothing buffered since the last flush
+            return 0
+    counts = r.hgetall(VIEWS_FLUSHING_KEY) or {}
+    params = [
+        {"uid": int(uid), "n": int(n)}
+        for uid, n in counts.items()
+        if str(uid).isdigit() and int(n) > 0
+    ]
+    if not params:
+        r.delete(VIEWS_FLUSHING_KEY)
+        return 0
+    handed_off = False
+    try:
+        db.connection().execute(
+            update(User.__table__)
+            .where(User.__table__.c.id == bindparam("uid"))
+            .values(storefront_views=User.__table__.c.storefront_views + bindparam("n")),
+            params,
+        )
+        # Drop the batch before committing: dying between the two loses it,
+        # whereas dropping after would let a retry add it a second time.
+        r.delete(VIEWS_FLUSHING_KEY)
+        handed_off = True
+        db.commit()
+    except Exception:
+        db.rollback()
+        if handed_off:
+            # Not committed after all: re-buffer for the next run.
+            pipe = r.pipeline()
+            for p in params:
+                pipe.hincrby(VIEWS_KEY, str(p["uid"]), p["n"])
+            pipe.execute()
+        raise
+    return len(params)
+
+
+# ── Invalidation on committed store changes ─────────────────────────
+
+
+def invalidate_storefronts(*slugs: str) -> None:
+    invalidate_tags(*(storefront_tag(s) for s in slugs))
+
+
+@event.listens_for(User, "after_update")
+def _user_updated(_mapper, _connection, target: User) -> None:
+    state = inspect(target)
+    if not any(state.attrs[f].history.has_changes() for f in _PAYLOAD_USER_FIELDS):
+        return
+    invalidate_on_commit(
+        target,
+        invalidate_storefronts,
+        state.dict.get("storefront_slug"),
+        *(state.attrs.storefront_slug.history.deleted or ()),
+    )
+
+
+@event.listens_for(User, "after_delete")
+def _user_deleted(_mapper, _connection, target: User) -> None:
+    invalidate_on_commit(target, invalidate_storefronts, inspect(target).dict.get("storefront_slug"))
+
+
+@event.listens_for(Product, "after_insert")
+@event.listens_for(Product, "after_update")
+@event.listens_for(Product, "after_delete")
+@event.listens_for(ProductCategory, "after_insert")
+@event.listens_for(ProductCategory, "after_update")
+@event.listens_for(ProductCategory, "after_delete")
+@event.listens_for(StorefrontReview, "after_insert")
+@event.listens_for(StorefrontReview, "after_update")
+@event.listens_for(StorefrontReview, "after_delete")
+def _store_row_changed(_mapper, _connection, target) -> None:
+    state = inspect(target)
+    if state.session is None:
+        return
+    owners = state.session.info.setdefault(_OWNERS_INFO_KEY, set())
+    owners.add(state.dict.get("user_id"))
+    owners.update(state.attrs.user_id.history.deleted or ())
+
+
+@event.listens_for(Session, "after_flush")
+def _resolve_owner_slugs(session: Session, _flush_context) -> None:
+    # One slug query per flush, however many products a bulk edit touched.
+    owners = {o for o in session.info.pop(_OWNERS_INFO_KEY, ()) if o is not None}
+    if not owners:
+        return
+    slugs = session.connection().execute(
+        select(User.storefront_slug).where(User.id.in_(owners))
+    ).scalars()
+    invalidate_on_commit(session, invalidate_storefronts, *slugs)
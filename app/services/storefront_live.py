@@ -0,0 +1,127 @@
+"""Materialised "live in search" flag for storefronts.
+
+A store is live — listed in ``/public/stores`` and counted by the admin
+"Live in search" metric — when it is opted in, active, has a slug, a logo, an
+active Paystack subaccount, a description, a state and at least one listable
+product. That gate used to be re-derived, with a DISTINCT subquery over every
+listable product, on each directory request and each admin metrics call.
+Instead ``user.storefront_live`` stores the answer (with a partial index on
+live slugs) and is recomputed in SQL for exactly the owners a flush touched:
+an ``after_flush`` hook watches the gate's user fields and the product fields
+of :func:`listable_product_conditions`, in the same transaction as the write.
+Core bulk statements bypass the hook, so ``maintenance.reconcile_storefront_live``
+re-evaluates every row periodically and repairs any drift.
+"""
+from __future__ import annotations
+
+import logging
+from collections.abc import Iterable
+
+from sqlalchemy import and_, case, event, select, update
+from sqlalchemy.orm import Session
+
+from app.db.flush_maintenance import changed, in_savepoint, old_and_new
+from app.models.inventory_models import Product
+from app.models.models import User
+
+logger = logging.getLogger(__name__)
+
+# User columns the gate reads.
+_USER_FIELDS = (
+    "storefront_enabled", "store_status", "storefront_slug", "logo_url",
+    "paystack_subaccount_active", "storefront_description", "storefront_state",
+)
+# Product columns listable_product_conditions() reads, plus the owner.
+_PRODUCT_FIELDS = ("is_active", "description", "image_url", "user_id")
+
+
+def listable_product_conditions() -> list:
+    """A product is publicly listable only when it's active AND has a description
+    AND a photo — the exact rule the store page uses to display items. The
+    directory + 'live in search' gate reuse this, so a store counted as live
+    always has at least one item a shopper can actually see and buy.
+    """
+    return [
+        Product.is_active.is_(True),
+        Product.description.isnot(None),
+        Product.description != "",
+        Product.image_url.isnot(None),
+        Product.image_url != "",
+    ]
+
+
+def live_condition():
+    """SQL truth value of the live gate for the ``user`` row in scope."""
+    has_listable = (
+        select(Product.id)
+        .where(Product.user_id == User.id, *listable_product_conditions())
+        .exists()
+    )
+    return and_(
+        User.storefront_enabled.is_(True),
+        User.store_status == "active",
+        User.storefront_slug.isnot(None),
+        User.logo_url.isnot(None),
+        User.paystack_subaccount_active.is_(True),
+        User.storefront_description.isnot(None),
+        User.storefront_description != "",
+        User.storefront_state.isnot(None),
+        User.storefront_state != "",
+        has_listable,
+    )
+
+
+def refresh_live_flags(connection, owner_ids: Iterable[int] | None = None) -> int:
+    """Recompute ``storefront_live`` (for ``owner_ids``, or everyone).
+
+    Only rows whose flag actually changes are written; returns how many.
+    """
+    # CASE so the comparison below is never NULL.
+    live = case((live_condition(), True), else_=False)
+    stmt = update(User).where(User.storefront_live != live).values(storefront_live=live)
+    if owner_ids is not None:
+        owner_ids = sorted(set(owner_ids))
+        if not owner_ids:
+            return 0
+        stmt = stmt.where(User.id.in_(owner_ids))
+    return connection.execute(stmt).rowcount or 0
+
+
+# ── Maintenance on flush ────────────────────────────────────────────
+
+
+def collect_owner_ids(session: Session) -> set[int]:
+    """Owners whose live flag a pending flush may change."""
+    owners: set = set()
+    for obj in session.new:
+        if isinstance(obj, User):
+            if obj.storefront_enabled:
+                owners.add(obj.id)
+        elif isinstance(obj, Product):
+            owners |= old_and_new(obj, "user_id")
+    for obj in session.dirty:
+        if isinstance(obj, User):
+            if changed(obj, _USER_FIELDS):
+                owners.add(obj.id)
+        elif isinstance(obj, Product) and changed(obj, _PRODUCT_FIELDS):
+            owners |= old_and_new(obj, "user_id")
+    for obj in session.deleted:
+        if isinstance(obj, Product):
+            owners |= old_and_new(obj, "user_id")
+    owners.discard(None)
+    return owners
+
+
+@event.listens_for(Session, "after_flush")
+def _track_live_flags(session: Session, flush_context) -> None:
+    # new/dirty/deleted and attribute history still show pre-flush state here.
+    owners = collect_owner_ids(session)
+    if not owners:
+        return
+    conn = session.connection()
+    in_savepoint(
+        conn,
+        lambda: refresh_live_flags(conn, owners),
+        target="storefront_live",
+        repair="reconcile_storefront_live",
+    )
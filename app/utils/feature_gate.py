@@ -402,6 +402,10 @@ def check_voice_ocr_quota(db: Session, user_id: int) -> None:
 def require_plan_feature(db: Session, user_id: int, feature_key: str, feature_name: str = None) -> None:
     """
     Check if user's plan has a specific feature.
+
+    Reads the cached request principal rather than loading the ``User``, so
+    it never commits a subscription downgrade (an expired plan simply counts
+    as FREE here).
     
     Args:
         db: Database session
@@ -412,17 +416,21 @@ def require_plan_feature(db: Session, user_id: int, feature_key: str, feature_na
     Raises:
         HTTPException: 403 if feature not available on user's plan
     """
-    gate = FeatureGate(db, user_id)
-    features = gate.user.effective_plan.features
-    
-    if not features.get(feature_key):
+    from app.services.principal import resolve_principal
+
+    principal = resolve_principal(db, user_id)
+    if principal is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    plan = principal.plan
+
+    if not plan.features.get(feature_key):
         feature_display = feature_name or feature_key.replace("_", " ").title()
         raise HTTPException(
             status_code=403,
             detail={
                 "error": "feature_not_available",
-                "message": f"{feature_display} is not available on your {gate.user.effective_plan.value} plan. Please upgrade.",
-                "current_plan": gate.user.effective_plan.value,
+                "message": f"{feature_display} is not available on your {plan.value} plan. Please upgrade.",
+                "current_plan": plan.value,
                 "required_feature": feature_key,
                 "upgrade_url": "/subscription/initialize"
             }
@@ -8,11 +8,22 @@ re-encodes it as WebP (a single, small format the browser handles) so uploads
 land as ~40–150 KB instead of megabytes. Falls back to returning the original
 bytes if Pillow can't open the file (e.g. SVG logos) — nothing is worse than a
 missing image.
+
+`prepare_for_ocr` is the matching step for receipt photos sent to the vision
+API (fit within the API's size limit, re-encode as JPEG).
+
+Both are CPU-bound Pillow work. Async code must not call them directly — it
+awaits the ``a``-prefixed twins, which run them on the media process pool
+(app/utils/media_executor.py) so a 12MP phone photo doesn't stall the event
+loop. JPEGs are decoded in draft mode: libjpeg scales by 1/2, 1/4 or 1/8 while
+decoding, so a photo headed for a 1080px card never materialises at full size.
 """
 from __future__ import annotations
 
+import asyncio
 import io
 import logging
+from collections.abc import Sequence
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +35,21 @@ _WEBP_QUALITY = 80
 # OOM the worker. ~24MP covers legitimate DSLR photos with a wide margin; Pillow
 # raises DecompressionBombError above this and we fall back to the original bytes.
 _MAX_IMAGE_PIXELS = 24_000_000
+_OCR_JPEG_QUALITY = 85
+
+
+def _draft(img, box: tuple[int, int]) -> None:
+    """Let the JPEG decoder downscale while decoding, never below the thumbnail.
+
+    Must run before anything loads the pixels (convert, exif_transpose). A
+    no-op for other formats.
+    """
+    if img.format != "JPEG":
+        return
+    width, height = img.size
+    scale = min(box[0] / width, box[1] / height)
+    if scale < 1:
+        img.draft(None, (max(1, int(width * scale)), max(1, int(height * scale))))
 
 
 def optimize_for_storefront(
@@ -55,6 +81,8 @@ def optimize_for_storefront(
 
     try:
         img = Image.open(io.BytesIO(content))
+        # Square box, so EXIF rotation below can't change the needed size.
+        _draft(img, (max_side, max_side))
         # Respect EXIF orientation (phones upload sideways otherwise).
         img = ImageOps.exif_transpose(img)
         # Downscale ONLY (LANCZOS keeps text/logos crisp); never upscale.
@@ -69,3 +97,85 @@ def optimize_for_storefront(
     except Exception as exc:  # noqa: BLE001
         logger.warning("Image optimization failed (%s); serving original", exc)
         return content, content_type
+
+
+def prepare_for_ocr(content: bytes, max_size: tuple[int, int]) -> bytes | None:
+    """RGB JPEG of ``content`` fitting ``max_size`` for the vision API, or None if unreadable."""
+    from PIL import Image
+
+    try:
+        img = Image.open(io.BytesIO(content))
+        _draft(img, max_size)
+
+        # Convert to RGB if needed (handles RGBA, grayscale, etc.)
+        if img.mode != "RGB":
+            img = img.convert("RGB")
+
+        # Resize if too large (API limits)
+        if img.size[0] > max_size[0] or img.size[1] > max_size[1]:
+            img.thumbnail(max_size, Image.Resampling.LANCZOS)
+            logger.info("Resized image to %s to fit %s", img.size, max_size)
+
+        output = io.BytesIO()
+        img.save(output, format="JPEG", quality=_OCR_JPEG_QUALITY)
+        return output.getvalue()
+    except Exception as exc:  # noqa: BLE001
+        # User-provided invalid image - log as warning to avoid Sentry noise
+        logger.warning("Image preprocessing failed: %s", exc)
+        return None
+
+
+# ── Async API (runs on the media pool) ──────────────────────────────
+
+
+async def aoptimize_for_storefront(
+    content: bytes,
+    content_type: str,
+    *,
+    max_side: int = _MAX_SIDE_PX,
+    quality: int = _WEBP_QUALITY,
+) -> tuple[bytes, str]:
+    """:func:`optimize_for_storefront` off the event loop.
+
+    Like the sync version it never breaks an upload: oversized input, a
+    timeout or a crashed worker all fall back to the original bytes.
+    """
+    from app.utils.media_executor import MediaProcessingError, check_input_size, run_media
+
+    try:
+        check_input_size(content)
+        return await run_media(
+            optimize_for_storefront, content, content_type, max_side=max_side, quality=quality
+        )
+    except MediaProcessingError as exc:
+        logger.warning("Image optimization skipped (%s); serving original", exc)
+        return content, content_type
+
+
+async def aoptimize_many(
+    images: Sequence[tuple[bytes, str]],
+    *,
+    max_side: int = _MAX_SIDE_PX,
+    quality: int = _WEBP_QUALITY,
+) -> list[tuple[bytes, str]]:
+    """Optimise several ``(content, content_type)`` images in parallel, in order."""
+    return list(
+        await asyncio.gather(
+            *(
+                aoptimize_for_storefront(content, content_type, max_side=max_side, quality=quality)
+                for content, content_type in images
+            )
+        )
+    )
+
+
+async def aprepare_for_ocr(content: bytes, max_size: tuple[int, int]) -> bytes | None:
+    """:func:`prepare_for_ocr` off the event loop.
+
+    Raises :class:`~app.utils.media_executor.MediaProcessingError` when the
+    input is too large or processing times out.
+    """
+    from app.utils.media_executor import check_input_size, run_media
+
+    check_input_size(content)
+    return await run_media(prepare_for_ocr, content, max_size)
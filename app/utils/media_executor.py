@@ -0,0 +1,140 @@
+"""Bounded process pool for CPU-bound media work (Pillow decode/resize/encode).
+
+Async handlers await :func:`run_media` instead of calling Pillow inline, so a
+large phone photo no longer blocks the event loop (and, because it is a
+separate process, no longer holds the GIL either).
+
+- The pool has ``MEDIA_POOL_WORKERS`` processes, started with ``spawn`` (the
+  API and Celery processes are threaded, which makes ``fork`` unsafe). Each
+  child is replaced after ``MEDIA_MAX_TASKS_PER_CHILD`` jobs, so a Pillow leak
+  can't grow forever. The pool is rebuilt in a forked child (Celery prefork).
+- Jobs are bounded: inputs above ``MEDIA_MAX_INPUT_BYTES`` are refused up
+  front, and a job still running after ``MEDIA_TASK_TIMEOUT`` seconds raises
+  :class:`MediaProcessingError`. Its pool's processes are killed (a process
+  pool can't cancel one running job); other jobs still on that pool fail the
+  same way, and the next call starts a fresh pool.
+- With ``MEDIA_POOL_WORKERS = 0``, inside a daemonic process (a Celery
+  prefork child may not have children of its own), or if no process can be
+  started, jobs run on a thread instead. That keeps the event loop free but
+  not the GIL. A pool that failed to start is dropped, never reused.
+
+Job functions must be module-level (picklable), and their arguments and
+results must be plain data such as bytes, str or tuples.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, TypeVar
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_lock = threading.Lock()
+_pool: ProcessPoolExecutor | None = None
+_pool_pid: int | None = None
+
+
+class MediaProcessingError(Exception):
+    """A media job was refused (too large), timed out, or lost its worker."""
+
+
+def check_input_size(content: bytes) -> None:
+    """Refuse inputs over ``MEDIA_MAX_INPUT_BYTES`` before paying to ship them to a worker."""
+    if len(content) > settings.MEDIA_MAX_INPUT_BYTES:
+        raise MediaProcessingError(
+            f"input of {len(content)} bytes exceeds {settings.MEDIA_MAX_INPUT_BYTES}"
+        )
+
+
+def _is_daemon() -> bool:
+    """True inside a daemonic process (e.g. a Celery prefork child), which can't fork workers."""
+    if multiprocessing.current_process().daemon:
+        return True
+    try:
+        import billiard  # Celery's multiprocessing fork
+    except ImportError:
+        return False
+    return bool(billiard.current_process().daemon)
+
+
+def _get_pool() -> ProcessPoolExecutor | None:
+    global _pool, _pool_pid
+    if settings.MEDIA_POOL_WORKERS <= 0 or _is_daemon():
+        return None
+    if _pool is not None and _pool_pid == os.getpid():
+        return _pool
+    with _lock:
+        if _pool is None or _pool_pid != os.getpid():
+            # An executor inherited across fork belongs to the parent; don't touch it.
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.MEDIA_POOL_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+                max_tasks_per_child=settings.MEDIA_MAX_TASKS_PER_CHILD or None,
+            )
+            _pool_pid = os.getpid()
+    return _pool
+
+
+def _discard_pool(pool: ProcessPoolExecutor, *, kill: bool = False) -> None:
+    """Stop handing out ``pool``; with ``kill``, terminate its (possibly stuck) workers."""
+    global _pool, _pool_pid
+    with _lock:
+        if _pool is pool:
+            _pool = None
+            _pool_pid = None
+    try:
+        if kill:
+            for process in list((getattr(pool, "_processes", None) or {}).values()):
+                process.terminate()
+        pool.shutdown(wait=False, cancel_futures=True)
+    except Exception:  # noqa: BLE001 — a half-started pool may not shut down cleanly
+        logger.debug("Discarding media pool failed", exc_info=True)
+
+
+async def run_media(fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run ``fn(*args, **kwargs)`` on the media pool and await its result.
+
+    Raises :class:`MediaProcessingError` on timeout or when the worker dies.
+    Exceptions raised by ``fn`` itself propagate unchanged.
+    """
+    timeout = settings.MEDIA_TASK_TIMEOUT
+    pool = _get_pool()
+    future = None
+    if pool is not None:
+        try:
+            future = pool.submit(fn, *args, **kwargs)
+        except (AssertionError, BrokenProcessPool, OSError, RuntimeError) as exc:
+            # AssertionError: multiprocessing refusing to start children here.
+            logger.warning("Media pool unavailable (%s); running on a thread", exc)
+            _discard_pool(pool)
+    try:
+        if future is None:
+            return await asyncio.wait_for(asyncio.to_thread(fn, *args, **kwargs), timeout)
+        return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+    except asyncio.TimeoutError:
+        if pool is not None and future is not None:
+            _discard_pool(pool, kill=True)
+        raise MediaProcessingError(f"{fn.__name__} exceeded {timeout}s") from None
+    except BrokenProcessPool as exc:
+        _discard_pool(pool)  # type: ignore[arg-type]
+        raise MediaProcessingError(f"media worker died running {fn.__name__}") from exc
+
+
+def shutdown_media_pool() -> None:
+    """Stop the pool's workers. Called on app and Celery worker-process shutdown."""
+    global _pool, _pool_pid
+    with _lock:
+        pool, pid = _pool, _pool_pid
+        _pool, _pool_pid = None, None
+    if pool is not None and pid == os.getpid():
+        pool.shutdown(wait=False, cancel_futures=True)
@@ -6,6 +6,14 @@ utility conversation in Nigeria. Without a cap, 50K users could
 generate $13K+/month in WhatsApp costs alone.
 
 Budget is tracked in Redis with a daily key that auto-expires.
+
+Every sender reserves a send just before making it, with
+:class:`BudgetReservation` (or :func:`reserve_whatsapp_sends`): a Lua script
+checks and increments the counter atomically, so concurrent fan-out tasks
+can't all see "under budget" and overshoot the cap, and a send that isn't
+made is handed back on exit. Reserving a whole batch up front would hold
+budget other tasks need for as long as the batch runs, and lose it outright
+if the worker died mid-batch.
 """
 from __future__ import annotations
 
@@ -26,85 +34,192 @@ PRIORITY_DAILY_BUDGET = 100
 
 _BUDGET_KEY = "wa:budget:{date}"
 _PRIORITY_KEY = "wa:priority:{date}"
+_KEY_TTL = 90000  # 25 hours — auto-cleanup
+
+# KEYS[1]=counter ARGV: n, limit, ttl, partial(0/1). Returns granted count.
+_RESERVE_LUA = """
+local used = tonumber(redis.call('GET', KEYS[1]) or '0')
+local n = tonumber(ARGV[1])
+local free = tonumber(ARGV[2]) - used
+if free < 0 then free = 0 end
+local grant = n
+if grant > free then
+  if ARGV[4] == '1' then grant = free else grant = 0 end
+end
+if grant > 0 then
+  redis.call('INCRBY', KEYS[1], grant)
+  redis.call('EXPIRE', KEYS[1], tonumber(ARGV[3]))
+end
+return grant
+"""
+
+# KEYS[1]=counter ARGV: n. Never drops the counter below zero.
+_RELEASE_LUA = """
+local used = tonumber(redis.call('GET', KEYS[1]) or '0')
+local n = math.min(tonumber(ARGV[1]), used)
+if n > 0 then redis.call('DECRBY', KEYS[1], n) end
+return used - n
+"""
 
 
 def _get_budget_limit() -> int:
     return int(getattr(settings, "WHATSAPP_DAILY_BUDGET", DEFAULT_DAILY_BUDGET))
 
 
+def _today() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d")
+
+
 def _get_today_key(prefix: str) -> str:
-    return prefix.format(date=datetime.now(timezone.utc).strftime("%Y-%m-%d"))
+    return prefix.format(date=_today())
+
+
+def _key_and_limit(priority: bool, day: str | None = None) -> tuple[str, int]:
+    day = day or _today()
+    if priority:
+        return _PRIORITY_KEY.format(date=day), PRIORITY_DAILY_BUDGET
+    return _BUDGET_KEY.format(date=day), _get_budget_limit()
 
 
-def can_send_whatsapp(priority: bool = False) -> bool:
-    """Check if we're within today's WhatsApp budget.
+def _reserve_fallback(r, key: str, n: int, limit: int, partial: bool) -> int:
+    """INCRBY-then-rollback for servers without scripting."""
+    pipe = r.pipeline()
+    pipe.incrby(key, n)
+    pipe.expire(key, _KEY_TTL)
+    free = max(0, limit - (int(pipe.execute()[0]) - n))
+    grant = min(n, free) if partial else (n if n <= free else 0)
+    if grant < n:
+        r.decrby(key, n - grant)
+    return grant
 
-    Args:
-        priority: True for high-value messages (payment alerts,
-                  confirmations). These use a separate counter.
 
-    Returns True if under the daily cap.
+def reserve_whatsapp_sends(
+    n: int = 1, priority: bool = False, *, partial: bool = True, day: str | None = None
+) -> int:
+    """Atomically reserve up to ``n`` sends from the budget of ``day`` (UTC, default today).
+
+    Returns how many were granted: ``min(n, remaining)`` when ``partial``,
+    otherwise ``n`` or 0. Reserved sends count as used until given back with
+    :func:`release_whatsapp_sends`. Fails open (grants ``n``) if Redis is down.
     """
+    if n <= 0:
+        return 0
     try:
+        from redis.exceptions import ResponseError
+
         from app.db.redis_client import get_redis_client
         r = get_redis_client()
 
-        if priority:
-            key = _get_today_key(_PRIORITY_KEY)
-            limit = PRIORITY_DAILY_BUDGET
-        else:
-            key = _get_today_key(_BUDGET_KEY)
-            limit = _get_budget_limit()
-
-        current = int(r.get(key) or 0)
-        return current < limit
+        key, limit = _key_and_limit(priority, day)
+        try:
+            return int(r.eval(_RESERVE_LUA, 1, key, n, limit, _KEY_TTL, "1" if partial else "0"))
+        except ResponseError:
+            return _reserve_fallback(r, key, n, limit, partial)
     except Exception:
-        # If Redis is down, allow sends (fail open)
-        return True
+        logger.debug("WhatsApp budget reservation failed; allowing sends", exc_info=True)
+        return n
 
 
-def record_whatsapp_send(priority: bool = False) -> int:
-    """Record a WhatsApp send against today's budget.
+def release_whatsapp_sends(n: int, priority: bool = False, *, day: str | None = None) -> None:
+    """Give back ``n`` reserved-but-unsent messages to the budget of ``day``.
 
-    Returns the new count for today.
+    Pass the ``day`` the sends were reserved against (as
+    :class:`BudgetReservation` does); otherwise a release after midnight would
+    come off the next day's counter.
     """
+    if n <= 0:
+        return
     try:
+        from redis.exceptions import ResponseError
+
         from app.db.redis_client import get_redis_client
         r = get_redis_client()
 
-        if priority:
-            key = _get_today_key(_PRIORITY_KEY)
-        else:
-            key = _get_today_key(_BUDGET_KEY)
+        key, _ = _key_and_limit(priority, day)
+        try:
+            r.eval(_RELEASE_LUA, 1, key, n)
+        except ResponseError:
+            if int(r.decrby(key, n)) < 0:
+                r.set(key, 0, ex=_KEY_TTL)
+    except Exception:
+        logger.debug("WhatsApp budget release failed", exc_info=True)
+
+
+def remaining_whatsapp_budget(priority: bool = False) -> int:
+    """Sends left today for the given priority class (the full cap if Redis is down)."""
+    key, limit = _key_and_limit(priority)
+    try:
+        from app.db.redis_client import get_redis_client
+        r = get_redis_client()
 
-        pipe = r.pipeline()
-        pipe.incr(key)
-        pipe.expire(key, 90000)  # 25 hours — auto-cleanup
-        result = pipe.execute()
-        return result[0]
+        return max(0, limit - int(r.get(key) or 0))
     except Exception:
-        return 0
+        return limit
+
+
+class BudgetReservation:
+    """Reserve sends for the block; unused ones are released on exit.
+
+    Usage, one reservation per send::
+
+        for phone in recipients:
+            with BudgetReservation(1, priority=True) as budget:
+                if not budget.available:
+                    break
+                if client.send_text(phone, msg):
+                    budget.spend()
+    """
+
+    def __init__(self, n: int, priority: bool = False):
+        self.requested = n
+        self.priority = priority
+        self.granted = 0
+        self.spent = 0
+        self.day: str | None = None
+
+    def __enter__(self) -> BudgetReservation:
+        # Pin the day: a release after midnight must return budget to the
+        # counter it came from, not take it off tomorrow's.
+        self.day = _today()
+        self.granted = reserve_whatsapp_sends(self.requested, self.priority, day=self.day)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
+
+    @property
+    def available(self) -> bool:
+        return self.spent < self.granted
+
+    def spend(self) -> None:
+        self.spent += 1
+
+    def release(self) -> None:
+        unused = self.granted - self.spent
+        if unused > 0:
+            release_whatsapp_sends(unused, self.priority, day=self.day)
+        self.granted = self.spent
 
 
 def get_budget_status() -> dict:
     """Get current budget usage (for admin dashboard)."""
+    marketing_limit = _get_budget_limit()
     try:
         from app.db.redis_client import get_redis_client
         r = get_redis_client()
 
-        marketing_key = _get_today_key(_BUDGET_KEY)
-        priority_key = _get_today_key(_PRIORITY_KEY)
-
-        return {
-            "marketing_used": int(r.get(marketing_key) or 0),
-            "marketing_limit": _get_budget_limit(),
-            "priority_used": int(r.get(priority_key) or 0),
-            "priority_limit": PRIORITY_DAILY_BUDGET,
-        }
+        marketing_raw, priority_raw = r.mget(
+            [_get_today_key(_BUDGET_KEY), _get_today_key(_PRIORITY_KEY)]
+        )
+        marketing_used = int(marketing_raw or 0)
+        priority_used = int(priority_raw or 0)
     except Exception:
-        return {
-            "marketing_used": 0,
-            "marketing_limit": _get_budget_limit(),
-            "priority_used": 0,
-            "priority_limit": PRIORITY_DAILY_BUDGET,
-        }
+        marketing_used = priority_used = 0
+    return {
+        "marketing_used": marketing_used,
+        "marketing_limit": marketing_limit,
+        "marketing_remaining": max(0, marketing_limit - marketing_used),
+        "priority_used": priority_used,
+        "priority_limit": PRIORITY_DAILY_BUDGET,
+        "priority_remaining": max(0, PRIORITY_DAILY_BUDGET - priority_used),
+    }
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from celery import Celery
 from celery.schedules import crontab
+from celery.signals import worker_process_shutdown
 
 from app.core.config import settings
 from app.core.redis_utils import get_ssl_options, prepare_redis_url
@@ -102,6 +103,26 @@ def _create_celery() -> Celery:
                 "task": "maintenance.cleanup_old_logs",
                 "schedule": crontab(minute=30, hour=3, day_of_week=0),  # Sun 03:30 UTC
             },
+            "flush-storefront-views": {
+                "task": "maintenance.flush_storefront_views",
+                "schedule": crontab(minute="*"),  # every minute — buffered store view counts
+            },
+            "nightly-invoice-rollup-reconcile": {
+                "task": "maintenance.rebuild_invoice_rollup",
+                "schedule": crontab(minute=15, hour=0),  # 00:15 UTC — last 2 days
+            },
+            "reconcile-storefront-live": {
+                "task": "maintenance.reconcile_storefront_live",
+                "schedule": crontab(minute="*/30"),  # every 30 min — live-store flag drift
+            },
+            "nightly-search-documents-reconcile": {
+                "task": "maintenance.rebuild_search_documents",
+                "schedule": crontab(minute=45, hour=0),  # 00:45 UTC — store search index
+            },
+            "weekly-audit-chain-verify": {
+                "task": "maintenance.verify_audit_chain_full",
+                "schedule": crontab(minute=0, hour=4, day_of_week=0),  # Sun 04:00 UTC
+            },
             "weekly-warn-inactive-accounts": {
                 "task": "maintenance.warn_inactive_accounts",
                 "schedule": crontab(minute=0, hour=4, day_of_week=1),  # Mon 04:00 UTC
@@ -143,3 +164,35 @@ def _create_celery() -> Celery:
 
 
 celery_app = _create_celery()
+
+
+@worker_process_shutdown.connect
+def _flush_audit_on_shutdown(**_kwargs) -> None:
+    """Drain queued audit events before a worker process exits."""
+    from app.core.audit import flush_audit_log
+
+    flush_audit_log()
+
+
+@worker_process_shutdown.connect
+def _close_whatsapp_transport(**_kwargs) -> None:
+    """Close pooled WhatsApp API connections before a worker process exits."""
+    from app.bot.whatsapp_transport import close_transport
+
+    close_transport()
+
+
+@worker_process_shutdown.connect
+def _close_inbound_loop(**_kwargs) -> None:
+    """Close the persistent inbound event loop before a worker process exits."""
+    from app.workers.inbound_runtime import shutdown
+
+    shutdown()
+
+
+@worker_process_shutdown.connect
+def _shutdown_media_pool(**_kwargs) -> None:
+    """Stop the media processing pool before a worker process exits."""
+    from app.utils.media_executor import shutdown_media_pool
+
+    shutdown_media_pool()
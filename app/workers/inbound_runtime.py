@@ -0,0 +1,188 @@
+"""Long-lived execution context for inbound WhatsApp processing.
+
+``process_whatsapp_inbound`` used to build an ``NLPService``, call
+``asyncio.run`` (a fresh event loop per message) and force ``gc.collect()``
+after every message. This module keeps, per worker thread, one event loop
+that lives as long as the process, and per process the stateless
+collaborators (``NLPService``, the pooled WhatsApp client) — only the DB
+session and the ``WhatsAppHandler`` bound to it are per message.
+
+Messages from the same sender are serialised so two workers never
+interleave one conversation's state: a thread lock per sender within the
+process, then a Redis lease (``inbound:sender:<phone>``) across processes and
+hosts. If Redis is unreachable only the in-process lock applies. If the lease
+isn't free within ``WHATSAPP_SENDER_LOCK_WAIT`` seconds the message is
+processed anyway, since a stuck lock is worse than an overlap. The lease
+expires after ``WHATSAPP_SENDER_LOCK_TTL`` seconds so a killed worker can't
+hold it. With the default prefork pool each process handles one message at a
+time; run the worker with
+``--pool threads --concurrency N`` (see ``WHATSAPP_INBOUND_*`` settings) to
+process N senders concurrently in one process, each thread on its own loop.
+"""
+from __future__ import annotations
+
+import asyncio
+import gc
+import logging
+import os
+import threading
+import time
+import uuid
+import weakref
+from collections.abc import Coroutine
+from contextlib import contextmanager
+from typing import Any, Iterator, TypeVar
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_local = threading.local()
+_lock = threading.Lock()
+_SENDER_KEY = "inbound:sender:"
+_sender_locks: weakref.WeakValueDictionary[str, threading.Lock] = weakref.WeakValueDictionary()
+_nlp: Any = None
+_processed = 0
+
+
+def _loop() -> asyncio.AbstractEventLoop:
+    """This thread's persistent event loop (recreated after fork or close)."""
+    loop = getattr(_local, "loop", None)
+    if loop is None or loop.is_closed() or getattr(_local, "pid", None) != os.getpid():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        _local.loop, _local.pid = loop, os.getpid()
+    return loop
+
+
+async def _close_loop_clients() -> None:
+    """Close the pooled HTTP clients bound to the running loop."""
+    from app.bot.whatsapp_transport import aclose_transport
+    from app.services.openai_client import aclose_client
+
+    await aclose_transport()
+    await aclose_client()
+
+
+async def _then_close_clients(coro: Coroutine[Any, Any, T]) -> T:
+    try:
+        return await coro
+    finally:
+        await _close_loop_clients()
+
+
+def run(coro: Coroutine[Any, Any, T]) -> T:
+    """Run ``coro`` to completion on this thread's persistent loop.
+
+    Also the entry point for other Celery tasks that drive async services, so
+    their per-loop HTTP pools are reused instead of leaked with a
+    throwaway loop. With the persistent loop disabled, each call's pools are
+    closed before its loop is.
+    """
+    if not settings.WHATSAPP_INBOUND_PERSISTENT_LOOP:
+        return asyncio.run(_then_close_clients(coro))
+    return _loop().run_until_complete(coro)
+
+
+def get_nlp() -> Any:
+    """Process-wide ``NLPService`` (stateless: compiled patterns only)."""
+    global _nlp
+    if _nlp is None:
+        from app.bot.nlp_service import NLPService
+
+        _nlp = NLPService()
+    return _nlp
+
+
+def _acquire_shared(sender: str) -> tuple[Any, str] | None:
+    """Claim the cross-process lease for ``sender``: ``(client, token)`` or None.
+
+    A plain ``SET NX EX`` lease (no Lua, like the cache's recompute leases).
+    None when Redis is unreachable or the wait ran out.
+    """
+    try:
+        from app.db.redis_client import get_redis_client
+
+        client = get_redis_client()
+        key, token = _SENDER_KEY + sender, uuid.uuid4().hex
+        deadline = time.monotonic() + settings.WHATSAPP_SENDER_LOCK_WAIT
+        delay = 0.01
+        while not client.set(key, token, nx=True, ex=settings.WHATSAPP_SENDER_LOCK_TTL):
+            if time.monotonic() >= deadline:
+                logger.warning("Sender lock for %s still held after %ss; processing anyway",
+                               sender, settings.WHATSAPP_SENDER_LOCK_WAIT)
+                return None
+            time.sleep(delay)
+            delay = min(delay * 2, 0.25)
+        return client, token
+    except Exception:  # noqa: BLE001
+        logger.warning("Redis sender lock unavailable; serialising in-process only", exc_info=True)
+        return None
+
+
+def _release_shared(sender: str, client: Any, token: str) -> None:
+    key = _SENDER_KEY + sender
+    try:
+        # Only delete our own lease; after expiry another worker may hold it.
+        if client.get(key) == token:
+            client.delete(key)
+    except Exception:  # noqa: BLE001 — it expires on its own
+        logger.debug("Releasing sender lock for %s failed", sender, exc_info=True)
+
+
+@contextmanager
+def sender_lock(sender: str | None) -> Iterator[None]:
+    """Serialise work for ``sender`` across threads, processes and hosts."""
+    if not sender:
+        yield
+        return
+    with _lock:
+        lock = _sender_locks.get(sender)
+        if lock is None:
+            lock = threading.Lock()
+            _sender_locks[sender] = lock
+    with lock:
+        shared = _acquire_shared(sender)
+        try:
+            yield
+        finally:
+            if shared is not None:
+                _release_shared(sender, *shared)
+
+
+def payload_sender(payload: dict[str, Any]) -> str | None:
+    """Sender of a single-message webhook payload, without full extraction."""
+    try:
+        return payload["entry"][0]["changes"][0]["value"]["messages"][0].get("from")
+    except (KeyError, IndexError, TypeError, AttributeError):
+        return payload.get("from") if isinstance(payload, dict) else None
+
+
+def after_message() -> None:
+    """Periodic (instead of per-message) full collection to bound RSS."""
+    global _processed
+    every = settings.WHATSAPP_INBOUND_GC_EVERY
+    if every <= 0:
+        return
+    with _lock:
+        _processed += 1
+        due = _processed % every == 0
+    if due:
+        gc.collect()
+
+
+def shutdown() -> None:
+    """Close this thread's loop. Called on worker-process shutdown."""
+    loop = getattr(_local, "loop", None)
+    if loop is None or loop.is_closed():
+        return
+    try:
+        loop.run_until_complete(_close_loop_clients())
+        loop.run_until_complete(loop.shutdown_asyncgens())
+    except Exception:  # noqa: BLE001
+        logger.debug("inbound loop shutdown failed", exc_info=True)
+    finally:
+        loop.close()
+        _local.loop = None
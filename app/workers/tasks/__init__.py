@@ -33,6 +33,11 @@ from .maintenance_tasks import (
     cleanup_stale_webhooks,
     delete_inactive_accounts,
     downgrade_expired_subscriptions,
+    flush_storefront_views,
+    rebuild_invoice_rollup,
+    rebuild_search_documents,
+    reconcile_storefront_live,
+    verify_audit_chain_full,
     warn_inactive_accounts,
 )
 from .growth_tasks import (
@@ -54,6 +59,8 @@ from .escrow_tasks import (
 from .messaging_tasks import (
     ocr_parse_image,
     process_whatsapp_inbound,
+    process_whatsapp_statuses,
+    resume_whatsapp_inbound,
     send_customer_payment_reminders,
     send_daily_summaries,
     send_overdue_reminders,
@@ -76,6 +83,8 @@ __all__ = [
     "generate_receipt_pdf_async",
     # Messaging tasks
     "process_whatsapp_inbound",
+    "process_whatsapp_statuses",
+    "resume_whatsapp_inbound",
     "send_overdue_reminders",
     "send_customer_payment_reminders",
     "send_daily_summaries",
@@ -102,8 +111,13 @@ __all__ = [
     # Maintenance
     "downgrade_expired_subscriptions",
     "cleanup_stale_webhooks",
+    "flush_storefront_views",
     "warn_inactive_accounts",
     "delete_inactive_accounts",
+    "verify_audit_chain_full",
+    "rebuild_invoice_rollup",
+    "rebuild_search_documents",
+    "reconcile_storefront_live",
     # Growth tasks
     "send_aggregate_unpaid_alerts",
     "send_weekly_free_summary",
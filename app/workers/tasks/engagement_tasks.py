@@ -150,41 +150,42 @@ def _send_wa_template(
     if _was_sent(db, user_id, wa_type):
         return False
 
-    # Check daily WhatsApp budget before sending
-    from app.utils.whatsapp_budget import can_send_whatsapp, record_whatsapp_send
-    if not can_send_whatsapp(priority=priority):
-        logger.debug("WhatsApp daily budget exceeded, skipping %s for user %s", wa_type, user_id)
-        return False
-
-    try:
-        from app.core.whatsapp import get_whatsapp_client
-
-        client = get_whatsapp_client()
-        lang = settings.WHATSAPP_TEMPLATE_LANGUAGE or "en"
-        components = (
-            [
-                {
-                    "type": "body",
-                    "parameters": [{"type": "text", "text": p} for p in params],
-                }
-            ]
-            if params
-            else None
-        )
+    # Reserve from the daily WhatsApp budget before sending
+    from app.utils.whatsapp_budget import BudgetReservation
+    with BudgetReservation(1, priority=priority) as budget:
+        if not budget.available:
+            logger.debug("WhatsApp daily budget exceeded, skipping %s for user %s", wa_type, user_id)
+            return False
+
+        try:
+            from app.core.whatsapp import get_whatsapp_client
+
+            client = get_whatsapp_client()
+            lang = settings.WHATSAPP_TEMPLATE_LANGUAGE or "en"
+            components = (
+                [
+                    {
+                        "type": "body",
+                        "parameters": [{"type": "text", "text": p} for p in params],
+                    }
+                ]
+                if params
+                else None
+            )
 
-        ok = client.send_template(phone, template_name, lang, components)
-        if ok:
-            _record_sent(db, user_id, wa_type)
-            record_whatsapp_send(priority=priority)
-        return ok
-    except Exception as e:
-        logger.warning(
-            "WhatsApp template '%s' failed for user %s: %s",
-            template_name,
-            user_id,
-            e,
-        )
-        return False
+            ok = client.send_template(phone, template_name, lang, components)
+            if ok:
+                _record_sent(db, user_id, wa_type)
+                budget.spend()
+            return ok
+        except Exception as e:
+            logger.warning(
+                "WhatsApp template '%s' failed for user %s: %s",
+                template_name,
+                user_id,
+                e,
+            )
+            return False
 
 
 # ── Main scheduled task ──────────────────────────────────────────────
@@ -548,20 +549,23 @@ def _send_zero_invoice_nudge(db, user, name: str, day: int, stats: dict[str, int
 
     # WhatsApp: only if no email (save budget) and within daily cap
     if user.phone and not sent:
-        from app.utils.whatsapp_budget import can_send_whatsapp, record_whatsapp_send
+        from app.utils.whatsapp_budget import BudgetReservation
         wa_sent = False
-        if can_send_whatsapp() and is_window_open(user.phone):
-            try:
-                from app.core.whatsapp import get_whatsapp_client
-                client = get_whatsapp_client()
-                if client.send_text(user.phone, wa_message):
-                    record_whatsapp_send()
-                    wa_sent = True
-            except Exception as e:
-                logger.warning("Day %d WhatsApp nudge failed for user %s: %s", day, user.id, e)
+        if is_window_open(user.phone):
+            with BudgetReservation(1) as budget:
+                if budget.available:
+                    try:
+                        from app.core.whatsapp import get_whatsapp_client
+                        client = get_whatsapp_client()
+                        if client.send_text(user.phone, wa_message):
+                            budget.spend()
+                            wa_sent = True
+                    except Exception as e:
+                        logger.warning("Day %d WhatsApp nudge failed for user %s: %s", day, user.id, e)
 
-        # Fall back to win_back_reminder template (outside 24h window)
-        if not wa_sent and can_send_whatsapp():
+        # Fall back to win_back_reminder template (outside 24h window);
+        # _send_wa_template reserves its own budget.
+        if not wa_sent:
             win_back_tpl = getattr(settings, "WHATSAPP_TEMPLATE_WIN_BACK", None)
             if win_back_tpl:
                 if _send_wa_template(
@@ -19,6 +19,7 @@ from typing import Any
 from celery import Task
 from sqlalchemy import func
 
+from app.bot import conversation_state
 from app.core.config import settings
 from app.workers.celery_app import celery_app
 from app.workers.tasks.messaging_tasks import session_scope
@@ -43,7 +44,7 @@ def mark_feedback_pending(phone: str) -> None:
     try:
         from app.db.redis_client import get_redis_client
         r = get_redis_client()
-        r.setex(f"{_FEEDBACK_PENDING_PREFIX}{phone}", _FEEDBACK_TTL, "1")
+        conversation_state.write(r, f"{_FEEDBACK_PENDING_PREFIX}{phone}", _FEEDBACK_TTL, "1")
     except Exception:
         logger.debug("Failed to mark feedback pending for %s", phone)
 
@@ -53,7 +54,7 @@ def is_feedback_pending(phone: str) -> bool:
     try:
         from app.db.redis_client import get_redis_client
         r = get_redis_client()
-        return bool(r.get(f"{_FEEDBACK_PENDING_PREFIX}{phone}"))
+        return bool(conversation_state.read(r, f"{_FEEDBACK_PENDING_PREFIX}{phone}"))
     except Exception:
         return False
 
@@ -63,7 +64,7 @@ def clear_feedback_pending(phone: str) -> None:
     try:
         from app.db.redis_client import get_redis_client
         r = get_redis_client()
-        r.delete(f"{_FEEDBACK_PENDING_PREFIX}{phone}")
+        conversation_state.remove(r, f"{_FEEDBACK_PENDING_PREFIX}{phone}")
     except Exception:
         pass
 
@@ -177,24 +178,25 @@ def collect_user_feedback() -> dict[str, Any]:
                     if has_phone:
                         try:
                             from app.core.whatsapp import get_whatsapp_client
-                            from app.utils.whatsapp_budget import can_send_whatsapp, record_whatsapp_send
+                            from app.utils.whatsapp_budget import BudgetReservation
                             template_name = getattr(settings, "WHATSAPP_TEMPLATE_FEEDBACK", None)
-                            if template_name and can_send_whatsapp(priority=False):
-                                client = get_whatsapp_client()
-                                lang = settings.WHATSAPP_TEMPLATE_LANGUAGE or "en"
-                                components = [{
-                                    "type": "body",
-                                    "parameters": [
-                                        {"type": "text", "text": name},
-                                        {"type": "text", "text": str(invoice_count)},
-                                    ],
-                                }]
-                                if client.send_template(user.phone, template_name, lang, components):
-                                    record_whatsapp_send(priority=False)
-                                    from app.workers.tasks.feedback_tasks import mark_feedback_pending
-                                    mark_feedback_pending(user.phone)
-                                    stats["whatsapp_sent"] = stats.get("whatsapp_sent", 0) + 1
-                                    delivered = True
+                            with BudgetReservation(1 if template_name else 0) as budget:
+                                if budget.available:
+                                    client = get_whatsapp_client()
+                                    lang = settings.WHATSAPP_TEMPLATE_LANGUAGE or "en"
+                                    components = [{
+                                        "type": "body",
+                                        "parameters": [
+                                            {"type": "text", "text": name},
+                                            {"type": "text", "text": str(invoice_count)},
+                                        ],
+                                    }]
+                                    if client.send_template(user.phone, template_name, lang, components):
+                                        budget.spend()
+                                        from app.workers.tasks.feedback_tasks import mark_feedback_pending
+                                        mark_feedback_pending(user.phone)
+                                        stats["whatsapp_sent"] = stats.get("whatsapp_sent", 0) + 1
+                                        delivered = True
                         except Exception as e:
                             logger.warning("Feedback WhatsApp failed for user %s: %s", user.id, e)
 
@@ -163,34 +163,35 @@ def send_aggregate_unpaid_alerts() -> dict[str, Any]:
                 # WhatsApp fallback (no email, or email failed) — budget-gated,
                 # unpaid alerts are high value.
                 if not sent and has_phone:
-                    from app.utils.whatsapp_budget import can_send_whatsapp, record_whatsapp_send
-                    if can_send_whatsapp(priority=True):
-                        template_name = getattr(settings, "WHATSAPP_TEMPLATE_UNPAID_ALERT", None)
-                        if template_name:
-                            lang = settings.WHATSAPP_TEMPLATE_LANGUAGE or "en"
-                            ok = client.send_template(
-                                user.phone,
-                                template_name,
-                                lang,
-                                components=[{
-                                    "type": "body",
-                                    "parameters": [
-                                        {"type": "text", "text": name},
-                                        {"type": "text", "text": f"₦{total:,.0f}"},
-                                        {"type": "text", "text": str(count)},
-                                    ],
-                                }],
-                            )
-                            if ok:
-                                record_whatsapp_send(priority=True)
-                                stats["whatsapp_sent"] += 1
-                                sent = True
-
-                        if not sent and is_window_open(user.phone):
-                            if client.send_text(user.phone, message):
-                                record_whatsapp_send(priority=True)
-                                stats["whatsapp_sent"] += 1
-                                sent = True
+                    from app.utils.whatsapp_budget import BudgetReservation
+                    with BudgetReservation(1, priority=True) as budget:
+                        if budget.available:
+                            template_name = getattr(settings, "WHATSAPP_TEMPLATE_UNPAID_ALERT", None)
+                            if template_name:
+                                lang = settings.WHATSAPP_TEMPLATE_LANGUAGE or "en"
+                                ok = client.send_template(
+                                    user.phone,
+                                    template_name,
+                                    lang,
+                                    components=[{
+                                        "type": "body",
+                                        "parameters": [
+                                            {"type": "text", "text": name},
+                                            {"type": "text", "text": f"₦{total:,.0f}"},
+                                            {"type": "text", "text": str(count)},
+                                        ],
+                                    }],
+                                )
+                                if ok:
+                                    budget.spend()
+                                    stats["whatsapp_sent"] += 1
+                                    sent = True
+
+                            if not sent and is_window_open(user.phone):
+                                if client.send_text(user.phone, message):
+                                    budget.spend()
+                                    stats["whatsapp_sent"] += 1
+                                    sent = True
 
                 # Email fallback already attempted first above.
                 if sent:
@@ -394,10 +395,10 @@ def send_weekly_free_summary() -> dict[str, Any]:
                         # If user has email, prefer email to save WhatsApp budget
                         pass
                     elif has_phone and is_window_open(user.phone):
-                        from app.utils.whatsapp_budget import can_send_whatsapp, record_whatsapp_send
-                        if can_send_whatsapp():
-                            if client.send_text(user.phone, message):
-                                record_whatsapp_send()
+                        from app.utils.whatsapp_budget import BudgetReservation
+                        with BudgetReservation(1) as budget:
+                            if budget.available and client.send_text(user.phone, message):
+                                budget.spend()
                                 stats["whatsapp_sent"] += 1
                                 sent = True
 
@@ -528,33 +529,34 @@ def send_payment_upsells() -> dict[str, Any]:
                 # Upsell = marketing spend. Prefer email; only use WhatsApp
                 # if no email and within budget.
                 if has_phone and not user.email:
-                    from app.utils.whatsapp_budget import can_send_whatsapp, record_whatsapp_send
-                    if can_send_whatsapp():
-                        template_name = getattr(settings, "WHATSAPP_TEMPLATE_PAYMENT_UPSELL", None)
-                        if template_name:
-                            lang = settings.WHATSAPP_TEMPLATE_LANGUAGE or "en"
-                            ok = client.send_template(
-                                user.phone,
-                                template_name,
-                                lang,
-                                components=[{
-                                    "type": "body",
-                                    "parameters": [
-                                        {"type": "text", "text": name},
-                                        {"type": "text", "text": f"₦{total:,.0f}"},
-                                    ],
-                                }],
-                            )
-                            if ok:
-                                record_whatsapp_send()
-                                stats["whatsapp_sent"] += 1
-                                sent = True
-
-                        if not sent and is_window_open(user.phone):
-                            if client.send_text(user.phone, message):
-                                record_whatsapp_send()
-                                stats["whatsapp_sent"] += 1
-                                sent = True
+                    from app.utils.whatsapp_budget import BudgetReservation
+                    with BudgetReservation(1) as budget:
+                        if budget.available:
+                            template_name = getattr(settings, "WHATSAPP_TEMPLATE_PAYMENT_UPSELL", None)
+                            if template_name:
+                                lang = settings.WHATSAPP_TEMPLATE_LANGUAGE or "en"
+                                ok = client.send_template(
+                                    user.phone,
+                                    template_name,
+                                    lang,
+                                    components=[{
+                                        "type": "body",
+                                        "parameters": [
+                                            {"type": "text", "text": name},
+                                            {"type": "text", "text": f"₦{total:,.0f}"},
+                                        ],
+                                    }],
+                                )
+                                if ok:
+                                    budget.spend()
+                                    stats["whatsapp_sent"] += 1
+                                    sent = True
+
+                            if not sent and is_window_open(user.phone):
+                                if client.send_text(user.phone, message):
+                                    budget.spend()
+                                    stats["whatsapp_sent"] += 1
+                                    sent = True
 
                 # Email fallback
                 if not sent and user.email:
@@ -713,7 +715,7 @@ def send_storefront_completion_nudges() -> dict[str, Any]:
 
             from app.bot.conversation_window import is_window_open
             from app.core.whatsapp import get_whatsapp_client
-            from app.utils.whatsapp_budget import can_send_whatsapp, record_whatsapp_send
+            from app.utils.whatsapp_budget import BudgetReservation
 
             client = get_whatsapp_client()
 
@@ -748,15 +750,12 @@ def send_storefront_completion_nudges() -> dict[str, Any]:
                     continue
 
                 sent = False
-                if (
-                    _is_valid_phone(user.phone)
-                    and is_window_open(user.phone)
-                    and can_send_whatsapp()
-                ):
-                    if client.send_text(user.phone, wa_msg):
-                        record_whatsapp_send()
-                        stats["whatsapp_sent"] += 1
-                        sent = True
+                if _is_valid_phone(user.phone) and is_window_open(user.phone):
+                    with BudgetReservation(1) as budget:
+                        if budget.available and client.send_text(user.phone, wa_msg):
+                            budget.spend()
+                            stats["whatsapp_sent"] += 1
+                            sent = True
 
                 if not sent and user.email:
                     if _send_smtp_email(user.email, subject, None, plain):
@@ -645,38 +645,39 @@ def winback_churned_businesses() -> dict[str, Any]:
 
                 # WhatsApp only if no email and within budget (winback = low priority)
                 if not sent and user.phone and user.phone_verified:
-                    from app.utils.whatsapp_budget import can_send_whatsapp, record_whatsapp_send
-                    if can_send_whatsapp():
-                        try:
-                            from app.core.whatsapp import get_whatsapp_client
-                            client = get_whatsapp_client()
-                            wa_msg = (
-                                f"Hi {name} 👋\n\n"
-                                f"It's been {days_inactive} days since you used SuoOps.\n\n"
-                            )
-                            if tier == 30:
-                                wa_msg += (
-                                    f"You have {pending_count} pending invoices ({revenue_str} tracked). "
-                                    f"Your customers might be ready to pay — send a quick reminder?\n\n"
-                                    f"Tap to log in: https://suoops.com/login"
-                                )
-                            elif tier == 60:
-                                wa_msg += (
-                                    f"You still have {pending_count} unpaid invoices. "
-                                    f"A quick reminder could help you collect.\n\n"
-                                    f"Log in: https://suoops.com/login"
-                                )
-                            else:
-                                wa_msg += (
-                                    f"Your {total_invoices} invoices and {revenue_str} in records "
-                                    f"are still safe. Pick up where you left off anytime.\n\n"
-                                    f"https://suoops.com/login"
+                    from app.utils.whatsapp_budget import BudgetReservation
+                    with BudgetReservation(1) as budget:
+                        if budget.available:
+                            try:
+                                from app.core.whatsapp import get_whatsapp_client
+                                client = get_whatsapp_client()
+                                wa_msg = (
+                                    f"Hi {name} 👋\n\n"
+                                    f"It's been {days_inactive} days since you used SuoOps.\n\n"
                                 )
-                            if client.send_text(user.phone, wa_msg):
-                                record_whatsapp_send()
-                                sent = True
-                        except Exception as e:
-                            logger.warning("WhatsApp winback failed for user %s: %s", user.id, e)
+                                if tier == 30:
+                                    wa_msg += (
+                                        f"You have {pending_count} pending invoices ({revenue_str} tracked). "
+                                        f"Your customers might be ready to pay — send a quick reminder?\n\n"
+                                        f"Tap to log in: https://suoops.com/login"
+                                    )
+                                elif tier == 60:
+                                    wa_msg += (
+                                        f"You still have {pending_count} unpaid invoices. "
+                                        f"A quick reminder could help you collect.\n\n"
+                                        f"Log in: https://suoops.com/login"
+                                    )
+                                else:
+                                    wa_msg += (
+                                        f"Your {total_invoices} invoices and {revenue_str} in records "
+                                        f"are still safe. Pick up where you left off anytime.\n\n"
+                                        f"https://suoops.com/login"
+                                    )
+                                if client.send_text(user.phone, wa_msg):
+                                    budget.spend()
+                                    sent = True
+                            except Exception as e:
+                                logger.warning("WhatsApp winback failed for user %s: %s", user.id, e)
 
                 if sent:
                     db.add(UserEmailLog(user_id=user.id, email_type=email_type))
@@ -837,37 +838,38 @@ def nudge_zero_invoice_users() -> dict[str, Any]:
                 try:
                     from app.core.config import settings as _settings
                     from app.core.whatsapp import get_whatsapp_client
-                    from app.utils.whatsapp_budget import can_send_whatsapp, record_whatsapp_send
+                    from app.utils.whatsapp_budget import BudgetReservation
 
-                    if not can_send_whatsapp():
-                        stats["skipped"] += 1
-                        continue
+                    with BudgetReservation(1) as budget:
+                        if not budget.available:
+                            stats["skipped"] += 1
+                            continue
+
+                        client = get_whatsapp_client()
 
-                    client = get_whatsapp_client()
-
-                    sent = False
-                    # Try free-form text first (works inside 24h window)
-                    try:
-                        if client.send_text(user.phone, msg):
-                            record_whatsapp_send()
-                            sent = True
-                    except Exception:
-                        pass
-
-                    # Fall back to approved template (works outside 24h window)
-                    if not sent:
-                        tpl = _settings.WHATSAPP_TEMPLATE_WIN_BACK
-                        if tpl:
-                            lang = _settings.WHATSAPP_TEMPLATE_LANGUAGE or "en"
-                            components = [
-                                {
-                                    "type": "body",
-                                    "parameters": [{"type": "text", "text": name}],
-                                }
-                            ]
-                            if client.send_template(user.phone, tpl, lang, components):
-                                record_whatsapp_send()
+                        sent = False
+                        # Try free-form text first (works inside 24h window)
+                        try:
+                            if client.send_text(user.phone, msg):
+                                budget.spend()
                                 sent = True
+                        except Exception:
+                            pass
+
+                        # Fall back to approved template (works outside 24h window)
+                        if not sent:
+                            tpl = _settings.WHATSAPP_TEMPLATE_WIN_BACK
+                            if tpl:
+                                lang = _settings.WHATSAPP_TEMPLATE_LANGUAGE or "en"
+                                components = [
+                                    {
+                                        "type": "body",
+                                        "parameters": [{"type": "text", "text": name}],
+                                    }
+                                ]
+                                if client.send_template(user.phone, tpl, lang, components):
+                                    budget.spend()
+                                    sent = True
 
                     if sent:
                         db.add(UserEmailLog(user_id=user.id, email_type=email_type))
@@ -889,3 +891,168 @@ def nudge_zero_invoice_users() -> dict[str, Any]:
     except Exception as exc:
         logger.error("Zero-invoice activation nudge task failed: %s", exc)
         raise
+
+
+@celery_app.task(
+    name="maintenance.verify_audit_chain_segment",
+    soft_time_limit=900,
+    time_limit=960,
+)
+def verify_audit_chain_segment(start_id: int, end_id: int) -> dict[str, Any]:
+    """Verify one id segment of the audit_log hash chain (chord header task)."""
+    from app.services.audit_verifier import verify_segment
+
+    with session_scope() as db:
+        return verify_segment(db, start_id, end_id).as_dict()
+
+
+@celery_app.task(
+    name="maintenance.record_audit_chain_verification",
+    soft_time_limit=60,
+    time_limit=90,
+)
+def record_audit_chain_verification(results: list[dict[str, Any]]) -> dict[str, Any]:
+    """Fold segment results; on success store a fresh signed checkpoint."""
+    from app.core.audit import log_audit_event
+    from app.services.audit_verifier import combine_segments, save_checkpoint
+
+    result = combine_segments(results)
+    if result.ok and result.verified:
+        with session_scope() as db:
+            save_checkpoint(db, result.last_id, result.last_hash, result.verified)
+    if result.ok:
+        logger.info("Audit chain full verify: %s", result.message)
+    else:
+        logger.error("Audit chain full verify FAILED: %s", result.message)
+    log_audit_event(
+        "audit.chain.verify_full",
+        status="success" if result.ok else "failure",
+        verified=result.verified,
+        first_broken_id=result.first_broken_id,
+        reason=result.reason,
+    )
+    return result.as_dict()
+
+
+@celery_app.task(
+    name="maintenance.verify_audit_chain_full",
+    soft_time_limit=60,
+    time_limit=90,
+)
+def verify_audit_chain_full(segments: int | None = None) -> dict[str, Any]:
+    """Re-verify the whole audit chain as parallel id segments.
+
+    Each segment is seeded from the stored hash of the row before it; the
+    previous segment proves that hash, so the chord callback sees the same
+    answer a single sequential walk would.
+    """
+    from celery import chord
+
+    from app.core.config import settings
+    from app.services.audit_verifier import segment_bounds
+
+    with session_scope() as db:
+        bounds = segment_bounds(db, segments or settings.AUDIT_VERIFY_SEGMENTS)
+    if not bounds:
+        return {"success": True, "segments": 0}
+
+    header = [verify_audit_chain_segment.s(lo, hi) for lo, hi in bounds]
+    chord(header)(record_audit_chain_verification.s())
+    logger.info("Queued audit chain verify over %d segment(s) up to id %d", len(bounds), bounds[-1][1])
+    return {"success": True, "segments": len(bounds), "upto_id": bounds[-1][1]}
+
+
+@celery_app.task(
+    name="maintenance.rebuild_invoice_rollup",
+    autoretry_for=(Exception,),
+    retry_backoff=60,
+    retry_kwargs={"max_retries": 2},
+    soft_time_limit=1800,
+    time_limit=1900,
+)
+def rebuild_invoice_rollup(days: int | None = 2, issuer_id: int | None = None) -> dict[str, Any]:
+    """Recompute ``invoice_daily_rollup`` from raw invoices.
+
+    Nightly with the default ``days=2`` it reconciles anything the ORM flush
+    hook missed (Core bulk updates, writes from a deploy still on old code):
+    every issuer-day holding an invoice created or updated in that window.
+    ``days=None`` rebuilds every day — the backfill for a fresh table.
+    """
+    from app.services.invoice_rollup import rebuild_rollup
+
+    since = None
+    if days is not None:
+        since = dt.datetime.now(dt.timezone.utc).date() - dt.timedelta(days=days)
+    with session_scope() as db:
+        rows = rebuild_rollup(db, since=since, issuer_id=issuer_id)
+    logger.info("Invoice rollup rebuilt since %s (issuer=%s): %d rows", since or "start", issuer_id, rows)
+    return {"success": True, "rows": rows, "since": since.isoformat() if since else None}
+
+
+@celery_app.task(
+    name="maintenance.rebuild_search_documents",
+    autoretry_for=(Exception,),
+    retry_backoff=60,
+    retry_kwargs={"max_retries": 2},
+    soft_time_limit=1800,
+    time_limit=1900,
+)
+def rebuild_search_documents() -> dict[str, Any]:
+    """Recompute every ``storefront_search_document`` from profiles and products.
+
+    Nightly it reconciles whatever the ORM flush hook missed (Core bulk
+    updates, writes from a deploy still on old code); run once by hand it is
+    the backfill for a fresh table.
+    """
+    from app.services.marketplace_search import rebuild_documents
+
+    with session_scope() as db:
+        docs = rebuild_documents(db)
+    logger.info("Marketplace search documents rebuilt: %d stores", docs)
+    return {"success": True, "documents": docs}
+
+
+@celery_app.task(
+    name="maintenance.reconcile_storefront_live",
+    autoretry_for=(Exception,),
+    retry_backoff=60,
+    retry_kwargs={"max_retries": 2},
+    soft_time_limit=600,
+    time_limit=660,
+)
+def reconcile_storefront_live() -> dict[str, Any]:
+    """Re-evaluate ``user.storefront_live`` for every store and fix drift.
+
+    The flush hook keeps the flag current for ORM writes; this catches Core
+    bulk updates and writes from a deploy still on old code.
+    """
+    from app.services.storefront_live import refresh_live_flags
+
+    with session_scope() as db:
+        fixed = refresh_live_flags(db.connection())
+    if fixed:
+        logger.warning("Reconciled storefront_live drift on %d stores", fixed)
+    return {"success": True, "fixed": fixed}
+
+
+@celery_app.task(
+    name="maintenance.flush_storefront_views",
+    autoretry_for=(Exception,),
+    retry_backoff=30,
+    retry_kwargs={"max_retries": 2},
+    soft_time_limit=60,
+    time_limit=90,
+)
+def flush_storefront_views() -> dict[str, Any]:
+    """Fold Redis-buffered storefront view counts into ``user.storefront_views``.
+
+    A failed batch stays in Redis and is retried on the next run, so counts
+    are never lost, only delayed.
+    """
+    from app.services.storefront_cache import flush_views
+
+    with session_scope() as db:
+        stores = flush_views(db)
+    if stores:
+        logger.info("Flushed buffered storefront views for %d stores", stores)
+    return {"success": True, "stores": stores}
@@ -6,7 +6,6 @@ Celery tasks for WhatsApp processing, reminders, OCR, and payment sync.
 from __future__ import annotations
 
 import asyncio
-import gc
 import logging
 from datetime import date, datetime, timedelta, timezone
 from typing import Any
@@ -42,20 +41,53 @@ def process_whatsapp_inbound(self: Task, payload: dict[str, Any]) -> None:
     """Process inbound WhatsApp message.
 
     Heavy NLP / adapter imports are done lazily to keep baseline worker RSS low.
+    Runs on the worker thread's persistent event loop with shared NLP and
+    WhatsApp clients, serialised per sender (see ``app.workers.inbound_runtime``).
     """
-    from app.bot.nlp_service import NLPService
     from app.bot.whatsapp_adapter import WhatsAppHandler
     from app.core.whatsapp import get_whatsapp_client
+    from app.workers import inbound_runtime
 
-    with session_scope() as db:
-        handler = WhatsAppHandler(
-            client=get_whatsapp_client(),
-            nlp=NLPService(),
-            db=db,
-        )
-        asyncio.run(handler.handle_incoming(payload))
+    with inbound_runtime.sender_lock(inbound_runtime.payload_sender(payload)):
+        with session_scope() as db:
+            handler = WhatsAppHandler(
+                client=get_whatsapp_client(),
+                nlp=inbound_runtime.get_nlp(),
+                db=db,
+            )
+            inbound_runtime.run(handler.handle_incoming(payload))
+
+    inbound_runtime.after_message()
+
+
+@celery_app.task(
+    name="whatsapp.resume_inbound",
+    soft_time_limit=30,
+    time_limit=60,
+)
+def resume_whatsapp_inbound(remaining: list[dict[str, Any]]) -> int:
+    """Errback: re-dispatch a sender's later messages after one failed for good.
+
+    A chain stops at its first failed link; without this the messages queued
+    behind a poison message would be silently dropped.
+    """
+    from app.queue.whatsapp_queue import sender_chain
+
+    logger.warning("Inbound message failed; resuming %d later message(s) from sender", len(remaining))
+    sender_chain(remaining).apply_async()
+    return len(remaining)
+
+
+@celery_app.task(
+    name="whatsapp.process_statuses",
+    soft_time_limit=60,
+    time_limit=90,
+)
+def process_whatsapp_statuses(statuses: list[dict[str, Any]]) -> dict[str, int]:
+    """Handle every delivery receipt from one webhook delivery in one pass."""
+    from app.bot.message_extractor import handle_statuses
 
-    gc.collect()
+    return handle_statuses(statuses)
 
 
 @celery_app.task(
@@ -75,7 +107,7 @@ def notify_back_in_stock(product_id: int) -> dict[str, Any]:
     from app.bot.whatsapp_client import WhatsAppClient
     from app.models.inventory_models import Product
     from app.models.models import StorefrontStockNotification, User
-    from app.utils.whatsapp_budget import can_send_whatsapp, record_whatsapp_send
+    from app.utils.whatsapp_budget import BudgetReservation
 
     stats = {"sent": 0, "skipped": 0}
     with session_scope() as db:
@@ -113,15 +145,16 @@ def notify_back_in_stock(product_id: int) -> dict[str, Any]:
                 w.notified = True
                 stats["skipped"] += 1
                 continue
-            if not can_send_whatsapp(priority=False):
-                break
-            try:
-                if client.send_text(w.phone, msg):
-                    record_whatsapp_send(priority=False)
-                    stats["sent"] += 1
-                w.notified = True
-            except Exception as exc:  # noqa: BLE001
-                logger.warning("Back-in-stock notify failed for %s: %s", w.phone, exc)
+            with BudgetReservation(1) as budget:
+                if not budget.available:
+                    break
+                try:
+                    if client.send_text(w.phone, msg):
+                        budget.spend()
+                        stats["sent"] += 1
+                    w.notified = True
+                except Exception as exc:  # noqa: BLE001
+                    logger.warning("Back-in-stock notify failed for %s: %s", w.phone, exc)
         db.commit()
 
     logger.info("Back-in-stock notify for product %s: %s", product_id, stats)
@@ -147,10 +180,13 @@ def send_overdue_reminders() -> dict[str, Any]:
     Each tier is sent only once per invoice (tracked in InvoiceReminderLog).
     Runs daily at 09:00 WAT (08:00 UTC).
     """
+    from sqlalchemy import or_, select
     from sqlalchemy.orm import joinedload
 
     from app.bot.conversation_window import is_window_open
-    from app.models.models import InvoiceReminderLog, Invoice, User
+    from app.models.models import Invoice
+    from app.services import reminder_planning
+    from app.utils.whatsapp_budget import BudgetReservation
 
     sent = 0
     email_sent = 0
@@ -163,23 +199,22 @@ def send_overdue_reminders() -> dict[str, Any]:
             today = date.today()
             now_dt = datetime.combine(today, datetime.min.time())
 
-            from sqlalchemy import or_
-
+            overdue_filter = (
+                Invoice.status == "pending",
+                Invoice.invoice_type == "revenue",
+                Invoice.due_date != None,  # noqa: E711
+                Invoice.due_date < now_dt,
+                # Never nag owners about unpaid/abandoned storefront orders —
+                # those are online-pay carts, not invoices to chase.
+                or_(
+                    Invoice.channel.is_(None),
+                    Invoice.channel != "storefront",
+                ),
+            )
             overdue_invoices = (
                 db.query(Invoice)
                 .options(joinedload(Invoice.customer))
-                .filter(
-                    Invoice.status == "pending",
-                    Invoice.invoice_type == "revenue",
-                    Invoice.due_date != None,  # noqa: E711
-                    Invoice.due_date < now_dt,
-                    # Never nag owners about unpaid/abandoned storefront orders —
-                    # those are online-pay carts, not invoices to chase.
-                    or_(
-                        Invoice.channel.is_(None),
-                        Invoice.channel != "storefront",
-                    ),
-                )
+                .filter(*overdue_filter)
                 .all()
             )
 
@@ -187,23 +222,28 @@ def send_overdue_reminders() -> dict[str, Any]:
                 logger.info("No overdue invoices found")
                 return {"success": True, "sent": 0, "total_overdue": 0}
 
-            # Group by issuer
-            by_issuer: dict[int, list[Invoice]] = {}
-            for inv in overdue_invoices:
-                by_issuer.setdefault(inv.issuer_id, []).append(inv)
+            # Plan in memory: one query for already-sent tiers, one for issuers.
+            sent_keys = reminder_planning.load_sent_reminders(
+                db,
+                select(Invoice.id).where(*overdue_filter),
+                reminder_planning.OWNER_TIERS,
+            )
+            plan, skipped = reminder_planning.plan_owner_overdue(overdue_invoices, sent_keys, today)
+            users = reminder_planning.load_users(db, plan.keys())
+            log_writer = reminder_planning.ReminderLogWriter(db, sent_keys)
 
             logger.info(
                 "Found %d overdue invoices for %d users",
                 len(overdue_invoices),
-                len(by_issuer),
+                len(plan),
             )
 
             from app.core.whatsapp import get_whatsapp_client
 
             client = get_whatsapp_client()
 
-            for issuer_id, invoices in by_issuer.items():
-                user = db.query(User).filter(User.id == issuer_id).first()
+            for issuer_id, tiers in plan.items():
+                user = users.get(issuer_id)
                 if not user:
                     continue
                 has_phone = _is_valid_phone(user.phone)
@@ -212,121 +252,87 @@ def send_overdue_reminders() -> dict[str, Any]:
                 if not has_phone and not user.email:
                     continue
 
-                # Classify invoices by escalation tier
-                tiers: dict[str, list[Invoice]] = {
-                    "owner_light": [],
-                    "owner_action": [],
-                    "owner_urgent": [],
-                    "owner_critical": [],
-                }
-                for inv in invoices:
-                    if not inv.due_date:
-                        continue
-                    days = (today - inv.due_date.date()).days
-                    if days >= 14:
-                        tier = "owner_critical"
-                    elif days >= 8:
-                        tier = "owner_urgent"
-                    elif days >= 4:
-                        tier = "owner_action"
-                    else:
-                        tier = "owner_light"
-
-                    # Check if this tier was already sent for this invoice
-                    # (any channel — prevents duplicate emails when WA fails)
-                    already = (
-                        db.query(InvoiceReminderLog)
-                        .filter(
-                            InvoiceReminderLog.invoice_id == inv.id,
-                            InvoiceReminderLog.reminder_type == tier,
-                        )
-                        .first()
-                    )
-                    if already:
-                        skipped += 1
-                        continue
-                    tiers[tier].append(inv)
-
                 # Build a single consolidated message per user covering the highest tier
                 message = _build_owner_escalation_message(tiers, today)
                 if not message:
                     continue
 
-                try:
-                    wa_delivered = False
-                    from app.utils.whatsapp_budget import can_send_whatsapp, record_whatsapp_send
-
-                    # 1) Try template first (works outside 24h window)
-                    overdue_tpl = settings.WHATSAPP_TEMPLATE_OVERDUE_REPORT
-                    if overdue_tpl and has_phone and can_send_whatsapp(priority=True):
-                        total_inv = sum(len(v) for v in tiers.values())
-                        total_amt = sum(inv.amount for vs in tiers.values() for inv in vs)
-                        critical_cnt = len(tiers["owner_critical"])
-                        urgent_cnt = len(tiers["owner_urgent"])
-                        tpl_lang = settings.WHATSAPP_TEMPLATE_LANGUAGE or "en"
-                        wa_delivered = client.send_template(
-                            user.phone,
-                            overdue_tpl,
-                            tpl_lang,
-                            components=[{
-                                "type": "body",
-                                "parameters": [
-                                    {"type": "text", "text": str(total_inv)},
-                                    {"type": "text", "text": f"₦{total_amt:,.0f}"},
-                                    {"type": "text", "text": str(critical_cnt)},
-                                    {"type": "text", "text": str(urgent_cnt)},
-                                ],
-                            }],
-                        )
-                        if wa_delivered:
-                            record_whatsapp_send(priority=True)
-                            sent += 1
+                # Reserve this owner's priority send just before trying it;
+                # the exit releases it unless delivered (also on a crash).
+                with BudgetReservation(1 if has_phone else 0, priority=True) as budget:
+                    try:
+                        wa_delivered = False
+                        # 1) Try template first (works outside 24h window)
+                        overdue_tpl = settings.WHATSAPP_TEMPLATE_OVERDUE_REPORT
+                        if overdue_tpl and has_phone and budget.available:
+                            total_inv = sum(len(v) for v in tiers.values())
+                            total_amt = sum(inv.amount for vs in tiers.values() for inv in vs)
+                            critical_cnt = len(tiers["owner_critical"])
+                            urgent_cnt = len(tiers["owner_urgent"])
+                            tpl_lang = settings.WHATSAPP_TEMPLATE_LANGUAGE or "en"
+                            wa_delivered = client.send_template(
+                                user.phone,
+                                overdue_tpl,
+                                tpl_lang,
+                                components=[{
+                                    "type": "body",
+                                    "parameters": [
+                                        {"type": "text", "text": str(total_inv)},
+                                        {"type": "text", "text": f"₦{total_amt:,.0f}"},
+                                        {"type": "text", "text": str(critical_cnt)},
+                                        {"type": "text", "text": str(urgent_cnt)},
+                                    ],
+                                }],
+                            )
+                            if wa_delivered:
+                                budget.spend()
+                                sent += 1
+
+                        # 2) Fallback to plain text (only within 24h window)
+                        if not wa_delivered and has_phone and is_window_open(user.phone) and budget.available:
+                            wa_delivered = client.send_text(user.phone, message)
+                            if wa_delivered:
+                                budget.spend()
+                                sent += 1
+                            else:
+                                logger.warning(
+                                    "Overdue reminder delivery failed for user %s (phone=%s…)",
+                                    issuer_id,
+                                    user.phone[:6] if user.phone else "none",
+                                )
 
-                    # 2) Fallback to plain text (only within 24h window)
-                    if not wa_delivered and has_phone and is_window_open(user.phone) and can_send_whatsapp(priority=True):
-                        wa_delivered = client.send_text(user.phone, message)
-                        if wa_delivered:
-                            record_whatsapp_send(priority=True)
-                            sent += 1
-                        else:
-                            logger.warning(
-                                "Overdue reminder delivery failed for user %s (phone=%s…)",
-                                issuer_id,
-                                user.phone[:6] if user.phone else "none",
+                        budget.release()  # hand back an unused send before the email fallback
+
+                        # 3) Email fallback: send if WhatsApp didn't deliver
+                        if not wa_delivered and user.email:
+                            email_ok = _send_owner_overdue_email(
+                                user.email, user.name, tiers, today
                             )
+                            if email_ok:
+                                email_sent += 1
+                            else:
+                                failed += 1
+                        elif not wa_delivered and not user.email:
+                            skipped_window += 1
 
-                    # 3) Email fallback: send if WhatsApp didn't deliver
-                    if not wa_delivered and user.email:
-                        email_ok = _send_owner_overdue_email(
-                            user.email, user.name, tiers, today
+                        # Log all tiers we just notified about
+                        if wa_delivered or (user.email and not wa_delivered):
+                            channel = "whatsapp" if wa_delivered else "email"
+                            recipient = user.phone if wa_delivered else user.email
+                            log_writer.record(
+                                (
+                                    (inv.id, tier)
+                                    for tier, tier_invoices in tiers.items()
+                                    for inv in tier_invoices
+                                ),
+                                channel,
+                                recipient,
+                            )
+                    except Exception as e:
+                        logger.warning(
+                            "Failed owner overdue reminder for user %s: %s", issuer_id, e
                         )
-                        if email_ok:
-                            email_sent += 1
-                        else:
-                            failed += 1
-                    elif not wa_delivered and not user.email:
-                        skipped_window += 1
-
-                    # Log all tiers we just notified about
-                    if wa_delivered or (user.email and not wa_delivered):
-                        channel = "whatsapp" if wa_delivered else "email"
-                        recipient = user.phone if wa_delivered else user.email
-                        for tier, tier_invoices in tiers.items():
-                            for inv in tier_invoices:
-                                db.add(
-                                    InvoiceReminderLog(
-                                        invoice_id=inv.id,
-                                        reminder_type=tier,
-                                        channel=channel,
-                                        recipient=recipient,
-                                    )
-                                )
-                        db.commit()
-                except Exception as e:
-                    logger.warning(
-                        "Failed owner overdue reminder for user %s: %s", issuer_id, e
-                    )
-                    failed += 1
+                        failed += 1
 
         logger.info(
             "Owner overdue reminders: wa_sent=%d email_sent=%d skipped=%d failed=%d skipped_window=%d",
@@ -603,9 +609,11 @@ def send_customer_payment_reminders() -> dict[str, Any]:
     Each tier is sent only once per invoice per channel (tracked in
     InvoiceReminderLog).  Runs daily at 10:00 WAT (09:00 UTC).
     """
+    from sqlalchemy import select
     from sqlalchemy.orm import joinedload
 
-    from app.models.models import InvoiceReminderLog, Invoice, User
+    from app.models.models import Invoice
+    from app.services import reminder_planning
 
     stats = {"whatsapp_sent": 0, "email_sent": 0, "skipped": 0, "failed": 0, "wa_skipped_window": 0}
 
@@ -617,18 +625,19 @@ def send_customer_payment_reminders() -> dict[str, Any]:
             # Window: 3 days before today → any overdue
             window_start = now_dt + timedelta(days=3)
 
+            candidate_filter = (
+                Invoice.status == "pending",
+                Invoice.invoice_type == "revenue",
+                Invoice.due_date != None,  # noqa: E711
+                Invoice.due_date <= window_start,
+            )
             candidates = (
                 db.query(Invoice)
                 .options(
                     joinedload(Invoice.customer),
                     joinedload(Invoice.issuer),
                 )
-                .filter(
-                    Invoice.status == "pending",
-                    Invoice.invoice_type == "revenue",
-                    Invoice.due_date != None,  # noqa: E711
-                    Invoice.due_date <= window_start,
-                )
+                .filter(*candidate_filter)
                 .all()
             )
 
@@ -640,6 +649,13 @@ def send_customer_payment_reminders() -> dict[str, Any]:
                 "Customer reminders: %d candidate invoices", len(candidates)
             )
 
+            # Every (invoice, tier, channel) already sent, in one query; new
+            # logs are committed right after each send and join this set.
+            sent_keys = reminder_planning.load_sent_reminders(
+                db, select(Invoice.id).where(*candidate_filter)
+            )
+            log_writer = reminder_planning.ReminderLogWriter(db, sent_keys)
+
             for inv in candidates:
                 customer = inv.customer
                 issuer = inv.issuer
@@ -660,16 +676,7 @@ def send_customer_payment_reminders() -> dict[str, Any]:
                 wa_delivered = False
                 email_handled = False
                 if customer_phone and _is_valid_phone(customer_phone):
-                    already = (
-                        db.query(InvoiceReminderLog)
-                        .filter(
-                            InvoiceReminderLog.invoice_id == inv.id,
-                            InvoiceReminderLog.reminder_type == tier,
-                            InvoiceReminderLog.channel == "whatsapp",
-                        )
-                        .first()
-                    )
-                    if already:
+                    if (inv.id, tier, "whatsapp") in sent_keys:
                         stats["skipped"] += 1
                         wa_delivered = True  # Already sent via WA before
                     else:
@@ -677,76 +684,36 @@ def send_customer_payment_reminders() -> dict[str, Any]:
                             inv, customer, issuer, tier, business_name
                         )
                         if ok:
-                            db.add(
-                                InvoiceReminderLog(
-                                    invoice_id=inv.id,
-                                    reminder_type=tier,
-                                    channel="whatsapp",
-                                    recipient=customer_phone,
-                                )
-                            )
+                            log_writer.record([(inv.id, tier)], "whatsapp", customer_phone)
                             stats["whatsapp_sent"] += 1
                             wa_delivered = True
                         else:
                             stats["wa_skipped_window"] += 1
                             # WhatsApp failed (likely outside 24h window or
                             # no template) — try email as fallback if available
-                            if customer_email and not (
-                                db.query(InvoiceReminderLog)
-                                .filter(
-                                    InvoiceReminderLog.invoice_id == inv.id,
-                                    InvoiceReminderLog.reminder_type == tier,
-                                    InvoiceReminderLog.channel == "email",
-                                )
-                                .first()
-                            ):
+                            if customer_email and (inv.id, tier, "email") not in sent_keys:
                                 email_ok = _send_customer_email_reminder(
                                     inv, customer, issuer, tier, business_name
                                 )
                                 # Mark handled so the email-only block below
-                                # doesn't re-send (the log added here is still
-                                # pending/unflushed and its dedup query would
-                                # miss it, causing a duplicate-row IntegrityError).
+                                # doesn't count a failed attempt twice.
                                 email_handled = True
                                 if email_ok:
-                                    db.add(
-                                        InvoiceReminderLog(
-                                            invoice_id=inv.id,
-                                            reminder_type=tier,
-                                            channel="email",
-                                            recipient=customer_email,
-                                        )
-                                    )
+                                    log_writer.record([(inv.id, tier)], "email", customer_email)
                                     stats["email_sent"] += 1
                                 else:
                                     stats["failed"] += 1
 
                 # --- Email (only for email-only customers, skip if WA delivered) ---
                 if customer_email and not wa_delivered and not email_handled:
-                    already = (
-                        db.query(InvoiceReminderLog)
-                        .filter(
-                            InvoiceReminderLog.invoice_id == inv.id,
-                            InvoiceReminderLog.reminder_type == tier,
-                            InvoiceReminderLog.channel == "email",
-                        )
-                        .first()
-                    )
-                    if already:
+                    if (inv.id, tier, "email") in sent_keys:
                         stats["skipped"] += 1
                     else:
                         ok = _send_customer_email_reminder(
                             inv, customer, issuer, tier, business_name
                         )
                         if ok:
-                            db.add(
-                                InvoiceReminderLog(
-                                    invoice_id=inv.id,
-                                    reminder_type=tier,
-                                    channel="email",
-                                    recipient=customer_email,
-                                )
-                            )
+                            log_writer.record([(inv.id, tier)], "email", customer_email)
                             stats["email_sent"] += 1
                         else:
                             stats["failed"] += 1
@@ -755,8 +722,6 @@ def send_customer_payment_reminders() -> dict[str, Any]:
                 if tier == "customer_overdue_14d" and issuer.phone:
                     _notify_owner_escalation(inv, issuer, customer, business_name)
 
-            db.commit()
-
         logger.info("Customer payment reminders: %s", stats)
         return {"success": True, **stats}
 
@@ -804,65 +769,66 @@ def _send_customer_whatsapp_reminder(
     try:
         from app.bot.conversation_window import is_window_open
         from app.core.whatsapp import get_whatsapp_client
-        from app.utils.whatsapp_budget import can_send_whatsapp, record_whatsapp_send
+        from app.utils.whatsapp_budget import BudgetReservation
 
         # Payment reminders are priority (help users collect money)
-        if not can_send_whatsapp(priority=True):
-            return False
-
-        client = get_whatsapp_client()
+        with BudgetReservation(1, priority=True) as budget:
+            if not budget.available:
+                return False
 
-        # Prefer template (works outside 24h window)
-        template_name = settings.WHATSAPP_TEMPLATE_PAYMENT_REMINDER
-        if template_name:
-            customer_name = customer.name or "Customer"
-            amount_str = f"₦{inv.amount:,.0f}"
-            payment_link = f"{settings.FRONTEND_URL}/pay/{inv.invoice_id}"
-
-            days_until_due = (inv.due_date.date() - date.today()).days
-            # Template text: "⏰ Overdue: {{4}} days" — send just the number
-            if days_until_due >= 0:
-                days_info = str(days_until_due)
-            else:
-                days_info = str(abs(days_until_due))
+            client = get_whatsapp_client()
 
-            from app.utils.invoice_delivery import template_bank_params
-            bank_name, account_number, _ = template_bank_params(
-                issuer, online_only=bool(getattr(issuer, "online_payments_active", False))
-            )
+            # Prefer template (works outside 24h window)
+            template_name = settings.WHATSAPP_TEMPLATE_PAYMENT_REMINDER
+            if template_name:
+                customer_name = customer.name or "Customer"
+                amount_str = f"₦{inv.amount:,.0f}"
+                payment_link = f"{settings.FRONTEND_URL}/pay/{inv.invoice_id}"
+
+                days_until_due = (inv.due_date.date() - date.today()).days
+                # Template text: "⏰ Overdue: {{4}} days" — send just the number
+                if days_until_due >= 0:
+                    days_info = str(days_until_due)
+                else:
+                    days_info = str(abs(days_until_due))
+
+                from app.utils.invoice_delivery import template_bank_params
+                bank_name, account_number, _ = template_bank_params(
+                    issuer, online_only=bool(getattr(issuer, "online_payments_active", False))
+                )
 
-            components = [
-                {
-                    "type": "body",
-                    "parameters": [
-                        {"type": "text", "text": customer_name},
-                        {"type": "text", "text": inv.invoice_id},
-                        {"type": "text", "text": amount_str},
-                        {"type": "text", "text": days_info},
-                        {"type": "text", "text": bank_name},
-                        {"type": "text", "text": account_number},
-                        {"type": "text", "text": payment_link},
-                    ],
-                }
-            ]
-            lang = settings.WHATSAPP_TEMPLATE_LANGUAGE or "en"
-            ok = client.send_template(customer.phone, template_name, lang, components)
+                components = [
+                    {
+                        "type": "body",
+                        "parameters": [
+                            {"type": "text", "text": customer_name},
+                            {"type": "text", "text": inv.invoice_id},
+                            {"type": "text", "text": amount_str},
+                            {"type": "text", "text": days_info},
+                            {"type": "text", "text": bank_name},
+                            {"type": "text", "text": account_number},
+                            {"type": "text", "text": payment_link},
+                        ],
+                    }
+                ]
+                lang = settings.WHATSAPP_TEMPLATE_LANGUAGE or "en"
+                ok = client.send_template(customer.phone, template_name, lang, components)
+                if ok:
+                    budget.spend()
+                return ok
+
+            # Fallback: free-form text (only works within 24h window)
+            if not is_window_open(customer.phone):
+                logger.debug(
+                    "Skipping WhatsApp reminder for customer %s — outside 24h window",
+                    customer.phone[:6] if customer.phone else "none",
+                )
+                return False
+            message = _format_customer_reminder(inv, tier, business_name)
+            ok = client.send_text(customer.phone, message)
             if ok:
-                record_whatsapp_send(priority=True)
+                budget.spend()
             return ok
-
-        # Fallback: free-form text (only works within 24h window)
-        if not is_window_open(customer.phone):
-            logger.debug(
-                "Skipping WhatsApp reminder for customer %s — outside 24h window",
-                customer.phone[:6] if customer.phone else "none",
-            )
-            return False
-        message = _format_customer_reminder(inv, tier, business_name)
-        ok = client.send_text(customer.phone, message)
-        if ok:
-            record_whatsapp_send(priority=True)
-        return ok
     except Exception as e:
         logger.warning(
             "WhatsApp reminder failed for invoice %s to %s: %s",
@@ -1010,11 +976,11 @@ def send_mark_paid_nudges() -> dict[str, Any]:
     Runs daily at 12:00 WAT (11:00 UTC).
     """
     from sqlalchemy import func as sqlfunc
-    from sqlalchemy.orm import joinedload
 
     from app.bot.conversation_window import is_window_open
     from app.db.redis_client import get_redis_client
-    from app.models.models import Invoice, User
+    from app.models.models import Invoice
+    from app.services import reminder_planning
 
     sent = 0
     skipped_cooldown = 0
@@ -1053,39 +1019,35 @@ def send_mark_paid_nudges() -> dict[str, Any]:
 
             client = get_whatsapp_client()
 
+            # Check 7-day cooldown via Redis, then load the remaining owners and
+            # their 3 oldest pending invoices in one query each.
+            due_rows = []
             for row in owners_with_pending:
+                cooldown_key = f"nudge:mark_paid:{row.issuer_id}"
+                if redis and redis.get(cooldown_key):
+                    skipped_cooldown += 1
+                    continue
+                due_rows.append(row)
+            due_ids = [row.issuer_id for row in due_rows]
+            users = reminder_planning.load_users(db, due_ids)
+            oldest_by_issuer = reminder_planning.oldest_pending_invoices(db, due_ids, cutoff)
+
+            for row in due_rows:
                 issuer_id = row.issuer_id
                 pending_count = row.pending_count
                 pending_total = float(row.pending_total or 0)
                 oldest_date = row.oldest
-
-                # Check 7-day cooldown via Redis
                 cooldown_key = f"nudge:mark_paid:{issuer_id}"
-                if redis and redis.get(cooldown_key):
-                    skipped_cooldown += 1
-                    continue
 
-                user = db.query(User).filter(User.id == issuer_id).first()
+                user = users.get(issuer_id)
                 if not user:
                     continue
                 has_phone = _is_valid_phone(user.phone)
                 if not has_phone and not user.email:
                     continue
 
-                # Get the 3 oldest pending invoices for specificity
-                oldest_invoices = (
-                    db.query(Invoice)
-                    .options(joinedload(Invoice.customer))
-                    .filter(
-                        Invoice.issuer_id == issuer_id,
-                        Invoice.status == "pending",
-                        Invoice.invoice_type == "revenue",
-                        Invoice.created_at < cutoff,
-                    )
-                    .order_by(Invoice.created_at.asc())
-                    .limit(3)
-                    .all()
-                )
+                # The 3 oldest pending invoices, for specificity
+                oldest_invoices = oldest_by_issuer.get(issuer_id, [])
 
                 # Build the nudge message
                 days_oldest = (today - oldest_date.date()).days if oldest_date else 0
@@ -1341,6 +1303,10 @@ def sync_provider_status(self: Task, provider: str, reference: str) -> dict[str,
             invoice.status_updated_at = datetime.now(timezone.utc)
         db.commit()
 
+        from app.services.cache_service import invalidate_invoice_tags
+
+        invalidate_invoice_tags(invoice.issuer_id, invoice.customer_id, invoice.invoice_id)
+
         logger.info(
             "Invoice %s status synced: %s → %s (ref=%s)",
             invoice.invoice_id,
@@ -1367,10 +1333,12 @@ def ocr_parse_image(
     import base64
 
     from app.services.ocr_service import OCRService
+    from app.workers import inbound_runtime
 
     raw = base64.b64decode(image_bytes_b64)
     service = OCRService()
-    result = asyncio.run(service.parse_receipt(raw, context))
+    # Persistent loop: reuses its pooled OpenAI client across tasks.
+    result = inbound_runtime.run(service.parse_receipt(raw, context))
 
     if not result.get("success"):
         if "timeout" in str(result.get("error", "")).lower():
@@ -1382,255 +1350,274 @@ def ocr_parse_image(
 # ── Daily Business Summary ───────────────────────────────────────────
 
 
-@celery_app.task(
-    name="summary.send_daily_summaries",
-    autoretry_for=(Exception,),
-    retry_backoff=30,
-    retry_kwargs={"max_retries": 2},
-)
-def send_daily_summaries() -> dict[str, Any]:
-    """Send daily business summary to all active users via WhatsApp.
+# Users per keyset page when streaming daily-summary recipients.
+_SUMMARY_CHUNK_SIZE = 500
+
 
-    Runs every evening (18:00 UTC / 19:00 WAT).  Skips users with zero
-    activity for the day so it never feels like spam.
+def _daily_summary_figures(
+    db, user_ids: list[int], start_of_day: datetime
+) -> dict[int, tuple[Any, Any, Any, int]]:
+    """Per-user (revenue_today, expenses_today, outstanding, overdue_count).
+
+    One grouped query for a whole chunk of users instead of four per user.
+    Users with no matching invoices are absent (all zeros).
     """
+    from sqlalchemy import and_, case, or_
     from sqlalchemy import func as sqlfunc
-    from sqlalchemy import or_
-    from sqlalchemy.orm import joinedload
 
-    from app.models.models import Invoice, SubscriptionPlan, User
+    from app.models.models import Invoice
 
-    sent = 0
-    failed = 0
-    email_sent = 0
+    paid_today = and_(
+        Invoice.invoice_type == "revenue",
+        Invoice.status == "paid",
+        Invoice.paid_at >= start_of_day,
+    )
+    expense_today = and_(
+        Invoice.invoice_type == "expense",
+        Invoice.created_at >= start_of_day,
+    )
+    outstanding = and_(
+        Invoice.invoice_type == "revenue",
+        Invoice.status.in_(["pending", "awaiting_confirmation"]),
+        # Abandoned/unpaid storefront carts aren't money owed — exclude them so
+        # this matches the web dashboard's Outstanding figure
+        # (calculate_cash_position).
+        or_(
+            Invoice.channel.is_(None),
+            Invoice.channel != "storefront",
+            Invoice.status != "pending",
+        ),
+    )
+    overdue = and_(
+        Invoice.invoice_type == "revenue",
+        Invoice.status == "pending",
+        Invoice.due_date != None,  # noqa: E711
+        Invoice.due_date < start_of_day,
+        # Same storefront-cart exclusion as Outstanding above.
+        or_(Invoice.channel.is_(None), Invoice.channel != "storefront"),
+    )
 
-    try:
-        with session_scope() as db:
-            now_utc = datetime.now(timezone.utc)
-            start_of_day = now_utc.replace(hour=0, minute=0, second=0, microsecond=0)
+    def amount_if(condition):
+        return sqlfunc.coalesce(sqlfunc.sum(case((condition, Invoice.amount), else_=0)), 0)
 
-            # Debug: count PRO / pro_override users first
-            pro_count = (
-                db.query(sqlfunc.count(User.id))
-                .filter(
-                    (User.plan == SubscriptionPlan.PRO) | (User.pro_override.is_(True)),
-                )
-                .scalar()
-            )
-            with_phone = (
-                db.query(sqlfunc.count(User.id))
-                .filter(
-                    User.phone != None,  # noqa: E711
-                    (User.plan == SubscriptionPlan.PRO) | (User.pro_override.is_(True)),
-                )
-                .scalar()
-            )
-            logger.info(
-                "Daily summary debug: pro/override_users=%d with_phone=%d",
-                pro_count, with_phone,
-            )
+    rows = (
+        db.query(
+            Invoice.issuer_id,
+            amount_if(paid_today),
+            amount_if(expense_today),
+            amount_if(outstanding),
+            sqlfunc.coalesce(sqlfunc.sum(case((overdue, 1), else_=0)), 0),
+        )
+        .filter(
+            Invoice.issuer_id.in_(user_ids),
+            or_(paid_today, expense_today, outstanding, overdue),
+        )
+        .group_by(Invoice.issuer_id)
+        .all()
+    )
+    return {
+        issuer_id: (rev, exp, out, int(overdue_count or 0))
+        for issuer_id, rev, exp, out, overdue_count in rows
+    }
 
-            # Get PRO / pro_override users who have a phone OR email
-            # (email-only users still deserve their daily summary)
-            active_users = (
-                db.query(User)
-                .filter(
-                    (User.plan == SubscriptionPlan.PRO) | (User.pro_override.is_(True)),
-                    (User.phone != None) | (User.email != None),  # noqa: E711
-                )
-                .outerjoin(Invoice, Invoice.issuer_id == User.id)
-                .group_by(User.id)
-                .all()
-            )
-            logger.info("Daily summary: %d users after join", len(active_users))
 
-            from app.core.whatsapp import get_whatsapp_client
-            from app.bot.conversation_window import is_window_open
+def _iter_summary_recipients(db, chunk_size: int = _SUMMARY_CHUNK_SIZE):
+    """Yield chunks of PRO / pro_override users with a phone or email.
 
-            client = get_whatsapp_client()
-            summary_template = getattr(settings, "WHATSAPP_TEMPLATE_DAILY_SUMMARY", None)
-            template_lang = getattr(settings, "WHATSAPP_TEMPLATE_LANGUAGE", "en")
+    Keyset-paginated on ``User.id`` and detached as plain snapshots so the
+    sender threads never touch the ORM session.
+    """
+    from types import SimpleNamespace
 
-            if not summary_template:
-                logger.warning(
-                    "WHATSAPP_TEMPLATE_DAILY_SUMMARY not configured — "
-                    "daily summaries will only reach users who messaged the bot today. "
-                    "Set up a WhatsApp message template in Meta Business Manager "
-                    "and add it to your env vars for full coverage."
-                )
+    from app.models.models import SubscriptionPlan, User
 
-            skipped_window = 0
+    last_id = 0
+    while True:
+        rows = (
+            db.query(User.id, User.phone, User.email, User.name, User.business_name)
+            .filter(
+                (User.plan == SubscriptionPlan.PRO) | (User.pro_override.is_(True)),
+                # Email-only users still deserve their daily summary.
+                (User.phone != None) | (User.email != None),  # noqa: E711
+                User.id > last_id,
+            )
+            .order_by(User.id)
+            .limit(chunk_size)
+            .all()
+        )
+        if not rows:
+            return
+        yield [
+            SimpleNamespace(id=r.id, phone=r.phone, email=r.email, name=r.name, business_name=r.business_name)
+            for r in rows
+        ]
+        last_id = rows[-1].id
 
-            for user in active_users:
-                try:
-                    has_phone = _is_valid_phone(user.phone)
-
-                    # Revenue collected today
-                    revenue_today = (
-                        db.query(sqlfunc.coalesce(sqlfunc.sum(Invoice.amount), 0))
-                        .filter(
-                            Invoice.issuer_id == user.id,
-                            Invoice.invoice_type == "revenue",
-                            Invoice.status == "paid",
-                            Invoice.paid_at >= start_of_day,
-                        )
-                        .scalar()
-                    )
 
-                    # Expenses recorded today
-                    expenses_today = (
-                        db.query(sqlfunc.coalesce(sqlfunc.sum(Invoice.amount), 0))
-                        .filter(
-                            Invoice.issuer_id == user.id,
-                            Invoice.invoice_type == "expense",
-                            Invoice.created_at >= start_of_day,
-                        )
-                        .scalar()
-                    )
+def _deliver_daily_summary(user, figures, client, summary_template, template_lang) -> tuple[str, bool]:
+    """Send one user's summary. Returns (outcome, skipped_window).
 
-                    # Total outstanding
-                    outstanding = (
-                        db.query(sqlfunc.coalesce(sqlfunc.sum(Invoice.amount), 0))
-                        .filter(
-                            Invoice.issuer_id == user.id,
-                            Invoice.invoice_type == "revenue",
-                            Invoice.status.in_(["pending", "awaiting_confirmation"]),
-                            # Abandoned/unpaid storefront carts aren't money owed —
-                            # exclude them so this matches the web dashboard's
-                            # Outstanding figure (calculate_cash_position).
-                            or_(
-                                Invoice.channel.is_(None),
-                                Invoice.channel != "storefront",
-                                Invoice.status != "pending",
-                            ),
-                        )
-                        .scalar()
-                    )
+    ``outcome`` is 'email', 'whatsapp' or 'failed'. Runs on a sender thread:
+    anything needing the DB (the cash image) opens its own session.
+    """
+    from app.bot.conversation_window import is_window_open
 
-                    # Overdue count
-                    overdue_count = (
-                        db.query(sqlfunc.count(Invoice.id))
-                        .filter(
-                            Invoice.issuer_id == user.id,
-                            Invoice.invoice_type == "revenue",
-                            Invoice.status == "pending",
-                            Invoice.due_date != None,  # noqa: E711
-                            Invoice.due_date < start_of_day,
-                            # Same storefront-cart exclusion as Outstanding above.
-                            or_(
-                                Invoice.channel.is_(None),
-                                Invoice.channel != "storefront",
-                            ),
-                        )
-                        .scalar()
-                    ) or 0
+    revenue_today, expenses_today, outstanding, overdue_count = figures
+    rev = float(revenue_today)
+    exp = float(expenses_today)
+    net = rev - exp
+    out = float(outstanding)
 
-                    rev = float(revenue_today)
-                    exp = float(expenses_today)
-                    net = rev - exp
-                    out = float(outstanding)
+    logger.info(
+        "Daily summary user %s: rev=%.0f exp=%.0f outstanding=%.0f overdue=%d",
+        user.id, rev, exp, out, overdue_count,
+    )
 
-                    logger.info(
-                        "Daily summary user %s: rev=%.0f exp=%.0f outstanding=%.0f overdue=%d",
-                        user.id, rev, exp, out, overdue_count,
-                    )
+    # PRO users always get a daily summary, even on quiet days
+    message = _format_daily_summary(revenue_today, expenses_today, outstanding, overdue_count)
+
+    # Email is the primary channel (free). WhatsApp is only used for users with
+    # no email on file — this keeps the daily summary off paid WhatsApp
+    # templates for (almost) everyone.
+    if user.email:
+        email_ok = _send_daily_summary_email(
+            to_email=user.email,
+            name=user.name or user.business_name,
+            revenue=rev,
+            expenses=exp,
+            net=net,
+            outstanding=out,
+            overdue_count=overdue_count,
+        )
+        if email_ok:
+            return "email", False
+        # Email failed — fall through to the WhatsApp fallback.
+
+    # ── WhatsApp fallback (no email, or email delivery failed) ──
+    wa_success = False
+    skipped_window = False
+
+    if _is_valid_phone(user.phone):
+        # Template first (works outside 24h window)
+        if summary_template:
+            wa_success = client.send_template(
+                user.phone,
+                summary_template,
+                template_lang,
+                components=[{
+                    "type": "body",
+                    "parameters": [
+                        {"type": "text", "text": f"₦{rev:,.0f}"},
+                        {"type": "text", "text": f"₦{exp:,.0f}"},
+                        {"type": "text", "text": f"₦{net:,.0f}"},
+                        {"type": "text", "text": f"₦{out:,.0f}"},
+                        {"type": "text", "text": str(overdue_count)},
+                    ],
+                }],
+            )
+            if not wa_success:
+                logger.warning(
+                    "Template delivery failed for user %s, trying plain text",
+                    user.id,
+                )
 
-                    # PRO users always get a daily summary, even on quiet days
+        # Plain text only works within the 24-hour window
+        if not wa_success:
+            if is_window_open(user.phone):
+                wa_success = client.send_text(user.phone, message)
+            else:
+                skipped_window = True
+                logger.debug("Daily summary outside 24h window for user %s", user.id)
+
+    if wa_success:
+        # Follow up with the visual cash snapshot. Images, like plain text, are
+        # only deliverable inside the 24h window.
+        try:
+            with session_scope() as db:
+                _send_daily_cash_image(db, client, user, is_window_open)
+        except Exception as img_err:  # noqa: BLE001
+            logger.warning("Daily cash image failed for user %s: %s", user.id, img_err)
+        return "whatsapp", skipped_window
+
+    # Neither channel succeeded
+    logger.warning(
+        "Daily summary delivery failed for user %s (phone=%s… email=%s)",
+        user.id,
+        user.phone[:6] if user.phone else "none",
+        "yes" if user.email else "no",
+    )
+    return "failed", skipped_window
 
-                    message = _format_daily_summary(
-                        revenue_today, expenses_today, outstanding, overdue_count
-                    )
 
-                    # Email is the primary channel (free). WhatsApp is only used
-                    # for users with no email on file — this keeps the daily
-                    # summary off paid WhatsApp templates for (almost) everyone.
-                    if user.email:
-                        email_ok = _send_daily_summary_email(
-                            to_email=user.email,
-                            name=user.name or user.business_name,
-                            revenue=rev,
-                            expenses=exp,
-                            net=net,
-                            outstanding=out,
-                            overdue_count=overdue_count,
-                        )
-                        if email_ok:
-                            email_sent += 1
-                            continue
-                        # Email failed — fall through to the WhatsApp fallback.
-
-                    # ── WhatsApp fallback (no email, or email delivery failed) ──
-                    wa_success = False
-
-                    if has_phone:
-                        # Template first (works outside 24h window)
-                        if summary_template:
-                            wa_success = client.send_template(
-                                user.phone,
-                                summary_template,
-                                template_lang,
-                                components=[{
-                                    "type": "body",
-                                    "parameters": [
-                                        {"type": "text", "text": f"₦{rev:,.0f}"},
-                                        {"type": "text", "text": f"₦{exp:,.0f}"},
-                                        {"type": "text", "text": f"₦{net:,.0f}"},
-                                        {"type": "text", "text": f"₦{out:,.0f}"},
-                                        {"type": "text", "text": str(overdue_count)},
-                                    ],
-                                }],
-                            )
-                            if not wa_success:
-                                logger.warning(
-                                    "Template delivery failed for user %s, trying plain text",
-                                    user.id,
-                                )
+@celery_app.task(
+    name="summary.send_daily_summaries",
+    autoretry_for=(Exception,),
+    retry_backoff=30,
+    retry_kwargs={"max_retries": 2},
+)
+def send_daily_summaries() -> dict[str, Any]:
+    """Send daily business summary to all active users via WhatsApp.
 
-                        # Plain text only works within the 24-hour window
-                        if not wa_success:
-                            if is_window_open(user.phone):
-                                wa_success = client.send_text(user.phone, message)
-                            else:
-                                skipped_window += 1
-                                logger.debug(
-                                    "Daily summary outside 24h window for user %s", user.id,
-                                )
+    Runs every evening (18:00 UTC / 19:00 WAT). Recipients are streamed in
+    chunks; each chunk's figures come from one grouped query and its sends
+    fan out over a bounded thread pool (``DAILY_SUMMARY_SEND_CONCURRENCY``).
+    """
+    from concurrent.futures import ThreadPoolExecutor
 
-                    if wa_success:
-                        sent += 1
-                        # Follow up with the visual cash snapshot. Images, like
-                        # plain text, are only deliverable inside the 24h window.
-                        try:
-                            _send_daily_cash_image(db, client, user, is_window_open)
-                        except Exception as img_err:  # noqa: BLE001
-                            logger.warning(
-                                "Daily cash image failed for user %s: %s", user.id, img_err
-                            )
-                        continue
+    from app.core.whatsapp import get_whatsapp_client
 
-                    # Neither channel succeeded
-                    failed += 1
-                    logger.warning(
-                        "Daily summary delivery failed for user %s "
-                        "(phone=%s… email=%s)",
-                        user.id,
-                        user.phone[:6] if user.phone else "none",
-                        "yes" if user.email else "no",
-                    )
+    counts = {"whatsapp": 0, "email": 0, "failed": 0}
+    skipped_window = 0
+    users_seen = 0
+    zero = (0, 0, 0, 0)
 
-                except Exception as e:
-                    logger.warning("Failed daily summary for user %s: %s", user.id, e)
-                    failed += 1
+    client = get_whatsapp_client()
+    summary_template = getattr(settings, "WHATSAPP_TEMPLATE_DAILY_SUMMARY", None)
+    template_lang = getattr(settings, "WHATSAPP_TEMPLATE_LANGUAGE", "en")
+
+    if not summary_template:
+        logger.warning(
+            "WHATSAPP_TEMPLATE_DAILY_SUMMARY not configured — "
+            "daily summaries will only reach users who messaged the bot today. "
+            "Set up a WhatsApp message template in Meta Business Manager "
+            "and add it to your env vars for full coverage."
+        )
+
+    def deliver(user, figures):
+        try:
+            return _deliver_daily_summary(user, figures, client, summary_template, template_lang)
+        except Exception as e:  # noqa: BLE001
+            logger.warning("Failed daily summary for user %s: %s", user.id, e)
+            return "failed", False
+
+    try:
+        now_utc = datetime.now(timezone.utc)
+        start_of_day = now_utc.replace(hour=0, minute=0, second=0, microsecond=0)
+
+        with session_scope() as db, ThreadPoolExecutor(
+            max_workers=max(1, settings.DAILY_SUMMARY_SEND_CONCURRENCY),
+            thread_name_prefix="daily-summary",
+        ) as pool:
+            for users in _iter_summary_recipients(db):
+                users_seen += len(users)
+                figures = _daily_summary_figures(db, [u.id for u in users], start_of_day)
+                # Drain each chunk before fetching the next so at most one
+                # chunk of recipients is in flight.
+                for outcome, window_skip in pool.map(
+                    lambda u, f=figures: deliver(u, f.get(u.id, zero)), users
+                ):
+                    counts[outcome] += 1
+                    skipped_window += window_skip
 
         logger.info(
-            "Daily summaries: wa_sent=%d email_sent=%d failed=%d skipped_24h_window=%d",
-            sent, email_sent, failed, skipped_window,
+            "Daily summaries: users=%d wa_sent=%d email_sent=%d failed=%d skipped_24h_window=%d",
+            users_seen, counts["whatsapp"], counts["email"], counts["failed"], skipped_window,
         )
         return {
             "success": True,
-            "sent": sent,
-            "email_sent": email_sent,
-            "failed": failed,
+            "sent": counts["whatsapp"],
+            "email_sent": counts["email"],
+            "failed": counts["failed"],
             "skipped_window": skipped_window,
         }
 
@@ -246,45 +246,46 @@ def _notify_tax_report_whatsapp(
     try:
         from app.bot.conversation_window import is_window_open
         from app.core.whatsapp import get_whatsapp_client
-        from app.utils.whatsapp_budget import can_send_whatsapp, record_whatsapp_send
-
-        if not can_send_whatsapp(priority=False):
-            return False
-
-        client = get_whatsapp_client()
-        template_name = getattr(settings, "WHATSAPP_TEMPLATE_TAX_REPORT_READY", None)
-        template_lang = getattr(settings, "WHATSAPP_TEMPLATE_LANGUAGE", "en")
-
-        # Template first
-        if template_name:
-            first_name = (user.name or "").split()[0] or "there"
-            ok = client.send_template(
-                user.phone,
-                template_name,
-                template_lang,
-                components=[{
-                    "type": "body",
-                    "parameters": [
-                        {"type": "text", "text": f"{first_name}, your "},
-                        {"type": "text", "text": period},
-                    ],
-                }],
-            )
-            if ok:
-                record_whatsapp_send(priority=False)
-                return True
-
-        # Plain text fallback (only inside 24h window)
-        if is_window_open(user.phone):
-            msg = (
-                f"\U0001f4ca Your *{period} Tax Report* is ready!\n\n"
-                "View and download it from your dashboard:\n"
-                "\U0001f517 suoops.com/dashboard/tax-reports"
-            )
-            ok = client.send_text(user.phone, msg)
-            if ok:
-                record_whatsapp_send(priority=False)
-            return ok
+        from app.utils.whatsapp_budget import BudgetReservation
+
+        with BudgetReservation(1) as budget:
+            if not budget.available:
+                return False
+
+            client = get_whatsapp_client()
+            template_name = getattr(settings, "WHATSAPP_TEMPLATE_TAX_REPORT_READY", None)
+            template_lang = getattr(settings, "WHATSAPP_TEMPLATE_LANGUAGE", "en")
+
+            # Template first
+            if template_name:
+                first_name = (user.name or "").split()[0] or "there"
+                ok = client.send_template(
+                    user.phone,
+                    template_name,
+                    template_lang,
+                    components=[{
+                        "type": "body",
+                        "parameters": [
+                            {"type": "text", "text": f"{first_name}, your "},
+                            {"type": "text", "text": period},
+                        ],
+                    }],
+                )
+                if ok:
+                    budget.spend()
+                    return True
+
+            # Plain text fallback (only inside 24h window)
+            if is_window_open(user.phone):
+                msg = (
+                    f"\U0001f4ca Your *{period} Tax Report* is ready!\n\n"
+                    "View and download it from your dashboard:\n"
+                    "\U0001f517 suoops.com/dashboard/tax-reports"
+                )
+                ok = client.send_text(user.phone, msg)
+                if ok:
+                    budget.spend()
+                return ok
 
     except Exception as e:
         logger.warning("Tax report WA notification failed for user %s: %s", user.id, e)
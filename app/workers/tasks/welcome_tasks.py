@@ -296,31 +296,32 @@ def send_activation_followup(user_id: int) -> dict:
 
         try:
             from app.core.whatsapp import get_whatsapp_client
-            from app.utils.whatsapp_budget import can_send_whatsapp, record_whatsapp_send
+            from app.utils.whatsapp_budget import BudgetReservation
 
-            if not can_send_whatsapp(priority=False):
-                result["reason"] = "daily_budget_exhausted"
-                return result
+            with BudgetReservation(1) as budget:
+                if not budget.available:
+                    result["reason"] = "daily_budget_exhausted"
+                    return result
 
-            client = get_whatsapp_client()
-            if client.send_text(user.phone, msg):
-                record_whatsapp_send(priority=False)
-                db.add(UserEmailLog(user_id=user_id, email_type=FOLLOWUP_LOG_TYPE))
-                db.commit()
-                result["sent"] = True
-                logger.info("Sent 1-hour follow-up to user %s", user_id)
-            else:
-                # Outside 24h window — use template fallback
-                from app.core.config import settings as _settings
-                tpl = _settings.WHATSAPP_TEMPLATE_WIN_BACK
-                if tpl:
-                    lang = _settings.WHATSAPP_TEMPLATE_LANGUAGE or "en"
-                    components = [{"type": "body", "parameters": [{"type": "text", "text": name}]}]
-                    if client.send_template(user.phone, tpl, lang, components):
-                        record_whatsapp_send(priority=False)
-                        db.add(UserEmailLog(user_id=user_id, email_type=FOLLOWUP_LOG_TYPE))
-                        db.commit()
-                        result["sent"] = True
+                client = get_whatsapp_client()
+                if client.send_text(user.phone, msg):
+                    budget.spend()
+                    db.add(UserEmailLog(user_id=user_id, email_type=FOLLOWUP_LOG_TYPE))
+                    db.commit()
+                    result["sent"] = True
+                    logger.info("Sent 1-hour follow-up to user %s", user_id)
+                else:
+                    # Outside 24h window — use template fallback
+                    from app.core.config import settings as _settings
+                    tpl = _settings.WHATSAPP_TEMPLATE_WIN_BACK
+                    if tpl:
+                        lang = _settings.WHATSAPP_TEMPLATE_LANGUAGE or "en"
+                        components = [{"type": "body", "parameters": [{"type": "text", "text": name}]}]
+                        if client.send_template(user.phone, tpl, lang, components):
+                            budget.spend()
+                            db.add(UserEmailLog(user_id=user_id, email_type=FOLLOWUP_LOG_TYPE))
+                            db.commit()
+                            result["sent"] = True
         except Exception as e:
             logger.warning("1-hour follow-up failed for user %s: %s", user_id, e)
             result["reason"] = str(e)
@@ -425,25 +426,26 @@ def send_daily_professionalism_score(user_id: int) -> dict:
             result["skipped_reason"] = "already_today"
             return result
 
-        from app.utils.whatsapp_budget import can_send_whatsapp, record_whatsapp_send
+        from app.utils.whatsapp_budget import BudgetReservation
 
-        if not can_send_whatsapp():
-            result["skipped_reason"] = "budget"
-            return result
+        with BudgetReservation(1) as budget:
+            if not budget.available:
+                result["skipped_reason"] = "budget"
+                return result
 
-        try:
-            from app.core.whatsapp import get_whatsapp_client
+            try:
+                from app.core.whatsapp import get_whatsapp_client
 
-            first_name = (user.name or "there").split()[0]
-            msg = _professionalism_score_message(db, user.id, first_name, paid=False)
-            get_whatsapp_client().send_text(user.phone, msg)
-            record_whatsapp_send()
-            _record_score_today(db, user.id)
-            result["sent"] = True
-            logger.info("Daily professionalism nudge sent to user %s", user_id)
-        except Exception as e:
-            logger.warning("Daily professionalism nudge failed for user %s: %s", user_id, e)
-            result["skipped_reason"] = f"error: {e}"
+                first_name = (user.name or "there").split()[0]
+                msg = _professionalism_score_message(db, user.id, first_name, paid=False)
+                get_whatsapp_client().send_text(user.phone, msg)
+                budget.spend()
+                _record_score_today(db, user.id)
+                result["sent"] = True
+                logger.info("Daily professionalism nudge sent to user %s", user_id)
+            except Exception as e:
+                logger.warning("Daily professionalism nudge failed for user %s: %s", user_id, e)
+                result["skipped_reason"] = f"error: {e}"
     return result
 
 
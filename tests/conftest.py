@@ -135,6 +135,29 @@ def _reset_rate_limiter():
     yield
 
 
+@pytest.fixture(autouse=True)
+def _reset_local_cache():
+    """Empty the in-process cache tier so cached responses don't leak between tests."""
+    from app.core.cache import cache_clear_local
+    from app.services.inventory import product_match
+
+    cache_clear_local()
+    product_match.clear_local()
+    yield
+
+
+@pytest.fixture
+def local_cache(monkeypatch):
+    """Keep the app cache in-process for one test.
+
+    Redis outlives the per-test database, so an entry keyed by a recycled
+    user id or phone from an earlier run would otherwise be served.
+    """
+    from app.core import cache
+
+    monkeypatch.setattr(cache, "_get_client", lambda: None)
+
+
 @pytest.fixture
 def db_session():
     """Provide a transactional database session for tests."""
@@ -146,6 +169,75 @@ def db_session():
         session.close()
 
 
+@pytest.fixture
+def issuer(db_session):
+    """A committed ``(user, customer)`` pair to issue invoices between."""
+    from app.models.models import Customer, User
+
+    user = User(phone="+2348000000001", name="Issuer", email="issuer@example.com")
+    customer = Customer(name="Buyer", phone="+2348000000002")
+    db_session.add_all([user, customer])
+    db_session.commit()
+    return user, customer
+
+
+@pytest.fixture
+def make_invoice(db_session, issuer):
+    """Factory committing an invoice from ``issuer``'s user to its customer."""
+    from decimal import Decimal
+    from itertools import count
+
+    from app.models.models import Invoice
+
+    user, customer = issuer
+    numbers = count(1)
+
+    def make(amount="100", status="pending", **fields):
+        fields.setdefault("invoice_id", f"INV-TEST-{next(numbers)}")
+        invoice = Invoice(
+            issuer_id=user.id,
+            customer_id=customer.id,
+            amount=Decimal(amount),
+            status=status,
+            **fields,
+        )
+        db_session.add(invoice)
+        db_session.commit()
+        return invoice
+
+    return make
+
+
+@pytest.fixture
+def select_counter():
+    """Factory: ``select_counter("product")`` records SELECTs reading that table.
+
+    Returns the live list of captured statements; with no table, every SELECT.
+    Listeners are removed when the test ends.
+    """
+    from sqlalchemy import event
+
+    listeners = []
+
+    def start(table: str | None = None) -> list[str]:
+        seen: list[str] = []
+        needle = f"FROM {table}" if table else None
+
+        def _capture(conn, cursor, statement, params, context, executemany):
+            if statement.lstrip().upper().startswith("SELECT") and (
+                needle is None or needle in statement
+            ):
+                seen.append(statement)
+
+        event.listen(test_engine, "before_cursor_execute", _capture)
+        listeners.append(_capture)
+        return seen
+
+    yield start
+    for listener in listeners:
+        event.remove(test_engine, "before_cursor_execute", listener)
+
+
 # FastAPI TestClient fixture expected by some tests (e.g., invoice verification)
 
 
@@ -252,3 +252,15 @@ def test_brevo_sync_segment_unconfigured(admin_client, seeded):
     # No BREVO_CONTACTS_API_KEY -> handler returns a "not configured" result.
     r = admin_client.post("/admin/brevo/sync/inactive")
     assert r.status_code < 500
+
+
+def test_list_users_cursor_walk(admin_client, seeded):
+    first = admin_client.get("/admin/users?limit=3")
+    assert first.status_code == 200
+    cursor = first.headers["X-Next-Cursor"]
+    rest = admin_client.get(f"/admin/users?limit=3&cursor={cursor}")
+    assert rest.status_code == 200
+    assert "X-Next-Cursor" not in rest.headers
+    ids = [u["id"] for u in first.json()] + [u["id"] for u in rest.json()]
+    assert sorted(ids) == sorted(seeded["users"])
+    assert admin_client.get("/admin/users?cursor=not-a-cursor").status_code == 400
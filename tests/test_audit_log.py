@@ -60,3 +60,53 @@ def test_audit_chain_recomputes_and_detects_tampering():
     tampered = hash_entry("", "a.HACKED", rows[0].user_id, rows[0].status, rows[0].details)
     assert tampered != rows[0].entry_hash
 
+
+
+def test_audit_batch_insert_extends_chain_linearly():
+    from app.core.audit import hash_entry
+
+    audit._persist_audit_batch(
+        [{"action": f"batch.{i}", "user_id": i, "status": "success"} for i in range(3)]
+    )
+    audit._persist_audit_batch([{"action": "batch.3", "user_id": 3, "status": "success"}])
+
+    with SessionLocal() as db:
+        rows = db.query(AuditLog).order_by(AuditLog.id).all()
+
+    assert [r.action for r in rows] == ["batch.0", "batch.1", "batch.2", "batch.3"]
+    prev = ""
+    for r in rows:
+        assert (r.prev_hash or "") == prev
+        assert r.entry_hash == hash_entry(prev, r.action, r.user_id, r.status, r.details)
+        prev = r.entry_hash
+
+
+def test_background_writer_batches_to_file_and_flushes(tmp_path):
+    import json
+
+    path = tmp_path / "audit.log"
+    writer = audit.AuditWriter(
+        str(path), to_db=True, max_queue=100, batch_size=50, flush_interval=0.05
+    )
+    for i in range(10):
+        assert writer.submit({"ts": 1, "action": "bg.event", "user_id": i, "status": "success"})
+    assert writer.close(timeout=5)
+
+    lines = path.read_text().splitlines()
+    assert [json.loads(line)["user_id"] for line in lines] == list(range(10))
+    with SessionLocal() as db:
+        assert db.query(AuditLog).filter(AuditLog.action == "bg.event").count() == 10
+
+
+def test_background_writer_drops_when_queue_full(tmp_path, monkeypatch):
+    dropped = []
+    monkeypatch.setattr(audit.metrics, "audit_event_dropped", lambda reason, count=1: dropped.append(reason))
+    writer = audit.AuditWriter(
+        str(tmp_path / "audit.log"), to_db=False, max_queue=1, batch_size=1, flush_interval=0.05
+    )
+    # Don't start the consumer so the queue stays full.
+    monkeypatch.setattr(writer, "_ensure_started", lambda: None)
+
+    assert writer.submit({"action": "one"}) is True
+    assert writer.submit({"action": "two"}) is False
+    assert dropped == ["queue_full"]
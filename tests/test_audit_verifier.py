@@ -0,0 +1,109 @@
+"""Streaming + checkpointed audit-chain verification."""
+from __future__ import annotations
+
+from sqlalchemy import update
+
+from app.core import audit
+from app.db.session import SessionLocal
+from app.models.models import AuditChainCheckpoint, AuditLog
+from app.services import audit_verifier
+
+
+def _seed(n: int, start: int = 0) -> None:
+    audit._persist_audit_batch(
+        [{"ts": 1, "action": f"test.{start + i}", "user_id": i, "status": "success"} for i in range(n)]
+    )
+
+
+def test_incremental_verify_checkpoints_and_resumes():
+    _seed(7)
+    with SessionLocal() as db:
+        first = audit_verifier.verify_incremental(db, chunk_size=3)
+        assert first.ok and first.verified == 7 and first.complete
+
+        _seed(2, start=7)
+        second = audit_verifier.verify_incremental(db, chunk_size=3)
+        # Only the rows appended since the checkpoint are re-hashed.
+        assert second.ok and second.verified == 2
+
+        ckpt = audit_verifier.latest_checkpoint(db)
+        assert ckpt.rows_verified == 9
+        assert ckpt.last_id == db.query(AuditLog.id).order_by(AuditLog.id.desc()).limit(1).scalar()
+
+
+def test_max_rows_stops_early_and_next_call_continues():
+    _seed(5)
+    with SessionLocal() as db:
+        partial = audit_verifier.verify_incremental(db, max_rows=3, chunk_size=2)
+        assert partial.ok and partial.verified == 3 and not partial.complete
+        rest = audit_verifier.verify_incremental(db, max_rows=3, chunk_size=2)
+        assert rest.ok and rest.verified == 2 and rest.complete
+
+
+def test_verify_detects_edit_after_checkpoint():
+    _seed(4)
+    with SessionLocal() as db:
+        audit_verifier.verify_incremental(db)
+        _seed(3, start=4)
+        target = db.query(AuditLog.id).order_by(AuditLog.id.desc()).limit(1).scalar() - 1
+        db.execute(update(AuditLog).where(AuditLog.id == target).values(action="forged"))
+        db.commit()
+
+        result = audit_verifier.verify_incremental(db)
+        assert not result.ok
+        assert result.reason == "content_edited"
+        assert result.first_broken_id == target
+
+
+def test_forged_checkpoint_is_rejected():
+    _seed(3)
+    with SessionLocal() as db:
+        audit_verifier.verify_incremental(db)
+        ckpt = audit_verifier.latest_checkpoint(db)
+        db.execute(
+            update(AuditChainCheckpoint)
+            .where(AuditChainCheckpoint.id == ckpt.id)
+            .values(rows_verified=ckpt.rows_verified + 100)
+        )
+        db.commit()
+
+        result = audit_verifier.verify_incremental(db)
+        assert not result.ok and result.reason == "checkpoint_invalid"
+        # A full walk ignores checkpoints and still vouches for the rows themselves.
+        assert audit_verifier.verify_full(db).ok
+
+
+def test_segments_compose_into_full_verification():
+    _seed(10)
+    with SessionLocal() as db:
+        bounds = audit_verifier.segment_bounds(db, 3)
+        assert len(bounds) == 3
+        results = [audit_verifier.verify_segment(db, lo, hi, chunk_size=2).as_dict() for lo, hi in bounds]
+        combined = audit_verifier.combine_segments(results)
+        assert combined.ok and combined.verified == 10
+
+        # Deleting a row breaks the link in whichever segment follows it.
+        victim = bounds[1][0]
+        db.query(AuditLog).filter(AuditLog.id == victim).delete()
+        db.commit()
+        results = [audit_verifier.verify_segment(db, lo, hi).as_dict() for lo, hi in bounds]
+        combined = audit_verifier.combine_segments(results)
+        assert not combined.ok
+        assert combined.reason == "chain_broken"
+        assert combined.first_broken_id == victim + 1
+
+
+def test_full_verify_task_records_checkpoint():
+    from app.workers.tasks.maintenance_tasks import (
+        record_audit_chain_verification,
+        verify_audit_chain_segment,
+    )
+
+    _seed(6)
+    with SessionLocal() as db:
+        bounds = audit_verifier.segment_bounds(db, 2)
+    results = [verify_audit_chain_segment(lo, hi) for lo, hi in bounds]
+    summary = record_audit_chain_verification(results)
+    assert summary["ok"] and summary["verified"] == 6
+    with SessionLocal() as db:
+        assert audit_verifier.latest_checkpoint(db).rows_verified == 6
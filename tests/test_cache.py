@@ -0,0 +1,151 @@
+"""Two-tier cache: LRU bounds, single-flight and stale-while-revalidate."""
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.core import cache
+
+
+@pytest.fixture(autouse=True)
+def _local_only(monkeypatch):
+    # Exercise the in-process tier deterministically, with or without Redis.
+    monkeypatch.setattr(cache, "_get_client", lambda: None)
+
+
+def test_local_lru_evicts_least_recently_used():
+    lru = cache.LocalLRU(2)
+    now = time.time()
+    entry = cache._Entry("v", now + 60, now + 60)
+    lru.set("a", entry)
+    lru.set("b", entry)
+    assert lru.get("a", now) is not None  # touch "a" so "b" is the oldest
+    lru.set("c", entry)
+    assert lru.get("b", now) is None
+    assert lru.get("a", now) is not None
+    assert lru.get("c", now) is not None
+
+
+def test_local_lru_drops_expired_entries():
+    lru = cache.LocalLRU(4)
+    now = time.time()
+    lru.set("a", cache._Entry("v", now - 1, now - 1))
+    assert lru.get("a", now) is None
+    assert len(lru) == 0
+
+
+def test_get_or_compute_runs_producer_once_for_concurrent_callers():
+    calls = []
+    barrier = threading.Barrier(8)
+
+    def producer():
+        calls.append(1)
+        time.sleep(0.1)
+        return {"total": 42}
+
+    results = []
+
+    def worker():
+        barrier.wait()
+        results.append(cache.get_or_compute("test:herd", 60, producer))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert results == [{"total": 42}] * 8
+
+
+def test_stale_value_served_while_single_caller_recomputes(monkeypatch):
+    cache.cache_set("test:swr", "old", ttl=60, stale_ttl=300)
+    # Age the entry past its freshness window but within the stale window.
+    now = time.time()
+    cache._local.set("test:swr", cache._Entry("old", now - 1, now + 300))
+
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow_producer():
+        started.set()
+        release.wait(2)
+        return "new"
+
+    refresher = threading.Thread(target=lambda: cache.get_or_compute("test:swr", 60, slow_producer, stale_ttl=300))
+    refresher.start()
+    started.wait(2)
+    # Everyone else gets the stale value immediately instead of queueing.
+    assert cache.get_or_compute("test:swr", 60, lambda: pytest.fail("producer re-run")) == "old"
+    release.set()
+    refresher.join()
+    assert cache.cache_get("test:swr") == "new"
+
+
+def test_cached_async_single_flight():
+    calls = []
+
+    async def producer():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return [1, 2, 3]
+
+    async def run():
+        return await asyncio.gather(*(cache.cached("test:async", 30, producer) for _ in range(5)))
+
+    assert asyncio.run(run()) == [[1, 2, 3]] * 5
+    assert len(calls) == 1
+
+
+def test_cache_delete_removes_local_entry():
+    cache.cache_set("test:del", {"a": 1})
+    assert cache.cache_get("test:del") == {"a": 1}
+    cache.cache_delete("test:del")
+    assert cache.cache_get("test:del") is None
+
+
+def test_tagged_key_changes_when_tag_invalidated():
+    before = cache.tagged_key("analytics:1:dashboard", "issuer:1")
+    assert cache.tagged_key("analytics:1:dashboard", "issuer:1") == before
+    cache.invalidate_tags("issuer:1")
+    assert cache.tagged_key("analytics:1:dashboard", "issuer:1") != before
+    assert cache.tagged_key("analytics:2:dashboard", "issuer:2").endswith("@0")
+
+
+def test_invalidate_on_commit_merges_items_and_waits_for_commit(db_session):
+    calls = []
+
+    def invalidate(*items):
+        calls.append(sorted(items))
+
+    cache.invalidate_on_commit(db_session, invalidate, "a", None, "")
+    cache.invalidate_on_commit(db_session, invalidate, "b", "a")
+    assert calls == []
+    db_session.commit()
+    assert calls == [["a", "b"]]
+    db_session.commit()
+    assert calls == [["a", "b"]]
+
+
+def test_invalidate_on_commit_drops_rolled_back_work(db_session):
+    calls = []
+
+    def invalidate(*items):
+        calls.append(sorted(items))
+
+    db_session.connection()  # hooks queue from inside a flush, i.e. a transaction
+    cache.invalidate_on_commit(db_session, invalidate, "outer")
+    savepoint = db_session.begin_nested()
+    cache.invalidate_on_commit(db_session, invalidate, "inner")
+    savepoint.rollback()
+    db_session.commit()
+    # A SAVEPOINT rollback keeps what the enclosing transaction queued.
+    assert calls == [["inner", "outer"]]
+
+    db_session.connection()
+    cache.invalidate_on_commit(db_session, invalidate, "rolled-back")
+    db_session.rollback()
+    db_session.commit()
+    assert calls == [["inner", "outer"]]
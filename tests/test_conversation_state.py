@@ -0,0 +1,108 @@
+"""Per-message conversation-state snapshot: one MGET in, one pipeline out."""
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from app.bot import conversation_state, onboarding_flow, owed_list_session
+from app.bot.conversation_window import is_window_open, mark_conversation_active
+from app.workers.tasks import feedback_tasks
+
+PHONE = "+2348012345678"
+
+
+class _FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.ops = []
+
+    def setex(self, key, ttl, value):
+        self.ops.append(("setex", key, ttl, value))
+
+    def delete(self, key):
+        self.ops.append(("delete", key))
+
+    def execute(self):
+        self.redis.calls.append("pipeline")
+        for op in self.ops:
+            if op[0] == "setex":
+                self.redis.store[op[1]] = op[3]
+            else:
+                self.redis.store.pop(op[1], None)
+
+
+class _FakeRedis:
+    def __init__(self, store=None):
+        self.store = dict(store or {})
+        self.calls: list[str] = []
+
+    def mget(self, keys):
+        self.calls.append("mget")
+        return [self.store.get(k) for k in keys]
+
+    def get(self, key):
+        self.calls.append("get")
+        return self.store.get(key)
+
+    def exists(self, key):
+        self.calls.append("exists")
+        return int(key in self.store)
+
+    def setex(self, key, ttl, value):
+        self.calls.append("setex")
+        self.store[key] = value
+
+    def delete(self, key):
+        self.calls.append("delete")
+        self.store.pop(key, None)
+
+    def pipeline(self, transaction=True):
+        return _FakePipeline(self)
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    r = _FakeRedis({
+        f"feedback:pending:{PHONE}": "1",
+        f"bot:owed_list:{PHONE}": json.dumps(["INV-1", "INV-2"]),
+    })
+    monkeypatch.setattr("app.db.redis_client.get_redis_client", lambda: r)
+    return r
+
+
+def test_snapshot_reads_once_and_flushes_once(fake_redis):
+    with conversation_state.snapshot(PHONE) as state:
+        assert state.feedback_pending and not state.window_open
+        mark_conversation_active(PHONE)
+        assert is_window_open(PHONE)
+        assert feedback_tasks.is_feedback_pending(PHONE)
+        feedback_tasks.clear_feedback_pending(PHONE)
+        assert not feedback_tasks.is_feedback_pending(PHONE)
+        assert owed_list_session.get_owed_list(PHONE) == ["INV-1", "INV-2"]
+        assert onboarding_flow.get_onboarding_session(PHONE) is None
+        onboarding_flow.start_onboarding(PHONE, user_id=7)
+        assert onboarding_flow.get_onboarding_session(PHONE).user_id == 7
+        # Nothing written yet.
+        assert f"wa:window:{PHONE}" not in fake_redis.store
+
+    assert fake_redis.calls == ["mget", "pipeline"]
+    assert fake_redis.store[f"wa:window:{PHONE}"] == "1"
+    assert f"feedback:pending:{PHONE}" not in fake_redis.store
+    assert json.loads(fake_redis.store[f"bot:onboarding:{PHONE}"])["user_id"] == 7
+
+
+def test_helpers_hit_redis_directly_outside_a_snapshot(fake_redis):
+    assert feedback_tasks.is_feedback_pending(PHONE)
+    mark_conversation_active(PHONE)
+    assert fake_redis.calls == ["get", "setex"]
+
+
+def test_snapshot_fails_open_without_redis(monkeypatch):
+    def _down():
+        raise ConnectionError("redis down")
+
+    monkeypatch.setattr("app.db.redis_client.get_redis_client", _down)
+    with conversation_state.snapshot(PHONE) as state:
+        assert state is None
+        assert conversation_state.current() is None
@@ -87,10 +87,10 @@ def _patch_wa(monkeypatch, ok=True, can_send=True, raise_exc=False):
         "app.core.whatsapp.get_whatsapp_client", lambda: _FakeClient(ok, raise_exc)
     )
     monkeypatch.setattr(
-        "app.utils.whatsapp_budget.can_send_whatsapp", lambda *a, **k: can_send
+        "app.utils.whatsapp_budget.reserve_whatsapp_sends", lambda n=1, *a, **k: n if can_send else 0
     )
     monkeypatch.setattr(
-        "app.utils.whatsapp_budget.record_whatsapp_send", lambda *a, **k: 1
+        "app.utils.whatsapp_budget.release_whatsapp_sends", lambda *a, **k: None
     )
 
 
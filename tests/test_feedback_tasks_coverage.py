@@ -156,8 +156,8 @@ def test_collect_feedback_whatsapp_success(monkeypatch, fake_redis, frozen_now,
     _make_invoice(db_session, user.id, cust.id, days_ago=1, suffix="a")
 
     monkeypatch.setattr(settings, "WHATSAPP_TEMPLATE_FEEDBACK", "feedback_tpl")
-    monkeypatch.setattr("app.utils.whatsapp_budget.can_send_whatsapp", lambda priority=False: True)
-    monkeypatch.setattr("app.utils.whatsapp_budget.record_whatsapp_send", lambda priority=False: None)
+    monkeypatch.setattr("app.utils.whatsapp_budget.reserve_whatsapp_sends", lambda n=1, priority=False, **k: n)
+    monkeypatch.setattr("app.utils.whatsapp_budget.release_whatsapp_sends", lambda *a, **k: None)
     client = _FakeClient()
     monkeypatch.setattr("app.core.whatsapp.get_whatsapp_client", lambda: client)
 
@@ -211,7 +211,8 @@ def test_collect_feedback_excludes_users_with_testimonial(monkeypatch, fake_redi
     db_session.commit()
 
     monkeypatch.setattr(settings, "WHATSAPP_TEMPLATE_FEEDBACK", "feedback_tpl")
-    monkeypatch.setattr("app.utils.whatsapp_budget.can_send_whatsapp", lambda priority=False: True)
+    monkeypatch.setattr("app.utils.whatsapp_budget.reserve_whatsapp_sends", lambda n=1, priority=False, **k: n)
+    monkeypatch.setattr("app.utils.whatsapp_budget.release_whatsapp_sends", lambda *a, **k: None)
     client = _FakeClient()
     monkeypatch.setattr("app.core.whatsapp.get_whatsapp_client", lambda: client)
 
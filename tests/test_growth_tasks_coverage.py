@@ -107,10 +107,10 @@ def patch_externals(monkeypatch):
         "app.bot.conversation_window.is_window_open", lambda phone: True, raising=True
     )
     monkeypatch.setattr(
-        "app.utils.whatsapp_budget.can_send_whatsapp", lambda priority=False: True, raising=True
+        "app.utils.whatsapp_budget.reserve_whatsapp_sends", lambda n=1, priority=False, **k: n, raising=True
     )
     monkeypatch.setattr(
-        "app.utils.whatsapp_budget.record_whatsapp_send", lambda priority=False: 1, raising=True
+        "app.utils.whatsapp_budget.release_whatsapp_sends", lambda *a, **k: None, raising=True
     )
     # growth_tasks imports _send_smtp_email at module import time.
     smtp = MagicMock(return_value=True)
@@ -0,0 +1,68 @@
+"""Tag-based invalidation for InvoiceCacheRepository."""
+import datetime as dt
+from decimal import Decimal
+
+import pytest
+
+from app.core import cache
+from app.models import models
+from app.services.cache_service import InvoiceCacheRepository, invalidate_invoice_tags
+
+
+class DictStore:
+    def __init__(self):
+        self.data: dict[str, str] = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+
+@pytest.fixture(autouse=True)
+def _local_only(monkeypatch):
+    monkeypatch.setattr(cache, "_get_client", lambda: None)
+
+
+def _invoice(invoice_id: str, issuer_id: int = 1, customer_id: int = 10) -> models.Invoice:
+    return models.Invoice(
+        id=1,
+        invoice_id=invoice_id,
+        issuer_id=issuer_id,
+        customer_id=customer_id,
+        amount=Decimal("5000"),
+        status="pending",
+        invoice_type="revenue",
+        created_at=dt.datetime(2026, 1, 1, tzinfo=dt.timezone.utc),
+    )
+
+
+def test_invoice_entry_keyed_by_public_invoice_id():
+    repo = InvoiceCacheRepository(DictStore())
+    repo.set_invoice(_invoice("INV-A"))
+    assert repo.get_invoice("INV-A")["amount"] == "5000"
+
+
+def test_status_change_retires_invoice_and_lists():
+    repo = InvoiceCacheRepository(DictStore())
+    repo.set_invoice(_invoice("INV-A"))
+    repo.set_invoice_list(1, [_invoice("INV-A"), _invoice("INV-B", customer_id=11)])
+    repo.set_invoice_list(2, [_invoice("INV-C", issuer_id=2, customer_id=12)])
+
+    invalidate_invoice_tags(1, 10, "INV-A")
+
+    assert repo.get_invoice("INV-A") is None
+    assert repo.get_invoice_list(1) is None
+    # Unrelated issuer's list survives.
+    assert repo.get_invoice_list(2) is not None
+
+
+def test_customer_tag_retires_lists_showing_that_customer():
+    repo = InvoiceCacheRepository(DictStore())
+    repo.set_invoice_list(1, [_invoice("INV-A", customer_id=10)])
+    cache.invalidate_tags("customer:10")
+    assert repo.get_invoice_list(1) is None
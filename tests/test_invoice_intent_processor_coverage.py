@@ -24,6 +24,7 @@ from app.core.exceptions import (
 )
 from app.models.inventory_models import Product
 from app.models.models import Customer, Invoice, User
+from app.services.inventory.product_match import ProductMatchIndex
 
 
 # ── Helpers ──────────────────────────────────────────────────────
@@ -358,28 +359,33 @@ def test_notify_customer_full_invoice_no_template(db_session):
 # ── Inventory price resolution ───────────────────────────────────
 
 
+_MATCH_INDEX = "app.services.inventory.product_match.get_match_index"
+
+
+def _catalog(*products):
+    """Match index over ``products`` that resolves without a database."""
+    index = ProductMatchIndex([p.id for p in products], [p.name for p in products])
+    by_id = {p.id: p for p in products}
+    index.resolve = lambda _db, queries: [by_id.get(i) for i in index.match_many(queries)]
+    return index
+
+
 async def test_resolve_prices_no_products_starts_pending_session():
     proc, client = _make_processor()
-    with patch(
-        "app.services.inventory.product_service.ProductService"
-    ) as PS:
-        PS.return_value.list_products.return_value = ([], 0)
+    with patch(_MATCH_INDEX, return_value=_catalog()):
         result = proc._resolve_prices_from_inventory(
             1, [{"description": "wig", "quantity": 5}], "234801",
             data={"customer_name": "Joy"},
         )
     assert result is None
-    assert "234801" in iip._pending_prices
+    assert iip.get_pending_price_session("234801") is not None
     iip.clear_pending_price_session("234801")
 
 
 async def test_resolve_prices_matches_inventory():
     proc, client = _make_processor()
     product = SimpleNamespace(name="Wig", selling_price=Decimal("5000"), id=9)
-    with patch(
-        "app.services.inventory.product_service.ProductService"
-    ) as PS:
-        PS.return_value.list_products.return_value = ([product], 1)
+    with patch(_MATCH_INDEX, return_value=_catalog(product)):
         result = proc._resolve_prices_from_inventory(
             1, [{"description": "wig", "quantity": 2}], "234801",
             data={"customer_name": "Joy"},
@@ -392,10 +398,7 @@ async def test_resolve_prices_matches_inventory():
 async def test_resolve_prices_partial_match_prompts():
     proc, client = _make_processor()
     product = SimpleNamespace(name="Wig", selling_price=Decimal("5000"), id=9)
-    with patch(
-        "app.services.inventory.product_service.ProductService"
-    ) as PS:
-        PS.return_value.list_products.return_value = ([product], 1)
+    with patch(_MATCH_INDEX, return_value=_catalog(product)):
         result = proc._resolve_prices_from_inventory(
             1, [
                 {"description": "wig", "quantity": 2},
@@ -560,32 +563,32 @@ def test_start_pending_price_session_prompts():
 
 async def test_handle_price_reply_creates_invoice():
     proc, client = _make_processor()
-    iip._pending_prices["234801"] = iip.PendingPriceSession(
+    iip.save_pending_price_session("234801", iip.PendingPriceSession(
         user_id=42,
         lines=[{"description": "wig", "quantity": 5},
                {"description": "shoe", "quantity": 10}],
         data={"customer_name": "Tonye", "customer_phone": "08012345678"},
-    )
+    ))
     with patch.object(proc, "_enforce_quota", return_value=True), \
          patch.object(proc, "_create_invoice", new_callable=AsyncMock) as mock_create, \
          patch.object(iip, "build_invoice_service"):
         handled = await proc.handle_price_reply("234801", "5000, 3000")
     assert handled is True
-    assert "234801" not in iip._pending_prices
+    assert iip.get_pending_price_session("234801") is None
     data = mock_create.call_args[0][3]
     assert data["amount"] == Decimal("55000")
 
 
 async def test_handle_price_reply_bad_input_reprompts():
     proc, client = _make_processor()
-    iip._pending_prices["234801"] = iip.PendingPriceSession(
+    iip.save_pending_price_session("234801", iip.PendingPriceSession(
         user_id=42,
         lines=[{"description": "wig", "quantity": 5}],
         data={"customer_name": "Tonye"},
-    )
+    ))
     handled = await proc.handle_price_reply("234801", "hello world")
     assert handled is True
-    assert "234801" in iip._pending_prices  # kept for retry
+    assert iip.get_pending_price_session("234801") is not None  # kept for retry
     assert "couldn't read" in _last_text(client).lower()
     iip.clear_pending_price_session("234801")
 
@@ -617,8 +620,7 @@ def test_parse_price_reply_variants():
 
 def test_resolve_prices_no_products_no_data_blocks():
     proc, client = _make_processor()
-    with patch("app.services.inventory.product_service.ProductService") as PS:
-        PS.return_value.list_products.return_value = ([], 0)
+    with patch(_MATCH_INDEX, return_value=_catalog()):
         result = proc._resolve_prices_from_inventory(
             1, [{"description": "wig", "quantity": 5}], "234801", data=None,
         )
@@ -629,8 +631,7 @@ def test_resolve_prices_no_products_no_data_blocks():
 def test_resolve_prices_no_match_no_data_blocks():
     proc, client = _make_processor()
     product = SimpleNamespace(name="Wig", selling_price=Decimal("5000"), id=9)
-    with patch("app.services.inventory.product_service.ProductService") as PS:
-        PS.return_value.list_products.return_value = ([product], 1)
+    with patch(_MATCH_INDEX, return_value=_catalog(product)):
         result = proc._resolve_prices_from_inventory(
             1, [{"description": "unicorn", "quantity": 5}], "234801", data=None,
         )
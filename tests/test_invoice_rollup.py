@@ -0,0 +1,157 @@
+"""invoice_daily_rollup: incremental upkeep, rebuild parity, analytics reads."""
+from __future__ import annotations
+
+import datetime as dt
+from decimal import Decimal
+
+from sqlalchemy import update
+
+from app.core.config import settings
+from app.models.models import Invoice, InvoiceDailyRollup
+from app.services import analytics_service
+from app.services.invoice_rollup import rebuild_rollup
+
+
+def _rollup(db):
+    """(type, status, channel) → (count, amount), summed over days."""
+    totals: dict = {}
+    for r in db.query(InvoiceDailyRollup).all():
+        if r.invoice_count:
+            key = (r.invoice_type, r.status, r.channel)
+            count, amount = totals.get(key, (0, Decimal("0")))
+            totals[key] = (count + r.invoice_count, amount + r.amount_total)
+    return totals
+
+
+def test_flush_hook_tracks_create_status_change_and_delete(db_session, make_invoice):
+    a = make_invoice("100")
+    make_invoice("50", channel="whatsapp")
+    make_invoice("30", invoice_type="expense", status="paid")
+    assert _rollup(db_session) == {
+        ("revenue", "pending", ""): (1, Decimal("100")),
+        ("revenue", "pending", "whatsapp"): (1, Decimal("50")),
+        ("expense", "paid", ""): (1, Decimal("30")),
+    }
+
+    db_session.expire_all()  # old values must still be recovered for expired attributes
+    a.status = "paid"
+    a.amount = Decimal("120")
+    db_session.commit()
+    rollup = _rollup(db_session)
+    assert ("revenue", "pending", "") not in rollup
+    assert rollup[("revenue", "paid", "")] == (1, Decimal("120"))
+
+    db_session.delete(a)
+    db_session.commit()
+    assert ("revenue", "paid", "") not in _rollup(db_session)
+
+
+def test_rollback_discards_rollup_delta(db_session, issuer):
+    user, customer = issuer
+    db_session.add(
+        Invoice(invoice_id="INV-ROLL-X", issuer_id=user.id, customer_id=customer.id, amount=Decimal("9"))
+    )
+    db_session.flush()
+    db_session.rollback()
+    assert _rollup(db_session) == {}
+
+
+def test_rebuild_matches_incremental(db_session, make_invoice):
+    make_invoice("100")
+    make_invoice("40", status="paid")
+    make_invoice("25", status="paid", channel="storefront")
+    incremental = _rollup(db_session)
+
+    rebuild_rollup(db_session)
+    db_session.commit()
+    assert _rollup(db_session) == incremental
+
+
+def test_reconcile_repairs_old_invoices_changed_outside_the_orm(db_session, make_invoice):
+    old = make_invoice("100", created_at=dt.datetime.now(dt.timezone.utc) - dt.timedelta(days=90))
+    make_invoice("40")
+    # Core UPDATE: skips the flush hook, but still bumps updated_at.
+    db_session.execute(update(Invoice).where(Invoice.id == old.id).values(status="paid"))
+    db_session.commit()
+    assert _rollup(db_session)[("revenue", "pending", "")] == (2, Decimal("140"))
+
+    rebuild_rollup(db_session, since=dt.date.today() - dt.timedelta(days=2))
+    db_session.commit()
+    assert _rollup(db_session) == {
+        ("revenue", "pending", ""): (1, Decimal("40")),
+        ("revenue", "paid", ""): (1, Decimal("100")),
+    }
+
+
+def test_analytics_rollup_and_raw_agree(db_session, issuer, make_invoice, monkeypatch):
+    user, _ = issuer
+    today = dt.date.today()
+    past = dt.datetime.now(dt.timezone.utc) - dt.timedelta(days=40)
+    make_invoice("100", status="paid", paid_at=dt.datetime.now(dt.timezone.utc))
+    make_invoice("60", due_date=past)  # overdue
+    make_invoice("70", status="awaiting_confirmation")
+    make_invoice("999", channel="storefront")  # abandoned cart
+    make_invoice("80", status="paid", created_at=past)
+    make_invoice("15", invoice_type="expense", status="paid")
+
+    def snapshot():
+        start = today - dt.timedelta(days=30)
+        return (
+            analytics_service.calculate_revenue_metrics(db_session, user.id, start, today, Decimal("1")),
+            analytics_service.calculate_invoice_metrics(db_session, user.id, start, today),
+            analytics_service.calculate_monthly_trends(db_session, user.id, today, Decimal("1")),
+            analytics_service.calculate_cash_position(db_session, user.id),
+        )
+
+    from_rollup = snapshot()
+    monkeypatch.setattr(settings, "ANALYTICS_ROLLUP_ENABLED", False)
+    assert snapshot() == from_rollup
+
+    revenue, invoices, _, cash = from_rollup
+    assert revenue.total_revenue == 230.0
+    assert revenue.overdue_revenue == 60.0
+    assert revenue.pending_revenue == 70.0
+    assert revenue.growth_rate == 25.0
+    assert invoices.total_invoices == 3
+    assert cash["invoices_created_today"] == 3
+    assert cash["expenses_today"] == 15.0
+
+
+def test_analytics_falls_back_when_rollup_unreadable(
+    db_session, issuer, make_invoice, monkeypatch
+):
+    from sqlalchemy.exc import OperationalError
+
+    user, _ = issuer
+    make_invoice("100", status="paid")
+
+    def broken(*args, **kwargs):
+        raise OperationalError("SELECT", {}, Exception("no such table"))
+
+    monkeypatch.setattr(analytics_service, "_invoice_counts_rollup", broken)
+    metrics = analytics_service.calculate_invoice_metrics(
+        db_session, user.id, dt.date.today() - dt.timedelta(days=1), dt.date.today()
+    )
+    assert metrics.paid_invoices == 1
+
+
+def test_cash_position_reads_todays_bucket_by_utc_date(
+    db_session, issuer, make_invoice, monkeypatch
+):
+    import time
+
+    user, _ = issuer
+    make_invoice("100")
+    make_invoice("15", invoice_type="expense", status="paid")
+    # At any instant one of these zones is on a different calendar day from UTC.
+    for zone in ("Pacific/Kiritimati", "Etc/GMT+12"):
+        with monkeypatch.context() as m:
+            m.setenv("TZ", zone)
+            time.tzset()
+            try:
+                cash = analytics_service.calculate_cash_position(db_session, user.id)
+            finally:
+                m.undo()
+                time.tzset()
+        assert cash["invoices_created_today"] == 1
+        assert cash["expenses_today"] == 15.0
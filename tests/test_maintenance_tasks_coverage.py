@@ -539,10 +539,10 @@ def test_winback_whatsapp_fallback(db_session, monkeypatch):
         "app.core.whatsapp.get_whatsapp_client", lambda: FakeClient()
     )
     monkeypatch.setattr(
-        "app.utils.whatsapp_budget.can_send_whatsapp", lambda *a, **k: True
+        "app.utils.whatsapp_budget.reserve_whatsapp_sends", lambda n=1, *a, **k: n
     )
     monkeypatch.setattr(
-        "app.utils.whatsapp_budget.record_whatsapp_send", lambda *a, **k: 1
+        "app.utils.whatsapp_budget.release_whatsapp_sends", lambda *a, **k: None
     )
 
     result = mt.winback_churned_businesses()
@@ -577,10 +577,10 @@ def _fake_wa(monkeypatch, send_text_ok=True, send_template_ok=True, can_send=Tru
         "app.core.whatsapp.get_whatsapp_client", lambda: FakeClient()
     )
     monkeypatch.setattr(
-        "app.utils.whatsapp_budget.can_send_whatsapp", lambda *a, **k: can_send
+        "app.utils.whatsapp_budget.reserve_whatsapp_sends", lambda n=1, *a, **k: n if can_send else 0
     )
     monkeypatch.setattr(
-        "app.utils.whatsapp_budget.record_whatsapp_send", lambda *a, **k: 1
+        "app.utils.whatsapp_budget.release_whatsapp_sends", lambda *a, **k: None
     )
 
 
@@ -0,0 +1,121 @@
+"""Marketplace search index: documents kept on write, ranked search with snippets."""
+from __future__ import annotations
+
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import update
+
+from app.models import models
+from app.models.inventory_models import Product, ProductCategory
+from app.services import marketplace_search
+
+
+def _store(db, slug, phone, *, business_name, city="Ikeja", description="Fresh food daily"):
+    owner = models.User(
+        phone=phone,
+        name="Owner",
+        business_name=business_name,
+        storefront_enabled=True,
+        store_status="active",
+        storefront_slug=slug,
+        storefront_description=description,
+        storefront_city=city,
+        storefront_state="Lagos",
+        logo_url="http://img/logo.png",
+        paystack_subaccount_active=True,
+    )
+    db.add(owner)
+    db.commit()
+    return owner
+
+
+def _product(db, owner, name, *, category=None, sku=None):
+    product = Product(
+        user_id=owner.id,
+        sku=sku or name.upper().replace(" ", "-"),
+        name=name,
+        description="Good stuff",
+        image_url="http://img/p.jpg",
+        selling_price=Decimal("1000"),
+        is_active=True,
+        track_stock=False,
+        category_id=category.id if category else None,
+    )
+    db.add(product)
+    db.commit()
+    return product
+
+
+def _document(db, owner):
+    db.expire_all()
+    return db.get(models.StorefrontSearchDocument, owner.id)
+
+
+@pytest.fixture
+def stores(db_session):
+    grains = _store(db_session, "grainhouse", "+2348160000051", business_name="Grain House")
+    cat = ProductCategory(user_id=grains.id, name="Grains")
+    db_session.add(cat)
+    db_session.commit()
+    _product(db_session, grains, "Ofada Rice", category=cat)
+    _product(db_session, grains, "Beans", category=cat)
+    rice = _store(db_session, "ricequeen", "+2348160000052", business_name="Rice Queen", description="Party jollof")
+    _product(db_session, rice, "Jollof Tray")
+    return grains, rice, cat
+
+
+def test_document_follows_profile_product_and_category_writes(db_session, stores):
+    grains, _, cat = stores
+    doc = _document(db_session, grains)
+    assert doc.store_text.startswith("Grain House")
+    assert doc.product_text == "Ofada Rice\tGrains\nBeans\tGrains"
+    assert doc.document == doc.document.lower()
+
+    grains.storefront_city = "Yaba"
+    cat.name = "Staples"
+    db_session.commit()
+    doc = _document(db_session, grains)
+    assert "Yaba" in doc.store_text
+    assert "Beans\tStaples" in doc.product_text
+
+    beans = db_session.query(Product).filter_by(user_id=grains.id, name="Beans").one()
+    beans.is_active = False
+    db_session.commit()
+    assert "Beans" not in _document(db_session, grains).product_text
+
+    grains.storefront_slug = None
+    db_session.commit()
+    assert _document(db_session, grains) is None
+
+
+def test_search_ranks_profile_matches_and_returns_snippets(client, stores):
+    body = client.get("/public/stores", params={"q": "rice"}).json()
+    assert body["total"] == 2
+    assert [s["slug"] for s in body["stores"]] == ["ricequeen", "grainhouse"]
+    assert body["stores"][1]["matched_products"] == ["Ofada Rice"]
+
+    by_category = client.get("/public/stores", params={"q": "grains"}).json()
+    assert by_category["stores"][0]["matched_products"] == ["Ofada Rice", "Beans"]
+
+    assert client.get("/public/stores", params={"q": "100%"}).json()["total"] == 0
+    assert client.get("/public/stores").json()["total"] == 2
+
+
+def test_search_keeps_live_store_gate(client, db_session, stores):
+    grains, _, _ = stores
+    grains.logo_url = None
+    db_session.commit()
+    body = client.get("/public/stores", params={"q": "rice"}).json()
+    assert [s["slug"] for s in body["stores"]] == ["ricequeen"]
+
+
+def test_rebuild_reconciles_core_writes(db_session, stores):
+    grains, _, _ = stores
+    db_session.execute(update(Product).where(Product.user_id == grains.id).values(name="Millet"))
+    db_session.commit()
+    assert "Millet" not in _document(db_session, grains).product_text
+
+    assert marketplace_search.rebuild_documents(db_session) == 2
+    db_session.commit()
+    assert _document(db_session, grains).product_text == "Millet\tGrains\nMillet\tGrains"
@@ -0,0 +1,115 @@
+"""Media process pool and the async image pipeline built on it."""
+from __future__ import annotations
+
+import io
+import time
+from unittest.mock import patch
+
+import pytest
+from PIL import Image
+
+from app.core.config import settings
+from app.services.ocr_service import OCRService
+from app.utils import image_optimizer, media_executor
+from app.utils.media_executor import MediaProcessingError, run_media
+
+
+def _jpeg(size=(4000, 3000)) -> bytes:
+    out = io.BytesIO()
+    Image.new("RGB", size, color=(200, 120, 40)).save(out, format="JPEG")
+    return out.getvalue()
+
+
+@pytest.fixture(params=["process", "thread"])
+def pool_mode(request, monkeypatch):
+    if request.param == "thread":
+        monkeypatch.setattr(settings, "MEDIA_POOL_WORKERS", 0)
+    return request.param
+
+
+def test_draft_decodes_jpeg_at_reduced_scale_but_not_below_target():
+    img = Image.open(io.BytesIO(_jpeg()))
+    image_optimizer._draft(img, (1080, 1080))
+    assert img.size == (2000, 1500)  # 1/2 scale; 1/4 would undershoot 1080x810
+
+    png = io.BytesIO()
+    Image.new("RGB", (4000, 3000)).save(png, format="PNG")
+    img = Image.open(io.BytesIO(png.getvalue()))
+    image_optimizer._draft(img, (1080, 1080))
+    assert img.size == (4000, 3000)
+
+
+def test_sync_pipelines_fit_their_boxes():
+    webp, content_type = image_optimizer.optimize_for_storefront(_jpeg(), "image/jpeg")
+    assert content_type == "image/webp"
+    assert max(Image.open(io.BytesIO(webp)).size) == 1080
+
+    prepared = image_optimizer.prepare_for_ocr(_jpeg((5000, 4000)), (2048, 2048))
+    assert Image.open(io.BytesIO(prepared)).size == (2048, 1638)
+    assert image_optimizer.prepare_for_ocr(b"not an image", (2048, 2048)) is None
+
+
+async def test_run_media_returns_result(pool_mode):
+    assert await run_media(len, b"abc") == 3
+
+
+async def test_batch_optimisation_keeps_order(pool_mode):
+    svg = b"<svg xmlns='http://www.w3.org/2000/svg'/>"
+    results = await image_optimizer.aoptimize_many(
+        [(_jpeg(), "image/jpeg"), (svg, "image/svg+xml"), (_jpeg((300, 200)), "image/jpeg")]
+    )
+    assert [ct for _, ct in results] == ["image/webp", "image/svg+xml", "image/webp"]
+    assert results[1][0] == svg
+    assert Image.open(io.BytesIO(results[2][0])).size == (300, 200)
+
+
+async def test_timeout_kills_the_job_and_the_next_call_gets_a_fresh_pool(monkeypatch):
+    monkeypatch.setattr(settings, "MEDIA_TASK_TIMEOUT", 0.5)
+    started = time.monotonic()
+    with pytest.raises(MediaProcessingError):
+        await run_media(time.sleep, 30)
+    assert time.monotonic() - started < 10
+    assert media_executor._pool is None
+    assert await run_media(len, b"ok") == 2
+
+
+async def test_oversized_input_is_refused_before_processing(monkeypatch):
+    monkeypatch.setattr(settings, "MEDIA_MAX_INPUT_BYTES", 1024)
+    content = _jpeg()
+
+    with pytest.raises(MediaProcessingError):
+        await image_optimizer.aprepare_for_ocr(content, (2048, 2048))
+    assert await image_optimizer.aoptimize_for_storefront(content, "image/jpeg") == (
+        content,
+        "image/jpeg",
+    )
+
+    ocr = OCRService()
+    ocr.api_key = "test-key"
+    with patch("app.services.ocr_service.get_async_client") as client:
+        result = await ocr.parse_receipt(content)
+    assert result["success"] is False
+    assert "too large" in result["error"]
+    client.assert_not_called()
+
+
+async def test_daemonic_process_runs_jobs_on_a_thread(monkeypatch):
+    monkeypatch.setattr(media_executor, "_pool", None)
+    monkeypatch.setattr(media_executor, "_is_daemon", lambda: True)
+    prepared = await image_optimizer.aprepare_for_ocr(_jpeg((300, 200)), (2048, 2048))
+    assert Image.open(io.BytesIO(prepared)).size == (300, 200)
+    assert media_executor._pool is None
+
+
+async def test_pool_that_cannot_start_children_is_not_reused(monkeypatch):
+    class _RefusingPool:
+        def submit(self, *args, **kwargs):
+            raise AssertionError("daemonic processes are not allowed to have children")
+
+        def shutdown(self, **kwargs):
+            pass
+
+    monkeypatch.setattr(media_executor, "_pool", _RefusingPool())
+    monkeypatch.setattr(media_executor, "_pool_pid", media_executor.os.getpid())
+    assert await run_media(len, b"abc") == 3
+    assert media_executor._pool is None
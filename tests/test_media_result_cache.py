@@ -0,0 +1,141 @@
+"""Content-addressed caching of OCR and transcription results."""
+from __future__ import annotations
+
+import asyncio
+import io
+import json
+import os
+from unittest.mock import AsyncMock, Mock, patch
+
+import httpx
+import pytest
+from PIL import Image
+
+from app.services import openai_client
+from app.services.ocr_service import OCRService
+from app.services.speech_service import SpeechService
+
+
+def _unique_image() -> bytes:
+    # Random pixels so results cached in Redis by earlier runs can't match.
+    img = Image.frombytes("RGB", (64, 48), os.urandom(64 * 48 * 3))
+    out = io.BytesIO()
+    img.save(out, format="PNG")
+    return out.getvalue()
+
+
+def _vision_response(amount: str = "50000") -> Mock:
+    response = Mock()
+    response.raise_for_status = Mock()
+    response.json.return_value = {
+        "choices": [{"message": {"content": json.dumps({"amount": amount, "customer_name": "Ada"})}}]
+    }
+    return response
+
+
+def _whisper_response(text: str) -> Mock:
+    response = Mock()
+    response.raise_for_status = Mock()
+    response.json.return_value = {"text": text}
+    return response
+
+
+@pytest.fixture
+def ocr():
+    service = OCRService()
+    service.api_key = "test-key"
+    return service
+
+
+@pytest.fixture
+def speech():
+    service = SpeechService()
+    service.api_key = "test-key"
+    return service
+
+
+async def test_repeat_receipt_costs_one_api_call(ocr):
+    image = _unique_image()
+    post = AsyncMock(return_value=_vision_response())
+    with patch("app.services.ocr_service.get_async_client") as client:
+        client.return_value.post = post
+        first = await ocr.parse_receipt(image, context="salon")
+        second = await ocr.parse_receipt(image, context="salon")
+
+    assert first["success"] is True and first["amount"] == "50000"
+    assert second == first
+    assert post.await_count == 1
+
+
+async def test_concurrent_duplicates_share_one_call(ocr):
+    image = _unique_image()
+
+    async def slow_post(*args, **kwargs):
+        await asyncio.sleep(0.05)
+        return _vision_response()
+
+    post = AsyncMock(side_effect=slow_post)
+    with patch("app.services.ocr_service.get_async_client") as client:
+        client.return_value.post = post
+        results = await asyncio.gather(*(ocr.parse_receipt(image) for _ in range(5)))
+
+    assert all(r["success"] for r in results)
+    assert post.await_count == 1
+
+
+async def test_context_and_image_are_part_of_the_key(ocr):
+    image = _unique_image()
+    post = AsyncMock(return_value=_vision_response())
+    with patch("app.services.ocr_service.get_async_client") as client:
+        client.return_value.post = post
+        await ocr.parse_receipt(image, context="salon")
+        await ocr.parse_receipt(image, context="pharmacy")
+        await ocr.parse_receipt(_unique_image(), context="salon")
+
+    assert post.await_count == 3
+
+
+async def test_api_errors_are_not_cached(ocr):
+    image = _unique_image()
+    post = AsyncMock(side_effect=[httpx.ConnectError("down"), _vision_response()])
+    with patch("app.services.ocr_service.get_async_client") as client:
+        client.return_value.post = post
+        failed = await ocr.parse_receipt(image)
+        retried = await ocr.parse_receipt(image)
+
+    assert failed["success"] is False
+    assert retried["success"] is True
+    assert post.await_count == 2
+
+
+async def test_repeat_voice_note_is_transcribed_once_per_language(speech):
+    audio = b"OggS" + os.urandom(256)
+    post = AsyncMock(return_value=_whisper_response(" invoice Ada 5000 "))
+    with patch("app.services.speech_service.get_async_client") as client:
+        client.return_value.post = post
+        assert await speech.transcribe_audio(audio) == "invoice Ada 5000"
+        assert await speech.transcribe_audio(audio) == "invoice Ada 5000"
+        await speech.transcribe_audio(audio, language="yo")
+
+    assert post.await_count == 2
+
+
+def test_result_key_separates_variants():
+    key = openai_client.result_key("ocr", b"img", "gpt-4o", "prompt")
+    assert key.startswith("ocr:")
+    assert key == openai_client.result_key("ocr", b"img", "gpt-4o", "prompt")
+    assert key != openai_client.result_key("ocr", b"img", "gpt-4o", "prompt2")
+    assert key != openai_client.result_key("ocr", b"img", "gpt-4", "oprompt")
+
+
+def test_pooled_client_is_reused_per_event_loop():
+    async def grab():
+        client = openai_client.get_async_client()
+        assert openai_client.get_async_client() is client
+        await openai_client.aclose_client()
+        return client
+
+    first = asyncio.run(grab())
+    second = asyncio.run(grab())
+    assert first is not second
+    assert first.is_closed and second.is_closed
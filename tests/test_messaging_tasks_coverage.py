@@ -7,11 +7,15 @@ nothing touches the network.
 """
 from __future__ import annotations
 
+import asyncio
 import itertools
 import smtplib
+import threading
+import time
 from datetime import date, datetime, timedelta, timezone
 from unittest.mock import MagicMock
 
+import fakeredis
 import pytest
 
 from app.core.config import settings
@@ -99,7 +103,7 @@ def _make_invoice(
 
 @pytest.fixture
 def wa(monkeypatch):
-    """Patch WhatsApp client + budget + conversation window. Returns the mock client."""
+    """Patch WhatsApp client + conversation window, budget on fakeredis. Returns the mock client."""
     client = MagicMock()
     client.send_template.return_value = True
     client.send_text.return_value = True
@@ -108,8 +112,8 @@ def wa(monkeypatch):
 
     monkeypatch.setattr("app.core.whatsapp.get_whatsapp_client", lambda: client, raising=True)
     monkeypatch.setattr("app.bot.conversation_window.is_window_open", lambda phone: True, raising=True)
-    monkeypatch.setattr("app.utils.whatsapp_budget.can_send_whatsapp", lambda priority=False: True, raising=True)
-    monkeypatch.setattr("app.utils.whatsapp_budget.record_whatsapp_send", lambda priority=False: 1, raising=True)
+    budget = fakeredis.FakeRedis(decode_responses=True)
+    monkeypatch.setattr("app.db.redis_client.get_redis_client", lambda: budget, raising=True)
     return client
 
 
@@ -368,6 +372,60 @@ def test_overdue_reminders_whatsapp_template(db_session, wa, monkeypatch):
     assert db_session.query(models.InvoiceReminderLog).count() >= 1
 
 
+def test_overdue_reminders_logged_before_a_crash_are_not_resent(db_session, wa, monkeypatch):
+    class _WorkerLost(BaseException):
+        pass
+
+    monkeypatch.setattr(settings, "WHATSAPP_TEMPLATE_OVERDUE_REPORT", "overdue_tpl", raising=False)
+    cust = _make_customer(db_session)
+    for n in range(2):
+        _make_invoice(
+            db_session, _make_user(db_session, email=f"owner{n}@example.com"), cust, amount=5000,
+            due_date=datetime.now(timezone.utc) - timedelta(days=20),
+        )
+    wa.send_template.side_effect = [True, _WorkerLost()]
+    with pytest.raises(_WorkerLost):
+        mt.send_overdue_reminders()
+    # The first owner's reminder was committed right after it was sent.
+    db_session.expire_all()
+    assert db_session.query(models.InvoiceReminderLog).count() == 1
+
+    wa.send_template.side_effect = None
+    wa.send_template.reset_mock()
+    result = mt.send_overdue_reminders()  # the retry only sends the second one
+    assert result["sent"] == 1
+    assert wa.send_template.call_count == 1
+
+
+def test_overdue_reminders_reserve_budget_per_send(db_session, wa, monkeypatch):
+    from app.utils import whatsapp_budget
+
+    class _WorkerLost(BaseException):
+        pass
+
+    monkeypatch.setattr(settings, "WHATSAPP_TEMPLATE_OVERDUE_REPORT", "overdue_tpl", raising=False)
+    cust = _make_customer(db_session)
+    for n in range(3):
+        _make_invoice(
+            db_session, _make_user(db_session, email=f"owner{n}@example.com"), cust, amount=5000,
+            due_date=datetime.now(timezone.utc) - timedelta(days=20),
+        )
+    used = []
+
+    def send(*_args, **_kwargs):
+        used.append(whatsapp_budget.get_budget_status()["priority_used"])
+        if len(used) == 2:
+            raise _WorkerLost()
+        return True
+
+    wa.send_template.side_effect = send
+    with pytest.raises(_WorkerLost):
+        mt.send_overdue_reminders()
+    # One send reserved at a time, and the crashed one was handed back.
+    assert used == [1, 2]
+    assert whatsapp_budget.get_budget_status()["priority_used"] == 1
+
+
 def test_overdue_reminders_email_fallback(db_session, wa, smtp_ok, monkeypatch):
     # No WhatsApp template, window closed -> email fallback.
     monkeypatch.setattr(settings, "WHATSAPP_TEMPLATE_OVERDUE_REPORT", None, raising=False)
@@ -634,6 +692,31 @@ def test_ocr_parse_image_success(monkeypatch):
     assert result["success"] is True
 
 
+@pytest.mark.parametrize("persistent", [True, False])
+def test_ocr_parse_image_does_not_leak_pooled_clients(monkeypatch, persistent):
+    import base64
+
+    from app.services import openai_client
+
+    monkeypatch.setattr(settings, "WHATSAPP_INBOUND_PERSISTENT_LOOP", persistent)
+    clients = []
+
+    class FakeOCR:
+        async def parse_receipt(self, raw, context):
+            clients.append(openai_client.get_async_client())
+            return {"success": True}
+
+    monkeypatch.setattr("app.services.ocr_service.OCRService", FakeOCR, raising=True)
+    b64 = base64.b64encode(b"imgbytes").decode()
+    mt.ocr_parse_image(b64)
+    mt.ocr_parse_image(b64)
+    if persistent:  # one loop, one pool, reused
+        assert clients[0] is clients[1] and not clients[0].is_closed
+    else:  # a loop per task, each pool closed with it
+        assert clients[0] is not clients[1]
+        assert all(c.is_closed for c in clients)
+
+
 # ═══════════════════════════════════════════════════════════════════════
 # send_daily_summaries
 # ═══════════════════════════════════════════════════════════════════════
@@ -705,6 +788,36 @@ def test_daily_summaries_plain_text_and_cash_image(db_session, wa, monkeypatch):
     wa.send_image.assert_called()
 
 
+def test_daily_summaries_grouped_figures_across_chunks(db_session, wa, monkeypatch):
+    # Figures come from one grouped query per chunk, never leak between users.
+    monkeypatch.setattr(mt, "_SUMMARY_CHUNK_SIZE", 1)
+    monkeypatch.setattr(settings, "WHATSAPP_TEMPLATE_DAILY_SUMMARY", "daily_tpl", raising=False)
+    monkeypatch.setattr("app.bot.conversation_window.is_window_open", lambda phone: False, raising=True)
+    now = datetime.now(timezone.utc)
+    cust = _make_customer(db_session)
+    a = _make_user(db_session, plan=SubscriptionPlan.PRO, email=None)
+    b = _make_user(db_session, plan=SubscriptionPlan.PRO, email=None)
+    _make_invoice(db_session, a, cust, amount=15000, status="paid", paid_at=now)
+    _make_invoice(db_session, a, cust, amount=2000, invoice_type="expense", status="paid")
+    _make_invoice(db_session, b, cust, amount=7000, due_date=now - timedelta(days=3))
+    start_of_day = now.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    figures = mt._daily_summary_figures(db_session, [a.id, b.id], start_of_day)
+    assert {k: tuple(float(x) for x in v) for k, v in figures.items()} == {
+        a.id: (15000.0, 2000.0, 0.0, 0.0),
+        b.id: (0.0, 0.0, 7000.0, 1.0),
+    }
+
+    result = mt.send_daily_summaries()
+    assert result["sent"] == 2
+    params = {
+        call.args[0]: [p["text"] for p in call.kwargs["components"][0]["parameters"]]
+        for call in wa.send_template.call_args_list
+    }
+    assert params[a.phone] == ["₦15,000", "₦2,000", "₦13,000", "₦0", "0"]
+    assert params[b.phone] == ["₦0", "₦0", "₦0", "₦7,000", "1"]
+
+
 # ═══════════════════════════════════════════════════════════════════════
 # _send_daily_cash_image
 # ═══════════════════════════════════════════════════════════════════════
@@ -759,6 +872,92 @@ def test_process_whatsapp_inbound(db_session, monkeypatch):
     assert result is None
 
 
+def test_process_whatsapp_inbound_reuses_loop_and_nlp(db_session, monkeypatch):
+    loops, nlps = [], []
+
+    class FakeHandler:
+        def __init__(self, client, nlp, db):
+            nlps.append(nlp)
+
+        async def handle_incoming(self, payload):
+            loops.append(asyncio.get_running_loop())
+
+    monkeypatch.setattr("app.bot.whatsapp_adapter.WhatsAppHandler", FakeHandler, raising=True)
+    monkeypatch.setattr("app.core.whatsapp.get_whatsapp_client", lambda: MagicMock(), raising=True)
+
+    payload = {"entry": [{"changes": [{"value": {"messages": [{"from": "2348011111111"}]}}]}]}
+    mt.process_whatsapp_inbound(payload)
+    mt.process_whatsapp_inbound(payload)
+
+    assert loops[0] is loops[1] and not loops[0].is_closed()
+    assert nlps[0] is nlps[1]
+
+
+def test_inbound_sender_lock_serialises_one_sender():
+    from app.workers import inbound_runtime
+
+    active, overlaps = [], []
+
+    def work(sender):
+        with inbound_runtime.sender_lock(sender):
+            if sender in active:
+                overlaps.append(sender)
+            active.append(sender)
+            time.sleep(0.02)
+            active.remove(sender)
+
+    threads = [threading.Thread(target=work, args=(s,)) for s in ("+234A", "+234A", "+234B", "+234A")]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert overlaps == []
+
+
+def _redis_or_skip():
+    from app.db.redis_client import get_redis_client
+
+    try:
+        client = get_redis_client()
+        client.ping()
+    except Exception:  # noqa: BLE001
+        pytest.skip("Redis not reachable")
+    return client
+
+
+def test_inbound_sender_lock_waits_for_another_process(monkeypatch):
+    from app.workers import inbound_runtime
+
+    client = _redis_or_skip()
+    sender = f"+234{next(_counter)}{time.time_ns()}"
+    key = f"inbound:sender:{sender}"
+    client.set(key, "other-worker", ex=5)
+    threading.Timer(0.2, client.delete, args=(key,)).start()
+
+    started = time.monotonic()
+    with inbound_runtime.sender_lock(sender):
+        waited = time.monotonic() - started
+        assert client.exists(key)
+    assert waited >= 0.15
+    assert not client.exists(key)
+
+
+def test_inbound_sender_lock_gives_up_waiting_on_a_stuck_holder(monkeypatch):
+    from app.workers import inbound_runtime
+
+    client = _redis_or_skip()
+    monkeypatch.setattr(settings, "WHATSAPP_SENDER_LOCK_WAIT", 0.1)
+    sender = f"+234{next(_counter)}{time.time_ns()}"
+    key = f"inbound:sender:{sender}"
+    client.set(key, "stuck-worker", ex=5)
+    ran = []
+    with inbound_runtime.sender_lock(sender):
+        ran.append(sender)
+    assert ran == [sender]
+    assert client.get(key) == "stuck-worker"  # never released someone else's lease
+    client.delete(key)
+
+
 # ═══════════════════════════════════════════════════════════════════════
 # _notify_owner_escalation
 # ═══════════════════════════════════════════════════════════════════════
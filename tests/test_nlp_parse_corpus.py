@@ -0,0 +1,93 @@
+"""Golden corpus and throughput checks for NLPService invoice parsing.
+
+``data/nlp_invoice_corpus.json`` holds real-world shaped invoice messages
+(typed and transcribed) with the entities the parser must produce for them,
+quirks included. Due dates are resolved against a frozen clock
+(Wednesday 2026-03-04 12:00 UTC).
+"""
+from __future__ import annotations
+
+import datetime as dt
+import json
+import time
+from decimal import Decimal
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from app.bot import nlp_service
+from app.bot.nlp_service import NLPService
+
+CORPUS = json.loads(
+    (Path(__file__).parent / "data" / "nlp_invoice_corpus.json").read_text(encoding="utf-8")
+)
+
+# An order of magnitude below a laptop run, so slow CI runners don't flake;
+# a per-call regex compile or an extra pass per message still trips them.
+MIN_PARSES_PER_SECOND = 2_000
+MIN_LINE_ITEM_EXTRACTIONS_PER_SECOND = 5_000
+
+
+class _FrozenDateTime(dt.datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return cls(2026, 3, 4, 12, 0, tzinfo=tz)
+
+
+@pytest.fixture
+def frozen_clock(monkeypatch):
+    monkeypatch.setattr(
+        nlp_service,
+        "dt",
+        SimpleNamespace(datetime=_FrozenDateTime, timedelta=dt.timedelta, timezone=dt.timezone),
+    )
+
+
+def _jsonable(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, dt.datetime):
+        return value.isoformat()
+    if isinstance(value, dict):
+        return {k: _jsonable(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_jsonable(v) for v in value]
+    return value
+
+
+def _parse(nlp: NLPService, case: dict):
+    return nlp.parse_text(
+        case["text"],
+        is_speech=case.get("is_speech", False),
+        caller_currency=case.get("caller_currency", "NGN"),
+    )
+
+
+def _rate(fn, messages, *, rounds: int = 20) -> float:
+    fn(messages[0])  # warm up
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for message in messages:
+            fn(message)
+    return rounds * len(messages) / (time.perf_counter() - start)
+
+
+@pytest.mark.parametrize("case", CORPUS, ids=[c["text"][:40] for c in CORPUS])
+def test_corpus_parses_match_golden(case, frozen_clock):
+    result = _parse(NLPService(), case)
+    assert result.intent == case["intent"]
+    assert _jsonable(result.entities) == case["entities"]
+
+
+def test_parse_throughput():
+    nlp = NLPService()
+    rate = _rate(lambda case: _parse(nlp, case), CORPUS)
+    assert rate >= MIN_PARSES_PER_SECOND, f"{rate:.0f} messages/s"
+
+
+def test_line_item_extraction_throughput():
+    nlp = NLPService()
+    texts = [c["text"].lower() for c in CORPUS if c["intent"] == "create_invoice"]
+    rate = _rate(lambda text: nlp._extract_line_items(text, set()), texts)
+    assert rate >= MIN_LINE_ITEM_EXTRACTIONS_PER_SECOND, f"{rate:.0f} extractions/s"
@@ -151,8 +151,8 @@ async def test_call_vision_api_success(ocr_service, sample_image_bytes, mock_vis
     }
     mock_response.raise_for_status = Mock()
     
-    with patch('httpx.AsyncClient') as mock_client:
-        mock_client.return_value.__aenter__.return_value.post = AsyncMock(return_value=mock_response)
+    with patch('app.services.ocr_service.get_async_client') as mock_client:
+        mock_client.return_value.post = AsyncMock(return_value=mock_response)
         
         result = await ocr_service._call_vision_api(base64_image, context=None)
         
@@ -176,9 +176,9 @@ async def test_call_vision_api_with_context(ocr_service, sample_image_bytes):
     }
     mock_response.raise_for_status = Mock()
     
-    with patch('httpx.AsyncClient') as mock_client:
+    with patch('app.services.ocr_service.get_async_client') as mock_client:
         mock_post = AsyncMock(return_value=mock_response)
-        mock_client.return_value.__aenter__.return_value.post = mock_post
+        mock_client.return_value.post = mock_post
         
         await ocr_service._call_vision_api(base64_image, context="hair salon")
         
@@ -289,8 +289,8 @@ async def test_parse_receipt_success(ocr_service, sample_image_bytes, mock_visio
     }
     mock_response.raise_for_status = Mock()
     
-    with patch('httpx.AsyncClient') as mock_client:
-        mock_client.return_value.__aenter__.return_value.post = AsyncMock(return_value=mock_response)
+    with patch('app.services.ocr_service.get_async_client') as mock_client:
+        mock_client.return_value.post = AsyncMock(return_value=mock_response)
         
         result = await ocr_service.parse_receipt(sample_image_bytes, context="hair salon")
         
@@ -314,8 +314,8 @@ async def test_parse_receipt_invalid_image(ocr_service):
 @pytest.mark.asyncio
 async def test_parse_receipt_api_error(ocr_service, sample_image_bytes):
     """Test handling of Vision API errors."""
-    with patch('httpx.AsyncClient') as mock_client:
-        mock_client.return_value.__aenter__.return_value.post = AsyncMock(
+    with patch('app.services.ocr_service.get_async_client') as mock_client:
+        mock_client.return_value.post = AsyncMock(
             side_effect=Exception("API Error")
         )
         
@@ -0,0 +1,126 @@
+"""Keyset (cursor) pagination for invoice and product lists."""
+from __future__ import annotations
+
+import datetime as dt
+from decimal import Decimal
+
+import pytest
+
+from app.models.inventory_models import Product
+from app.models.models import Invoice
+from app.services.inventory import build_inventory_service
+from app.services.invoice_service import build_invoice_service
+from app.utils import pagination
+
+
+@pytest.fixture
+def catalog(db_session, issuer, make_invoice):
+    """Seven invoices and five products for the issuer; returns its user id."""
+    user, _ = issuer
+    now = dt.datetime.now(dt.timezone.utc)
+    for n in range(7):
+        make_invoice(
+            Decimal(100 + n),
+            invoice_id=f"INV-PAGE-{n}",
+            invoice_type="revenue",
+            created_at=now - dt.timedelta(days=n),
+        )
+    # Duplicate names: the id tie-breaker must keep pages disjoint.
+    for n in range(5):
+        db_session.add(
+            Product(
+                user_id=user.id,
+                name="Rice" if n < 3 else f"Beans {n}",
+                sku=f"SKU-{n}",
+                selling_price=Decimal(500),
+            )
+        )
+    db_session.commit()
+    return user.id
+
+
+def _walk(fetch):
+    seen, cursor = [], None
+    while True:
+        page = fetch(cursor)
+        seen.extend(page.items)
+        if page.next_cursor is None:
+            return seen
+        cursor = page.next_cursor
+
+
+def test_invoice_cursor_pages_match_offset_order(db_session, catalog):
+    svc = build_invoice_service(db_session)
+    expected, total = svc.list_invoices(catalog, limit=50)
+    walked = _walk(lambda c: svc.page_invoices(catalog, cursor=c, limit=3))
+    assert [i.id for i in walked] == [i.id for i in expected]
+
+    page = svc.page_invoices(catalog, limit=3)
+    assert (page.total, page.total_capped) == (total, False)
+
+
+def test_product_cursor_pages_match_offset_order(db_session, catalog):
+    svc = build_inventory_service(db_session, user_id=catalog)
+    expected, _ = svc.list_products(page_size=50)
+    walked = _walk(lambda c: svc.page_products(cursor=c, page_size=2))
+    assert [p.id for p in walked] == [p.id for p in expected]
+
+
+def test_capped_count_and_bad_cursor(db_session, catalog):
+    query = db_session.query(Invoice).filter(Invoice.issuer_id == catalog)
+    assert pagination.capped_count(query, cap=5) == (5, True)
+    assert pagination.capped_count(query, cap=50) == (7, False)
+
+    with pytest.raises(pagination.InvalidCursorError):
+        build_invoice_service(db_session).page_invoices(catalog, cursor="%%%")
+    with pytest.raises(pagination.InvalidCursorError):
+        pagination.decode_cursor(pagination.encode_cursor(1, 2), 1)
+
+
+def test_only_the_first_invoice_page_is_cached(db_session, catalog):
+    from unittest.mock import MagicMock
+
+    svc = build_invoice_service(db_session)
+    svc.cache = MagicMock()
+    first = svc.page_invoices(catalog, limit=3)
+    svc.page_invoices(catalog, cursor=first.next_cursor, limit=3)
+    svc.cache.set_invoice_list.assert_called_once_with(catalog, first.items)
+
+
+def test_capped_product_total_reports_no_page_count(db_session, catalog, monkeypatch):
+    from app.api.routes_inventory.products import list_products
+    from app.core.config import settings
+
+    svc = build_inventory_service(db_session, user_id=catalog)
+    filters = dict(
+        category_id=None, search=None, include_inactive=False,
+        low_stock_only=False, out_of_stock_only=False,
+    )
+    first = list_products(svc, page=1, page_size=2, cursor=None, **filters)
+    assert first.total_pages == 3 and first.next_cursor
+
+    monkeypatch.setattr(settings, "PAGINATION_COUNT_CAP", 2)
+    capped = list_products(svc, page=1, page_size=2, cursor=first.next_cursor, **filters)
+    assert capped.total_capped and capped.total_pages is None
+
+
+def test_invoice_route_walks_pages_by_cursor(client, db_session, catalog):
+    from app.api.dependencies import get_data_owner_id
+    from app.api.main import app
+    from app.api.routes_auth import get_current_user_id
+
+    app.dependency_overrides[get_current_user_id] = lambda: catalog
+    app.dependency_overrides[get_data_owner_id] = lambda: catalog
+    try:
+        first = client.get("/invoices/", params={"limit": 4}).json()
+        assert first["has_more"] and first["next_cursor"]
+        second = client.get("/invoices/", params={"limit": 4, "cursor": first["next_cursor"]}).json()
+    finally:
+        app.dependency_overrides.pop(get_current_user_id, None)
+        app.dependency_overrides.pop(get_data_owner_id, None)
+
+    expected, _ = build_invoice_service(db_session).list_invoices(catalog, limit=50)
+    ids = [i["invoice_id"] for i in first["items"] + second["items"]]
+    assert ids == [i.invoice_id for i in expected]
+    assert (second["total"], second["total_capped"], second["has_more"]) == (7, False, False)
+    assert second["next_cursor"] is None
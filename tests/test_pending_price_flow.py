@@ -18,6 +18,7 @@ from app.bot.invoice_intent_processor import (
     _pending_prices,
     clear_pending_price_session,
     get_pending_price_session,
+    save_pending_price_session,
 )
 from app.bot.nlp_service import NLPService
 
@@ -51,8 +52,8 @@ class TestPendingPriceSession:
             lines=[{"description": "wig", "quantity": 5}],
             data={"customer_name": "Tonye"},
         )
-        _pending_prices["2348012345678"] = session
-        assert get_pending_price_session("2348012345678") is session
+        save_pending_price_session("2348012345678", session)
+        assert get_pending_price_session("2348012345678") == session
 
     def test_missing_returns_none(self):
         assert get_pending_price_session("9999999") is None
@@ -64,16 +65,16 @@ class TestPendingPriceSession:
             data={},
         )
         session.created_at -= 1000  # expired (> 900s TTL)
-        _pending_prices["2348012345678"] = session
+        save_pending_price_session("2348012345678", session)
         assert get_pending_price_session("2348012345678") is None
-        assert "2348012345678" not in _pending_prices
+        assert _pending_prices.get("2348012345678") is None
 
     def test_clear_session(self):
-        _pending_prices["2348012345678"] = PendingPriceSession(
-            user_id=1, lines=[], data={},
+        save_pending_price_session(
+            "2348012345678", PendingPriceSession(user_id=1, lines=[], data={}),
         )
         clear_pending_price_session("2348012345678")
-        assert "2348012345678" not in _pending_prices
+        assert _pending_prices.get("2348012345678") is None
 
 
 # ── Price reply parsing tests ────────────────────────────────────
@@ -221,14 +222,14 @@ class TestHandlePriceReply:
         sender = "2348012345678"
 
         # Set up pending session
-        _pending_prices[sender] = PendingPriceSession(
+        save_pending_price_session(sender, PendingPriceSession(
             user_id=42,
             lines=[
                 {"description": "wig", "quantity": 5},
                 {"description": "shoe", "quantity": 10},
             ],
             data={"customer_name": "Tonye", "customer_phone": "08078557662"},
-        )
+        ))
 
         with (
             patch.object(proc, "_enforce_quota", return_value=True),
@@ -243,7 +244,7 @@ class TestHandlePriceReply:
 
         assert result is True
         # Session cleared
-        assert sender not in _pending_prices
+        assert _pending_prices.get(sender) is None
         # Invoice created with correct data
         assert mock_create.called
         call_data = mock_create.call_args[0][3]  # 4th arg is data
@@ -257,14 +258,14 @@ class TestHandlePriceReply:
         proc, client = _make_processor()
         sender = "2348012345678"
 
-        _pending_prices[sender] = PendingPriceSession(
+        save_pending_price_session(sender, PendingPriceSession(
             user_id=42,
             lines=[
                 {"description": "wig", "quantity": 5},
                 {"description": "shoe", "quantity": 10},
             ],
             data={"customer_name": "Tonye", "customer_phone": "08078557662"},
-        )
+        ))
 
         result = asyncio.run(
             proc.handle_price_reply(sender, "hello world"),
@@ -272,7 +273,7 @@ class TestHandlePriceReply:
 
         assert result is True
         # Session NOT cleared (user can retry)
-        assert sender in _pending_prices
+        assert _pending_prices.get(sender) is not None
         # Hint sent
         msg = client.send_text.call_args[0][1]
         assert "couldn't read" in msg.lower()
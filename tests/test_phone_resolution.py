@@ -0,0 +1,93 @@
+"""Cached phone → user resolution and its invalidation on User changes."""
+from __future__ import annotations
+
+import pytest
+
+from app.models.models import User
+from app.models.team_models import Team, TeamMember
+from app.services import phone_resolution
+
+pytestmark = pytest.mark.usefixtures("local_cache")
+
+
+@pytest.fixture
+def user_selects(select_counter):
+    return select_counter('"user"')
+
+
+def test_resolves_any_format_and_caches(db_session, user_selects):
+    user = User(phone="+2348012345678", name="Ada", phone_verified=True)
+    db_session.add(user)
+    db_session.commit()
+
+    first = phone_resolution.resolve_phone(db_session, "2348012345678")
+    assert first == phone_resolution.PhoneIdentity(user.id, True, None)
+    queries = len(user_selects)
+    assert phone_resolution.resolve_phone(db_session, "08012345678") == first
+    assert phone_resolution.resolve_phone(db_session, "+2348012345678") == first
+    assert len(user_selects) == queries
+
+
+def test_verified_match_wins_and_team_owner_is_recorded(db_session):
+    owner = User(phone="+2348000000001", name="Owner")
+    stale = User(phone="08012345678", name="Old", phone_verified=False)
+    member = User(phone="+2348012345678", name="Member", phone_verified=True)
+    db_session.add_all([owner, stale, member])
+    db_session.commit()
+    team = Team(name="Shop", admin_user_id=owner.id)
+    db_session.add(team)
+    db_session.flush()
+    db_session.add(TeamMember(team_id=team.id, user_id=member.id))
+    db_session.commit()
+
+    identity = phone_resolution.resolve_phone(db_session, "+2348012345678")
+    assert identity == phone_resolution.PhoneIdentity(member.id, True, owner.id)
+
+
+def test_unknown_numbers_are_cached_until_a_user_claims_them(db_session):
+    assert phone_resolution.resolve_phone(db_session, "+2348099999999") is None
+    user = User(phone="+2348099999999", name="New")
+    db_session.add(user)
+    db_session.commit()  # commit hook drops the negative entry
+    assert phone_resolution.resolve_phone(db_session, "+2348099999999").user_id == user.id
+
+
+def test_phone_change_and_deletion_invalidate(db_session):
+    user = User(phone="+2348012345678", name="Ada", phone_verified=True)
+    db_session.add(user)
+    db_session.commit()
+    assert phone_resolution.resolve_phone(db_session, "+2348012345678").user_id == user.id
+
+    user.phone = "+2348087654321"
+    user.phone_verified = False
+    db_session.commit()
+    assert phone_resolution.resolve_phone(db_session, "+2348012345678") is None
+    moved = phone_resolution.resolve_phone(db_session, "+2348087654321")
+    assert moved.user_id == user.id and not moved.verified
+
+    assert phone_resolution.mark_verified(db_session, "+2348087654321", moved).verified
+    assert phone_resolution.resolve_phone(db_session, "+2348087654321").verified
+
+    db_session.delete(user)
+    db_session.commit()
+    assert phone_resolution.resolve_phone(db_session, "+2348087654321") is None
+
+
+def test_joining_or_leaving_a_team_refreshes_the_owner(db_session):
+    owner = User(phone="+2348000000001", name="Owner")
+    member = User(phone="+2348012345678", name="Member", phone_verified=True)
+    db_session.add_all([owner, member])
+    db_session.commit()
+    assert phone_resolution.resolve_phone(db_session, member.phone).team_owner_id is None
+
+    team = Team(name="Shop", admin_user_id=owner.id)
+    db_session.add(team)
+    db_session.flush()
+    membership = TeamMember(team_id=team.id, user_id=member.id)
+    db_session.add(membership)
+    db_session.commit()
+    assert phone_resolution.resolve_phone(db_session, member.phone).team_owner_id == owner.id
+
+    db_session.delete(membership)
+    db_session.commit()
+    assert phone_resolution.resolve_phone(db_session, member.phone).team_owner_id is None
@@ -0,0 +1,130 @@
+"""Shared presigned URLs: stable per window, identical across processes, batched."""
+from __future__ import annotations
+
+import itertools
+
+import pytest
+
+from app.core import cache
+from app.services import presign_service
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.store: dict[str, str] = {}
+        self.mgets = 0
+
+    def get(self, key):
+        return self.store.get(key)
+
+    def mget(self, keys):
+        self.mgets += 1
+        return [self.store.get(k) for k in keys]
+
+    def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.store:
+            return None
+        self.store[key] = value
+        return True
+
+    def pipeline(self, transaction=False):
+        return _FakePipeline(self)
+
+
+class _FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.calls = []
+
+    def set(self, *args, **kwargs):
+        self.calls.append((args, kwargs))
+
+    def execute(self):
+        return [self.redis.set(*a, **kw) for a, kw in self.calls]
+
+
+class _FakeS3:
+    """Signs like boto3: a new timestamp (here, a counter) on every call."""
+
+    bucket = "assets"
+
+    def __init__(self):
+        self.signed = 0
+        self._clock = itertools.count()
+
+    def get_presigned_url(self, key, expires_in=None):
+        self.signed += 1
+        return f"https://assets.s3/{key}?X-Amz-Date={next(self._clock)}&X-Amz-Expires={expires_in}"
+
+    def extract_key_from_url(self, url):
+        return url.split("/", 3)[-1].split("?")[0] if url.startswith("https://") else None
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    r = _FakeRedis()
+    monkeypatch.setattr(cache, "_get_client", lambda: r)
+    return r
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    fake = _FakeS3()
+    monkeypatch.setattr(presign_service, "_s3", lambda: fake)
+    return fake
+
+
+def test_same_url_within_window(redis, s3):
+    first = presign_service.presign_key("logos/user_1.png")
+    assert presign_service.presign_key("logos/user_1.png") == first
+    assert s3.signed == 1
+
+
+def test_other_processes_adopt_the_first_signature(redis, s3, monkeypatch):
+    first = presign_service.presign_key("products/9.jpg", expires_in=7200)
+    # A second worker: empty local tier, its own signer and clock.
+    cache.cache_clear_local()
+    other = _FakeS3()
+    monkeypatch.setattr(presign_service, "_s3", lambda: other)
+    assert presign_service.presign_key("products/9.jpg", expires_in=7200) == first
+    assert other.signed == 0
+
+
+def test_racing_signers_converge_on_the_stored_url(redis, s3, monkeypatch):
+    first = presign_service.presign_key("products/9.jpg")
+    # Another worker signed before seeing the entry; SET NX hands it ours.
+    cache.cache_clear_local()
+    monkeypatch.setattr(presign_service, "cache_get_many", lambda keys: [None] * len(keys))
+    assert presign_service.presign_key("products/9.jpg") == first
+    assert s3.signed == 2
+
+
+def test_new_url_once_the_window_closes(redis, s3, monkeypatch):
+    now = 1_000_000.0
+    monkeypatch.setattr(presign_service.time, "time", lambda: now)
+    window, remaining = presign_service._window("a.png", 3600, now)
+    first = presign_service.presign_key("a.png", expires_in=3600)
+    cache.cache_clear_local()
+
+    now += remaining
+    assert presign_service._window("a.png", 3600, now)[0] == window + 1
+    assert presign_service.presign_key("a.png", expires_in=3600) != first
+
+
+def test_presign_many_batches_and_keeps_unsignable_urls(redis, s3):
+    presign_service.presign_key("p/1.jpg")
+    redis.mgets = 0
+    urls = presign_service.presign_many(
+        ["https://old/p/1.jpg?sig", None, "https://old/p/2.jpg?sig", "file:///local.png"]
+    )
+    assert urls[0] == presign_service.presign_key("p/1.jpg")
+    assert urls[1] is None
+    assert urls[2].startswith("https://assets.s3/p/2.jpg?")
+    assert urls[3] == "file:///local.png"
+    assert redis.mgets == 1  # local misses read in one round trip
+    assert s3.signed == 2
+
+
+def test_ttl_is_capped_at_the_aws_maximum(redis, s3):
+    url = presign_service.presign_key("a.png", expires_in=30 * 86400)
+    assert url.endswith(f"X-Amz-Expires={presign_service.MAX_TTL}")
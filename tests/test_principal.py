@@ -0,0 +1,117 @@
+"""Cached request principal: plan, team role and data owner in one lookup."""
+from __future__ import annotations
+
+import datetime as dt
+
+import fakeredis
+import pytest
+from fastapi import HTTPException
+
+from app.api.dependencies import get_data_owner_id, get_principal, require_admin_role
+from app.models.models import SubscriptionPlan, User
+from app.models.team_models import Team, TeamMember
+from app.services import principal as principal_mod
+from app.utils.feature_gate import require_plan_feature
+
+pytestmark = pytest.mark.usefixtures("local_cache")
+
+
+@pytest.fixture
+def selects(select_counter):
+    return select_counter()
+
+
+def _team(db_session):
+    owner = User(phone="+2348000000001", name="Owner", plan=SubscriptionPlan.PRO)
+    member = User(phone="+2348000000002", name="Member")
+    db_session.add_all([owner, member])
+    db_session.commit()
+    team = Team(name="Shop", admin_user_id=owner.id)
+    db_session.add(team)
+    db_session.flush()
+    db_session.add(TeamMember(team_id=team.id, user_id=member.id))
+    db_session.commit()
+    return owner, member, team
+
+
+def test_member_resolves_once_then_hits_cache(db_session, selects):
+    owner, member, _ = _team(db_session)
+    selects.clear()
+
+    p = get_principal(member.id, db_session)
+    assert (p.role, p.data_owner_id) == (principal_mod.ROLE_MEMBER, owner.id)
+    assert p.plan == SubscriptionPlan.FREE and p.owner_plan == SubscriptionPlan.PRO
+    assert get_data_owner_id(p) == owner.id
+    with pytest.raises(HTTPException) as exc:
+        require_admin_role(p)
+    assert exc.value.status_code == 403
+
+    queries = len(selects)
+    assert queries <= 2
+    assert require_admin_role(get_principal(owner.id, db_session)) == owner.id
+    get_principal(member.id, db_session)
+    require_plan_feature(db_session, member.id, "tax_reports")
+    assert len(selects) == queries + 1  # only the owner's first lookup
+
+
+def test_plan_and_team_changes_invalidate(db_session):
+    owner, member, team = _team(db_session)
+    assert get_principal(member.id, db_session).owner_plan == SubscriptionPlan.PRO
+
+    owner.plan = SubscriptionPlan.FREE
+    db_session.commit()
+    assert get_principal(member.id, db_session).owner_plan == SubscriptionPlan.FREE
+
+    db_session.delete(db_session.query(TeamMember).filter_by(user_id=member.id).one())
+    db_session.commit()
+    p = get_principal(member.id, db_session)
+    assert (p.role, p.data_owner_id) == (principal_mod.ROLE_SOLO, member.id)
+
+
+def test_expired_subscription_counts_as_free_without_commit(db_session):
+    user = User(
+        phone="+2348000000003",
+        name="Lapsed",
+        plan=SubscriptionPlan.PRO,
+        subscription_expires_at=dt.datetime.now(dt.timezone.utc) - dt.timedelta(days=1),
+    )
+    db_session.add(user)
+    db_session.commit()
+
+    assert get_principal(user.id, db_session).plan == SubscriptionPlan.FREE
+    db_session.refresh(user)
+    assert user.plan == SubscriptionPlan.PRO  # persisted by the daily expiry task
+
+
+def test_unknown_user_is_404(db_session):
+    with pytest.raises(HTTPException) as exc:
+        get_principal(999_999, db_session)
+    assert exc.value.status_code == 404
+
+
+def test_team_deletion_demotes_members(db_session):
+    owner, member, team = _team(db_session)
+    assert get_principal(member.id, db_session).role == principal_mod.ROLE_MEMBER
+
+    db_session.delete(team)
+    db_session.commit()
+    p = get_principal(member.id, db_session)
+    assert (p.role, p.data_owner_id) == (principal_mod.ROLE_SOLO, member.id)
+    assert get_principal(owner.id, db_session).role == principal_mod.ROLE_SOLO
+
+
+def test_invalidation_reaches_other_processes_local_tier(db_session, monkeypatch):
+    from app.core import cache
+
+    shared = fakeredis.FakeRedis(decode_responses=True)
+    monkeypatch.setattr(cache, "_get_client", lambda: shared)
+    owner, member, _ = _team(db_session)
+    assert get_principal(member.id, db_session).role == principal_mod.ROLE_MEMBER
+
+    # Another worker removes the membership: Redis sees the bump, but this
+    # process's local tier still holds the member entry.
+    db_session.query(TeamMember).filter_by(user_id=member.id).delete()
+    db_session.commit()
+    shared.incr(cache.tag_key(principal_mod.principal_tag(member.id)))
+
+    assert get_principal(member.id, db_session).role == principal_mod.ROLE_SOLO
@@ -16,13 +16,14 @@ from app.bot.product_invoice_flow import (
     CartSession,
     ProductInvoiceFlow,
     _carts,
-    _fuzzy_match_product,
     _parse_item_entries,
     clear_cart,
     get_cart,
+    save_cart,
 )
 from app.models.inventory_models import Product
 from app.models.models import User
+from app.services.inventory.product_match import ProductMatchIndex
 
 
 @pytest.fixture(autouse=True)
@@ -91,25 +92,13 @@ def test_parse_item_entries_variants():
 
 
 def test_fuzzy_match_product():
-    products = [
-        ("brazilian wig", SimpleObj(name="Brazilian Wig")),
-        ("red shoe", SimpleObj(name="Red Shoe")),
-    ]
-    assert _fuzzy_match_product("wig", products).name == "Brazilian Wig"
-    assert _fuzzy_match_product("red", products).name == "Red Shoe"
-    assert _fuzzy_match_product("", products) is None
-    assert _fuzzy_match_product("nonexistent", products) is None
+    index = ProductMatchIndex([1, 2], ["Brazilian Wig", "Red Shoe"])
+    assert index.match_many(["wig", "red", "", "nonexistent"]) == [1, 2, None, None]
 
 
 def test_fuzzy_match_starts_with_and_word():
-    products = [("shoe", SimpleObj(name="Shoe")), ("brazilian wig", SimpleObj(name="Brazilian Wig"))]
-    assert _fuzzy_match_product("sh", products).name == "Shoe"
-    assert _fuzzy_match_product("br", products).name == "Brazilian Wig"
-
-
-class SimpleObj:
-    def __init__(self, name):
-        self.name = name
+    index = ProductMatchIndex([1, 2], ["Shoe", "Brazilian Wig"])
+    assert index.match_many(["sh", "br"]) == [1, 2]
 
 
 # ── Cart session ─────────────────────────────────────────────────
@@ -128,12 +117,12 @@ def test_cart_session_total_and_summary():
 def test_get_cart_expired():
     session = CartSession(user_id=1)
     session.created_at -= 10_000  # older than 900s TTL
-    _carts["234801"] = session
+    save_cart("234801", session)
     assert get_cart("234801") is None
 
 
 def test_clear_cart():
-    _carts["234801"] = CartSession(user_id=1)
+    save_cart("234801", CartSession(user_id=1))
     clear_cart("234801")
     assert get_cart("234801") is None
 
@@ -204,6 +193,7 @@ def test_handle_items_reply_merges_duplicates(flow, issuer, db_session):
     # go back to items step and add more of the same
     session = get_cart("234801")
     session.step = "awaiting_items"
+    save_cart("234801", session)
     flow.handle_items_reply("234801", "3 wig")
     session = get_cart("234801")
     assert session.items[0].quantity == 5
@@ -267,7 +257,7 @@ def test_handle_add_more_with_session(flow, issuer, db_session):
 
 
 def test_handle_clear_cart(flow, issuer):
-    _carts["234801"] = CartSession(user_id=issuer.id)
+    save_cart("234801", CartSession(user_id=issuer.id))
     flow.handle_clear_cart("234801")
     assert get_cart("234801") is None
 
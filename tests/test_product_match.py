@@ -0,0 +1,78 @@
+"""Per-issuer product match index: matching rule, whole-catalog reach, caching."""
+from __future__ import annotations
+
+from decimal import Decimal
+
+import pytest
+
+from app.models.inventory_models import Product
+from app.models.models import User
+from app.services.inventory.product_match import ProductMatchIndex, get_match_index
+
+
+@pytest.fixture
+def issuer(db_session):
+    user = User(phone="+2348012340021", name="Shop Owner", business_name="Shop")
+    db_session.add(user)
+    db_session.commit()
+    return user
+
+
+@pytest.fixture
+def product_selects(select_counter):
+    return select_counter("product")
+
+
+def _add(db, user_id, name, *, active=True):
+    product = Product(
+        user_id=user_id, sku=f"SKU-{name}", name=name, selling_price=Decimal("1000"),
+        is_active=active, track_stock=False,
+    )
+    db.add(product)
+    db.commit()
+    return product
+
+
+def test_matching_rule():
+    index = ProductMatchIndex(
+        [1, 2, 3, 4, 5],
+        ["Brazilian Wig", "Fish", "Shoe", "Red Shoe Lace", "Wig"],
+    )
+    assert index.match_many(["wig", "WIG "]) == [5, 5]  # exact beats substring
+    assert index.match_many(["shoe"]) == [3]  # shortest containing name
+    assert index.match_many(["sh"]) == [3]  # same length: prefix beats mid-word
+    assert index.match_many(["lace", "razil"]) == [4, 1]  # trigram postings
+    assert index.match_many(["", "unicorn", "zz"]) == [None, None, None]
+
+
+def test_resolves_beyond_the_first_fifty_products(db_session, issuer):
+    for n in range(60):
+        _add(db_session, issuer.id, f"Item {n:02d}")
+    _add(db_session, issuer.id, "Zobo Drink")
+    _add(db_session, issuer.id, "Zebra Print", active=False)
+
+    products = get_match_index(db_session, issuer.id).resolve(
+        db_session, ["zobo", "item 07", "zebra"]
+    )
+    assert [p.name if p else None for p in products] == ["Zobo Drink", "Item 07", None]
+
+
+def test_index_is_built_once_until_the_catalog_changes(db_session, issuer, product_selects):
+    wig = _add(db_session, issuer.id, "Wig")
+    first = get_match_index(db_session, issuer.id)
+    built = len(product_selects)
+    assert get_match_index(db_session, issuer.id) is first
+    assert len(product_selects) == built
+
+    wig.quantity_in_stock = 4  # stock isn't indexed
+    db_session.commit()
+    assert get_match_index(db_session, issuer.id) is first
+
+    wig.name = "Lace Wig"
+    db_session.commit()
+    renamed = get_match_index(db_session, issuer.id)
+    assert renamed is not first
+    assert renamed.match_many(["lace"]) == [wig.id]
+
+    _add(db_session, issuer.id, "Shoe")
+    assert get_match_index(db_session, issuer.id).match_many(["shoe"]) != [None]
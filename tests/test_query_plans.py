@@ -0,0 +1,180 @@
+"""Query-plan regression suite for invoice hot paths.
+
+Runs the real code paths (invoice list, analytics ``calculate_*``, reminder
+sweeps) against a seeded database, captures every SELECT that reads
+``invoice`` and EXPLAINs it with the same parameters. The test fails if any
+plan falls back to a full scan of ``invoice``:
+
+- SQLite (default stand-in): ``EXPLAIN QUERY PLAN`` must not report
+  ``SCAN invoice``.
+- PostgreSQL (``TEST_DATABASE_URL=postgresql://...``): with
+  ``enable_seqscan = off`` — so a small seed table can't hide a missing
+  index — no ``Seq Scan`` node may read ``invoice``.
+"""
+from __future__ import annotations
+
+import datetime as dt
+import json
+import re
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import event
+
+from app.db import session as db_session
+from app.db.session import SessionLocal
+from app.models.models import Customer, Invoice, User
+from app.services import analytics_service
+from app.services.invoice_service import build_invoice_service
+
+_INVOICE_READ = re.compile(r"\bFROM\s+invoice\b|\bJOIN\s+invoice\b", re.IGNORECASE)
+
+
+def _sqlite_full_scans(conn, statement, params) -> list[str]:
+    rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", params).all()
+    return [row[-1] for row in rows if re.match(r"SCAN invoice\b", row[-1])]
+
+
+def _postgres_full_scans(conn, statement, params) -> list[str]:
+    conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+    plan = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", params).scalar()
+    plan = json.loads(plan) if isinstance(plan, str) else plan
+
+    def walk(node):
+        if node.get("Node Type") == "Seq Scan" and node.get("Relation Name") == "invoice":
+            yield f"Seq Scan on invoice (filter: {node.get('Filter')})"
+        for child in node.get("Plans", []):
+            yield from walk(child)
+
+    return list(walk(plan[0]["Plan"]))
+
+
+def full_scans(statement: str, params) -> list[str]:
+    engine = db_session.engine
+    explain = _postgres_full_scans if engine.dialect.name == "postgresql" else _sqlite_full_scans
+    with engine.connect() as conn:
+        with conn.begin():
+            return explain(conn, statement, params)
+
+
+class _Capture:
+    """Record SELECTs that read ``invoice`` while the block runs."""
+
+    def __init__(self):
+        self.statements: list[tuple[str, object]] = []
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and _INVOICE_READ.search(statement):
+            self.statements.append((statement, parameters))
+
+    def __enter__(self):
+        event.listen(db_session.engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(db_session.engine, "before_cursor_execute", self._on_execute)
+
+
+@pytest.fixture
+def seeded():
+    now = dt.datetime.now(dt.timezone.utc)
+    with SessionLocal() as db:
+        users = [
+            User(phone=f"+23480000010{i}", name=f"Plan {i}", email=f"plan{i}@example.com")
+            for i in range(3)
+        ]
+        customer = Customer(name="Plan Buyer", phone="+2348000000199")
+        db.add_all([*users, customer])
+        db.flush()
+        statuses = ["pending", "paid", "awaiting_confirmation", "cancelled"]
+        for n in range(120):
+            db.add(
+                Invoice(
+                    invoice_id=f"INV-PLAN-{n}",
+                    issuer_id=users[n % 3].id,
+                    customer_id=customer.id,
+                    amount=Decimal(100 + n),
+                    status=statuses[n % 4],
+                    invoice_type="expense" if n % 7 == 0 else "revenue",
+                    channel="storefront" if n % 5 == 0 else None,
+                    created_at=now - dt.timedelta(days=n),
+                    due_date=now - dt.timedelta(days=n - 14),
+                    paid_at=now - dt.timedelta(days=n) if n % 4 == 1 else None,
+                )
+            )
+        db.commit()
+        yield db, users[0].id
+
+
+def _assert_no_full_scans(capture: _Capture) -> None:
+    assert capture.statements, "no invoice queries captured"
+    offenders = {}
+    for statement, params in capture.statements:
+        scans = full_scans(statement, params)
+        if scans:
+            offenders[" ".join(statement.split())[:200]] = scans
+    assert not offenders, f"invoice full scans: {offenders}"
+
+
+def test_list_invoices_plan(seeded):
+    db, issuer_id = seeded
+    service = build_invoice_service(db)
+    with _Capture() as capture:
+        service.list_invoices(issuer_id)
+        service.list_invoices(issuer_id, invoice_type="revenue", start_date=dt.date.today() - dt.timedelta(days=30))
+        page = service.page_invoices(issuer_id, limit=10)
+        service.page_invoices(issuer_id, cursor=page.next_cursor, limit=10)
+    _assert_no_full_scans(capture)
+
+
+@pytest.mark.parametrize("rollup", [True, False], ids=["rollup", "raw"])
+def test_analytics_plans(seeded, rollup, monkeypatch):
+    from app.core.config import settings
+
+    db, issuer_id = seeded
+    monkeypatch.setattr(settings, "ANALYTICS_ROLLUP_ENABLED", rollup)
+    today = dt.date.today()
+    start = today - dt.timedelta(days=30)
+    with _Capture() as capture:
+        analytics_service.calculate_revenue_metrics(db, issuer_id, start, today, Decimal("1"))
+        analytics_service.calculate_invoice_metrics(db, issuer_id, start, today)
+        analytics_service.calculate_customer_metrics(db, issuer_id, start, today)
+        analytics_service.calculate_aging_report(db, issuer_id, today, Decimal("1"))
+        analytics_service.calculate_monthly_trends(db, issuer_id, today, Decimal("1"))
+        analytics_service.calculate_cash_position(db, issuer_id)
+    _assert_no_full_scans(capture)
+
+
+@pytest.mark.parametrize(
+    ("task", "selection"),
+    [
+        ("send_overdue_reminders", "invoice.due_date <"),
+        ("send_customer_payment_reminders", "invoice.due_date <="),
+        ("send_mark_paid_nudges", "GROUP BY invoice.issuer_id"),
+    ],
+)
+def test_reminder_sweep_plans(seeded, monkeypatch, task, selection):
+    from unittest.mock import MagicMock
+
+    import fakeredis
+
+    from app.workers.tasks import messaging_tasks
+
+    # Delivery always succeeds; the WhatsApp budget and cooldowns live in fakeredis.
+    client = MagicMock()
+    client.send_template.return_value = True
+    client.send_text.return_value = True
+    redis = fakeredis.FakeRedis(decode_responses=True)
+    monkeypatch.setattr("app.core.whatsapp.get_whatsapp_client", lambda: client)
+    monkeypatch.setattr("app.bot.conversation_window.is_window_open", lambda phone: True)
+    monkeypatch.setattr("app.db.redis_client.get_redis_client", lambda: redis)
+
+    with _Capture() as capture:
+        result = getattr(messaging_tasks, task).run()
+
+    assert result["success"] is True
+    assert client.send_template.called or client.send_text.called
+    assert any(selection in " ".join(stmt.split()) for stmt, _ in capture.statements), (
+        f"{task} selection query not captured"
+    )
+    _assert_no_full_scans(capture)
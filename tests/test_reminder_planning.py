@@ -0,0 +1,83 @@
+"""Bulk reminder planning: sent-key lookup, in-memory plan, per-send log writes."""
+from __future__ import annotations
+
+import datetime as dt
+
+from sqlalchemy import select
+
+from app.db.session import SessionLocal
+from app.models.models import Invoice, InvoiceReminderLog
+from app.services import reminder_planning
+
+
+def _invoice(make_invoice, n, *, days_overdue=0, age_days=10):
+    now = dt.datetime.now(dt.timezone.utc).replace(tzinfo=None)
+    return make_invoice(
+        invoice_id=f"INV-PLAN-{n}",
+        due_date=now - dt.timedelta(days=days_overdue),
+        created_at=now - dt.timedelta(days=age_days, minutes=n),
+    )
+
+
+def test_plan_skips_tiers_sent_on_any_channel(db_session, issuer, make_invoice):
+    fresh = _invoice(make_invoice, 1, days_overdue=2)
+    emailed = _invoice(make_invoice, 2, days_overdue=5)
+    critical = _invoice(make_invoice, 3, days_overdue=20)
+    db_session.add(InvoiceReminderLog(
+        invoice_id=emailed.id, reminder_type="owner_action", channel="email", recipient="x",
+    ))
+    # An earlier tier doesn't block the current one.
+    db_session.add(InvoiceReminderLog(
+        invoice_id=critical.id, reminder_type="owner_urgent", channel="whatsapp", recipient="x",
+    ))
+    db_session.commit()
+
+    sent = reminder_planning.load_sent_reminders(
+        db_session, select(Invoice.id).where(Invoice.status == "pending"), reminder_planning.OWNER_TIERS
+    )
+    assert (emailed.id, "owner_action", "email") in sent
+
+    plan, skipped = reminder_planning.plan_owner_overdue(
+        [fresh, emailed, critical], sent, dt.date.today()
+    )
+    assert skipped == 1
+    tiers = plan[issuer[0].id]
+    assert [i.id for i in tiers["owner_light"]] == [fresh.id]
+    assert tiers["owner_action"] == []
+    assert [i.id for i in tiers["owner_critical"]] == [critical.id]
+
+
+def test_log_writer_commits_each_send_and_dedups(db_session, make_invoice):
+    invs = [_invoice(make_invoice, n) for n in range(1, 6)]
+    db_session.add(InvoiceReminderLog(
+        invoice_id=invs[0].id, reminder_type="owner_light", channel="email", recipient="x",
+    ))
+    db_session.commit()
+    sent = {(invs[0].id, "owner_light", "email")}
+
+    writer = reminder_planning.ReminderLogWriter(db_session, sent)
+    writer.record([(inv.id, "owner_light") for inv in invs[:3]], "email", "owner@example.com")
+    # Durable before the next send: visible from another session right away.
+    with SessionLocal() as other:
+        assert other.query(InvoiceReminderLog).count() == 3
+    writer.record([(invs[1].id, "owner_light")], "email", "again@example.com")  # same run
+    writer.record([(inv.id, "owner_light") for inv in invs[3:]], "email", "owner@example.com")
+    assert writer.written == 4
+    assert (invs[4].id, "owner_light", "email") in sent
+    assert db_session.query(InvoiceReminderLog).count() == 5
+
+    # A row inserted by a concurrent run is ignored, not an IntegrityError.
+    racing = reminder_planning.ReminderLogWriter(db_session)
+    racing.record([(invs[2].id, "owner_light")], "email", "owner@example.com")
+    assert db_session.query(InvoiceReminderLog).count() == 5
+
+
+def test_oldest_pending_invoices_per_issuer(db_session, issuer, make_invoice):
+    invs = [_invoice(make_invoice, n, age_days=10 + n) for n in range(1, 6)]
+    recent = _invoice(make_invoice, 9, age_days=1)
+    cutoff = dt.datetime.now() - dt.timedelta(days=5)
+
+    grouped = reminder_planning.oldest_pending_invoices(db_session, [issuer[0].id], cutoff)
+
+    assert [i.id for i in grouped[issuer[0].id]] == [invs[4].id, invs[3].id, invs[2].id]
+    assert recent.id not in {i.id for i in grouped[issuer[0].id]}
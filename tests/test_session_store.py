@@ -0,0 +1,105 @@
+"""Shared bot session store: codec, optimistic versions, local fallback."""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+import pytest
+
+from app.bot import session_store
+from app.bot.session_store import SessionStore, decode, encode
+
+
+@dataclass
+class _Session:
+    items: list
+    version: int = field(default=0, compare=False)
+
+
+def _store() -> SessionStore[_Session]:
+    return SessionStore(
+        "test:session:", 60, dump=lambda s: {"i": s.items}, load=lambda d: _Session(d["i"])
+    )
+
+
+@pytest.fixture(params=["redis", "local"])
+def store(request, monkeypatch):
+    if request.param == "local":
+        monkeypatch.setattr(session_store, "_redis", lambda: None)
+    elif session_store._redis() is None:
+        pytest.skip("Redis not reachable")
+    s = _store()
+    s.clear()
+    yield s
+    s.clear()
+
+
+def test_codec_round_trip():
+    payload = {
+        "price": Decimal("5000.50"),
+        "due": datetime(2026, 8, 1, 9, 30, tzinfo=timezone.utc),
+        "day": date(2026, 8, 1),
+        "lines": [{"quantity": 5}],
+    }
+    assert decode(encode(payload)) == payload
+    with pytest.raises(TypeError):
+        encode({"row": object()})
+
+
+def test_save_bumps_version_and_get_returns_it(store):
+    session = _Session(["wig"])
+    assert store.save("234801", session) is True
+    assert session.version == 1
+    loaded = store.get("234801")
+    assert loaded == session and loaded.version == 1
+    assert store.get("999") is None
+
+
+def test_stale_save_is_rejected(store):
+    store.save("234801", _Session(["wig"]))
+    first, second = store.get("234801"), store.get("234801")
+    first.items.append("shoe")
+    assert store.save("234801", first) is True
+    second.items.append("bag")
+    assert store.save("234801", second) is False
+    assert store.get("234801").items == ["wig", "shoe"]
+    assert store.save("234801", second, force=True) is True
+    assert store.get("234801").items == ["wig", "bag"]
+
+
+def test_update_reapplies_change_after_a_conflict(store):
+    store.save("234801", _Session(["wig"]))
+    calls = 0
+
+    def _add(session):
+        nonlocal calls
+        calls += 1
+        if calls == 1:  # another worker saves between our read and write
+            other = store.get("234801")
+            other.items.append("shoe")
+            store.save("234801", other)
+        session.items.append("bag")
+        return session
+
+    updated = store.update("234801", _add)
+    assert calls == 2
+    assert updated.items == ["wig", "shoe", "bag"]
+    assert store.get("234801").items == ["wig", "shoe", "bag"]
+    assert store.update("999", _add) is None
+
+
+def test_delete(store):
+    store.save("234801", _Session(["wig"]))
+    store.delete("234801")
+    assert store.get("234801") is None
+
+
+def test_local_fallback_expires(monkeypatch):
+    monkeypatch.setattr(session_store, "_redis", lambda: None)
+    store = _store()
+    now = 1_000_000.0
+    monkeypatch.setattr(session_store.time, "time", lambda: now)
+    store.save("234801", _Session(["wig"]))
+    now += 61
+    assert store.get("234801") is None
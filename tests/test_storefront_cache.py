@@ -0,0 +1,140 @@
+"""Cached public storefront payload, ETag/304 and buffered view counts."""
+from __future__ import annotations
+
+from decimal import Decimal
+
+import fakeredis
+import pytest
+
+from app.models import models
+from app.models.inventory_models import Product
+from app.services import storefront_cache
+
+
+@pytest.fixture
+def store(db_session):
+    owner = models.User(
+        phone="+2348160000040",
+        name="Shop",
+        business_name="Cached Shop",
+        storefront_enabled=True,
+        store_status="active",
+        storefront_slug="cachedshop",
+        storefront_state="Lagos",
+    )
+    db_session.add(owner)
+    db_session.commit()
+    product = Product(
+        user_id=owner.id,
+        sku="RICE-1",
+        name="Rice",
+        description="50kg bag",
+        image_url="http://img/rice.jpg",
+        selling_price=Decimal("80000"),
+        is_active=True,
+        track_stock=False,
+    )
+    db_session.add(product)
+    db_session.commit()
+    return owner, product
+
+
+@pytest.fixture
+def product_selects(select_counter):
+    return select_counter("product")
+
+
+@pytest.fixture
+def views_redis(monkeypatch):
+    r = fakeredis.FakeRedis(decode_responses=True)
+    monkeypatch.setattr("app.db.redis_client.get_redis_client", lambda: r)
+    return r
+
+
+def test_payload_is_cached_and_served_with_etag(client, store, product_selects):
+    first = client.get("/public/store/CachedShop")
+    assert first.status_code == 200
+    assert first.json()["products"][0]["name"] == "Rice"
+    etag = first.headers["ETag"]
+    assert "max-age" in first.headers["Cache-Control"]
+    built = len(product_selects)
+
+    again = client.get("/public/store/cachedshop")
+    assert again.json() == first.json()
+    assert len(product_selects) == built
+
+    not_modified = client.get("/public/store/cachedshop", headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+
+
+def test_product_change_invalidates_payload(client, db_session, store):
+    _, product = store
+    etag = client.get("/public/store/cachedshop").headers["ETag"]
+
+    product.selling_price = Decimal("90000")
+    db_session.commit()
+    resp = client.get("/public/store/cachedshop", headers={"If-None-Match": etag})
+    assert resp.status_code == 200
+    assert resp.json()["products"][0]["price"] == 90000.0
+    assert resp.headers["ETag"] != etag
+
+
+def test_unknown_slug_is_404(client):
+    assert client.get("/public/store/nope").status_code == 404
+
+
+def test_views_are_buffered_then_flushed(client, db_session, store, views_redis):
+    owner, _ = store
+    for _ in range(3):
+        client.get("/public/store/cachedshop")
+    db_session.refresh(owner)
+    assert owner.storefront_views == 0
+    assert views_redis.hgetall(storefront_cache.VIEWS_KEY) == {str(owner.id): "3"}
+
+    assert storefront_cache.flush_views(db_session) == 1
+    db_session.refresh(owner)
+    assert owner.storefront_views == 3
+    assert views_redis.keys("storefront:views*") == []
+    assert storefront_cache.flush_views(db_session) == 0
+
+
+def test_failed_view_flush_is_rebuffered_not_lost(client, db_session, store, views_redis, monkeypatch):
+    owner, _ = store
+    client.get("/public/store/cachedshop")
+
+    def _commit_fails():
+        raise RuntimeError("connection lost")
+
+    monkeypatch.setattr(db_session, "commit", _commit_fails)
+    with pytest.raises(RuntimeError):
+        storefront_cache.flush_views(db_session)
+    monkeypatch.undo()
+    monkeypatch.setattr("app.db.redis_client.get_redis_client", lambda: views_redis)
+
+    assert views_redis.hgetall(storefront_cache.VIEWS_KEY) == {str(owner.id): "1"}
+    assert storefront_cache.flush_views(db_session) == 1
+    db_session.refresh(owner)
+    assert owner.storefront_views == 1
+
+
+def test_bulk_product_edit_resolves_slugs_once(db_session, store, select_counter):
+    owner, product = store
+    db_session.add_all(
+        Product(user_id=owner.id, sku=f"SKU-{n}", name=f"Item {n}", selling_price=Decimal("100"))
+        for n in range(5)
+    )
+    db_session.flush()
+    selects = select_counter()
+    for p in db_session.query(Product).filter_by(user_id=owner.id):
+        p.selling_price = Decimal("200")
+    db_session.commit()
+    assert len([s for s in selects if s.startswith("SELECT user.storefront_slug")]) == 1
+
+
+def test_views_write_through_without_redis(client, db_session, store, monkeypatch):
+    owner, _ = store
+    monkeypatch.setattr("app.db.redis_client.get_redis_client", lambda: None)
+    client.get("/public/store/cachedshop")
+    db_session.refresh(owner)
+    assert owner.storefront_views == 1
@@ -0,0 +1,122 @@
+"""Materialised storefront "live in search" flag, maintained on write."""
+from __future__ import annotations
+
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import update
+
+from app.api.routes_storefront import count_live_storefronts, live_storefronts_query
+from app.db import session as db_module
+from app.models import models
+from app.models.inventory_models import Product
+from app.services.storefront_live import refresh_live_flags
+
+
+def _live(db, owner) -> bool:
+    db.expire_all()
+    return db.get(models.User, owner.id).storefront_live
+
+
+@pytest.fixture
+def owner(db_session):
+    user = models.User(
+        phone="+2348160000061",
+        name="Owner",
+        business_name="Live Shop",
+        storefront_enabled=True,
+        store_status="active",
+        storefront_slug="liveshop",
+        storefront_description="Fabrics",
+        storefront_state="Lagos",
+        logo_url="http://img/logo.png",
+        paystack_subaccount_active=True,
+    )
+    db_session.add(user)
+    db_session.commit()
+    return user
+
+
+@pytest.fixture
+def product(db_session, owner):
+    item = Product(
+        user_id=owner.id,
+        sku="ANKARA-1",
+        name="Ankara",
+        description="6 yards",
+        image_url="http://img/ankara.jpg",
+        selling_price=Decimal("12000"),
+        is_active=True,
+        track_stock=False,
+    )
+    db_session.add(item)
+    db_session.commit()
+    return item
+
+
+def test_listable_product_makes_store_live(db_session, owner):
+    assert not _live(db_session, owner)
+    draft = Product(
+        user_id=owner.id, sku="DRAFT", name="Draft", selling_price=Decimal("1"),
+        is_active=True, track_stock=False,
+    )
+    db_session.add(draft)
+    db_session.commit()
+    assert not _live(db_session, owner)  # no photo or description yet
+
+    draft.description = "Lace"
+    draft.image_url = "http://img/lace.jpg"
+    db_session.commit()
+    assert _live(db_session, owner)
+    assert count_live_storefronts(db_session) == 1
+
+    db_session.delete(draft)
+    db_session.commit()
+    assert not _live(db_session, owner)
+
+
+def test_profile_and_payout_changes_follow(db_session, owner, product):
+    assert _live(db_session, owner)
+
+    owner.paystack_subaccount_active = False
+    db_session.commit()
+    assert not _live(db_session, owner)
+
+    owner.paystack_subaccount_active = True
+    db_session.commit()
+    assert _live(db_session, owner)
+
+    owner.store_status = "suspended"
+    db_session.commit()
+    assert not _live(db_session, owner)
+    assert count_live_storefronts(db_session) == 0
+
+
+def test_directory_lists_only_live_stores(client, db_session, owner, product):
+    assert [s["slug"] for s in client.get("/public/stores").json()["stores"]] == ["liveshop"]
+
+    product.is_active = False
+    db_session.commit()
+    assert client.get("/public/stores").json()["total"] == 0
+
+
+def test_reconcile_repairs_core_write_drift(db_session, owner, product):
+    db_session.execute(update(models.User).where(models.User.id == owner.id).values(logo_url=None))
+    db_session.commit()
+    assert _live(db_session, owner)  # Core write bypassed the hook
+
+    assert refresh_live_flags(db_session.connection()) == 1
+    db_session.commit()
+    assert not _live(db_session, owner)
+    assert refresh_live_flags(db_session.connection()) == 0
+
+
+def test_directory_page_reads_the_partial_index(db_session):
+    engine = db_module.engine
+    if engine.dialect.name != "sqlite":
+        pytest.skip("plan text is SQLite-specific")
+    query = live_storefronts_query(db_session).order_by(models.User.storefront_slug).limit(24)
+    sql = str(query.statement.compile(engine, compile_kwargs={"literal_binds": True}))
+    with engine.connect() as conn:
+        plan = [row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")]
+    assert plan == ["SCAN user USING INDEX ix_user_storefront_live_slug"]
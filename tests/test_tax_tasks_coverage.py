@@ -328,7 +328,7 @@ def test_notify_whatsapp_invalid_phone_returns_false():
 
 def test_notify_whatsapp_budget_exhausted(monkeypatch):
     monkeypatch.setattr(tax_tasks, "settings", SimpleNamespace(), raising=False)
-    monkeypatch.setattr("app.utils.whatsapp_budget.can_send_whatsapp", lambda priority=False: False)
+    monkeypatch.setattr("app.utils.whatsapp_budget.reserve_whatsapp_sends", lambda n=1, priority=False, **k: 0)
     user = SimpleNamespace(phone="+2348012345678", name="Ada", id=1)
     assert tax_tasks._notify_tax_report_whatsapp(user, "July 2025", None) is False
 
@@ -339,18 +339,17 @@ def test_notify_whatsapp_template_success(monkeypatch):
         WHATSAPP_TEMPLATE_LANGUAGE="en",
     )
     monkeypatch.setattr(tax_tasks, "settings", fake_settings, raising=False)
-    monkeypatch.setattr("app.utils.whatsapp_budget.can_send_whatsapp", lambda priority=False: True)
-    recorded = {"n": 0}
+    monkeypatch.setattr("app.utils.whatsapp_budget.reserve_whatsapp_sends", lambda n=1, priority=False, **k: n)
+    released = []
     monkeypatch.setattr(
-        "app.utils.whatsapp_budget.record_whatsapp_send",
-        lambda priority=False: recorded.__setitem__("n", recorded["n"] + 1),
+        "app.utils.whatsapp_budget.release_whatsapp_sends", lambda n, priority=False, **k: released.append(n)
     )
     client = _FakeWaClient()
     monkeypatch.setattr("app.core.whatsapp.get_whatsapp_client", lambda: client)
 
     user = SimpleNamespace(phone="+2348012345678", name="Ada Lovelace", id=1)
     assert tax_tasks._notify_tax_report_whatsapp(user, "July 2025", "http://x") is True
-    assert client.templates and recorded["n"] == 1
+    assert client.templates and released == []  # the reserved send was spent
 
 
 def test_notify_whatsapp_plaintext_fallback(monkeypatch):
@@ -359,8 +358,8 @@ def test_notify_whatsapp_plaintext_fallback(monkeypatch):
         WHATSAPP_TEMPLATE_LANGUAGE="en",
     )
     monkeypatch.setattr(tax_tasks, "settings", fake_settings, raising=False)
-    monkeypatch.setattr("app.utils.whatsapp_budget.can_send_whatsapp", lambda priority=False: True)
-    monkeypatch.setattr("app.utils.whatsapp_budget.record_whatsapp_send", lambda priority=False: None)
+    monkeypatch.setattr("app.utils.whatsapp_budget.reserve_whatsapp_sends", lambda n=1, priority=False, **k: n)
+    monkeypatch.setattr("app.utils.whatsapp_budget.release_whatsapp_sends", lambda *a, **k: None)
     monkeypatch.setattr("app.bot.conversation_window.is_window_open", lambda phone: True)
     client = _FakeWaClient()
     monkeypatch.setattr("app.core.whatsapp.get_whatsapp_client", lambda: client)
@@ -372,7 +371,7 @@ def test_notify_whatsapp_plaintext_fallback(monkeypatch):
 
 def test_notify_whatsapp_returns_false_when_over_budget(monkeypatch):
     # Over the WhatsApp budget -> early False (no template/window attempt).
-    monkeypatch.setattr("app.utils.whatsapp_budget.can_send_whatsapp", lambda priority=False: False)
+    monkeypatch.setattr("app.utils.whatsapp_budget.reserve_whatsapp_sends", lambda n=1, priority=False, **k: 0)
     monkeypatch.setattr("app.core.whatsapp.get_whatsapp_client", lambda: _FakeWaClient())
     user = SimpleNamespace(phone="+2348012345678", name="Ada", id=1)
     assert tax_tasks._notify_tax_report_whatsapp(user, "July 2025", None) is False
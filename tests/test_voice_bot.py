@@ -24,8 +24,8 @@ class TestSpeechService:
         mock_response.json.return_value = {"text": "Invoice John fifty thousand naira"}
         mock_response.raise_for_status = Mock()
         
-        with patch("httpx.AsyncClient") as mock_client:
-            mock_client.return_value.__aenter__.return_value.post = AsyncMock(
+        with patch("app.services.speech_service.get_async_client") as mock_client:
+            mock_client.return_value.post = AsyncMock(
                 return_value=mock_response
             )
             
@@ -223,15 +223,15 @@ def test_followup_already_sent(db_session):
 
 def test_followup_budget_exhausted(monkeypatch, db_session):
     user = _make_user(db_session, 1, phone="+2348012345678")
-    monkeypatch.setattr("app.utils.whatsapp_budget.can_send_whatsapp", lambda priority=False: False)
+    monkeypatch.setattr("app.utils.whatsapp_budget.reserve_whatsapp_sends", lambda n=1, priority=False, **k: 0)
     result = welcome_tasks.send_activation_followup(user.id)
     assert result["reason"] == "daily_budget_exhausted"
 
 
 def test_followup_text_success(monkeypatch, db_session):
     user = _make_user(db_session, 1, phone="+2348012345678")
-    monkeypatch.setattr("app.utils.whatsapp_budget.can_send_whatsapp", lambda priority=False: True)
-    monkeypatch.setattr("app.utils.whatsapp_budget.record_whatsapp_send", lambda priority=False: None)
+    monkeypatch.setattr("app.utils.whatsapp_budget.reserve_whatsapp_sends", lambda n=1, priority=False, **k: n)
+    monkeypatch.setattr("app.utils.whatsapp_budget.release_whatsapp_sends", lambda *a, **k: None)
     client = _FakeClient()
     monkeypatch.setattr("app.core.whatsapp.get_whatsapp_client", lambda: client)
 
@@ -247,8 +247,8 @@ def test_followup_text_success(monkeypatch, db_session):
 
 def test_followup_template_fallback(monkeypatch, db_session):
     user = _make_user(db_session, 1, phone="+2348012345678")
-    monkeypatch.setattr("app.utils.whatsapp_budget.can_send_whatsapp", lambda priority=False: True)
-    monkeypatch.setattr("app.utils.whatsapp_budget.record_whatsapp_send", lambda priority=False: None)
+    monkeypatch.setattr("app.utils.whatsapp_budget.reserve_whatsapp_sends", lambda n=1, priority=False, **k: n)
+    monkeypatch.setattr("app.utils.whatsapp_budget.release_whatsapp_sends", lambda *a, **k: None)
     monkeypatch.setattr(settings, "WHATSAPP_TEMPLATE_WIN_BACK", "win_back_tpl")
     client = _FakeClient()
     client.text_ok = False  # plain text fails -> template fallback used
@@ -261,7 +261,8 @@ def test_followup_template_fallback(monkeypatch, db_session):
 
 def test_followup_exception(monkeypatch, db_session):
     user = _make_user(db_session, 1, phone="+2348012345678")
-    monkeypatch.setattr("app.utils.whatsapp_budget.can_send_whatsapp", lambda priority=False: True)
+    monkeypatch.setattr("app.utils.whatsapp_budget.reserve_whatsapp_sends", lambda n=1, priority=False, **k: n)
+    monkeypatch.setattr("app.utils.whatsapp_budget.release_whatsapp_sends", lambda *a, **k: None)
 
     def _boom():
         raise RuntimeError("client boom")
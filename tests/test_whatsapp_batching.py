@@ -0,0 +1,142 @@
+"""Batched WhatsApp webhook deliveries: every message and status is processed."""
+from __future__ import annotations
+
+import pytest
+
+from app.bot import message_extractor
+from app.queue import whatsapp_queue
+
+
+def _msg(sender: str, mid: str, ts: int, body: str) -> dict:
+    return {"from": sender, "id": mid, "timestamp": str(ts), "type": "text", "text": {"body": body}}
+
+
+def _batched_payload() -> dict:
+    return {
+        "object": "whatsapp_business_account",
+        "entry": [
+            {
+                "id": "WABA",
+                "changes": [{
+                    "field": "messages",
+                    "value": {
+                        "messaging_product": "whatsapp",
+                        "contacts": [
+                            {"wa_id": "2348011111111", "profile": {"name": "Ada"}},
+                            {"wa_id": "2348022222222", "profile": {"name": "Bayo"}},
+                        ],
+                        "messages": [
+                            _msg("2348011111111", "wamid.A2", 102, "second"),
+                            _msg("2348022222222", "wamid.B1", 101, "hello"),
+                            _msg("2348011111111", "wamid.A1", 100, "first"),
+                        ],
+                        "statuses": [{"id": "wamid.S1", "status": "delivered", "recipient_id": "234"}],
+                    },
+                }],
+            },
+            {
+                "id": "WABA",
+                "changes": [{
+                    "field": "messages",
+                    "value": {
+                        "messaging_product": "whatsapp",
+                        "statuses": [
+                            {"id": "wamid.S2", "status": "read", "recipient_id": "234"},
+                            {
+                                "id": "wamid.S3",
+                                "status": "failed",
+                                "recipient_id": "234",
+                                "errors": [{"code": 131026, "title": "Undeliverable"}],
+                            },
+                        ],
+                    },
+                }],
+            },
+        ],
+    }
+
+
+def test_iter_messages_yields_every_message_with_its_contact():
+    messages = list(message_extractor.iter_messages(_batched_payload()))
+    assert [m["message_id"] for m in messages] == ["wamid.A2", "wamid.B1", "wamid.A1"]
+    assert [m["contact"]["profile"]["name"] for m in messages] == ["Ada", "Bayo", "Ada"]
+    # Each split payload is a normal single-message webhook.
+    single = messages[1]["raw"]
+    assert message_extractor.extract_message(single)["text"] == "hello"
+    assert "statuses" not in single["entry"][0]["changes"][0]["value"]
+
+
+def test_statuses_across_entries_are_handled_in_bulk(monkeypatch):
+    recorded = []
+
+    class _FakeOTP:
+        def record_delivery_failure(self, **kwargs):
+            recorded.append(kwargs["wamid"])
+
+    monkeypatch.setattr("app.services.otp_service.OTPService", _FakeOTP)
+    statuses = list(message_extractor.iter_statuses(_batched_payload()))
+    assert [s["id"] for s in statuses] == ["wamid.S1", "wamid.S2", "wamid.S3"]
+    counts = message_extractor.handle_statuses(statuses)
+    assert counts == {"delivered": 1, "read": 1, "failed": 1}
+    assert recorded == ["wamid.S3"]
+
+
+def test_sender_batches_keep_per_sender_order():
+    batches = whatsapp_queue._sender_batches(_batched_payload())
+    ids = [
+        [p["entry"][0]["changes"][0]["value"]["messages"][0]["id"] for p in batch]
+        for batch in batches
+    ]
+    assert ids == [["wamid.A1", "wamid.A2"], ["wamid.B1"]]
+
+
+def test_enqueue_dispatches_one_group(monkeypatch):
+    dispatched = []
+    monkeypatch.setattr(
+        whatsapp_queue, "_dispatch", lambda batches, statuses: dispatched.append((batches, statuses))
+    )
+    whatsapp_queue.enqueue_message(_batched_payload())
+    (batches, statuses), = dispatched
+    assert sum(len(b) for b in batches) == 3
+    assert len(statuses) == 3
+
+
+def test_enqueue_falls_back_to_inline_processing(monkeypatch):
+    processed, handled = [], []
+
+    def _boom(*_a):
+        raise RuntimeError("broker down")
+
+    monkeypatch.setattr(whatsapp_queue, "_dispatch", _boom)
+    monkeypatch.setattr(whatsapp_queue, "_process_synchronously", processed.append)
+    monkeypatch.setattr(message_extractor, "handle_statuses", handled.append)
+    whatsapp_queue.enqueue_message(_batched_payload())
+    assert len(processed) == 3
+    assert len(handled[0]) == 3
+
+
+def test_sender_chain_links_resume_the_rest_on_failure():
+    batch = [{"n": 1}, {"n": 2}, {"n": 3}]
+    links = whatsapp_queue.sender_chain(batch).tasks
+    errbacks = [link.options.get("link_error") for link in links]
+    assert [eb[0]["task"] for eb in errbacks[:2]] == ["whatsapp.resume_inbound"] * 2
+    assert [eb[0]["args"] for eb in errbacks[:2]] == [([{"n": 2}, {"n": 3}],), ([{"n": 3}],)]
+    assert errbacks[2] is None
+
+
+def test_a_poison_message_does_not_drop_the_senders_later_messages(monkeypatch):
+    from app.workers.celery_app import celery_app
+    from app.workers.tasks import messaging_tasks
+
+    handled = []
+
+    def fake_inbound(payload):
+        if payload["n"] == 1:
+            raise ValueError("poison")
+        handled.append(payload["n"])
+
+    monkeypatch.setattr(celery_app.conf, "task_always_eager", True)
+    monkeypatch.setattr(messaging_tasks.process_whatsapp_inbound, "run", fake_inbound)
+    with pytest.raises(ValueError):
+        whatsapp_queue.sender_chain([{"n": 1}, {"n": 2}, {"n": 3}]).apply_async()
+    assert handled == [2, 3]
@@ -0,0 +1,81 @@
+"""Atomic reserve/release semantics of the daily WhatsApp budget."""
+from __future__ import annotations
+
+import fakeredis
+import pytest
+from redis.exceptions import ResponseError
+
+from app.utils import whatsapp_budget as wb
+
+
+@pytest.fixture(params=["lua", "no-scripting"])
+def fake_redis(request, monkeypatch):
+    """A fakeredis server that runs the real budget scripts (via lupa).
+
+    ``no-scripting`` refuses EVAL, like a proxy without scripting, to exercise
+    the INCRBY-then-rollback fallback.
+    """
+    r = fakeredis.FakeRedis(decode_responses=True)
+    if request.param == "no-scripting":
+        def _refuse(*_args, **_kwargs):
+            raise ResponseError("unknown command 'EVAL'")
+
+        monkeypatch.setattr(r, "eval", _refuse)
+    monkeypatch.setattr("app.db.redis_client.get_redis_client", lambda: r)
+    monkeypatch.setattr(wb, "PRIORITY_DAILY_BUDGET", 5)
+    return r
+
+
+def test_reserve_caps_at_limit_and_release_returns_sends(fake_redis):
+    assert wb.reserve_whatsapp_sends(3, priority=True) == 3
+    assert wb.reserve_whatsapp_sends(4, priority=True) == 2
+    assert wb.reserve_whatsapp_sends(1, priority=True) == 0
+    assert wb.remaining_whatsapp_budget(priority=True) == 0
+
+    wb.release_whatsapp_sends(2, priority=True)
+    assert wb.remaining_whatsapp_budget(priority=True) == 2
+    # All-or-nothing reservations don't take a partial grant.
+    assert wb.reserve_whatsapp_sends(3, priority=True, partial=False) == 0
+    assert wb.reserve_whatsapp_sends(2, priority=True, partial=False) == 2
+
+
+def test_release_never_goes_negative(fake_redis):
+    wb.reserve_whatsapp_sends(1, priority=True)
+    wb.release_whatsapp_sends(5, priority=True)
+    assert wb.get_budget_status()["priority_used"] == 0
+
+
+def test_reservation_sets_the_counter_expiry(fake_redis):
+    wb.reserve_whatsapp_sends(1, priority=True)
+    assert 0 < fake_redis.ttl(wb._get_today_key(wb._PRIORITY_KEY)) <= wb._KEY_TTL
+
+
+def test_budget_reservation_releases_unspent(fake_redis):
+    with wb.BudgetReservation(4, priority=True) as budget:
+        assert budget.granted == 4
+        budget.spend()
+        assert wb.remaining_whatsapp_budget(priority=True) == 1
+    status = wb.get_budget_status()
+    assert status["priority_used"] == 1
+    assert status["priority_remaining"] == 4
+    # Marketing class is tracked separately.
+    assert status["marketing_used"] == 0
+
+
+def test_release_after_midnight_returns_to_the_reserving_day(fake_redis, monkeypatch):
+    monkeypatch.setattr(wb, "_today", lambda: "2026-10-16")
+    with wb.BudgetReservation(2, priority=True):
+        monkeypatch.setattr(wb, "_today", lambda: "2026-10-17")
+        wb.reserve_whatsapp_sends(1, priority=True)
+    assert fake_redis.get("wa:priority:2026-10-16") == "0"
+    assert fake_redis.get("wa:priority:2026-10-17") == "1"
+
+
+def test_reservation_fails_open_without_redis(monkeypatch):
+    def _down():
+        raise ConnectionError("redis down")
+
+    monkeypatch.setattr("app.db.redis_client.get_redis_client", _down)
+    with wb.BudgetReservation(3) as budget:
+        assert budget.granted == 3 and budget.available
+    assert wb.remaining_whatsapp_budget() == wb._get_budget_limit()
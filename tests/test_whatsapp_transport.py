@@ -0,0 +1,174 @@
+"""Pooled WhatsApp transport: connection reuse, retry policy, client wiring."""
+from __future__ import annotations
+
+import os
+
+import httpx
+import pytest
+
+from app.bot import whatsapp_transport
+from app.bot.whatsapp_client import WhatsAppClient
+
+
+@pytest.fixture
+def mock_pool(monkeypatch):
+    """Route the shared sync client through a MockTransport; record calls."""
+    calls: list[httpx.Request] = []
+    responses: list[httpx.Response] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return responses.pop(0) if responses else httpx.Response(200, json={})
+
+    client = httpx.Client(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(whatsapp_transport, "_sync_client", client)
+    monkeypatch.setattr(whatsapp_transport, "_sync_pid", os.getpid())
+    monkeypatch.setattr(whatsapp_transport.time, "sleep", lambda s: None)
+    yield calls, responses
+    client.close()
+
+
+def test_sync_client_is_shared_and_rebuilt_after_fork(monkeypatch):
+    whatsapp_transport.close_transport()
+    first = whatsapp_transport.get_sync_client()
+    assert whatsapp_transport.get_sync_client() is first
+    monkeypatch.setattr(whatsapp_transport, "_sync_pid", -1)  # as seen from a forked child
+    assert whatsapp_transport.get_sync_client() is not first
+    whatsapp_transport.close_transport()
+
+
+def test_post_retries_429_then_succeeds(mock_pool):
+    calls, responses = mock_pool
+    responses += [
+        httpx.Response(429, headers={"Retry-After": "1"}),
+        httpx.Response(200, json={"messages": [{"id": "wamid.1"}]}),
+    ]
+    resp = whatsapp_transport.request("POST", "https://graph.test/msg", endpoint="messages", json={})
+    assert resp.status_code == 200
+    assert len(calls) == 2
+
+
+def test_post_5xx_is_not_retried(mock_pool):
+    # The message may already have gone out; resending could duplicate it.
+    calls, responses = mock_pool
+    responses.append(httpx.Response(503))
+    resp = whatsapp_transport.request("POST", "https://graph.test/msg", endpoint="messages", json={})
+    assert resp.status_code == 503
+    assert len(calls) == 1
+
+
+def test_get_retries_5xx(mock_pool):
+    calls, responses = mock_pool
+    responses += [httpx.Response(503), httpx.Response(200, json={"url": "u"})]
+    resp = whatsapp_transport.request("GET", "https://graph.test/media/1", endpoint="media_lookup")
+    assert resp.status_code == 200
+    assert len(calls) == 2
+
+
+@pytest.mark.parametrize(
+    ("error", "attempts"),
+    [
+        (httpx.ConnectError("refused"), 2),
+        (httpx.ConnectTimeout("connect"), 2),
+        (httpx.PoolTimeout("pool"), 2),
+        (httpx.ReadTimeout("read"), 1),
+        (httpx.RemoteProtocolError("reset"), 1),
+    ],
+)
+def test_post_retries_only_errors_raised_before_sending(monkeypatch, error, attempts):
+    monkeypatch.setattr(whatsapp_transport.time, "sleep", lambda s: None)
+    calls: list[httpx.Request] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        if len(calls) == 1:
+            raise error
+        return httpx.Response(200, json={})
+
+    client = httpx.Client(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(whatsapp_transport, "_sync_client", client)
+    monkeypatch.setattr(whatsapp_transport, "_sync_pid", os.getpid())
+    if attempts == 1:
+        with pytest.raises(type(error)):
+            whatsapp_transport.request("POST", "https://graph.test/msg", endpoint="messages")
+    else:
+        resp = whatsapp_transport.request("POST", "https://graph.test/msg", endpoint="messages")
+        assert resp.status_code == 200
+    assert len(calls) == attempts
+    client.close()
+
+
+async def test_async_retry_backs_off_without_blocking_the_loop(monkeypatch):
+    slept: list[float] = []
+
+    async def fake_sleep(delay: float) -> None:
+        slept.append(delay)
+
+    def blocking_sleep(delay: float) -> None:
+        raise AssertionError("time.sleep called on the event loop")
+
+    responses = [httpx.Response(429, headers={"Retry-After": "2"}), httpx.Response(200, content=b"x")]
+    client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: responses.pop(0)))
+    monkeypatch.setattr(whatsapp_transport, "get_async_client", lambda: client)
+    monkeypatch.setattr(whatsapp_transport.asyncio, "sleep", fake_sleep)
+    monkeypatch.setattr(whatsapp_transport.time, "sleep", blocking_sleep)
+
+    resp = await whatsapp_transport.arequest("GET", "https://graph.test/m", endpoint="media_download")
+    assert resp.content == b"x"
+    assert slept == [2.0]
+    await client.aclose()
+
+
+async def test_sync_request_on_the_loop_does_not_sleep(mock_pool, monkeypatch):
+    # A sync send_* from an async handler must not block the loop in backoff.
+    def blocking_sleep(delay: float) -> None:
+        raise AssertionError("time.sleep called on the event loop")
+
+    monkeypatch.setattr(whatsapp_transport.time, "sleep", blocking_sleep)
+    calls, responses = mock_pool
+    responses += [httpx.Response(429, headers={"Retry-After": "8"}), httpx.Response(200)]
+    resp = whatsapp_transport.request("POST", "https://graph.test/msg", endpoint="messages", json={})
+    assert resp.status_code == 429
+    assert len(calls) == 1
+
+
+def test_client_errors_are_not_retried(mock_pool):
+    calls, responses = mock_pool
+    responses.append(httpx.Response(400, json={"error": "bad"}))
+    resp = whatsapp_transport.request("POST", "https://graph.test/msg", endpoint="messages", json={})
+    assert resp.status_code == 400
+    assert len(calls) == 1
+
+
+def test_retries_are_bounded(mock_pool, monkeypatch):
+    monkeypatch.setattr(whatsapp_transport.settings, "WHATSAPP_HTTP_MAX_RETRIES", 2)
+    calls, responses = mock_pool
+    responses += [httpx.Response(429) for _ in range(5)]
+    resp = whatsapp_transport.request("POST", "https://graph.test/msg", endpoint="messages")
+    assert resp.status_code == 429
+    assert len(calls) == 3
+
+
+def test_backoff_is_jittered_and_capped(monkeypatch):
+    monkeypatch.setattr(whatsapp_transport.settings, "WHATSAPP_HTTP_BACKOFF_BASE", 1.0)
+    monkeypatch.setattr(whatsapp_transport.settings, "WHATSAPP_HTTP_BACKOFF_MAX", 4.0)
+    delays = [whatsapp_transport._backoff(10, None) for _ in range(50)]
+    assert all(0 <= d <= 4.0 for d in delays)
+    assert len(set(delays)) > 1
+    assert whatsapp_transport._backoff(1, httpx.Response(429, headers={"Retry-After": "60"})) == 4.0
+
+
+def test_client_sends_through_pool(mock_pool, monkeypatch):
+    calls, responses = mock_pool
+    monkeypatch.setattr(WhatsAppClient, "_is_test_mode", staticmethod(lambda: False))
+    client = WhatsAppClient("token")
+    client.phone_number_id = "123"
+    client.base_url = "https://graph.test/123/messages"
+
+    responses.append(httpx.Response(200, json={"messages": [{"id": "wamid.9"}]}))
+    assert client.send_template_with_id("+2348012345678", "tpl", "en") == "wamid.9"
+    responses.append(httpx.Response(400, text="bad request"))
+    assert client.send_interactive_buttons("+2348012345678", "hi", [{"id": "a", "title": "A"}]) is False
+
+    assert [c.url.path for c in calls] == ["/123/messages", "/123/messages"]
+    assert calls[0].headers["Authorization"] == "Bearer token"